@@ -33,10 +33,13 @@ from ...schemas.user import (
 )
 from ...services.auth_service import AuthService
 from ...services.admin_setting_service import AdminSettingService
+from ...services.config_cache import config_cache_stats
 from ...services.config_service import ConfigService
+from ...services.loop_monitor import get_loop_monitor
 from ...services.novel_service import NovelService
 from ...services.prompt_service import PromptService
 from ...services.update_log_service import UpdateLogService
+from ...services.usage_counters import get_usage_counters
 from ...services.user_service import UserService
 logger = logging.getLogger(__name__)
 
@@ -79,7 +82,7 @@ async def read_statistics(
     novel_count = await session.scalar(select(func.count(NovelProject.id))) or 0
     user_count = await session.scalar(select(func.count(User.id))) or 0
     usage = await session.get(UsageMetric, "api_request_count")
-    api_request_count = usage.value if usage else 0
+    api_request_count = (usage.value if usage else 0) + get_usage_counters().pending("api_request_count")
     logger.info("管理员获取统计数据：小说=%s，用户=%s，请求=%s", novel_count, user_count, api_request_count)
     return Statistics(novel_count=novel_count, user_count=user_count, api_request_count=api_request_count)
 
@@ -395,6 +398,22 @@ async def delete_system_config(
     logger.info("管理员删除系统配置：%s", key)
 
 
+@router.get("/config-cache/stats")
+async def get_config_cache_stats(
+    _: None = Depends(get_current_admin),
+) -> dict:
+    """配置缓存命中统计（当前进程）。"""
+    return config_cache_stats()
+
+
+@router.get("/loop-lag/stats")
+async def get_loop_lag_stats(
+    _: None = Depends(get_current_admin),
+) -> dict:
+    """事件循环阻塞统计（当前进程）。"""
+    return get_loop_monitor().stats()
+
+
 @router.post("/password", status_code=status.HTTP_204_NO_CONTENT)
 async def change_password(
     payload: PasswordChangeRequest,
@@ -13,10 +13,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.dependencies import get_current_user
 from ...db.session import get_session
-from ...models.novel import Chapter, ChapterOutline, ChapterVersion, NovelProject
+from ...models.novel import NovelProject
 from ...schemas.user import UserInDB
 from ...services.llm_service import LLMService
 from ...services.prompt_service import PromptService
+from ...services.project_text_loader import iter_project_texts, load_project_texts
+from ...utils.emotion_analyzer import KeywordEmotionAnalyzer
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
@@ -91,47 +93,8 @@ NARRATIVE_PHASE_KEYWORDS = {
 }
 
 
-def analyze_emotion(text: str) -> tuple[str, int]:
-    """分析文本的主要情感和强度"""
-    emotion_scores = {emotion: 0 for emotion in EMOTION_KEYWORDS}
-    
-    for emotion, keywords in EMOTION_KEYWORDS.items():
-        for keyword in keywords:
-            count = text.count(keyword)
-            emotion_scores[emotion] += count
-    
-    # 找出最高分的情感
-    max_emotion = max(emotion_scores, key=emotion_scores.get)
-    max_score = emotion_scores[max_emotion]
-    
-    if max_score == 0:
-        return "平静", 3
-    
-    # 计算强度 (1-10)
-    intensity = min(10, max(1, max_score))
-    
-    # 根据感叹号和问号增加强度
-    exclamation_count = text.count("！") + text.count("!")
-    question_count = text.count("？") + text.count("?")
-    intensity = min(10, intensity + exclamation_count // 3 + question_count // 5)
-    
-    return max_emotion, intensity
-
-
-def detect_narrative_phase(text: str, summary: str = "") -> Optional[str]:
-    """检测叙事阶段"""
-    combined_text = text + " " + summary
-    phase_scores = {phase: 0 for phase in NARRATIVE_PHASE_KEYWORDS}
-    
-    for phase, keywords in NARRATIVE_PHASE_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in combined_text:
-                phase_scores[phase] += 1
-    
-    max_phase = max(phase_scores, key=phase_scores.get)
-    if phase_scores[max_phase] > 0:
-        return max_phase
-    return None
+# 情感与叙事阶段关键词编译为一个匹配器，每章只扫描一遍
+_keyword_analyzer = KeywordEmotionAnalyzer(EMOTION_KEYWORDS, NARRATIVE_PHASE_KEYWORDS)
 
 
 def generate_emotion_description(emotion: str, intensity: int, title: str) -> str:
@@ -261,16 +224,8 @@ async def get_emotion_curve(
     if not project:
         raise HTTPException(status_code=404, detail="项目不存在")
     
-    # 获取所有章节和大纲
-    chapters_result = await session.execute(
-        select(Chapter).where(Chapter.project_id == project_id).order_by(Chapter.chapter_number)
-    )
-    chapters = chapters_result.scalars().all()
-    
-    outlines_result = await session.execute(
-        select(ChapterOutline).where(ChapterOutline.project_id == project_id).order_by(ChapterOutline.chapter_number)
-    )
-    outlines = {o.chapter_number: o for o in outlines_result.scalars().all()}
+    # 一次联表查询读取所有章节正文和大纲
+    chapters = await load_project_texts(session, project_id)
     
     # 分析每个章节的情感
     emotion_points = []
@@ -278,23 +233,12 @@ async def get_emotion_curve(
     total_intensity = 0
     
     for chapter in chapters:
-        # 获取章节内容
-        content = ""
-        if chapter.selected_version_id:
-            version_result = await session.execute(
-                select(ChapterVersion).where(ChapterVersion.id == chapter.selected_version_id)
-            )
-            version = version_result.scalar_one_or_none()
-            if version:
-                content = version.content
+        content = chapter.content
+        title = chapter.title
+        summary = chapter.outline_summary
         
-        outline = outlines.get(chapter.chapter_number)
-        title = outline.title if outline else f"第{chapter.chapter_number}章"
-        summary = outline.summary if outline else ""
-        
-        # 分析情感
-        emotion, intensity = analyze_emotion(content + " " + summary)
-        narrative_phase = detect_narrative_phase(content, summary)
+        # 分析情感（单遍扫描正文和摘要）
+        emotion, intensity, narrative_phase = _keyword_analyzer.analyze(content, summary)
         description = generate_emotion_description(emotion, intensity, title)
         
         emotion_points.append(EmotionPoint(
@@ -341,37 +285,16 @@ async def get_foreshadowing(
     if not project:
         raise HTTPException(status_code=404, detail="项目不存在")
     
-    # 获取所有章节和大纲
-    chapters_result = await session.execute(
-        select(Chapter).where(Chapter.project_id == project_id).order_by(Chapter.chapter_number)
-    )
-    chapters = chapters_result.scalars().all()
-    
-    outlines_result = await session.execute(
-        select(ChapterOutline).where(ChapterOutline.project_id == project_id).order_by(ChapterOutline.chapter_number)
-    )
-    outlines = {o.chapter_number: o for o in outlines_result.scalars().all()}
-    
-    # 构建章节数据
-    chapters_data = []
-    for chapter in chapters:
-        content = ""
-        if chapter.selected_version_id:
-            version_result = await session.execute(
-                select(ChapterVersion).where(ChapterVersion.id == chapter.selected_version_id)
-            )
-            version = version_result.scalar_one_or_none()
-            if version:
-                content = version.content
-        
-        outline = outlines.get(chapter.chapter_number)
-        
-        chapters_data.append({
+    # 构建章节数据（一次联表查询读取所有章节正文和大纲）
+    chapters_data = [
+        {
             "chapter_number": chapter.chapter_number,
-            "title": outline.title if outline else f"第{chapter.chapter_number}章",
-            "summary": outline.summary if outline else "",
-            "content": content,
-        })
+            "title": chapter.title,
+            "summary": chapter.outline_summary,
+            "content": chapter.content,
+        }
+        async for chapter in iter_project_texts(session, project_id)
+    ]
     
     # 提取伏笔
     foreshadowings = extract_foreshadowings(chapters_data)
@@ -411,23 +334,14 @@ async def analyze_emotion_with_ai(
     if not project:
         raise HTTPException(status_code=404, detail="项目不存在")
     
-    # 获取所有章节
-    chapters_result = await session.execute(
-        select(Chapter).where(Chapter.project_id == project_id).order_by(Chapter.chapter_number)
-    )
-    chapters = chapters_result.scalars().all()
-    
-    outlines_result = await session.execute(
-        select(ChapterOutline).where(ChapterOutline.project_id == project_id).order_by(ChapterOutline.chapter_number)
-    )
-    outlines = {o.chapter_number: o for o in outlines_result.scalars().all()}
-    
-    # 构建章节摘要列表
-    chapter_summaries = []
-    for chapter in chapters:
-        outline = outlines.get(chapter.chapter_number)
-        if outline:
-            chapter_summaries.append(f"第{chapter.chapter_number}章《{outline.title}》：{outline.summary}")
+    # 构建章节摘要列表（只用大纲，不读取正文）
+    chapters = await load_project_texts(session, project_id, include_content=False)
+    titles = {chapter.chapter_number: chapter.title for chapter in chapters}
+    chapter_summaries = [
+        f"第{chapter.chapter_number}章《{chapter.outline_title}》：{chapter.outline_summary}"
+        for chapter in chapters
+        if chapter.outline_title is not None
+    ]
     
     if not chapter_summaries:
         raise HTTPException(status_code=400, detail="没有可分析的章节")
@@ -473,8 +387,7 @@ async def analyze_emotion_with_ai(
         total_intensity = 0
         
         for item in data.get("chapters", []):
-            outline = outlines.get(item["chapter_number"])
-            title = outline.title if outline else f"第{item['chapter_number']}章"
+            title = titles.get(item["chapter_number"]) or f"第{item['chapter_number']}章"
             
             emotion_points.append(EmotionPoint(
                 chapter_number=item["chapter_number"],
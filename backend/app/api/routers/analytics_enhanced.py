@@ -13,12 +13,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.dependencies import get_current_user
 from ...db.session import get_session
-from ...models.novel import Chapter, ChapterVersion, NovelProject
+from ...models.novel import NovelProject
 from ...schemas.user import UserInDB
 from ...services.emotion_analyzer_enhanced import analyze_multidimensional_emotion
 from ...services.story_trajectory_analyzer import analyze_story_trajectory
 from ...services.creative_guidance_system import generate_creative_guidance
 from ...services.cache_service import CacheService
+from ...services.project_text_loader import iter_project_texts
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
@@ -166,51 +167,29 @@ async def get_enhanced_emotion_curve(
             logger.info(f"从缓存返回项目 {project_id} 的增强情感曲线")
             return [MultidimensionalEmotionPoint(**point) for point in cached]
     
-    # 获取所有已完成的章节
-    stmt = select(Chapter).where(
-        Chapter.project_id == project_id,
-        Chapter.status == "completed"
-    ).order_by(Chapter.chapter_number)
-    
-    result = await session.execute(stmt)
-    chapters = result.scalars().all()
-    
-    if not chapters:
-        return []
-    
-    # 对每章进行多维情感分析
+    # 对每章进行多维情感分析（一次联表查询流式读取已有正文的章节）
     emotion_points = []
     
-    for chapter in chapters:
-        # 获取选中的版本内容
-        if chapter.selected_version_id:
-            stmt = select(ChapterVersion).where(
-                ChapterVersion.id == chapter.selected_version_id
-            )
-            result = await session.execute(stmt)
-            version = result.scalar_one_or_none()
-            
-            if version and version.content:
-                # 执行多维情感分析
-                analysis = analyze_multidimensional_emotion(
-                    content=version.content,
-                    summary=chapter.real_summary or "",
-                    chapter_number=chapter.chapter_number
-                )
-                
-                emotion_points.append(MultidimensionalEmotionPoint(
-                    chapter_number=chapter.chapter_number,
-                    chapter_id=str(chapter.id),
-                    title=version.title or f"第{chapter.chapter_number}章",
-                    primary_emotion=analysis['primary_emotion'],
-                    primary_intensity=analysis['primary_intensity'],
-                    secondary_emotions=analysis['secondary_emotions'],
-                    narrative_phase=analysis['narrative_phase'],
-                    pace=analysis['pace'],
-                    is_turning_point=analysis['is_turning_point'],
-                    turning_point_type=analysis['turning_point_type'],
-                    description=analysis['description']
-                ))
+    async for chapter in iter_project_texts(session, project_id, only_with_content=True):
+        analysis = analyze_multidimensional_emotion(
+            content=chapter.content,
+            summary=chapter.real_summary,
+            chapter_number=chapter.chapter_number
+        )
+        
+        emotion_points.append(MultidimensionalEmotionPoint(
+            chapter_number=chapter.chapter_number,
+            chapter_id=str(chapter.chapter_id),
+            title=chapter.title,
+            primary_emotion=analysis['primary_emotion'],
+            primary_intensity=analysis['primary_intensity'],
+            secondary_emotions=analysis['secondary_emotions'],
+            narrative_phase=analysis['narrative_phase'],
+            pace=analysis['pace'],
+            is_turning_point=analysis['is_turning_point'],
+            turning_point_type=analysis['turning_point_type'],
+            description=analysis['description']
+        ))
     
     # 缓存结果（24小时）
     if emotion_points:
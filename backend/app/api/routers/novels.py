@@ -1,33 +1,40 @@
 # AIMETA P=小说API_项目和章节管理|R=小说CRUD_章节管理|NR=不含内容生成|E=route:GET_POST_/api/novels/*|X=http|A=小说CRUD_章节|D=fastapi,sqlalchemy|S=db|RD=./README.ai
 import json
 import logging
+from datetime import date
 from typing import Any, Dict, List
 
-from fastapi import APIRouter, Body, Depends, HTTPException, UploadFile, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.dependencies import get_current_user
 from ...core.config import settings
-from ...db.session import get_session
+from ...db.session import AsyncSessionLocal, get_session
 from ...schemas.novel import (
     ActiveInspirationResponse,
     Blueprint,
     BlueprintGenerationResponse,
     BlueprintPatch,
     Chapter as ChapterSchema,
+    ChapterPage,
     ConverseRequest,
     ConverseResponse,
+    ImportJobStatus,
     NovelProject as NovelProjectSchema,
     NovelProjectSummary,
     NovelSectionResponse,
     NovelSectionType,
 )
 from ...schemas.user import UserInDB
+from ...services.import_jobs import get_import_job_manager
 from ...services.import_service import ImportService
 from ...services.llm_service import LLMService
+from ...repositories.novel_repository import ProjectLoad
 from ...services.novel_service import NovelService
 from ...services.prompt_service import PromptService
 from ...services.project_transfer_service import ProjectTransferService
+from ...services.summary_backfill import schedule_summary_backfill
 from ...utils.json_utils import (
     fix_json_missing_commas,
     is_json_complete,
@@ -110,13 +117,73 @@ async def import_novel(
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, str]:
-    """上传并导入小说文件。"""
+    """上传并导入小说文件（同步完成，大文件请使用 /import-jobs）。"""
     import_service = ImportService(session)
     project_id = await import_service.import_novel_from_file(current_user.id, file)
     logger.info("用户 %s 导入项目 %s", current_user.id, project_id)
+    if settings.summary_backfill_on_import:
+        schedule_summary_backfill(project_id, current_user.id)
     return {"id": project_id}
 
 
+@router.post("/import-jobs", response_model=ImportJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def create_import_job(
+    file: UploadFile,
+    current_user: UserInDB = Depends(get_current_user),
+) -> ImportJobStatus:
+    """上传小说文件并创建后台导入任务，立即返回任务状态。"""
+    job = await get_import_job_manager().submit(current_user.id, file)
+    logger.info("用户 %s 创建导入任务 %s", current_user.id, job.id)
+    return ImportJobStatus.model_validate(job)
+
+
+@router.get("/import-jobs/{job_id}", response_model=ImportJobStatus)
+async def get_import_job(
+    job_id: str,
+    current_user: UserInDB = Depends(get_current_user),
+) -> ImportJobStatus:
+    """查询导入任务的状态、当前阶段与进度。"""
+    job = await get_import_job_manager().get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="导入任务不存在")
+    return ImportJobStatus.model_validate(job)
+
+
+@router.get("/import-jobs/{job_id}/events")
+async def stream_import_job(
+    job_id: str,
+    http_request: Request,
+    current_user: UserInDB = Depends(get_current_user),
+) -> StreamingResponse:
+    """以 SSE 推送导入任务进度：progress 事件表示状态变化，done 事件表示任务结束。"""
+    manager = get_import_job_manager()
+    if await manager.get(job_id, current_user.id) is None:
+        raise HTTPException(status_code=404, detail="导入任务不存在")
+    return StreamingResponse(
+        manager.job_events(
+            job_id,
+            current_user.id,
+            is_disconnected=http_request.is_disconnected,
+            heartbeat_seconds=settings.chapter_stream_heartbeat_seconds,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/import-jobs/{job_id}/cancel", response_model=ImportJobStatus)
+async def cancel_import_job(
+    job_id: str,
+    current_user: UserInDB = Depends(get_current_user),
+) -> ImportJobStatus:
+    """取消导入任务；已创建的项目会被删除，已完成的任务不受影响。"""
+    job = await get_import_job_manager().cancel(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="导入任务不存在")
+    logger.info("用户 %s 请求取消导入任务 %s", current_user.id, job_id)
+    return ImportJobStatus.model_validate(job)
+
+
 @router.post("/import-project", response_model=Dict[str, str], status_code=status.HTTP_201_CREATED)
 async def import_project(
     file: UploadFile,
@@ -173,12 +240,58 @@ async def import_projects_batch(
     return {"ids": ids}
 
 
+@router.post("/import-stream", response_model=Dict[str, List[str]], status_code=status.HTTP_201_CREATED)
+async def import_projects_stream(
+    file: UploadFile,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> Dict[str, List[str]]:
+    """导入 /export-stream 生成的 NDJSON 文件（支持 gzip），逐行读取而不整体解析。"""
+    await file.seek(0)
+    transfer_service = ProjectTransferService(session)
+    try:
+        ids = await transfer_service.import_bundle_stream(current_user.id, file.file)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    logger.info("用户 %s 流式导入项目 %s 个", current_user.id, len(ids))
+    return {"ids": ids}
+
+
+@router.get("/export-stream")
+async def export_projects_stream(
+    gzip: bool = Query(default=False, description="是否以 gzip 压缩输出"),
+    current_user: UserInDB = Depends(get_current_user),
+) -> StreamingResponse:
+    """以 NDJSON 流式导出当前用户全部项目，每次只加载一个项目的一批章节。"""
+    user_id = current_user.id
+
+    async def _body():
+        # 依赖注入的会话在响应体发送前就已关闭，导出使用独立会话
+        async with AsyncSessionLocal() as session:
+            try:
+                async for chunk in ProjectTransferService(session).iter_bundle_ndjson(user_id, compress=gzip):
+                    yield chunk
+            except Exception:
+                # 响应头已发出，无法再返回错误状态码；结束流且不写 end 记录，导入时会判定为不完整
+                logger.exception("用户 %s 流式导出项目中途失败，已截断输出", user_id)
+                return
+        logger.info("用户 %s 流式导出项目完成", user_id)
+
+    filename = f"novel_projects_bundle_{date.today().isoformat()}.ndjson" + (".gz" if gzip else "")
+    return StreamingResponse(
+        _body(),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/export-batch", response_model=Dict[str, Any])
 async def export_projects_batch(
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
-    """批量导出当前用户全部项目。"""
+    """批量导出当前用户全部项目（整体加载，项目较多时请使用 /export-stream）。"""
     transfer_service = ProjectTransferService(session)
     data = await transfer_service.export_bundle(current_user.id)
     logger.info("用户 %s 批量导出项目，共 %s 个", current_user.id, len(data.get("projects", [])))
@@ -233,6 +346,25 @@ async def get_novel_section(
     return await novel_service.get_section_data(project_id, current_user.id, section)
 
 
+@router.get("/{project_id}/chapters", response_model=ChapterPage)
+async def list_chapters(
+    project_id: str,
+    start: int = Query(default=1, ge=1, description="起始章节号（包含）"),
+    limit: int = Query(default=20, ge=1, le=200, description="本页最多返回的章节数"),
+    include_content: bool = Query(default=False, description="是否返回正文、版本和评审"),
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> ChapterPage:
+    novel_service = NovelService(session)
+    return await novel_service.get_chapter_page(
+        project_id,
+        current_user.id,
+        start=start,
+        limit=limit,
+        include_content=include_content,
+    )
+
+
 @router.get("/{project_id}/chapters/{chapter_number}", response_model=ChapterSchema)
 async def get_chapter(
     project_id: str,
@@ -269,7 +401,7 @@ async def converse_with_concept(
     prompt_service = PromptService(session)
     llm_service = LLMService(session)
 
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    project = await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
     if project.status in ("concept_complete", "blueprint_ready", "concept_abandoned"):
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="当前灵感已锁定，无法继续对话")
     if project.status == "draft":
@@ -354,7 +486,7 @@ async def generate_blueprint(
     prompt_service = PromptService(session)
     llm_service = LLMService(session)
 
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    project = await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
     if project.status in ("draft", "concept_in_progress"):
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="灵感未完成，无法生成蓝图")
     if project.status == "concept_abandoned":
@@ -688,7 +820,7 @@ async def save_blueprint(
 ) -> NovelProjectSchema:
     """保存蓝图信息，可用于手动覆盖自动生成结果。"""
     novel_service = NovelService(session)
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    project = await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
     if project.status == "concept_abandoned":
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="灵感已放弃，无法保存蓝图")
 
@@ -715,7 +847,7 @@ async def patch_blueprint(
 ) -> NovelProjectSchema:
     """局部更新蓝图字段，对世界观或角色做微调。"""
     novel_service = NovelService(session)
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    project = await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
     update_data = payload.model_dump(exclude_unset=True)
     await novel_service.patch_blueprint(project_id, update_data)
@@ -1,23 +1,25 @@
 # AIMETA P=优化器API_内容优化建议|R=内容优化_建议生成|NR=不含内容修改|E=route:POST_/api/optimizer/*|X=http|A=优化建议|D=fastapi|S=net|RD=./README.ai
 """
 章节内容分层优化API
-支持对话、环境描写、心理活动、节奏韵律四个维度的深度优化
+支持对话、环境描写、心理活动、节奏韵律四个维度的深度优化；
+patch 模式一次调用返回全部维度的段落补丁并在本地合并，full 模式逐维度重写整章
 """
-import json
 import logging
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ...core.config import settings
 from ...core.dependencies import get_current_user
 from ...db.session import get_session
 from ...schemas.user import UserInDB
+from ...services.chapter_optimizer import DIMENSION_PROMPT_MAP, OPTIMIZER_DIMENSIONS, ChapterOptimizer
 from ...services.llm_service import LLMService
+from ...repositories.novel_repository import ProjectLoad
 from ...services.novel_service import NovelService
 from ...services.prompt_service import PromptService
-from ...utils.json_utils import remove_think_tags, unwrap_markdown_json
 
 router = APIRouter(prefix="/api/optimizer", tags=["Optimizer"])
 logger = logging.getLogger(__name__)
@@ -27,8 +29,9 @@ class OptimizeRequest(BaseModel):
     """优化请求"""
     project_id: str = Field(..., description="项目ID")
     chapter_number: int = Field(..., description="章节编号")
-    dimension: str = Field(..., description="优化维度: dialogue/environment/psychology/rhythm")
+    dimension: str = Field(..., description="优化维度: dialogue/environment/psychology/rhythm，all 表示全部维度")
     additional_notes: Optional[str] = Field(default=None, description="额外优化指令")
+    mode: Optional[str] = Field(default=None, description="优化方式: patch/full，默认取 OPTIMIZER_MODE")
 
 
 class OptimizeResponse(BaseModel):
@@ -36,16 +39,11 @@ class OptimizeResponse(BaseModel):
     optimized_content: str = Field(..., description="优化后的内容")
     optimization_notes: str = Field(..., description="优化说明")
     dimension: str = Field(..., description="优化维度")
+    mode: str = Field(default="full", description="实际使用的优化方式")
+    patches: List[Dict[str, Any]] = Field(default_factory=list, description="patch 模式下已应用的段落补丁")
+    fallback_reason: Optional[str] = Field(default=None, description="patch 模式回退逐维重写的原因")
 
 
-# 优化维度到提示词的映射
-DIMENSION_PROMPT_MAP = {
-    "dialogue": "optimize_dialogue",
-    "environment": "optimize_environment", 
-    "psychology": "optimize_psychology",
-    "rhythm": "optimize_rhythm"
-}
-
 # 默认的节奏优化提示词（如果数据库中没有）
 DEFAULT_RHYTHM_PROMPT = """# 节奏韵律优化专家
 
@@ -105,13 +103,10 @@ async def optimize_chapter(
     llm_service = LLMService(session)
     
     # 验证项目所有权
-    project = await novel_service.ensure_project_owner(request.project_id, current_user.id)
+    await novel_service.ensure_project_owner(request.project_id, current_user.id, ProjectLoad.OWNER)
     
     # 获取章节内容
-    chapter = next(
-        (ch for ch in project.chapters if ch.chapter_number == request.chapter_number),
-        None
-    )
+    chapter = await novel_service.get_chapter(request.project_id, request.chapter_number)
     if not chapter:
         raise HTTPException(status_code=404, detail="章节不存在")
     
@@ -120,22 +115,24 @@ async def optimize_chapter(
     
     original_content = chapter.selected_version.content
     
-    # 验证优化维度
-    if request.dimension not in DIMENSION_PROMPT_MAP:
+    # 验证优化维度与方式
+    if request.dimension == "all":
+        dimensions = list(OPTIMIZER_DIMENSIONS)
+    elif request.dimension in DIMENSION_PROMPT_MAP:
+        dimensions = [request.dimension]
+    else:
         raise HTTPException(
             status_code=400, 
-            detail=f"不支持的优化维度: {request.dimension}，支持的维度: {list(DIMENSION_PROMPT_MAP.keys())}"
+            detail=f"不支持的优化维度: {request.dimension}，支持的维度: {list(DIMENSION_PROMPT_MAP.keys()) + ['all']}"
         )
-    
-    # 获取对应的优化提示词
-    prompt_name = DIMENSION_PROMPT_MAP[request.dimension]
-    optimizer_prompt = await prompt_service.get_prompt(prompt_name)
-    
-    # 如果没有找到提示词，使用默认提示词（仅对rhythm维度）
-    if not optimizer_prompt:
-        if request.dimension == "rhythm":
-            optimizer_prompt = DEFAULT_RHYTHM_PROMPT
-        else:
+    mode = request.mode or settings.optimizer_mode
+    if mode not in ("patch", "full"):
+        raise HTTPException(status_code=400, detail=f"不支持的优化方式: {mode}，支持: patch/full")
+    
+    # 逐维重写时，单一维度缺少提示词直接报错（仅 rhythm 有内置默认提示词）
+    if mode == "full" and len(dimensions) == 1 and request.dimension != "rhythm":
+        prompt_name = DIMENSION_PROMPT_MAP[request.dimension]
+        if not await prompt_service.get_prompt(prompt_name):
             raise HTTPException(
                 status_code=500, 
                 detail=f"缺少{request.dimension}优化提示词，请联系管理员配置 '{prompt_name}' 提示词"
@@ -143,79 +140,67 @@ async def optimize_chapter(
     
     # 获取角色DNA信息（用于心理活动优化）
     character_dna = {}
-    if request.dimension == "psychology":
-        project_schema = await novel_service._serialize_project(project)
-        for char in project_schema.blueprint.characters:
-            if "extra" in char and "dna_profile" in char.get("extra", {}):
-                character_dna[char.get("name", "")] = char["extra"]["dna_profile"]
-    
-    # 构建优化请求
-    optimize_input = {
-        "original_content": original_content,
-        "additional_notes": request.additional_notes or "无额外指令"
-    }
-    
-    # 如果是心理活动优化，添加角色DNA信息
-    if character_dna:
-        optimize_input["character_dna"] = character_dna
+    if "psychology" in dimensions:
+        blueprint = await novel_service.get_blueprint(request.project_id) or {}
+        for char in blueprint.get("characters", []):
+            dna_profile = char.get("dna_profile")
+            if dna_profile:
+                character_dna[char.get("name", "")] = dna_profile
     
     logger.info(
-        "用户 %s 开始优化项目 %s 第 %s 章，维度: %s",
+        "用户 %s 开始优化项目 %s 第 %s 章，维度: %s，方式: %s",
         current_user.id,
         request.project_id,
         request.chapter_number,
-        request.dimension
+        request.dimension,
+        mode,
     )
     
-    # 调用LLM进行优化
-    try:
-        response = await llm_service.get_llm_response(
-            system_prompt=optimizer_prompt,
-            conversation_history=[{
-                "role": "user",
-                "content": json.dumps(optimize_input, ensure_ascii=False)
-            }],
-            temperature=0.7,
-            user_id=current_user.id,
-            timeout=600.0,
-        )
-        
-        cleaned = remove_think_tags(response)
-        normalized = unwrap_markdown_json(cleaned)
-        
-        try:
-            result = json.loads(normalized)
-            optimized_content = result.get("optimized_content", cleaned)
-            optimization_notes = result.get("optimization_notes", "优化完成")
-        except json.JSONDecodeError:
-            # 如果无法解析JSON，将整个响应作为优化后的内容
-            optimized_content = cleaned
-            optimization_notes = "优化完成（响应格式非标准JSON）"
-        
-        logger.info(
-            "项目 %s 第 %s 章 %s 优化完成",
-            request.project_id,
-            request.chapter_number,
-            request.dimension
-        )
-        
-        return OptimizeResponse(
-            optimized_content=optimized_content,
-            optimization_notes=optimization_notes,
-            dimension=request.dimension
-        )
-        
-    except Exception as exc:
-        logger.exception(
+    optimizer = ChapterOptimizer(
+        llm_service,
+        prompt_service,
+        fallback_prompts={"rhythm": DEFAULT_RHYTHM_PROMPT},
+    )
+    result = await optimizer.optimize(
+        original_content,
+        user_id=current_user.id,
+        dimensions=dimensions,
+        mode=mode,
+        additional_notes=request.additional_notes or "无额外指令",
+        character_dna=character_dna or None,
+    )
+    
+    errors = [step["error"] for step in result.steps if step.get("error")]
+    if errors and len(errors) == len(result.steps):
+        logger.error(
             "项目 %s 第 %s 章优化失败: %s",
             request.project_id,
             request.chapter_number,
-            exc
+            errors[0]
         )
         raise HTTPException(
             status_code=500,
-            detail=f"优化过程中发生错误: {str(exc)[:200]}"
+            detail=f"优化过程中发生错误: {errors[0]}"
         )
+    
+    logger.info(
+        "项目 %s 第 %s 章 %s 优化完成: mode=%s patches=%s fallback=%s",
+        request.project_id,
+        request.chapter_number,
+        request.dimension,
+        result.mode,
+        len(result.patches),
+        result.fallback_reason,
+    )
+    
+    return OptimizeResponse(
+        optimized_content=result.content,
+        optimization_notes=result.notes,
+        dimension=request.dimension,
+        mode=result.mode,
+        patches=result.patches,
+        fallback_reason=result.fallback_reason,
+    )
 
 
 @router.post("/apply-optimization")
@@ -232,13 +217,10 @@ async def apply_optimization(
     novel_service = NovelService(session)
     
     # 验证项目所有权
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
     
     # 获取章节
-    chapter = next(
-        (ch for ch in project.chapters if ch.chapter_number == chapter_number),
-        None
-    )
+    chapter = await novel_service.get_chapter(project_id, chapter_number)
     if not chapter:
         raise HTTPException(status_code=404, detail="章节不存在")
     
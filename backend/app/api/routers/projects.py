@@ -14,6 +14,7 @@ from ...services.constitution_service import ConstitutionService
 from ...services.faction_service import FactionService
 from ...services.llm_service import LLMService
 from ...services.memory_layer_service import MemoryLayerService
+from ...repositories.novel_repository import ProjectLoad
 from ...services.novel_service import NovelService
 from ...services.prompt_service import PromptService
 from ...services.writer_persona_service import WriterPersonaService
@@ -82,7 +83,7 @@ async def get_constitution(
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
     constitution_service = ConstitutionService(session, LLMService(session), PromptService(session))
     constitution = await constitution_service.get_constitution(project_id)
@@ -97,7 +98,7 @@ async def put_constitution(
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
     constitution_service = ConstitutionService(session, LLMService(session), PromptService(session))
     constitution = await constitution_service.create_or_update_constitution(project_id, payload)
@@ -111,7 +112,7 @@ async def get_persona(
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
     persona_service = WriterPersonaService(session, LLMService(session), PromptService(session))
     persona = await persona_service.get_active_persona(project_id)
@@ -126,7 +127,7 @@ async def put_persona(
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
     persona_service = WriterPersonaService(session, LLMService(session), PromptService(session))
     payload_dict = payload.model_dump(exclude_unset=True)
@@ -153,7 +154,7 @@ async def get_project_memory(
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
     result = await session.execute(
         select(ProjectMemory).where(ProjectMemory.project_id == project_id)
@@ -170,7 +171,7 @@ async def put_project_memory(
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
     result = await session.execute(
         select(ProjectMemory).where(ProjectMemory.project_id == project_id)
@@ -198,7 +199,7 @@ async def get_character_states(
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
     if chapter_number is None:
         result = await session.execute(
@@ -223,7 +224,7 @@ async def get_factions(
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
     faction_service = FactionService(session, PromptService(session))
     factions = await faction_service.get_factions_by_project(project_id)
@@ -238,7 +239,7 @@ async def put_factions(
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
     faction_service = FactionService(session, PromptService(session))
     saved = []
@@ -11,6 +11,7 @@ from ...schemas.user import UserInDB
 from ...services.constitution_service import ConstitutionService
 from ...services.consistency_service import ConsistencyService
 from ...services.llm_service import LLMService
+from ...repositories.novel_repository import ProjectLoad
 from ...services.novel_service import NovelService
 from ...services.prompt_service import PromptService
 from ...services.six_dimension_review_service import SixDimensionReviewService
@@ -43,7 +44,7 @@ async def review_six_dimension(
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(request.project_id, current_user.id)
+    await novel_service.ensure_project_owner(request.project_id, current_user.id, ProjectLoad.OWNER)
 
     llm_service = LLMService(session)
     prompt_service = PromptService(session)
@@ -73,10 +74,9 @@ async def review_consistency(
     current_user: UserInDB = Depends(get_current_user),
 ) -> Dict[str, Any]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(request.project_id, current_user.id)
+    await novel_service.ensure_project_owner(request.project_id, current_user.id, ProjectLoad.OWNER)
 
-    sync_session = getattr(session, "sync_session", session)
-    consistency_service = ConsistencyService(sync_session, LLMService(session))
+    consistency_service = ConsistencyService(session, LLMService(session))
     result = await consistency_service.check_consistency(
         project_id=request.project_id,
         chapter_text=request.chapter_text,
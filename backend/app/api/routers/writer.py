@@ -12,14 +12,14 @@ Writer API Router - 人类化起点长篇写作系统
 2. 跨章 1234 逻辑：通过 ChapterMission 控制每章只写一个节拍
 3. 后置护栏检查：自动检测并修复违规内容
 """
-import asyncio
 import json
 import logging
 import os
-from typing import Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -37,9 +37,12 @@ from ...schemas.novel import (
     EvaluateChapterRequest,
     FinalizeChapterRequest,
     FinalizeChapterResponse,
+    FinalizeJobStatus,
     GenerateChapterRequest,
     GenerateOutlineRequest,
     NovelProject as NovelProjectSchema,
+    ProjectChapterDelta,
+    ProjectResponseMode,
     SelectVersionRequest,
     UpdateChapterOutlineRequest,
 )
@@ -51,12 +54,19 @@ from ...services.novel_service import NovelService
 from ...services.prompt_service import PromptService
 from ...services.vector_store_service import VectorStoreService
 from ...services.writer_context_builder import WriterContextBuilder
+from ...services.blueprint_index_cache import get_blueprint_index_cache
 from ...services.chapter_guardrails import ChapterGuardrails
 from ...services.ai_review_service import AIReviewService
 from ...services.finalize_service import FinalizeService
+from ...services.finalize_queue import enqueue_finalize_job
+from ...services.generation_events import GenerationEventStream, stream_generation
+from ...services.summary_backfill import SummaryBackfillService, is_backfill_running, schedule_summary_backfill
+from ...repositories.finalize_job_repository import FinalizeJobRepository
+from ...repositories.novel_repository import ProjectLoad
 from ...utils.json_utils import remove_think_tags, unwrap_markdown_json, parse_json_safely, is_json_complete
-from ...repositories.system_config_repository import SystemConfigRepository
+from ...services.config_cache import get_system_config_value
 from ...services.pipeline_orchestrator import PipelineOrchestrator
+from ...services.version_fanout import collect_successful, run_versions_concurrently, run_versions_sequentially
 
 router = APIRouter(prefix="/api/writer", tags=["Writer"])
 logger = logging.getLogger(__name__)
@@ -66,6 +76,19 @@ async def _load_project_schema(service: NovelService, project_id: str, user_id:
     return await service.get_project_schema(project_id, user_id)
 
 
+async def _project_response(
+    service: NovelService,
+    project_id: str,
+    user_id: int,
+    response_mode: ProjectResponseMode,
+    chapter_numbers: Iterable[int],
+) -> Union[NovelProjectSchema, ProjectChapterDelta]:
+    """delta 模式只返回变更章节和项目修订号，full 模式保持返回完整项目。"""
+    if response_mode == ProjectResponseMode.DELTA:
+        return await service.get_chapter_delta(project_id, chapter_numbers)
+    return await _load_project_schema(service, project_id, user_id)
+
+
 def _extract_tail_excerpt(text: Optional[str], limit: int = 500) -> str:
     """截取章节结尾文本，默认保留 500 字。"""
     if not text:
@@ -85,13 +108,12 @@ async def _resolve_version_count(session: AsyncSession) -> int:
     4) ENV: WRITER_VERSION_COUNT（兼容旧）
     5) settings.writer_chapter_versions（默认=2）
     """
-    repo = SystemConfigRepository(session)
     # 1) 新键优先，兼容旧键
     for key in ("writer.chapter_versions", "writer.version_count"):
-        record = await repo.get_by_key(key)
-        if record and record.value:
+        value = await get_system_config_value(session, key)
+        if value:
             try:
-                val = int(record.value)
+                val = int(value)
                 if val >= 1:
                     return val
             except ValueError:
@@ -264,147 +286,129 @@ async def _refresh_edit_summary_and_ingest(
                 chapter_number=chapter_number,
                 title=title,
                 content=content,
-                summary=None,
+                summary=summary_text,
                 user_id=user_id or 0,
             )
             logger.info("章节 %s 向量化入库成功", chapter_number)
         except Exception as exc:
             logger.error("章节 %s 向量化入库失败: %s", chapter_number, exc)
 
-    rewrite_input = f"""
-[原文]
-{original_text}
 
-[章节导演脚本]
-{json.dumps(chapter_mission, ensure_ascii=False, indent=2) if chapter_mission else "无"}
+@router.post("/advanced/generate", response_model=AdvancedGenerateResponse)
+async def advanced_generate_chapter(
+    request: AdvancedGenerateRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> AdvancedGenerateResponse:
+    """
+    高级写作入口：通过 PipelineOrchestrator 统一编排生成流程。
+    """
+    orchestrator = PipelineOrchestrator(session)
+    result = await orchestrator.generate_chapter(
+        project_id=request.project_id,
+        chapter_number=request.chapter_number,
+        writing_notes=request.writing_notes,
+        user_id=current_user.id,
+        flow_config=request.flow_config.model_dump(),
+    )
 
-[违规列表]
-{violations_text}
-"""
+    if request.flow_config.async_finalize:
+        await _enqueue_best_version_finalize(session, result, request, current_user.id)
 
-    try:
-        response = await llm_service.get_llm_response(
-            system_prompt=rewrite_prompt,
-            conversation_history=[{"role": "user", "content": rewrite_input}],
-            temperature=0.3,
-            user_id=user_id,
-            timeout=300.0,
-            response_format=None,
-        )
-        cleaned = remove_think_tags(response)
-        logger.info("成功修复违规内容")
-        return cleaned
-    except Exception as exc:
-        logger.warning("自动修复失败，返回原文: %s", exc)
-        return original_text
+    return AdvancedGenerateResponse(**result)
 
 
-async def _finalize_chapter_async(
-    project_id: str,
-    chapter_number: int,
-    selected_version_id: int,
+async def _enqueue_best_version_finalize(
+    session: AsyncSession,
+    result: Dict[str, Any],
+    request: AdvancedGenerateRequest,
     user_id: int,
-    skip_vector_update: bool = False,
 ) -> None:
-    async with AsyncSessionLocal() as session:
-        llm_service = LLMService(session)
+    """为评审选出的最佳版本登记异步定稿任务，任务 ID 写入 debug_metadata。"""
+    variants = result.get("variants") or []
+    best_index = result.get("best_version_index", 0)
+    if not 0 <= best_index < len(variants):
+        return
+    job = await enqueue_finalize_job(
+        session,
+        project_id=request.project_id,
+        chapter_number=request.chapter_number,
+        selected_version_id=variants[best_index]["version_id"],
+        user_id=user_id,
+    )
+    result["debug_metadata"] = {**(result.get("debug_metadata") or {}), "finalize_job_id": job.id}
 
-        stmt = (
-            select(Chapter)
-            .options(selectinload(Chapter.versions))
+
+async def _mark_stream_generation_failed(project_id: str, chapter_number: int) -> None:
+    """流式生成中途失败或客户端断开时，把仍处于 generating 的章节标记为 failed。"""
+    async with AsyncSessionLocal() as abort_session:
+        await abort_session.execute(
+            update(Chapter)
             .where(
                 Chapter.project_id == project_id,
                 Chapter.chapter_number == chapter_number,
+                Chapter.status == "generating",
             )
+            .values(status="failed")
         )
-        result = await session.execute(stmt)
-        chapter = result.scalars().first()
-        if not chapter:
-            return
+        await abort_session.commit()
 
-        selected_version = next(
-            (v for v in chapter.versions if v.id == selected_version_id),
-            None,
-        )
-        if not selected_version or not selected_version.content:
-            return
-
-        chapter.selected_version_id = selected_version.id
-        chapter.status = ChapterGenerationStatus.SUCCESSFUL.value
-        chapter.word_count = len(selected_version.content or "")
-        await session.commit()
-
-        vector_store = None
-        if settings.vector_store_enabled:
-            try:
-                vector_store = VectorStoreService()
-            except RuntimeError as exc:
-                logger.warning("向量库初始化失败，跳过定稿写入: %s", exc)
 
-        sync_session = getattr(session, "sync_session", session)
-        finalize_service = FinalizeService(sync_session, llm_service, vector_store)
-        await finalize_service.finalize_chapter(
-            project_id=project_id,
-            chapter_number=chapter_number,
-            chapter_text=selected_version.content,
-            user_id=user_id,
-            skip_vector_update=skip_vector_update,
-        )
-
-
-def _schedule_finalize_task(
+def _event_stream_response(
+    http_request: Request,
+    run: Callable[[GenerationEventStream], Awaitable[Dict[str, Any]]],
+    *,
     project_id: str,
     chapter_number: int,
-    selected_version_id: int,
-    user_id: int,
-    skip_vector_update: bool = False,
-) -> None:
-    asyncio.create_task(
-        _finalize_chapter_async(
-            project_id=project_id,
-            chapter_number=chapter_number,
-            selected_version_id=selected_version_id,
-            user_id=user_id,
-            skip_vector_update=skip_vector_update,
-        )
+) -> StreamingResponse:
+    """
+    以 SSE 返回流式生成过程
+
+    依赖注入的会话在响应体开始发送前就已关闭，run 内部须自行创建会话。
+    """
+    return StreamingResponse(
+        stream_generation(
+            run,
+            is_disconnected=http_request.is_disconnected,
+            heartbeat_seconds=settings.chapter_stream_heartbeat_seconds,
+            on_abort=lambda: _mark_stream_generation_failed(project_id, chapter_number),
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
-@router.post("/advanced/generate", response_model=AdvancedGenerateResponse)
-async def advanced_generate_chapter(
+@router.post("/advanced/generate/stream")
+async def advanced_generate_chapter_stream(
     request: AdvancedGenerateRequest,
-    background_tasks: BackgroundTasks,
+    http_request: Request,
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> AdvancedGenerateResponse:
+) -> StreamingResponse:
     """
-    高级写作入口：通过 PipelineOrchestrator 统一编排生成流程。
+    高级写作入口的流式版本：以 SSE 推送阶段事件与各版本正文增量，
+    最后的 result 事件与 /advanced/generate 的响应体相同。
     """
-    orchestrator = PipelineOrchestrator(session)
-    result = await orchestrator.generate_chapter(
-        project_id=request.project_id,
-        chapter_number=request.chapter_number,
-        writing_notes=request.writing_notes,
-        user_id=current_user.id,
-        flow_config=request.flow_config.model_dump(),
-    )
-
-    flow_config = request.flow_config
-    if flow_config.async_finalize and result.get("variants"):
-        best_index = result.get("best_version_index", 0)
-        variants = result["variants"]
-        if 0 <= best_index < len(variants):
-            selected_version_id = variants[best_index]["version_id"]
-            background_tasks.add_task(
-                _schedule_finalize_task,
-                request.project_id,
-                request.chapter_number,
-                selected_version_id,
-                current_user.id,
-                False,
+    await NovelService(session).ensure_project_owner(request.project_id, current_user.id, ProjectLoad.OWNER)
+    user_id = current_user.id
+
+    async def _run(events: GenerationEventStream) -> Dict[str, Any]:
+        async with AsyncSessionLocal() as stream_session:
+            orchestrator = PipelineOrchestrator(stream_session, events=events)
+            result = await orchestrator.generate_chapter(
+                project_id=request.project_id,
+                chapter_number=request.chapter_number,
+                writing_notes=request.writing_notes,
+                user_id=user_id,
+                flow_config=request.flow_config.model_dump(),
             )
+            if request.flow_config.async_finalize:
+                await _enqueue_best_version_finalize(stream_session, result, request, user_id)
+            return AdvancedGenerateResponse(**result).model_dump(mode="json")
 
-    return AdvancedGenerateResponse(**result)
+    return _event_stream_response(
+        http_request, _run, project_id=request.project_id, chapter_number=request.chapter_number
+    )
 
 
 @router.post("/chapters/{chapter_number}/finalize", response_model=FinalizeChapterResponse)
@@ -418,7 +422,7 @@ async def finalize_chapter(
     定稿入口：选中版本后触发 FinalizeService 进行记忆更新与快照写入。
     """
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(request.project_id, current_user.id)
+    await novel_service.ensure_project_owner(request.project_id, current_user.id, ProjectLoad.OWNER)
 
     stmt = (
         select(Chapter)
@@ -452,8 +456,12 @@ async def finalize_chapter(
         except RuntimeError as exc:
             logger.warning("向量库初始化失败，跳过定稿写入: %s", exc)
 
-    sync_session = getattr(session, "sync_session", session)
-    finalize_service = FinalizeService(sync_session, LLMService(session), vector_store)
+    finalize_service = FinalizeService(
+        session,
+        LLMService(session),
+        vector_store,
+        session_factory=AsyncSessionLocal,
+    )
     finalize_result = await finalize_service.finalize_chapter(
         project_id=request.project_id,
         chapter_number=chapter_number,
@@ -470,13 +478,103 @@ async def finalize_chapter(
     )
 
 
-@router.post("/novels/{project_id}/chapters/generate", response_model=NovelProjectSchema)
+@router.get("/finalize-jobs/{job_id}", response_model=FinalizeJobStatus)
+async def get_finalize_job(
+    job_id: str,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> FinalizeJobStatus:
+    """查询后台定稿任务状态。"""
+    job = await FinalizeJobRepository(session).get_by_id(job_id)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="定稿任务不存在")
+    return FinalizeJobStatus.model_validate(job)
+
+
+@router.get("/novels/{project_id}/finalize-jobs", response_model=List[FinalizeJobStatus])
+async def list_finalize_jobs(
+    project_id: str,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> List[FinalizeJobStatus]:
+    """列出项目最近的定稿任务。"""
+    novel_service = NovelService(session)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
+    jobs = await FinalizeJobRepository(session).list_for_project(project_id)
+    return [FinalizeJobStatus.model_validate(job) for job in jobs]
+
+
+@router.post("/novels/{project_id}/chapters/summaries/backfill", response_model=Dict[str, Any])
+async def backfill_chapter_summaries(
+    project_id: str,
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """在后台预先补全缺失的章节摘要，生成章节时即可直接读取。"""
+    novel_service = NovelService(session)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
+    pending = await SummaryBackfillService().list_pending(project_id)
+    scheduled = bool(pending) and schedule_summary_backfill(project_id, current_user.id)
+    return {
+        "pending": len(pending),
+        "scheduled": scheduled,
+        "running": is_backfill_running(project_id),
+    }
+
+
+@router.post("/novels/{project_id}/chapters/generate/stream")
+async def generate_chapter_stream(
+    project_id: str,
+    request: GenerateChapterRequest,
+    http_request: Request,
+    response_mode: ProjectResponseMode = Query(
+        default=ProjectResponseMode.FULL,
+        description="full 返回完整项目，delta 只返回变更章节和项目修订号",
+    ),
+    session: AsyncSession = Depends(get_session),
+    current_user: UserInDB = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    生成章节正文的流式版本：以 SSE 推送阶段事件与各版本正文增量
+
+    生成流程由 PipelineOrchestrator 的 basic 预设执行（导演脚本、可见性过滤、多版本生成、
+    护栏检查与 AI 评审），最后的 result 事件按 response_mode 返回完整项目或章节增量。
+    """
+    await NovelService(session).ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
+    user_id = current_user.id
+    logger.info("用户 %s 开始流式生成项目 %s 第 %s 章", user_id, project_id, request.chapter_number)
+
+    async def _run(events: GenerationEventStream) -> Dict[str, Any]:
+        async with AsyncSessionLocal() as stream_session:
+            orchestrator = PipelineOrchestrator(stream_session, events=events)
+            await orchestrator.generate_chapter(
+                project_id=project_id,
+                chapter_number=request.chapter_number,
+                writing_notes=request.writing_notes,
+                user_id=user_id,
+                flow_config={"preset": "basic"},
+            )
+            response = await _project_response(
+                NovelService(stream_session), project_id, user_id, response_mode, [request.chapter_number]
+            )
+            return response.model_dump(mode="json")
+
+    return _event_stream_response(
+        http_request, _run, project_id=project_id, chapter_number=request.chapter_number
+    )
+
+
+@router.post("/novels/{project_id}/chapters/generate", response_model=Union[NovelProjectSchema, ProjectChapterDelta])
 async def generate_chapter(
     project_id: str,
     request: GenerateChapterRequest,
+    response_mode: ProjectResponseMode = Query(
+        default=ProjectResponseMode.FULL,
+        description="full 返回完整项目，delta 只返回变更章节和项目修订号",
+    ),
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> Union[NovelProjectSchema, ProjectChapterDelta]:
     """
     生成章节正文 - 三层架构流程：
     1. 收集上下文和历史摘要
@@ -491,7 +589,9 @@ async def generate_chapter(
     context_builder = WriterContextBuilder()
     guardrails = ChapterGuardrails()
 
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    project = await novel_service.ensure_project_owner(
+        project_id, current_user.id, ProjectLoad.METADATA, include_selected_content=True
+    )
     logger.info("用户 %s 开始为项目 %s 生成第 %s 章", current_user.id, project_id, request.chapter_number)
     outline = await novel_service.get_outline(project_id, request.chapter_number)
     if not outline:
@@ -512,49 +612,55 @@ async def generate_chapter(
     latest_prev_number = -1
     previous_summary_text = ""
     previous_tail_excerpt = ""
+    missing_summary = False
     
     for existing in project.chapters:
         if existing.chapter_number >= request.chapter_number:
             continue
         if existing.selected_version is None or not existing.selected_version.content:
             continue
-        if not existing.real_summary:
-            summary = await llm_service.get_summary(
-                existing.selected_version.content,
-                temperature=0.15,
-                user_id=current_user.id,
-                timeout=180.0,
-            )
-            existing.real_summary = remove_think_tags(summary)
-            await session.commit()
+        existing_outline = outlines_map.get(existing.chapter_number)
+        # 请求内只读取已生成的摘要；缺失时先用大纲概要顶替，并在后台补全
+        summary = existing.real_summary
+        if not summary:
+            missing_summary = True
+            summary = existing_outline.summary if existing_outline and existing_outline.summary else ""
         completed_chapters.append({
             "chapter_number": existing.chapter_number,
-            "title": outlines_map.get(existing.chapter_number).title if outlines_map.get(existing.chapter_number) else f"第{existing.chapter_number}章",
-            "summary": existing.real_summary,
+            "title": existing_outline.title if existing_outline else f"第{existing.chapter_number}章",
+            "summary": summary,
         })
-        completed_summaries.append(existing.real_summary or "")
+        completed_summaries.append(summary)
         if existing.chapter_number > latest_prev_number:
             latest_prev_number = existing.chapter_number
-            previous_summary_text = existing.real_summary or ""
+            previous_summary_text = summary
             previous_tail_excerpt = _extract_tail_excerpt(existing.selected_version.content)
 
-    project_schema = await novel_service._serialize_project(project)
-    blueprint_dict = project_schema.blueprint.model_dump()
-
-    # 处理关系字段名
-    if "relationships" in blueprint_dict and blueprint_dict["relationships"]:
-        for relation in blueprint_dict["relationships"]:
-            if "character_from" in relation:
-                relation["from"] = relation.pop("character_from")
-            if "character_to" in relation:
-                relation["to"] = relation.pop("character_to")
+    if missing_summary:
+        schedule_summary_backfill(project_id, current_user.id, before_chapter=request.chapter_number)
+
+    def _build_blueprint_dict() -> Dict[str, Any]:
+        raw = novel_service._build_blueprint_schema(project).model_dump()
+        # 处理关系字段名
+        if "relationships" in raw and raw["relationships"]:
+            for relation in raw["relationships"]:
+                if "character_from" in relation:
+                    relation["from"] = relation.pop("character_from")
+                if "character_to" in relation:
+                    relation["to"] = relation.pop("character_to")
+        return raw
+
+    # 只读蓝图视图与角色名索引按项目修订号缓存，各版本共享
+    project_blueprint = get_blueprint_index_cache().get(project.id, project.revision or 0, _build_blueprint_dict)
+    blueprint_dict = project_blueprint.blueprint
+    name_index = project_blueprint.name_index
 
     outline_title = outline.title or f"第{outline.chapter_number}章"
     outline_summary = outline.summary or "暂无摘要"
     writing_notes = request.writing_notes or "无额外写作指令"
 
     # 提取所有角色名
-    all_characters = [c.get("name") for c in blueprint_dict.get("characters", []) if c.get("name")]
+    all_characters = list(name_index.names)
 
     # ========== 2. L2 Director: 生成章节导演脚本 ==========
     chapter_mission = await _generate_chapter_mission(
@@ -585,6 +691,7 @@ async def generate_chapter(
         outline_summary=outline_summary,
         writing_notes=writing_notes,
         allowed_new_characters=allowed_new_characters,
+        name_index=name_index,
     )
 
     writer_blueprint = visibility_context["writer_blueprint"]
@@ -656,15 +763,22 @@ async def generate_chapter(
     logger.debug("章节写作提示词长度: %s 字符", len(prompt_input))
 
     # ========== 6. L3 Writer: 生成正文 ==========
-    async def _generate_single_version(idx: int, version_style_hint: Optional[str] = None) -> Dict:
-        """生成单个版本，支持差异化风格提示"""
+    async def _generate_single_version(
+        idx: int,
+        version_style_hint: Optional[str] = None,
+        version_llm_service: Optional[LLMService] = None,
+        version_prompt_service: Optional[PromptService] = None,
+    ) -> Dict:
+        """生成单个版本，支持差异化风格提示；并发模式下传入版本独立会话的服务实例"""
+        version_llm_service = version_llm_service or llm_service
+        version_prompt_service = version_prompt_service or prompt_service
         try:
             # 如果有版本风格提示，添加到 prompt_input
             final_prompt_input = prompt_input
             if version_style_hint:
                 final_prompt_input += f"\n\n[版本风格提示]\n{version_style_hint}"
 
-            response = await llm_service.get_llm_response(
+            response = await version_llm_service.get_llm_response(
                 system_prompt=writer_prompt,
                 conversation_history=[{"role": "user", "content": final_prompt_input}],
                 temperature=0.9,
@@ -681,6 +795,7 @@ async def generate_chapter(
                 forbidden_characters=forbidden_characters,
                 allowed_new_characters=allowed_new_characters,
                 pov=chapter_mission.get("pov") if chapter_mission else None,
+                name_index=name_index,
             )
 
             final_content = normalized
@@ -702,8 +817,8 @@ async def generate_chapter(
                 # 尝试自动修复
                 violations_text = guardrails.format_violations_for_rewrite(guardrail_result)
                 final_content = await _rewrite_with_guardrails(
-                    llm_service=llm_service,
-                    prompt_service=prompt_service,
+                    llm_service=version_llm_service,
+                    prompt_service=version_prompt_service,
                     original_text=normalized,
                     chapter_mission=chapter_mission,
                     violations_text=violations_text,
@@ -773,11 +888,42 @@ async def generate_chapter(
         "悬念更重，多埋伏笔，结尾钩子更强",
     ]
 
+    def _style_hint(idx: int) -> Optional[str]:
+        return version_style_hints[idx] if idx < len(version_style_hints) else None
+
+    async def _version_worker(idx: int, version_session: AsyncSession) -> Dict:
+        return await _generate_single_version(
+            idx,
+            _style_hint(idx),
+            version_llm_service=LLMService(version_session),
+            version_prompt_service=PromptService(version_session),
+        )
+
+    parallel = settings.writer_parallel_versions and version_count > 1
     raw_versions = []
     try:
-        for idx in range(version_count):
-            style_hint = version_style_hints[idx] if idx < len(version_style_hints) else None
-            raw_versions.append(await _generate_single_version(idx, style_hint))
+        if parallel:
+            # 结束当前事务，各版本在独立会话中并发生成
+            await session.commit()
+            outcomes = await run_versions_concurrently(
+                version_count,
+                _version_worker,
+                session_factory=AsyncSessionLocal,
+                user_id=current_user.id,
+            )
+        else:
+            outcomes = await run_versions_sequentially(
+                version_count,
+                lambda idx: _generate_single_version(idx, _style_hint(idx)),
+            )
+        raw_versions = collect_successful(outcomes)
+        logger.info(
+            "项目 %s 第 %s 章版本生成完成: parallel=%s timings=%s",
+            project_id,
+            request.chapter_number,
+            parallel,
+            [outcome.timing() for outcome in outcomes],
+        )
     except Exception as exc:
         logger.exception("项目 %s 生成第 %s 章时发生异常: %s", project_id, request.chapter_number, exc)
         chapter.status = "failed"
@@ -840,18 +986,24 @@ async def generate_chapter(
         request.chapter_number,
         len(contents),
     )
-    return await _load_project_schema(novel_service, project_id, current_user.id)
+    return await _project_response(
+        novel_service, project_id, current_user.id, response_mode, [request.chapter_number]
+    )
 
 
-@router.post("/novels/{project_id}/chapters/select", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/select", response_model=Union[NovelProjectSchema, ProjectChapterDelta])
 async def select_chapter_version(
     project_id: str,
     request: SelectVersionRequest,
+    response_mode: ProjectResponseMode = Query(
+        default=ProjectResponseMode.FULL,
+        description="full 返回完整项目，delta 只返回变更章节和项目修订号",
+    ),
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> Union[NovelProjectSchema, ProjectChapterDelta]:
     novel_service = NovelService(session)
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    project = await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
     chapter = await novel_service.get_or_create_chapter(project_id, request.chapter_number)
 
     # 使用 novel_service.select_chapter_version 确保排序一致
@@ -868,33 +1020,43 @@ async def select_chapter_version(
     try:
         llm_service = LLMService(session)
         ingest_service = ChapterIngestionService(llm_service=llm_service)
+        outline = await novel_service.get_outline(project_id, request.chapter_number)
         await ingest_service.ingest_chapter(
             project_id=project_id,
             chapter_number=request.chapter_number,
-            title=chapter.title or f"第{request.chapter_number}章",
+            title=(outline.title if outline else None) or f"第{request.chapter_number}章",
             content=selected_version.content,
-            summary=None
+            summary=None,
+            user_id=current_user.id,
         )
         logger.info(f"章节 {request.chapter_number} 向量化入库成功")
     except Exception as e:
         logger.error(f"章节 {request.chapter_number} 向量化入库失败: {e}")
         # 向量化失败不应阻止版本选择，仅记录错误
 
-    return await _load_project_schema(novel_service, project_id, current_user.id)
+    return await _project_response(
+        novel_service, project_id, current_user.id, response_mode, [request.chapter_number]
+    )
 
 
-@router.post("/novels/{project_id}/chapters/evaluate", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/evaluate", response_model=Union[NovelProjectSchema, ProjectChapterDelta])
 async def evaluate_chapter(
     project_id: str,
     request: EvaluateChapterRequest,
+    response_mode: ProjectResponseMode = Query(
+        default=ProjectResponseMode.FULL,
+        description="full 返回完整项目，delta 只返回变更章节和项目修订号",
+    ),
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> Union[NovelProjectSchema, ProjectChapterDelta]:
     novel_service = NovelService(session)
     prompt_service = PromptService(session)
     llm_service = LLMService(session)
 
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    project = await novel_service.ensure_project_owner(
+        project_id, current_user.id, ProjectLoad.METADATA, include_selected_content=True
+    )
     # 确保预加载 versions / selected_version 关系
     from sqlalchemy.orm import selectinload
     stmt = (
@@ -935,7 +1097,9 @@ async def evaluate_chapter(
             feedback="未配置评审提示词",
             decision="skipped"
         )
-        return await _load_project_schema(novel_service, project_id, current_user.id)
+        return await _project_response(
+            novel_service, project_id, current_user.id, response_mode, [request.chapter_number]
+        )
 
     outlines_map = {item.chapter_number: item for item in project.outlines}
     outline = outlines_map.get(request.chapter_number)
@@ -956,8 +1120,7 @@ async def evaluate_chapter(
             }
         )
 
-    project_schema = await novel_service._serialize_project(project)
-    blueprint_dict = project_schema.blueprint.model_dump() if project_schema.blueprint else {}
+    blueprint_dict = novel_service._build_blueprint_schema(project).model_dump()
 
     evaluation_input = json.dumps(
         {
@@ -1028,18 +1191,24 @@ async def evaluate_chapter(
         # 抛出异常，让前端知道评审失败
         raise HTTPException(status_code=500, detail=f"评审失败: {str(exc)}")
     
-    return await _load_project_schema(novel_service, project_id, current_user.id)
+    return await _project_response(
+        novel_service, project_id, current_user.id, response_mode, [request.chapter_number]
+    )
 
 
-@router.post("/novels/{project_id}/chapters/update-outline", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/update-outline", response_model=Union[NovelProjectSchema, ProjectChapterDelta])
 async def update_chapter_outline(
     project_id: str,
     request: UpdateChapterOutlineRequest,
+    response_mode: ProjectResponseMode = Query(
+        default=ProjectResponseMode.FULL,
+        description="full 返回完整项目，delta 只返回变更章节和项目修订号",
+    ),
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> Union[NovelProjectSchema, ProjectChapterDelta]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
     outline = await novel_service.get_outline(project_id, request.chapter_number)
     if not outline:
@@ -1048,34 +1217,44 @@ async def update_chapter_outline(
     outline.title = request.title
     outline.summary = request.summary
     await session.commit()
+    await novel_service._touch_project(project_id)
 
-    return await _load_project_schema(novel_service, project_id, current_user.id)
+    return await _project_response(
+        novel_service, project_id, current_user.id, response_mode, [request.chapter_number]
+    )
 
 
-@router.post("/novels/{project_id}/chapters/delete", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/delete", response_model=Union[NovelProjectSchema, ProjectChapterDelta])
 async def delete_chapters(
     project_id: str,
     request: DeleteChapterRequest,
+    response_mode: ProjectResponseMode = Query(
+        default=ProjectResponseMode.FULL,
+        description="full 返回完整项目，delta 只返回变更章节和项目修订号",
+    ),
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> Union[NovelProjectSchema, ProjectChapterDelta]:
     novel_service = NovelService(session)
-    await novel_service.ensure_project_owner(project_id, current_user.id)
-
-    for ch_num in request.chapter_numbers:
-        await novel_service.delete_chapter(project_id, ch_num)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
 
-    await session.commit()
-    return await _load_project_schema(novel_service, project_id, current_user.id)
+    await novel_service.delete_chapters(project_id, request.chapter_numbers)
+    return await _project_response(
+        novel_service, project_id, current_user.id, response_mode, request.chapter_numbers
+    )
 
 
-@router.post("/novels/{project_id}/chapters/outline", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/outline", response_model=Union[NovelProjectSchema, ProjectChapterDelta])
 async def generate_chapters_outline(
     project_id: str,
     request: GenerateOutlineRequest,
+    response_mode: ProjectResponseMode = Query(
+        default=ProjectResponseMode.FULL,
+        description="full 返回完整项目，delta 只返回变更章节和项目修订号",
+    ),
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> Union[NovelProjectSchema, ProjectChapterDelta]:
     """
     续写章节大纲（分批生成）。
     参考蓝图生成 Step 3 的逻辑，按 batch_size 分批调用 LLM，
@@ -1084,11 +1263,10 @@ async def generate_chapters_outline(
     novel_service = NovelService(session)
     llm_service = LLMService(session)
 
-    project = await novel_service.ensure_project_owner(project_id, current_user.id)
+    project = await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.METADATA)
 
     # 获取蓝图信息
-    project_schema = await novel_service._serialize_project(project)
-    blueprint = project_schema.blueprint
+    blueprint = novel_service._build_blueprint_schema(project)
 
     # 获取用户 LLM 配置中的 batch_size
     from ...repositories.llm_config_repository import LLMConfigRepository
@@ -1231,20 +1409,27 @@ async def generate_chapters_outline(
         raise HTTPException(status_code=500, detail="大纲生成返回空结果，请重试。")
 
     logger.info("项目 %s 续写大纲完成: 共生成 %d 章", project_id, len(all_new_outlines))
-    return await _load_project_schema(novel_service, project_id, current_user.id)
+    await novel_service._touch_project(project_id)
+    return await _project_response(
+        novel_service, project_id, current_user.id, response_mode, [item["chapter_number"] for item in all_new_outlines]
+    )
 
 
-@router.post("/novels/{project_id}/chapters/edit", response_model=NovelProjectSchema)
+@router.post("/novels/{project_id}/chapters/edit", response_model=Union[NovelProjectSchema, ProjectChapterDelta])
 async def edit_chapter_content(
     project_id: str,
     request: EditChapterRequest,
     background_tasks: BackgroundTasks,
+    response_mode: ProjectResponseMode = Query(
+        default=ProjectResponseMode.FULL,
+        description="full 返回完整项目，delta 只返回变更章节和项目修订号",
+    ),
     session: AsyncSession = Depends(get_session),
     current_user: UserInDB = Depends(get_current_user),
-) -> NovelProjectSchema:
+) -> Union[NovelProjectSchema, ProjectChapterDelta]:
     novel_service = NovelService(session)
     
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
     chapter = await novel_service.get_or_create_chapter(project_id, request.chapter_number)
     
     # 更新内容：优先更新选中版本，否则选最新版本或创建新版本
@@ -1269,6 +1454,7 @@ async def edit_chapter_content(
     chapter.status = "successful"
     chapter.word_count = len(request.content or "")
     await session.commit()
+    await novel_service._touch_project(project_id)
 
     background_tasks.add_task(
         _refresh_edit_summary_and_ingest,
@@ -1278,7 +1464,9 @@ async def edit_chapter_content(
         current_user.id,
     )
 
-    return await _load_project_schema(novel_service, project_id, current_user.id)
+    return await _project_response(
+        novel_service, project_id, current_user.id, response_mode, [request.chapter_number]
+    )
 
 
 @router.post("/novels/{project_id}/chapters/edit-fast", response_model=ChapterSchema)
@@ -1291,7 +1479,7 @@ async def edit_chapter_content_fast(
 ) -> ChapterSchema:
     novel_service = NovelService(session)
 
-    await novel_service.ensure_project_owner(project_id, current_user.id)
+    await novel_service.ensure_project_owner(project_id, current_user.id, ProjectLoad.OWNER)
     chapter = await novel_service.get_or_create_chapter(project_id, request.chapter_number)
 
     target_version = chapter.selected_version
@@ -1315,6 +1503,7 @@ async def edit_chapter_content_fast(
     chapter.status = "successful"
     chapter.word_count = len(request.content or "")
     await session.commit()
+    await novel_service._touch_project(project_id)
 
     background_tasks.add_task(
         _refresh_edit_summary_and_ingest,
@@ -31,12 +31,14 @@ app.conf.update(
 # 定义任务队列
 app.conf.task_queues = (
     Queue('emotion_analysis', Exchange('emotion_analysis'), routing_key='emotion_analysis'),
+    Queue('finalize', Exchange('finalize'), routing_key='finalize'),
     Queue('default', Exchange('default'), routing_key='default'),
 )
 
 # 定义任务路由
 app.conf.task_routes = {
     'app.tasks.emotion_tasks.analyze_emotion_async': {'queue': 'emotion_analysis'},
+    'app.tasks.finalize_tasks.run_finalize_job': {'queue': 'finalize'},
 }
 
 # 定义定时任务（可选）
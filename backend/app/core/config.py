@@ -116,6 +116,68 @@ class Settings(BaseSettings):
         env="LLM_STREAM_CONNECT_TIMEOUT_SECONDS",
         description="LLM 流式调用的连接超时秒数，用于识别服务不可达/网络问题",
     )
+    llm_http_max_connections: int = Field(
+        default=100,
+        ge=1,
+        env="LLM_HTTP_MAX_CONNECTIONS",
+        description="每个 LLM 客户端连接池的最大连接数",
+    )
+    llm_http_max_keepalive_connections: int = Field(
+        default=20,
+        ge=0,
+        env="LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS",
+        description="每个 LLM 客户端连接池保持的空闲长连接数",
+    )
+    llm_http_keepalive_expiry_seconds: float = Field(
+        default=60.0,
+        gt=0,
+        env="LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS",
+        description="空闲长连接的保活秒数",
+    )
+    llm_client_idle_ttl_seconds: float = Field(
+        default=600.0,
+        ge=0,
+        env="LLM_CLIENT_IDLE_TTL_SECONDS",
+        description="池化 LLM 客户端空闲多久后回收（0 表示不回收）",
+    )
+    config_cache_ttl_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        env="CONFIG_CACHE_TTL_SECONDS",
+        description="系统配置与用户激活 LLM 配置的进程内缓存有效期（秒，0 表示不缓存）",
+    )
+    usage_counter_backend: str = Field(
+        default="local",
+        env="USAGE_COUNTER_BACKEND",
+        description="每日请求额度预占方式：local（进程内计数）或 redis（多进程共享）",
+    )
+    usage_counter_redis_url: str = Field(
+        default="redis://localhost:6379/2",
+        env="USAGE_COUNTER_REDIS_URL",
+        description="usage_counter_backend=redis 时使用的 Redis 地址",
+    )
+    usage_counter_flush_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        env="USAGE_COUNTER_FLUSH_SECONDS",
+        description="请求计数缓冲写回数据库的间隔（秒）",
+    )
+    loop_lag_monitor_enabled: bool = Field(
+        default=True,
+        env="LOOP_LAG_MONITOR_ENABLED",
+        description="是否监控事件循环阻塞（同步调用卡住循环时输出告警与阻塞位置）",
+    )
+    loop_lag_threshold_ms: float = Field(
+        default=100.0,
+        gt=0,
+        env="LOOP_LAG_THRESHOLD_MS",
+        description="事件循环阻塞超过该毫秒数时记为一次卡顿并告警",
+    )
+    llm_http2_enabled: bool = Field(
+        default=True,
+        env="LLM_HTTP2_ENABLED",
+        description="LLM 连接池是否启用 HTTP/2（需安装 h2，未安装时自动回退 HTTP/1.1）",
+    )
     blueprint_generation_timeout_seconds: float = Field(
         default=1800.0,
         gt=0,
@@ -135,6 +197,153 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("WRITER_CHAPTER_VERSION_COUNT", "WRITER_CHAPTER_VERSIONS"),
         description="每次生成章节的候选版本数量",
     )
+    writer_parallel_versions: bool = Field(
+        default=True,
+        env="WRITER_PARALLEL_VERSIONS",
+        description="是否并发生成章节的多个候选版本（每个版本使用独立数据库会话）",
+    )
+    writer_version_concurrency_per_user: int = Field(
+        default=3,
+        ge=1,
+        env="WRITER_VERSION_CONCURRENCY_PER_USER",
+        description="单个用户同时进行的章节版本生成数量上限",
+    )
+    writer_version_concurrency_global: int = Field(
+        default=8,
+        ge=1,
+        env="WRITER_VERSION_CONCURRENCY_GLOBAL",
+        description="整个进程同时进行的章节版本生成数量上限",
+    )
+    finalize_stage_concurrency: int = Field(
+        default=4,
+        ge=1,
+        env="FINALIZE_STAGE_CONCURRENCY",
+        description="章节定稿时并发执行的 LLM 阶段数上限",
+    )
+    reader_sim_concurrency: int = Field(
+        default=4,
+        ge=1,
+        env="READER_SIM_CONCURRENCY",
+        description="读者模拟时并发执行的 LLM 调用数上限（爽点检测、钩子评估与各读者画像）",
+    )
+    reader_sim_persona_timeout_seconds: float = Field(
+        default=150.0,
+        gt=0,
+        env="READER_SIM_PERSONA_TIMEOUT_SECONDS",
+        description="读者模拟中单个读者画像的超时秒数，超时的画像不计入总评分",
+    )
+    chapter_stream_heartbeat_seconds: float = Field(
+        default=15.0,
+        gt=0,
+        env="CHAPTER_STREAM_HEARTBEAT_SECONDS",
+        description="流式生成章节时无事件多少秒后发送一次心跳，防止代理断开空闲连接",
+    )
+    optimizer_mode: str = Field(
+        default="patch",
+        env="OPTIMIZER_MODE",
+        description="章节优化方式：patch（单次调用返回段落补丁，本地合并）或 full（逐维度重写整章）",
+    )
+    optimizer_patch_min_apply_ratio: float = Field(
+        default=0.5,
+        ge=0,
+        le=1,
+        env="OPTIMIZER_PATCH_MIN_APPLY_RATIO",
+        description="补丁模式下可定位补丁占比低于该值时回退逐维度重写",
+    )
+    finalize_queue_backend: str = Field(
+        default="local",
+        env="FINALIZE_QUEUE_BACKEND",
+        description="定稿任务执行方式：local（进程内 worker 池）或 celery",
+    )
+    finalize_queue_workers: int = Field(
+        default=2,
+        ge=1,
+        env="FINALIZE_QUEUE_WORKERS",
+        description="进程内定稿 worker 数量",
+    )
+    finalize_queue_poll_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        env="FINALIZE_QUEUE_POLL_SECONDS",
+        description="定稿 worker 空闲时轮询任务表的间隔（秒）",
+    )
+    finalize_job_max_attempts: int = Field(
+        default=3,
+        ge=1,
+        env="FINALIZE_JOB_MAX_ATTEMPTS",
+        description="定稿任务最大执行次数（含首次）",
+    )
+    finalize_job_retry_base_seconds: float = Field(
+        default=10.0,
+        ge=0,
+        env="FINALIZE_JOB_RETRY_BASE_SECONDS",
+        description="定稿任务失败重试的基础等待时间（秒），按次数指数增长",
+    )
+    finalize_job_retry_max_seconds: float = Field(
+        default=300.0,
+        ge=0,
+        env="FINALIZE_JOB_RETRY_MAX_SECONDS",
+        description="定稿任务重试等待时间上限（秒）",
+    )
+    finalize_job_stale_seconds: float = Field(
+        default=1800.0,
+        gt=0,
+        env="FINALIZE_JOB_STALE_SECONDS",
+        description="定稿任务运行超过该时长视为 worker 已退出，重新入队",
+    )
+    summary_backfill_concurrency_per_user: int = Field(
+        default=3,
+        ge=1,
+        env="SUMMARY_BACKFILL_CONCURRENCY_PER_USER",
+        description="单个用户同时进行的章节摘要补全 LLM 调用数上限",
+    )
+    summary_backfill_concurrency_global: int = Field(
+        default=6,
+        ge=1,
+        env="SUMMARY_BACKFILL_CONCURRENCY_GLOBAL",
+        description="整个进程同时进行的章节摘要补全 LLM 调用数上限",
+    )
+    summary_backfill_commit_batch: int = Field(
+        default=20,
+        ge=1,
+        env="SUMMARY_BACKFILL_COMMIT_BATCH",
+        description="章节摘要补全每批生成并提交的章节数",
+    )
+    summary_backfill_on_import: bool = Field(
+        default=True,
+        env="SUMMARY_BACKFILL_ON_IMPORT",
+        description="导入小说后是否在后台预先生成全部章节摘要",
+    )
+    import_bulk_batch_size: int = Field(
+        default=200,
+        ge=1,
+        env="IMPORT_BULK_BATCH_SIZE",
+        description="导入小说时每批插入的章节数（每批一条章节 INSERT 与一条版本 INSERT）",
+    )
+    import_job_concurrency: int = Field(
+        default=2,
+        ge=1,
+        env="IMPORT_JOB_CONCURRENCY",
+        description="单个进程同时执行的后台小说导入任务数，超出的任务排队等待",
+    )
+    import_job_stale_seconds: float = Field(
+        default=600.0,
+        gt=0,
+        env="IMPORT_JOB_STALE_SECONDS",
+        description="其他主机的导入任务心跳超过该时长未刷新视为执行进程已退出，标记为失败并删除其项目",
+    )
+    export_stream_chapter_batch: int = Field(
+        default=20,
+        ge=1,
+        env="EXPORT_STREAM_CHAPTER_BATCH",
+        description="流式导出时每批加载并输出的章节数（含全部版本正文）",
+    )
+    export_auxiliary_concurrency: int = Field(
+        default=4,
+        ge=1,
+        env="EXPORT_AUXILIARY_CONCURRENCY",
+        description="导出项目时并发读取附属数据（记忆层、伏笔、势力等）的会话数，1 表示在同一会话上依次读取",
+    )
     embedding_provider: str = Field(
         default="openai",
         env="EMBEDDING_PROVIDER",
@@ -161,6 +370,40 @@ class Settings(BaseSettings):
         env="EMBEDDING_MODEL_VECTOR_SIZE",
         description="嵌入向量维度，未配置时将自动检测",
     )
+    embedding_batch_size: int = Field(
+        default=64,
+        ge=1,
+        env="EMBEDDING_BATCH_SIZE",
+        description="批量嵌入时单次请求的文本条数（不超过提供方上限）",
+    )
+    embedding_batch_concurrency: int = Field(
+        default=4,
+        ge=1,
+        env="EMBEDDING_BATCH_CONCURRENCY",
+        description="批量嵌入时同时进行的请求数",
+    )
+    embedding_cache_enabled: bool = Field(
+        default=True,
+        env="EMBEDDING_CACHE_ENABLED",
+        description="是否启用嵌入向量缓存（按模型与文本哈希寻址）",
+    )
+    embedding_cache_memory_entries: int = Field(
+        default=4096,
+        ge=0,
+        env="EMBEDDING_CACHE_MEMORY_ENTRIES",
+        description="嵌入缓存内存层 LRU 条数上限，0 表示不使用内存层",
+    )
+    embedding_cache_path: Optional[str] = Field(
+        default="storage/embedding_cache.db",
+        env="EMBEDDING_CACHE_PATH",
+        description="嵌入缓存磁盘层 SQLite 文件路径，留空表示仅使用内存层",
+    )
+    embedding_cache_max_disk_mb: int = Field(
+        default=256,
+        ge=0,
+        env="EMBEDDING_CACHE_MAX_DISK_MB",
+        description="嵌入缓存磁盘层容量上限（MB），超出后淘汰最久未使用的记录",
+    )
     ollama_embedding_base_url: Optional[AnyUrl] = Field(
         default=None,
         env="OLLAMA_EMBEDDING_BASE_URL",
@@ -205,6 +448,29 @@ class Settings(BaseSettings):
         env="VECTOR_CHUNK_OVERLAP",
         description="章节分块重叠字数",
     )
+    vector_index_enabled: bool = Field(
+        default=True,
+        env="VECTOR_INDEX_ENABLED",
+        description="向量库缺少 vector_distance_cosine 时是否使用进程内向量索引",
+    )
+    vector_index_hnsw_threshold: int = Field(
+        default=20000,
+        ge=0,
+        env="VECTOR_INDEX_HNSW_THRESHOLD",
+        description="单项目向量条数达到该值且安装 hnswlib 时切换为 HNSW 近似检索，0 表示禁用",
+    )
+    vector_index_max_projects: int = Field(
+        default=32,
+        ge=1,
+        env="VECTOR_INDEX_MAX_PROJECTS",
+        description="进程内最多缓存的项目索引数量（按表计）",
+    )
+    vector_index_ttl_seconds: int = Field(
+        default=300,
+        ge=0,
+        env="VECTOR_INDEX_TTL_SECONDS",
+        description="项目索引过期秒数，过期后从向量库重新加载，0 表示不过期",
+    )
 
     # -------------------- Linux.do OAuth 配置 --------------------
     linuxdo_client_id: Optional[str] = Field(default=None, env="LINUXDO_CLIENT_ID", description="Linux.do OAuth Client ID")
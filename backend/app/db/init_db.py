@@ -120,6 +120,12 @@ async def _ensure_schema_updates() -> None:
                 if "metadata" not in columns:
                     sync_conn.execute(text("ALTER TABLE chapter_outlines ADD COLUMN metadata JSON"))
 
+            # 升级 novel_projects 表（增量响应使用的修订号）
+            if "novel_projects" in inspector.get_table_names():
+                columns = {col["name"] for col in inspector.get_columns("novel_projects")}
+                if "revision" not in columns:
+                    sync_conn.execute(text("ALTER TABLE novel_projects ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"))
+
             # 升级 llm_configs 表（从单配置迁移到多配置）
             if "llm_configs" in inspector.get_table_names():
                 columns = {col["name"] for col in inspector.get_columns("llm_configs")}
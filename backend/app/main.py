@@ -10,9 +10,14 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from .core.config import settings
 from .db.init_db import init_db
+from .services.finalize_queue import get_finalize_queue
+from .services.import_jobs import get_import_job_manager
+from .services.loop_monitor import get_loop_monitor
 from .services.prompt_service import PromptService
+from .services.usage_counters import get_usage_counters
 from .db.session import AsyncSessionLocal
 from .api.routers import api_router
+from .utils.llm_tool import close_llm_clients
 
 
 dictConfig(
@@ -72,7 +77,29 @@ async def lifespan(app: FastAPI):
     async with AsyncSessionLocal() as session:
         prompt_service = PromptService(session)
         await prompt_service.preload()
+    # 进程内定稿 worker：领取 finalize_jobs 表中的任务（含重启前未完成的任务）
+    finalize_queue = get_finalize_queue() if settings.finalize_queue_backend == "local" else None
+    if finalize_queue is not None:
+        await finalize_queue.start()
+    # 后台导入任务：上传内容只在原进程的临时文件中，已退出进程遗留的任务标记为失败并删除其项目
+    import_jobs = get_import_job_manager()
+    await import_jobs.start()
+    # 请求计数缓冲：定时批量写回，关闭时写回剩余增量
+    usage_counters = get_usage_counters()
+    await usage_counters.start()
+    # 事件循环阻塞监控：协程中的同步调用卡住循环时告警
+    loop_monitor = get_loop_monitor() if settings.loop_lag_monitor_enabled else None
+    if loop_monitor is not None:
+        await loop_monitor.start()
     yield
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+    if finalize_queue is not None:
+        await finalize_queue.stop()
+    await import_jobs.shutdown()
+    await usage_counters.stop()
+    # 应用关闭时释放池化的 LLM 连接
+    await close_llm_clients()
 
 
 app = FastAPI(
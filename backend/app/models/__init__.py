@@ -43,6 +43,12 @@ from .memory_layer import (
     StoryTimeTracker,
 )
 
+# 新增：定稿任务队列
+from .finalize_job import FinalizeJob
+
+# 新增：导入任务
+from .import_job import ImportJob
+
 # 新增：伏笔模型
 from .foreshadowing import (
     Foreshadowing,
@@ -87,6 +93,10 @@ __all__ = [
     "TimelineEvent",
     "CausalChain",
     "StoryTimeTracker",
+    # 定稿任务队列
+    "FinalizeJob",
+    # 导入任务
+    "ImportJob",
     # 伏笔模型
     "Foreshadowing",
     "ForeshadowingResolution",
@@ -0,0 +1,54 @@
+# AIMETA P=定稿任务模型_持久化后台任务队列|R=定稿任务表|NR=不含调度逻辑|E=FinalizeJob|X=internal|A=ORM模型|D=sqlalchemy|S=none|RD=./README.ai
+"""
+章节定稿任务表
+
+定稿请求先落库再由后台 worker 领取执行，进程重启或任务异常后可重试，
+并为前端提供任务状态查询。
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db.base import Base
+
+
+class FinalizeJob(Base):
+    """
+    定稿任务表
+
+    状态流转：queued -> running -> succeeded / failed；
+    执行失败且未超过最大次数时回到 queued，并通过 next_run_at 实现退避重试。
+    """
+    __tablename__ = "finalize_jobs"
+    __table_args__ = (
+        Index("idx_finalize_jobs_status_next_run", "status", "next_run_at"),
+        Index("idx_finalize_jobs_project_status", "project_id", "status"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    project_id: Mapped[str] = mapped_column(
+        ForeignKey("novel_projects.id", ondelete="CASCADE"), nullable=False
+    )
+    chapter_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    selected_version_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    skip_vector_update: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    status: Mapped[str] = mapped_column(String(16), default="queued", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3, nullable=False)
+    # 最早可执行时间（UTC，不带时区），用于退避重试
+    next_run_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    # 领取任务的 worker 标识（主机:进程），便于排查
+    worker_id: Mapped[Optional[str]] = mapped_column(String(128))
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    result: Mapped[Optional[dict]] = mapped_column(JSON)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
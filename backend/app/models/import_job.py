@@ -0,0 +1,55 @@
+# AIMETA P=导入任务模型_后台导入进度与取消|R=导入任务表|NR=不含导入逻辑|E=ImportJob|X=internal|A=ORM模型|D=sqlalchemy|S=none|RD=./README.ai
+"""
+小说导入任务表
+
+文件导入在后台执行，请求只登记任务并立即返回任务 ID；
+前端通过任务表轮询或订阅阶段进度，也可以请求取消。
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db.base import Base
+
+
+class ImportJob(Base):
+    """
+    导入任务表
+
+    状态流转：queued -> running -> succeeded / failed / cancelled；
+    运行中依次经过 parse -> census -> profiling -> persist -> ingest 阶段。
+    """
+    __tablename__ = "import_jobs"
+    __table_args__ = (
+        Index("idx_import_jobs_user_created", "user_id", "created_at"),
+        Index("idx_import_jobs_status", "status"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    file_size: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    status: Mapped[str] = mapped_column(String(16), default="queued", nullable=False)
+    stage: Mapped[Optional[str]] = mapped_column(String(16))
+    # 当前阶段的进度（如 persist 阶段已写入章数 / 总章数），没有细分进度的阶段为 0 / 0
+    progress_done: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    progress_total: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # 执行任务的进程标识（主机:进程），便于排查
+    worker_id: Mapped[Optional[str]] = mapped_column(String(128))
+    project_id: Mapped[Optional[str]] = mapped_column(String(36))
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+    result: Mapped[Optional[dict]] = mapped_column(JSON)
+
+    # 以下时间列统一使用不带时区的 UTC 时间；heartbeat_at 随进度更新，用于识别已中断的任务
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,182 @@
+# AIMETA P=定稿任务仓库_任务领取和状态更新|R=入队_领取_成功失败_过期回收_退出进程回收_查询|NR=不含执行逻辑|E=FinalizeJobRepository|X=internal|A=仓库类|D=sqlalchemy|S=db|RD=./README.ai
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Collection, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+
+from .base import BaseRepository
+from ..models import FinalizeJob
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def utcnow() -> datetime:
+    """任务表时间列统一使用不带时区的 UTC 时间。"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class FinalizeJobRepository(BaseRepository[FinalizeJob]):
+    model = FinalizeJob
+
+    async def enqueue(
+        self,
+        *,
+        project_id: str,
+        chapter_number: int,
+        selected_version_id: int,
+        user_id: int,
+        skip_vector_update: bool,
+        max_attempts: int,
+    ) -> FinalizeJob:
+        job = FinalizeJob(
+            id=str(uuid.uuid4()),
+            project_id=project_id,
+            chapter_number=chapter_number,
+            selected_version_id=selected_version_id,
+            user_id=user_id,
+            skip_vector_update=skip_vector_update,
+            status="queued",
+            attempts=0,
+            max_attempts=max_attempts,
+            next_run_at=utcnow(),
+        )
+        return await self.add(job)
+
+    async def find_active(
+        self,
+        *,
+        project_id: str,
+        chapter_number: int,
+        selected_version_id: int,
+    ) -> Optional[FinalizeJob]:
+        """查找同一章节同一版本尚未完成的任务，避免重复入队。"""
+        stmt = select(FinalizeJob).where(
+            FinalizeJob.project_id == project_id,
+            FinalizeJob.chapter_number == chapter_number,
+            FinalizeJob.selected_version_id == selected_version_id,
+            FinalizeJob.status.in_(ACTIVE_STATUSES),
+        )
+        result = await self.session.execute(stmt.limit(1))
+        return result.scalars().first()
+
+    async def claim_next(self, *, worker_id: str, exclude_projects: Collection[str] = ()) -> Optional[FinalizeJob]:
+        """领取一个到期任务；同一项目已有任务在运行时跳过，保证项目内串行。"""
+        running_projects = select(FinalizeJob.project_id).where(FinalizeJob.status == "running")
+        stmt = (
+            select(FinalizeJob.id)
+            .where(
+                FinalizeJob.status == "queued",
+                FinalizeJob.next_run_at <= utcnow(),
+                FinalizeJob.project_id.not_in(running_projects),
+            )
+            .order_by(FinalizeJob.next_run_at, FinalizeJob.created_at)
+            .limit(8)
+        )
+        if exclude_projects:
+            stmt = stmt.where(FinalizeJob.project_id.not_in(list(exclude_projects)))
+        candidates = (await self.session.execute(stmt)).scalars().all()
+        for job_id in candidates:
+            claimed = await self.try_claim(job_id, worker_id=worker_id)
+            if claimed is not None:
+                return claimed
+        return None
+
+    async def try_claim(self, job_id: str, *, worker_id: str) -> Optional[FinalizeJob]:
+        """以条件更新领取指定任务，多个 worker 竞争时只有一个成功。"""
+        now = utcnow()
+        result = await self.session.execute(
+            update(FinalizeJob)
+            .where(FinalizeJob.id == job_id, FinalizeJob.status == "queued")
+            .values(
+                status="running",
+                attempts=FinalizeJob.attempts + 1,
+                started_at=now,
+                worker_id=worker_id,
+            )
+        )
+        await self.session.commit()
+        if result.rowcount != 1:
+            return None
+        return await self.get_by_id(job_id)
+
+    async def has_running(self, project_id: str, *, exclude_job_id: Optional[str] = None) -> bool:
+        stmt = select(FinalizeJob.id).where(
+            FinalizeJob.project_id == project_id,
+            FinalizeJob.status == "running",
+        )
+        if exclude_job_id:
+            stmt = stmt.where(FinalizeJob.id != exclude_job_id)
+        return (await self.session.execute(stmt.limit(1))).first() is not None
+
+    async def mark_succeeded(self, job_id: str, result: Dict[str, Any]) -> None:
+        await self.session.execute(
+            update(FinalizeJob)
+            .where(FinalizeJob.id == job_id)
+            .values(status="succeeded", finished_at=utcnow(), result=result, last_error=None)
+        )
+        await self.session.commit()
+
+    async def mark_failed(self, job_id: str, error: str, *, retry_delay: Optional[float]) -> str:
+        """记录失败；给定 retry_delay 时回到队列等待重试，否则标记为最终失败。返回新状态。"""
+        values: Dict[str, Any] = {"last_error": error[:2000]}
+        if retry_delay is None:
+            values.update(status="failed", finished_at=utcnow())
+        else:
+            values.update(status="queued", next_run_at=utcnow() + timedelta(seconds=retry_delay))
+        await self.session.execute(update(FinalizeJob).where(FinalizeJob.id == job_id).values(**values))
+        await self.session.commit()
+        return values["status"]
+
+    async def release(self, job_id: str) -> None:
+        """worker 停止时归还正在执行的任务，不计入重试次数。"""
+        await self.session.execute(
+            update(FinalizeJob)
+            .where(FinalizeJob.id == job_id, FinalizeJob.status == "running")
+            .values(status="queued", attempts=FinalizeJob.attempts - 1, next_run_at=utcnow(), worker_id=None)
+        )
+        await self.session.commit()
+
+    async def requeue_stale(self, *, stale_after_seconds: float) -> int:
+        """运行超时的任务视为 worker 已退出，重新入队。"""
+        deadline = utcnow() - timedelta(seconds=stale_after_seconds)
+        result = await self.session.execute(
+            update(FinalizeJob)
+            .where(FinalizeJob.status == "running", FinalizeJob.started_at < deadline)
+            .values(status="queued", next_run_at=utcnow(), last_error="worker 超时未完成，已重新入队")
+        )
+        await self.session.commit()
+        return result.rowcount or 0
+
+    async def list_running_workers(self) -> List[str]:
+        """返回持有运行中任务的 worker_id，供判断执行进程是否已退出。"""
+        stmt = select(FinalizeJob.worker_id).where(
+            FinalizeJob.status == "running",
+            FinalizeJob.worker_id.is_not(None),
+        )
+        return list((await self.session.execute(stmt.distinct())).scalars().all())
+
+    async def requeue_workers(self, worker_ids: Collection[str]) -> int:
+        """已确认退出的 worker 持有的运行中任务立即重新入队，不必等待运行超时。"""
+        if not worker_ids:
+            return 0
+        result = await self.session.execute(
+            update(FinalizeJob)
+            .where(FinalizeJob.status == "running", FinalizeJob.worker_id.in_(list(worker_ids)))
+            .values(status="queued", next_run_at=utcnow(), worker_id=None, last_error="worker 进程已退出，已重新入队")
+        )
+        await self.session.commit()
+        return result.rowcount or 0
+
+    async def get_by_id(self, job_id: str) -> Optional[FinalizeJob]:
+        return await self.session.get(FinalizeJob, job_id, populate_existing=True)
+
+    async def list_for_project(self, project_id: str, *, limit: int = 20) -> Iterable[FinalizeJob]:
+        stmt = (
+            select(FinalizeJob)
+            .where(FinalizeJob.project_id == project_id)
+            .order_by(FinalizeJob.created_at.desc())
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
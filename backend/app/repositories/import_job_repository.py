@@ -0,0 +1,132 @@
+# AIMETA P=导入任务仓库_进度更新与取消|R=创建_开始_进度_心跳_记录项目_完成失败取消_中断回收_查询|NR=不含导入执行逻辑|E=ImportJobRepository|X=internal|A=仓库类|D=sqlalchemy|S=db|RD=./README.ai
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+
+from .base import BaseRepository
+from .finalize_job_repository import utcnow
+from ..models import ImportJob
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class ImportJobRepository(BaseRepository[ImportJob]):
+    model = ImportJob
+
+    async def create(self, *, user_id: int, filename: str, file_size: int, worker_id: str) -> ImportJob:
+        job = ImportJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            filename=filename,
+            file_size=file_size,
+            status="queued",
+            worker_id=worker_id,
+            heartbeat_at=utcnow(),
+        )
+        return await self.add(job)
+
+    async def mark_running(self, job_id: str) -> bool:
+        """开始执行；任务已在排队期间被取消时返回 False。"""
+        now = utcnow()
+        result = await self.session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status == "queued", ImportJob.cancel_requested.is_(False))
+            .values(status="running", started_at=now, heartbeat_at=now)
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+    async def report_progress(self, job_id: str, *, stage: str, done: int, total: int) -> bool:
+        """写入阶段进度并刷新心跳，返回是否已请求取消。"""
+        await self.session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status == "running")
+            .values(stage=stage, progress_done=done, progress_total=total, heartbeat_at=utcnow())
+        )
+        await self.session.commit()
+        result = await self.session.execute(select(ImportJob.cancel_requested).where(ImportJob.id == job_id))
+        return bool(result.scalar())
+
+    async def heartbeat(self, job_id: str) -> bool:
+        """排队及长时间无进度的阶段（LLM 分析）定期刷新心跳，返回是否已请求取消。"""
+        await self.session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status.in_(ACTIVE_STATUSES))
+            .values(heartbeat_at=utcnow())
+        )
+        await self.session.commit()
+        result = await self.session.execute(select(ImportJob.cancel_requested).where(ImportJob.id == job_id))
+        return bool(result.scalar())
+
+    async def set_project(self, job_id: str, project_id: str) -> None:
+        """项目创建后立即记录，执行进程意外退出时据此删除写了一半的项目。"""
+        await self.session.execute(
+            update(ImportJob).where(ImportJob.id == job_id).values(project_id=project_id, heartbeat_at=utcnow())
+        )
+        await self.session.commit()
+
+    async def request_cancel(self, job_id: str) -> None:
+        await self.session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status.in_(ACTIVE_STATUSES))
+            .values(cancel_requested=True)
+        )
+        await self.session.commit()
+
+    async def finish(
+        self,
+        job_id: str,
+        status: str,
+        *,
+        project_id: Optional[str] = None,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """以 succeeded / failed / cancelled 结束任务；未成功的任务的项目已被删除，清空 project_id。"""
+        values: Dict[str, Any] = {"status": status, "finished_at": utcnow(), "heartbeat_at": utcnow()}
+        if status != "succeeded":
+            values["project_id"] = None
+        elif project_id is not None:
+            values["project_id"] = project_id
+        if result is not None:
+            values["result"] = result
+        if error is not None:
+            values["last_error"] = error[:2000]
+        await self.session.execute(
+            update(ImportJob).where(ImportJob.id == job_id, ImportJob.status.in_(ACTIVE_STATUSES)).values(**values)
+        )
+        await self.session.commit()
+
+    async def list_active(self) -> List[ImportJob]:
+        result = await self.session.execute(select(ImportJob).where(ImportJob.status.in_(ACTIVE_STATUSES)))
+        return list(result.scalars().all())
+
+    async def mark_interrupted(self, job_id: str, *, error: str) -> bool:
+        """执行进程已退出的任务标记为失败（其项目由调用方删除）；任务已结束时返回 False。"""
+        result = await self.session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.status.in_(ACTIVE_STATUSES))
+            .values(status="failed", finished_at=utcnow(), last_error=error, project_id=None)
+        )
+        await self.session.commit()
+        return result.rowcount == 1
+
+    async def get_by_id(self, job_id: str) -> Optional[ImportJob]:
+        return await self.session.get(ImportJob, job_id, populate_existing=True)
+
+    async def get_for_user(self, job_id: str, user_id: int) -> Optional[ImportJob]:
+        job = await self.get_by_id(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    async def list_for_user(self, user_id: int, *, limit: int = 20) -> Iterable[ImportJob]:
+        stmt = (
+            select(ImportJob)
+            .where(ImportJob.user_id == user_id)
+            .order_by(ImportJob.created_at.desc())
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
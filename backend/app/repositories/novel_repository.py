@@ -1,21 +1,59 @@
-# AIMETA P=小说仓库_小说和章节数据访问|R=小说CRUD_章节CRUD|NR=不含业务逻辑|E=NovelRepository|X=internal|A=仓库类|D=sqlalchemy|S=db|RD=./README.ai
-from typing import Iterable, Optional
+# AIMETA P=小说仓库_小说和章节数据访问|R=小说CRUD_章节CRUD_分层加载|NR=不含业务逻辑|E=NovelRepository_ProjectLoad|X=internal|A=仓库类|D=sqlalchemy|S=db|RD=./README.ai
+from enum import Enum
+from typing import Iterable, List, Optional
 
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from .base import BaseRepository
-from ..models import Chapter, NovelProject
+from ..models import Chapter, ChapterOutline, ChapterVersion, NovelProject
+
+
+class ProjectLoad(str, Enum):
+    """
+    项目加载层级
+
+    - OWNER: 仅项目行，用于所有权校验和读写项目自身字段；
+    - METADATA: 蓝图、角色、关系、大纲和章节（含选中版本元数据），
+      不加载版本列表、评审和对话，选中版本正文默认延迟；
+    - FULL: 完整对象图（含全部版本、评审和对话），用于完整序列化、导出和级联删除。
+    """
+
+    OWNER = "owner"
+    METADATA = "metadata"
+    FULL = "full"
 
 
 class NovelRepository(BaseRepository[NovelProject]):
     model = NovelProject
 
-    async def get_by_id(self, project_id: str) -> Optional[NovelProject]:
-        stmt = (
-            select(NovelProject)
-            .where(NovelProject.id == project_id)
-            .options(
+    async def get_by_id(
+        self,
+        project_id: str,
+        load: ProjectLoad = ProjectLoad.FULL,
+        *,
+        include_selected_content: bool = False,
+    ) -> Optional[NovelProject]:
+        """
+        按层级加载项目
+
+        include_selected_content 仅对 METADATA 生效：为 False 时选中版本的 content
+        以 raiseload 方式延迟，误访问会直接报错而不是隐式查询。
+        """
+        stmt = select(NovelProject).where(NovelProject.id == project_id)
+        if load == ProjectLoad.METADATA:
+            selected_version = selectinload(NovelProject.chapters).selectinload(Chapter.selected_version)
+            if not include_selected_content:
+                selected_version = selected_version.defer(ChapterVersion.content, raiseload=True)
+            stmt = stmt.options(
+                selectinload(NovelProject.blueprint),
+                selectinload(NovelProject.characters),
+                selectinload(NovelProject.relationships_),
+                selectinload(NovelProject.outlines),
+                selected_version,
+            )
+        elif load == ProjectLoad.FULL:
+            stmt = stmt.options(
                 selectinload(NovelProject.blueprint),
                 selectinload(NovelProject.characters),
                 selectinload(NovelProject.relationships_),
@@ -25,10 +63,66 @@ class NovelRepository(BaseRepository[NovelProject]):
                 selectinload(NovelProject.chapters).selectinload(Chapter.evaluations),
                 selectinload(NovelProject.chapters).selectinload(Chapter.selected_version),
             )
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
+
+    async def get_chapter(self, project_id: str, chapter_number: int) -> Optional[Chapter]:
+        """加载单个章节及其全部版本、评审和选中版本。"""
+        stmt = (
+            select(Chapter)
+            .where(Chapter.project_id == project_id, Chapter.chapter_number == chapter_number)
+            .options(
+                selectinload(Chapter.versions),
+                selectinload(Chapter.evaluations),
+                selectinload(Chapter.selected_version),
+            )
         )
         result = await self.session.execute(stmt)
         return result.scalars().first()
 
+    async def get_chapters(
+        self,
+        project_id: str,
+        chapter_numbers: Iterable[int],
+        *,
+        include_versions: bool = True,
+    ) -> List[Chapter]:
+        """
+        按章节号批量加载章节，结果始终以数据库为准（populate_existing）
+
+        include_versions 为 False 时只加载选中版本元数据，正文以 raiseload 方式延迟。
+        """
+        numbers = list(chapter_numbers)
+        if not numbers:
+            return []
+        if include_versions:
+            options = (
+                selectinload(Chapter.versions),
+                selectinload(Chapter.evaluations),
+                selectinload(Chapter.selected_version),
+            )
+        else:
+            options = (selectinload(Chapter.selected_version).defer(ChapterVersion.content, raiseload=True),)
+        stmt = (
+            select(Chapter)
+            .where(Chapter.project_id == project_id, Chapter.chapter_number.in_(numbers))
+            .order_by(Chapter.chapter_number)
+            .options(*options)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def list_chapter_numbers(self, project_id: str) -> List[int]:
+        """返回有大纲或有章节记录的全部章节号（升序），只查询整数列。"""
+        outline_numbers = await self.session.execute(
+            select(ChapterOutline.chapter_number).where(ChapterOutline.project_id == project_id)
+        )
+        chapter_numbers = await self.session.execute(
+            select(Chapter.chapter_number).where(Chapter.project_id == project_id)
+        )
+        return sorted(set(outline_numbers.scalars()) | set(chapter_numbers.scalars()))
+
     async def list_by_user(self, user_id: int) -> Iterable[NovelProject]:
         result = await self.session.execute(
             select(NovelProject)
@@ -1,4 +1,5 @@
 # AIMETA P=小说模式_小说和章节请求响应|R=小说结构_章节结构|NR=不含业务逻辑|E=NovelSchema_ChapterSchema|X=internal|A=Pydantic模式|D=pydantic|S=none|RD=./README.ai
+from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
@@ -92,6 +93,7 @@ class NovelProject(BaseModel):
     title: str
     initial_prompt: str
     status: str
+    revision: int = 0
     conversation_history: List[Dict[str, Any]] = []
     blueprint: Optional[Blueprint] = None
     chapters: List[Chapter] = []
@@ -100,6 +102,34 @@ class NovelProject(BaseModel):
         from_attributes = True
 
 
+class ProjectResponseMode(str, Enum):
+    """写作接口的响应模式：full 返回完整项目，delta 只返回变更的章节。"""
+
+    FULL = "full"
+    DELTA = "delta"
+
+
+class ProjectChapterDelta(BaseModel):
+    """增量响应：本次操作涉及的章节及操作后的项目修订号。"""
+
+    project_id: str
+    revision: int
+    chapters: List[Chapter] = []
+    removed_chapter_numbers: List[int] = []
+
+
+class ChapterPage(BaseModel):
+    """按章节号分页读取的章节列表。"""
+
+    project_id: str
+    revision: int
+    total: int
+    start: int
+    limit: int
+    next_start: Optional[int] = Field(default=None, description="下一页起始章节号，没有更多时为空")
+    chapters: List[Chapter] = []
+
+
 class NovelProjectSummary(BaseModel):
     id: str
     title: str
@@ -148,6 +178,7 @@ class GenerateChapterRequest(BaseModel):
 class FlowConfig(BaseModel):
     preset: str = Field(default="basic", description="basic|enhanced|ultimate|custom")
     versions: Optional[int] = Field(default=None, description="生成版本数量")
+    parallel_versions: Optional[bool] = Field(default=None, description="是否并发生成多个版本")
     enable_preview: Optional[bool] = Field(default=None, description="是否启用预演生成")
     enable_optimizer: Optional[bool] = Field(default=None, description="是否启用优化器")
     enable_consistency: Optional[bool] = Field(default=None, description="是否启用一致性检查")
@@ -194,6 +225,47 @@ class FinalizeChapterResponse(BaseModel):
     result: Dict[str, Any]
 
 
+class FinalizeJobStatus(BaseModel):
+    """后台定稿任务状态"""
+    id: str
+    project_id: str
+    chapter_number: int
+    selected_version_id: int
+    status: str = Field(description="queued / running / succeeded / failed")
+    attempts: int
+    max_attempts: int
+    next_run_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ImportJobStatus(BaseModel):
+    """后台小说导入任务状态"""
+    id: str
+    filename: str
+    file_size: int
+    status: str = Field(description="queued / running / succeeded / failed / cancelled")
+    stage: Optional[str] = Field(default=None, description="parse / census / profiling / persist / ingest")
+    progress_done: int = 0
+    progress_total: int = 0
+    cancel_requested: bool = False
+    project_id: Optional[str] = None
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class SelectVersionRequest(BaseModel):
     chapter_number: int
     version_index: int
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import AdminSetting
 from ..repositories.admin_setting_repository import AdminSettingRepository
+from .config_cache import invalidate_admin_setting
 
 
 class AdminSettingService:
@@ -26,3 +27,4 @@ class AdminSettingService:
             setting = AdminSetting(key=key, value=value)
             await self.repo.add(setting)
         await self.session.commit()
+        invalidate_admin_setting(key)
@@ -18,9 +18,9 @@ import smtplib
 from ..core.config import settings
 from ..core.security import create_access_token, hash_password, verify_password
 from ..models import EmailVerificationCode, User
-from ..repositories.system_config_repository import SystemConfigRepository
 from ..repositories.user_repository import UserRepository
 from ..schemas.user import AuthOptions, Token, UserCreate, UserInDB, UserRegistration
+from .config_cache import get_system_config_value
 
 
 _CODE_TTL_SECONDS = 300
@@ -33,7 +33,6 @@ class AuthService:
     def __init__(self, session):
         self.session = session
         self.user_repo = UserRepository(session)
-        self.system_config_repo = SystemConfigRepository(session)
         self._code_ttl = _CODE_TTL_SECONDS
         self._send_interval = _SEND_INTERVAL_SECONDS
 
@@ -148,9 +147,9 @@ class AuthService:
         ]
         configs = {}
         for key in keys:
-            config = await self.system_config_repo.get_by_key(key)
-            if config:
-                configs[key] = config.value
+            value = await get_system_config_value(self.session, key)
+            if value is not None:
+                configs[key] = value
 
         required_keys = {"smtp.server", "smtp.port", "smtp.username", "smtp.password", "smtp.from"}
         if not required_keys.issubset(configs.keys()):
@@ -353,8 +352,7 @@ class AuthService:
         return await self.create_access_token(user)
 
     async def _get_config_value(self, key: str) -> Optional[str]:
-        config = await self.system_config_repo.get_by_key(key)
-        return config.value if config else None
+        return await get_system_config_value(self.session, key)
 
     async def get_config_value(self, key: str) -> Optional[str]:
         """对外暴露的配置读取接口，便于路由层复用。"""
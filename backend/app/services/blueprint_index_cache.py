@@ -0,0 +1,106 @@
+# AIMETA P=项目蓝图索引缓存_只读蓝图与角色名索引|R=按项目修订号缓存_只读蓝图视图_角色名索引复用|NR=不含蓝图读写|E=ProjectBlueprint_BlueprintIndexCache_get_blueprint_index_cache|X=internal|A=缓存工具|D=pyahocorasick可选|S=memory|RD=./README.ai
+"""
+项目蓝图索引缓存
+
+章节生成的每个版本都要做登场检测和护栏检查。这里按项目缓存两样东西：
+只读蓝图视图（utils.frozen）和编译好的角色名索引（utils.name_index），缓存键为项目修订号。
+
+- 修订号未变时直接复用，不再重建蓝图字典；
+- 修订号变化时重建蓝图视图。角色名列表没有变化时沿用原索引，不重新编译
+  （定稿、选版本等操作也会递增修订号，但不会改动角色）；
+- 按最近使用淘汰，最多保留 max_projects 个项目。
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from ..utils.frozen import ReadOnlyDict, freeze
+from ..utils.name_index import CharacterNameIndex
+
+
+@dataclass(frozen=True)
+class ProjectBlueprint:
+    revision: int
+    blueprint: ReadOnlyDict
+    name_index: CharacterNameIndex
+
+    @property
+    def character_names(self) -> Tuple[str, ...]:
+        return self.name_index.names
+
+
+def character_names(blueprint: Mapping[str, Any]) -> Tuple[str, ...]:
+    return tuple(
+        dict.fromkeys(c.get("name") for c in blueprint.get("characters") or () if c.get("name"))
+    )
+
+
+class BlueprintIndexCache:
+    """按项目缓存只读蓝图与角色名索引，记录命中与重建次数。"""
+
+    def __init__(self, max_projects: int = 256) -> None:
+        self.max_projects = max_projects
+        self._entries: "OrderedDict[str, ProjectBlueprint]" = OrderedDict()
+        self.hits = 0
+        self.rebuilds = 0
+        self.index_builds = 0
+
+    def get(
+        self,
+        project_id: str,
+        revision: int,
+        build: Callable[[], Dict[str, Any]],
+    ) -> ProjectBlueprint:
+        """返回项目在 revision 时的蓝图视图；未命中时调用 build 生成原始蓝图字典。"""
+        entry = self._entries.get(project_id)
+        if entry is not None and entry.revision == revision:
+            self.hits += 1
+            self._entries.move_to_end(project_id)
+            return entry
+
+        blueprint = freeze(build())
+        names = character_names(blueprint)
+        if entry is not None and entry.name_index.names == names:
+            name_index = entry.name_index
+        else:
+            name_index = CharacterNameIndex(names)
+            self.index_builds += 1
+        self.rebuilds += 1
+        entry = ProjectBlueprint(revision=revision, blueprint=blueprint, name_index=name_index)
+        self._entries[project_id] = entry
+        self._entries.move_to_end(project_id)
+        while len(self._entries) > self.max_projects:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, project_id: str) -> None:
+        self._entries.pop(project_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "rebuilds": self.rebuilds,
+            "index_builds": self.index_builds,
+        }
+
+
+_CACHE: Optional[BlueprintIndexCache] = None
+
+
+def get_blueprint_index_cache() -> BlueprintIndexCache:
+    """进程级蓝图索引缓存，懒加载。"""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = BlueprintIndexCache()
+    return _CACHE
+
+
+__all__ = [
+    "BlueprintIndexCache",
+    "ProjectBlueprint",
+    "character_names",
+    "get_blueprint_index_cache",
+]
@@ -14,7 +14,9 @@ import logging
 from typing import Optional, Dict, Any, List
 import json
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from ..models.chapter_blueprint import (
     ChapterBlueprint, 
@@ -142,7 +144,7 @@ class BlueprintService:
     
     def __init__(
         self,
-        db: Session,
+        db: AsyncSession,
         llm_service: LLMService
     ):
         self.db = db
@@ -150,27 +152,33 @@ class BlueprintService:
     
     # ==================== CRUD 操作 ====================
     
-    def get_blueprint(
+    async def get_blueprint(
         self,
         project_id: str,
         chapter_number: int
     ) -> Optional[ChapterBlueprint]:
         """获取章节蓝图"""
-        return self.db.query(ChapterBlueprint).filter(
-            ChapterBlueprint.project_id == project_id,
-            ChapterBlueprint.chapter_number == chapter_number
-        ).first()
+        result = await self.db.execute(
+            select(ChapterBlueprint).where(
+                ChapterBlueprint.project_id == project_id,
+                ChapterBlueprint.chapter_number == chapter_number
+            )
+        )
+        return result.scalars().first()
     
-    def get_all_blueprints(
+    async def get_all_blueprints(
         self,
         project_id: str
     ) -> List[ChapterBlueprint]:
         """获取项目所有章节蓝图"""
-        return self.db.query(ChapterBlueprint).filter(
-            ChapterBlueprint.project_id == project_id
-        ).order_by(ChapterBlueprint.chapter_number).all()
+        result = await self.db.execute(
+            select(ChapterBlueprint)
+            .where(ChapterBlueprint.project_id == project_id)
+            .order_by(ChapterBlueprint.chapter_number)
+        )
+        return list(result.scalars().all())
     
-    def create_blueprint(
+    async def create_blueprint(
         self,
         project_id: str,
         chapter_number: int,
@@ -183,10 +191,10 @@ class BlueprintService:
             **kwargs
         )
         self.db.add(blueprint)
-        self.db.flush()
+        await self.db.flush()
         return blueprint
     
-    def update_blueprint(
+    async def update_blueprint(
         self,
         blueprint: ChapterBlueprint,
         **kwargs
@@ -195,19 +203,19 @@ class BlueprintService:
         for key, value in kwargs.items():
             if hasattr(blueprint, key):
                 setattr(blueprint, key, value)
-        self.db.flush()
+        await self.db.flush()
         return blueprint
     
-    def delete_blueprint(
+    async def delete_blueprint(
         self,
         project_id: str,
         chapter_number: int
     ) -> bool:
         """删除章节蓝图"""
-        blueprint = self.get_blueprint(project_id, chapter_number)
+        blueprint = await self.get_blueprint(project_id, chapter_number)
         if blueprint:
-            self.db.delete(blueprint)
-            self.db.flush()
+            await self.db.delete(blueprint)
+            await self.db.flush()
             return True
         return False
     
@@ -223,39 +231,36 @@ class BlueprintService:
         从大纲自动生成章节蓝图
         """
         # 获取项目信息
-        project = self.db.query(NovelProject).filter(
-            NovelProject.id == project_id
-        ).first()
+        project = await self._get_project_with_blueprint(project_id)
         
         if not project or not project.blueprint:
             logger.error(f"项目不存在或无蓝图: {project_id}")
             return None
         
-        # 获取章节大纲
-        outline = self.db.query(ChapterOutline).filter(
-            ChapterOutline.project_id == project_id,
-            ChapterOutline.chapter_number == chapter_number
-        ).first()
+        # 一次取出当前章及前后章大纲
+        outline_result = await self.db.execute(
+            select(ChapterOutline).where(
+                ChapterOutline.project_id == project_id,
+                ChapterOutline.chapter_number.between(chapter_number - 1, chapter_number + 1)
+            )
+        )
+        outlines = {o.chapter_number: o for o in outline_result.scalars().all()}
+        outline = outlines.get(chapter_number)
         
         if not outline:
             logger.error(f"章节大纲不存在: {project_id}/{chapter_number}")
             return None
         
         # 获取前后章节信息
-        prev_outline = self.db.query(ChapterOutline).filter(
-            ChapterOutline.project_id == project_id,
-            ChapterOutline.chapter_number == chapter_number - 1
-        ).first()
-        
-        next_outline = self.db.query(ChapterOutline).filter(
-            ChapterOutline.project_id == project_id,
-            ChapterOutline.chapter_number == chapter_number + 1
-        ).first()
+        prev_outline = outlines.get(chapter_number - 1)
+        next_outline = outlines.get(chapter_number + 1)
         
         # 计算总章节数
-        total_chapters = self.db.query(ChapterOutline).filter(
-            ChapterOutline.project_id == project_id
-        ).count()
+        total_chapters = await self.db.scalar(
+            select(func.count()).select_from(ChapterOutline).where(
+                ChapterOutline.project_id == project_id
+            )
+        ) or 0
         
         # 生成蓝图
         prompt = GENERATE_BLUEPRINT_PROMPT.format(
@@ -281,11 +286,11 @@ class BlueprintService:
                 data = self._parse_json_response(response)
                 if data:
                     # 创建或更新蓝图
-                    blueprint = self.get_blueprint(project_id, chapter_number)
+                    blueprint = await self.get_blueprint(project_id, chapter_number)
                     if blueprint:
-                        return self.update_blueprint(blueprint, **data)
+                        return await self.update_blueprint(blueprint, **data)
                     else:
-                        return self.create_blueprint(project_id, chapter_number, **data)
+                        return await self.create_blueprint(project_id, chapter_number, **data)
         
         except Exception as e:
             logger.error(f"生成章节蓝图失败: {e}")
@@ -301,18 +306,19 @@ class BlueprintService:
         为项目所有章节生成蓝图
         """
         # 获取项目信息
-        project = self.db.query(NovelProject).filter(
-            NovelProject.id == project_id
-        ).first()
+        project = await self._get_project_with_blueprint(project_id)
         
         if not project or not project.blueprint:
             logger.error(f"项目不存在或无蓝图: {project_id}")
             return []
         
         # 获取所有章节大纲
-        outlines = self.db.query(ChapterOutline).filter(
-            ChapterOutline.project_id == project_id
-        ).order_by(ChapterOutline.chapter_number).all()
+        outline_result = await self.db.execute(
+            select(ChapterOutline)
+            .where(ChapterOutline.project_id == project_id)
+            .order_by(ChapterOutline.chapter_number)
+        )
+        outlines = outline_result.scalars().all()
         
         if not outlines:
             return []
@@ -342,50 +348,66 @@ class BlueprintService:
             if response:
                 data_list = self._parse_json_response(response)
                 if isinstance(data_list, list):
+                    # 已有蓝图一次查出，避免逐章查询
+                    existing = {
+                        bp.chapter_number: bp
+                        for bp in await self.get_all_blueprints(project_id)
+                    }
                     blueprints = []
                     for data in data_list:
                         chapter_number = data.pop("chapter_number", None)
                         if chapter_number:
-                            blueprint = self.get_blueprint(project_id, chapter_number)
+                            blueprint = existing.get(chapter_number)
                             if blueprint:
-                                blueprint = self.update_blueprint(blueprint, **data)
+                                blueprint = await self.update_blueprint(blueprint, **data)
                             else:
-                                blueprint = self.create_blueprint(
+                                blueprint = await self.create_blueprint(
                                     project_id, chapter_number, **data
                                 )
                             blueprints.append(blueprint)
                     
-                    self.db.commit()
+                    await self.db.commit()
                     return blueprints
         
         except Exception as e:
             logger.error(f"批量生成章节蓝图失败: {e}")
-            self.db.rollback()
+            await self.db.rollback()
         
         return []
     
+    async def _get_project_with_blueprint(self, project_id: str) -> Optional[NovelProject]:
+        """获取项目并预加载小说蓝图（异步会话不能懒加载关系）"""
+        result = await self.db.execute(
+            select(NovelProject)
+            .options(selectinload(NovelProject.blueprint))
+            .where(NovelProject.id == project_id)
+        )
+        return result.scalars().first()
+    
     # ==================== 模板管理 ====================
     
-    def get_template(self, template_id: int) -> Optional[BlueprintTemplate]:
+    async def get_template(self, template_id: int) -> Optional[BlueprintTemplate]:
         """获取蓝图模板"""
-        return self.db.query(BlueprintTemplate).filter(
-            BlueprintTemplate.id == template_id
-        ).first()
+        return await self.db.get(BlueprintTemplate, template_id)
     
-    def get_system_templates(self) -> List[BlueprintTemplate]:
+    async def get_system_templates(self) -> List[BlueprintTemplate]:
         """获取系统预设模板"""
-        return self.db.query(BlueprintTemplate).filter(
-            BlueprintTemplate.template_type == "system"
-        ).all()
+        result = await self.db.execute(
+            select(BlueprintTemplate).where(BlueprintTemplate.template_type == "system")
+        )
+        return list(result.scalars().all())
     
-    def get_user_templates(self, user_id: int) -> List[BlueprintTemplate]:
+    async def get_user_templates(self, user_id: int) -> List[BlueprintTemplate]:
         """获取用户自定义模板"""
-        return self.db.query(BlueprintTemplate).filter(
-            BlueprintTemplate.user_id == user_id,
-            BlueprintTemplate.template_type == "user"
-        ).all()
+        result = await self.db.execute(
+            select(BlueprintTemplate).where(
+                BlueprintTemplate.user_id == user_id,
+                BlueprintTemplate.template_type == "user"
+            )
+        )
+        return list(result.scalars().all())
     
-    def create_template(
+    async def create_template(
         self,
         name: str,
         config: Dict,
@@ -401,33 +423,33 @@ class BlueprintService:
             config=config
         )
         self.db.add(template)
-        self.db.flush()
+        await self.db.flush()
         return template
     
-    def apply_template(
+    async def apply_template(
         self,
         project_id: str,
         chapter_number: int,
         template_id: int
     ) -> Optional[ChapterBlueprint]:
         """应用模板到章节"""
-        template = self.get_template(template_id)
+        template = await self.get_template(template_id)
         if not template:
             return None
         
-        blueprint = self.get_blueprint(project_id, chapter_number)
+        blueprint = await self.get_blueprint(project_id, chapter_number)
         if blueprint:
-            return self.update_blueprint(blueprint, **template.config)
+            return await self.update_blueprint(blueprint, **template.config)
         else:
-            return self.create_blueprint(project_id, chapter_number, **template.config)
+            return await self.create_blueprint(project_id, chapter_number, **template.config)
     
     # ==================== 节奏分析 ====================
     
-    def analyze_pacing(self, project_id: str) -> Dict[str, Any]:
+    async def analyze_pacing(self, project_id: str) -> Dict[str, Any]:
         """
         分析项目的节奏分布
         """
-        blueprints = self.get_all_blueprints(project_id)
+        blueprints = await self.get_all_blueprints(project_id)
         
         if not blueprints:
             return {"error": "无章节蓝图"}
@@ -514,7 +536,7 @@ class BlueprintService:
             logger.error(f"JSON解析失败: {e}")
             return None
     
-    def init_system_templates(self):
+    async def init_system_templates(self):
         """初始化系统预设模板"""
         templates = [
             {
@@ -559,17 +581,13 @@ class BlueprintService:
             }
         ]
         
+        existing_names = {template.name for template in await self.get_system_templates()}
         for t in templates:
-            existing = self.db.query(BlueprintTemplate).filter(
-                BlueprintTemplate.name == t["name"],
-                BlueprintTemplate.template_type == "system"
-            ).first()
-            
-            if not existing:
-                self.create_template(
+            if t["name"] not in existing_names:
+                await self.create_template(
                     name=t["name"],
                     description=t["description"],
                     config=t["config"]
                 )
         
-        self.db.commit()
+        await self.db.commit()
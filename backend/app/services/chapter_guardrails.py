@@ -1,4 +1,4 @@
-# AIMETA P=章节护栏_后置一致性检查|R=禁止角色检测_全知视角检测_登场协议检查|NR=不含LLM调用|E=none|X=internal|A=检测_验证|D=re|S=none|RD=./README.ai
+# AIMETA P=章节护栏_后置一致性检查|R=禁止角色检测_全知视角检测_登场协议检查|NR=不含LLM调用|E=none|X=internal|A=检测_验证|D=re,utils.name_index|S=none|RD=./README.ai
 """
 ChapterGuardrails: 章节后置一致性检查服务
 
@@ -7,11 +7,22 @@ ChapterGuardrails: 章节后置一致性检查服务
 2. 检测全知视角的 cue 词
 3. 检测新角色登场是否符合协议
 4. 输出违规列表，供自动修复使用
+
+角色名检测使用 CharacterNameIndex 一遍扫描全部名字；调用方可传入按项目缓存的索引，
+未传入时按名字集合缓存临时索引，避免每个版本重新编译。
 """
 
 import re
 from dataclasses import dataclass, field
-from typing import List, Optional, Set
+from functools import lru_cache
+from typing import List, Optional, Set, Tuple
+
+from ..utils.name_index import CharacterNameIndex
+
+
+@lru_cache(maxsize=128)
+def _names_index(names: Tuple[str, ...]) -> CharacterNameIndex:
+    return CharacterNameIndex(names)
 
 
 @dataclass
@@ -101,6 +112,7 @@ class ChapterGuardrails:
         forbidden_characters: List[str],
         allowed_new_characters: Optional[List[str]] = None,
         pov: Optional[str] = None,
+        name_index: Optional[CharacterNameIndex] = None,
     ) -> GuardrailResult:
         """
         执行护栏检查。
@@ -110,14 +122,19 @@ class ChapterGuardrails:
             forbidden_characters: 禁止出现的角色名列表
             allowed_new_characters: 本章允许登场的新角色列表
             pov: 本章视角角色名
+            name_index: 蓝图角色名索引；不在索引中的名字会单独查找
 
         Returns:
             GuardrailResult: 检查结果
         """
         result = GuardrailResult(passed=True)
+        if name_index is None:
+            name_index = _names_index(
+                tuple(sorted({n for n in (forbidden_characters or []) + (allowed_new_characters or []) if n}))
+            )
 
         # A) 检测禁止角色名
-        self._check_forbidden_names(generated_text, forbidden_characters, result)
+        self._check_forbidden_names(generated_text, forbidden_characters, result, name_index)
 
         # B) 检测全知视角 cue
         self._check_omniscient_cues(generated_text, result)
@@ -125,32 +142,31 @@ class ChapterGuardrails:
         # C) 检测新角色登场协议
         if allowed_new_characters:
             self._check_character_introduction(
-                generated_text, allowed_new_characters, result
+                generated_text, allowed_new_characters, result, name_index
             )
 
         return result
 
     def _check_forbidden_names(
-        self, text: str, forbidden_characters: List[str], result: GuardrailResult
+        self,
+        text: str,
+        forbidden_characters: List[str],
+        result: GuardrailResult,
+        name_index: Optional[CharacterNameIndex] = None,
     ):
         """检测禁止角色名"""
-        for name in forbidden_characters:
-            if not name:
-                continue
-            # 使用正则进行精确匹配（避免部分匹配）
-            pattern = re.compile(re.escape(name))
-            for match in pattern.finditer(text):
-                pos = match.start()
-                context = self._extract_context(text, pos)
-                result.add_violation(
-                    Violation(
-                        type="forbidden_name",
-                        severity="high",
-                        description=f"出现了禁止角色「{name}」的名字",
-                        position=pos,
-                        context=context,
-                    )
+        index = name_index or _names_index(tuple(sorted({n for n in forbidden_characters if n})))
+        for hit in index.find_all(text, forbidden_characters):
+            context = self._extract_context(text, hit.start)
+            result.add_violation(
+                Violation(
+                    type="forbidden_name",
+                    severity="high",
+                    description=f"出现了禁止角色「{hit.name}」的名字",
+                    position=hit.start,
+                    context=context,
                 )
+            )
 
     def _check_omniscient_cues(self, text: str, result: GuardrailResult):
         """检测全知视角 cue 词"""
@@ -169,19 +185,17 @@ class ChapterGuardrails:
             )
 
     def _check_character_introduction(
-        self, text: str, new_characters: List[str], result: GuardrailResult
+        self,
+        text: str,
+        new_characters: List[str],
+        result: GuardrailResult,
+        name_index: Optional[CharacterNameIndex] = None,
     ):
         """检测新角色登场是否有介绍"""
-        for name in new_characters:
-            if not name:
-                continue
-            # 找到角色名首次出现的位置
-            pattern = re.compile(re.escape(name))
-            match = pattern.search(text)
-            if not match:
-                continue  # 角色未出现，不算违规
-
-            pos = match.start()
+        index = name_index or _names_index(tuple(sorted({n for n in new_characters if n})))
+        # 找到各角色名首次出现的位置（未出现的角色不在结果中，不算违规）
+        first_positions = index.first_positions(text, new_characters)
+        for name, pos in first_positions.items():
             # 检查前 120 字是否有介绍性词汇
             intro_range = max(0, pos - 120)
             intro_text = text[intro_range:pos]
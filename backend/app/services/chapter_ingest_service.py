@@ -7,8 +7,9 @@ from __future__ import annotations
 全部注释使用中文，方便团队成员阅读理解。
 """
 
+import hashlib
 import logging
-from typing import Dict, List, Optional, Sequence
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from ..core.config import settings
 from ..services.llm_service import LLMService
@@ -45,7 +46,11 @@ class ChapterIngestionService:
         summary: Optional[str],
         user_id: int,
     ) -> None:
-        """将章节正文与摘要写入向量库，供后续 RAG 检索使用。"""
+        """将章节正文与摘要写入向量库，供后续 RAG 检索使用。
+
+        按片段内容哈希与嵌入命名空间（接口类型:模型）比对已入库数据，只对变化的片段重新嵌入，切换嵌入模型后全部重嵌；
+        摘要未变化时跳过。未提供摘要时：正文未变化则保留已有摘要（模型切换时按原文重嵌），正文已变化则删除过期摘要向量。
+        """
         if not settings.vector_store_enabled:
             logger.warning("向量库未启用，跳过章节向量写入: project=%s chapter=%s", project_id, chapter_number)
             return
@@ -64,14 +69,65 @@ class ChapterIngestionService:
             chapter_number,
             len(chunks),
         )
-        await self._vector_store.delete_by_chapters(project_id, [chapter_number])
 
-        chunk_records = []
+        # 与已入库片段按内容哈希与嵌入命名空间比对，只处理发生变化的分块；其他模型生成的向量不可复用
+        namespace = await self._llm_service.get_embedding_namespace(user_id=user_id)
+        existing = {
+            item["id"]: item
+            for item in await self._vector_store.get_chapter_chunks(project_id, chapter_number)
+        }
+        reusable = {
+            item["content_hash"]: item["embedding"]
+            for item in existing.values()
+            if item.get("content_hash") and item.get("embedding") and item.get("embedding_namespace") == namespace
+        }
+        model_changed = any(item.get("embedding_namespace") != namespace for item in existing.values())
+        changed: List[Tuple[int, str, str]] = []
+        current_ids = set()
+        content_changed = False
         for index, chunk_text in enumerate(chunks):
-            embedding = await self._llm_service.get_embedding(
-                chunk_text,
-                user_id=user_id,
-            )
+            record_id = self._chunk_id(project_id, chapter_number, index)
+            current_ids.add(record_id)
+            content_hash = self._content_hash(chunk_text)
+            previous = existing.get(record_id)
+            if not previous or previous.get("content_hash") != content_hash:
+                content_changed = True
+            elif previous.get("chapter_title") == title and previous.get("embedding_namespace") == namespace:
+                continue
+            changed.append((index, chunk_text, content_hash))
+        stale_ids = [record_id for record_id in existing if record_id not in current_ids]
+        content_changed = content_changed or bool(stale_ids)
+
+        # 摘要向量没有独立元数据，按同章节片段判断是否为旧模型生成
+        cleaned_summary = summary.strip() if summary else ""
+        previous_summary = await self._vector_store.get_chapter_summary(project_id, chapter_number)
+        summary_outdated = False
+        if not cleaned_summary and previous_summary:
+            if content_changed:
+                # 正文已变化且尚无新摘要，旧摘要不再对应当前正文
+                summary_outdated = True
+            else:
+                cleaned_summary = previous_summary.get("summary") or ""
+        summary_changed = bool(cleaned_summary) and not (
+            previous_summary
+            and previous_summary.get("summary") == cleaned_summary
+            and previous_summary.get("title") == title
+            and not model_changed
+        )
+
+        # 移位但内容未变的分块复用已有向量，其余片段与摘要合并为一次批量嵌入请求
+        embed_inputs = [chunk_text for _, chunk_text, content_hash in changed if content_hash not in reusable]
+        if summary_changed:
+            embed_inputs.append(cleaned_summary)
+        embeddings = (
+            await self._llm_service.get_embeddings_batch(embed_inputs, user_id=user_id) if embed_inputs else []
+        )
+        fresh = iter(embeddings)
+
+        chunk_records = []
+        for index, chunk_text, content_hash in changed:
+            embedding = reusable.get(content_hash) or next(fresh, None)
+            record_id = self._chunk_id(project_id, chapter_number, index)
             if not embedding:
                 logger.warning(
                     "生成章节片段向量失败，已跳过: project=%s chapter=%s chunk=%s",
@@ -79,8 +135,10 @@ class ChapterIngestionService:
                     chapter_number,
                     index,
                 )
+                # 旧内容已失效，避免检索到过期片段
+                if record_id in existing:
+                    stale_ids.append(record_id)
                 continue
-            record_id = f"{project_id}:{chapter_number}:{index}"
             chunk_records.append(
                 {
                     "id": record_id,
@@ -93,51 +151,57 @@ class ChapterIngestionService:
                     "metadata": {
                         "chunk_id": record_id,
                         "length": len(chunk_text),
+                        "content_hash": content_hash,
+                        "embedding_namespace": namespace,
                     },
                 }
             )
+        summary_embedding = next(fresh, None) if summary_changed else None
 
         if chunk_records:
             await self._vector_store.upsert_chunks(records=chunk_records)
-            logger.info(
-                "章节正文向量写入完成: project=%s chapter=%s 成功片段=%d",
-                project_id,
-                chapter_number,
-                len(chunk_records),
-            )
+        if stale_ids:
+            await self._vector_store.delete_chunks(project_id, stale_ids)
+        if summary_outdated:
+            await self._vector_store.delete_summary(project_id, chapter_number)
+        logger.info(
+            "章节正文向量写入完成: project=%s chapter=%s 未变化=%d 更新=%d 新嵌入=%d 删除=%d",
+            project_id,
+            chapter_number,
+            len(chunks) - len(changed),
+            len(chunk_records),
+            len(embed_inputs) - (1 if summary_changed else 0),
+            len(stale_ids),
+        )
 
-        if summary:
-            cleaned_summary = summary.strip()
-            if cleaned_summary:
-                summary_embedding = await self._llm_service.get_embedding(
-                    cleaned_summary,
-                    user_id=user_id,
+        if cleaned_summary and not summary_changed:
+            logger.info("章节摘要未变化，跳过摘要向量写入: project=%s chapter=%s", project_id, chapter_number)
+        elif summary_changed:
+            if summary_embedding:
+                summary_id = f"{project_id}:{chapter_number}:summary"
+                await self._vector_store.upsert_summaries(
+                    records=[
+                        {
+                            "id": summary_id,
+                            "project_id": project_id,
+                            "chapter_number": chapter_number,
+                            "title": title,
+                            "summary": cleaned_summary,
+                            "embedding": summary_embedding,
+                        }
+                    ]
+                )
+                logger.info(
+                    "章节摘要向量写入完成: project=%s chapter=%s",
+                    project_id,
+                    chapter_number,
+                )
+            else:
+                logger.warning(
+                    "生成章节摘要向量失败，已跳过: project=%s chapter=%s",
+                    project_id,
+                    chapter_number,
                 )
-                if summary_embedding:
-                    summary_id = f"{project_id}:{chapter_number}:summary"
-                    await self._vector_store.upsert_summaries(
-                        records=[
-                            {
-                                "id": summary_id,
-                                "project_id": project_id,
-                                "chapter_number": chapter_number,
-                                "title": title,
-                                "summary": cleaned_summary,
-                                "embedding": summary_embedding,
-                            }
-                        ]
-                    )
-                    logger.info(
-                        "章节摘要向量写入完成: project=%s chapter=%s",
-                        project_id,
-                        chapter_number,
-                    )
-                else:
-                    logger.warning(
-                        "生成章节摘要向量失败，已跳过: project=%s chapter=%s",
-                        project_id,
-                        chapter_number,
-                    )
 
     async def delete_chapters(self, project_id: str, chapter_numbers: Sequence[int]) -> None:
         """从向量库中删除指定章节的所有片段与摘要。"""
@@ -150,6 +214,15 @@ class ChapterIngestionService:
         )
         await self._vector_store.delete_by_chapters(project_id, list(chapter_numbers))
 
+    @staticmethod
+    def _chunk_id(project_id: str, chapter_number: int, index: int) -> str:
+        return f"{project_id}:{chapter_number}:{index}"
+
+    @staticmethod
+    def _content_hash(text: str) -> str:
+        """片段内容的稳定哈希，存入 rag_chunks.metadata 用于增量比对。"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
     def _split_into_chunks(self, text: str) -> List[str]:
         """按照配置的 chunk 大小与重叠度切分章节正文。"""
         normalized = text.strip()
@@ -0,0 +1,226 @@
+# AIMETA P=章节多维优化_单次补丁与逐维重写|R=补丁模式单次调用_本地合并_失败回退逐维重写|NR=不含章节读写|E=ChapterOptimizer_OptimizationResult|X=internal|A=章节优化|D=sqlalchemy|S=net|RD=./README.ai
+"""
+章节多维度优化
+
+旧实现按对话 / 环境 / 心理 / 节奏四个维度依次让模型重写整章，每次都重新输出全文，
+输出 token 与耗时约为一章的四倍。
+
+patch 模式（默认）只调用一次模型，让其针对全部维度返回段落级补丁，再由
+utils.text_patch 在本地合并。以下情况回退到原有的逐维重写（full 模式）：
+- 缺少 optimize_patch 提示词；
+- 模型输出无法解析或调用失败；
+- 提出的补丁中能定位并应用的比例低于 optimizer_patch_min_apply_ratio。
+"""
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..core.config import settings
+from ..utils.json_utils import remove_think_tags, unwrap_markdown_json
+from ..utils.text_patch import apply_patches, number_paragraphs, parse_patches
+from .llm_service import LLMService
+from .prompt_service import PromptService
+
+logger = logging.getLogger(__name__)
+
+OPTIMIZER_DIMENSIONS = ("dialogue", "environment", "psychology", "rhythm")
+
+# 优化维度到提示词的映射
+DIMENSION_PROMPT_MAP = {
+    "dialogue": "optimize_dialogue",
+    "environment": "optimize_environment",
+    "psychology": "optimize_psychology",
+    "rhythm": "optimize_rhythm",
+}
+
+PATCH_PROMPT_NAME = "optimize_patch"
+
+
+@dataclass
+class OptimizationResult:
+    content: str
+    mode: str
+    steps: List[Dict[str, Any]] = field(default_factory=list)
+    patches: List[Dict[str, Any]] = field(default_factory=list)
+    rejected_patches: int = 0
+    fallback_reason: Optional[str] = None
+
+    @property
+    def notes(self) -> str:
+        return "\n".join(str(step.get("notes", "")) for step in self.steps if step.get("notes")) or "优化完成"
+
+    def report(self) -> Dict[str, Any]:
+        report: Dict[str, Any] = {"mode": self.mode, "steps": self.steps}
+        if self.mode == "patch":
+            report["patches_applied"] = len(self.patches)
+            report["patches_rejected"] = self.rejected_patches
+        if self.fallback_reason:
+            report["fallback_reason"] = self.fallback_reason
+        return report
+
+
+class ChapterOptimizer:
+    """按维度优化章节正文：patch 模式单次调用，full 模式逐维重写。"""
+
+    def __init__(
+        self,
+        llm_service: LLMService,
+        prompt_service: PromptService,
+        *,
+        fallback_prompts: Optional[Dict[str, str]] = None,
+    ):
+        self.llm_service = llm_service
+        self.prompt_service = prompt_service
+        self.fallback_prompts = fallback_prompts or {}
+
+    async def optimize(
+        self,
+        content: str,
+        *,
+        user_id: int,
+        dimensions: Sequence[str] = OPTIMIZER_DIMENSIONS,
+        mode: Optional[str] = None,
+        additional_notes: Optional[str] = None,
+        character_dna: Optional[Dict[str, Any]] = None,
+    ) -> OptimizationResult:
+        mode = mode or settings.optimizer_mode
+        if mode == "patch":
+            result = await self._optimize_with_patches(
+                content,
+                user_id=user_id,
+                dimensions=dimensions,
+                additional_notes=additional_notes,
+                character_dna=character_dna,
+            )
+            if result.fallback_reason is None:
+                return result
+            logger.info("补丁优化回退逐维重写: %s", result.fallback_reason)
+            fallback = await self._optimize_full(
+                content,
+                user_id=user_id,
+                dimensions=dimensions,
+                additional_notes=additional_notes,
+                character_dna=character_dna,
+            )
+            fallback.fallback_reason = result.fallback_reason
+            return fallback
+        return await self._optimize_full(
+            content,
+            user_id=user_id,
+            dimensions=dimensions,
+            additional_notes=additional_notes,
+            character_dna=character_dna,
+        )
+
+    async def _optimize_with_patches(
+        self,
+        content: str,
+        *,
+        user_id: int,
+        dimensions: Sequence[str],
+        additional_notes: Optional[str],
+        character_dna: Optional[Dict[str, Any]],
+    ) -> OptimizationResult:
+        result = OptimizationResult(content=content, mode="patch")
+        prompt = await self.prompt_service.get_prompt(PATCH_PROMPT_NAME)
+        if not prompt:
+            result.fallback_reason = "missing_prompt"
+            return result
+
+        optimize_input: Dict[str, Any] = {
+            "dimensions": list(dimensions),
+            "paragraphs": number_paragraphs(content),
+            "additional_notes": additional_notes or "在不改变剧情走向的前提下优化。",
+        }
+        if character_dna:
+            optimize_input["character_dna"] = character_dna
+
+        try:
+            response = await self.llm_service.get_llm_response(
+                system_prompt=prompt,
+                conversation_history=[{"role": "user", "content": json.dumps(optimize_input, ensure_ascii=False)}],
+                temperature=0.7,
+                user_id=user_id,
+                timeout=600.0,
+            )
+            payload = json.loads(unwrap_markdown_json(remove_think_tags(response)))
+        except json.JSONDecodeError:
+            result.fallback_reason = "invalid_json"
+            return result
+        except Exception as exc:
+            logger.warning("补丁优化调用失败: %s", exc)
+            result.fallback_reason = "llm_error"
+            return result
+
+        patches = parse_patches(payload)
+        merged = apply_patches(content, patches)
+        result.rejected_patches = len(merged.rejected)
+        if merged.proposed and len(merged.applied) / merged.proposed < settings.optimizer_patch_min_apply_ratio:
+            result.fallback_reason = f"patches_unmatched:{len(merged.rejected)}/{merged.proposed}"
+            return result
+
+        result.content = merged.content
+        result.patches = [patch.to_dict() for patch in merged.applied]
+        notes = payload.get("optimization_notes") if isinstance(payload, dict) else None
+        result.steps.append({"dimension": ",".join(dimensions), "notes": notes or "优化完成"})
+        return result
+
+    async def _optimize_full(
+        self,
+        content: str,
+        *,
+        user_id: int,
+        dimensions: Sequence[str],
+        additional_notes: Optional[str],
+        character_dna: Optional[Dict[str, Any]],
+    ) -> OptimizationResult:
+        result = OptimizationResult(content=content, mode="full")
+        for dimension in dimensions:
+            prompt_name = DIMENSION_PROMPT_MAP.get(dimension)
+            prompt = (await self.prompt_service.get_prompt(prompt_name) if prompt_name else None) or (
+                self.fallback_prompts.get(dimension)
+            )
+            if not prompt:
+                logger.warning("缺少优化提示词 %s，跳过 %s 维度", prompt_name, dimension)
+                continue
+
+            optimize_input: Dict[str, Any] = {
+                "original_content": result.content,
+                "additional_notes": additional_notes or "在不改变剧情走向的前提下优化该维度。",
+            }
+            if dimension == "psychology" and character_dna:
+                optimize_input["character_dna"] = character_dna
+            try:
+                response = await self.llm_service.get_llm_response(
+                    system_prompt=prompt,
+                    conversation_history=[{"role": "user", "content": json.dumps(optimize_input, ensure_ascii=False)}],
+                    temperature=0.7,
+                    user_id=user_id,
+                    timeout=600.0,
+                )
+                cleaned = remove_think_tags(response)
+                normalized = unwrap_markdown_json(cleaned)
+                try:
+                    parsed = json.loads(normalized)
+                    result.content = parsed.get("optimized_content", cleaned)
+                    result.steps.append(
+                        {"dimension": dimension, "notes": parsed.get("optimization_notes", "优化完成")}
+                    )
+                except json.JSONDecodeError:
+                    result.content = cleaned
+                    result.steps.append({"dimension": dimension, "notes": "优化完成（响应格式非标准JSON）"})
+            except Exception as exc:
+                logger.warning("优化维度 %s 失败: %s", dimension, exc)
+                result.steps.append({"dimension": dimension, "error": str(exc)[:200]})
+        return result
+
+
+__all__ = [
+    "ChapterOptimizer",
+    "DIMENSION_PROMPT_MAP",
+    "OPTIMIZER_DIMENSIONS",
+    "OptimizationResult",
+]
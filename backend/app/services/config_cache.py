@@ -0,0 +1,156 @@
+# AIMETA P=配置缓存_系统配置_管理员设置与LLM配置TTL缓存|R=TTL缓存_显式失效_命中统计|NR=不含配置写入|E=TTLCache_get_system_config_value_get_active_llm_config|X=internal|A=缓存工具|D=sqlalchemy|S=db,memory|RD=./README.ai
+"""
+进程级配置缓存
+
+每次 LLM 调用都要读取用户激活的 LLM 配置、若干 SystemConfig 键和每日额度设置，一次章节生成会重复查询
+上百次相同的配置。这里按 config_cache_ttl_seconds 在进程内缓存查询结果：
+
+- 只缓存纯数据（字符串 / dict），不缓存绑定会话的 ORM 对象；
+- ConfigService、AdminSettingService、LLMConfigService 写入后立即失效对应条目；
+- 多进程部署时其他进程最多延迟一个 TTL 看到变更。
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..repositories.admin_setting_repository import AdminSettingRepository
+from ..repositories.llm_config_repository import LLMConfigRepository
+from ..repositories.system_config_repository import SystemConfigRepository
+
+_SYSTEM = "system"
+_ADMIN = "admin"
+_LLM_ACTIVE = "llm_active"
+
+
+class TTLCache:
+    """带过期时间的字典缓存，记录命中 / 未命中 / 失效次数。ttl 为 0 时不缓存。"""
+
+    def __init__(self, ttl_seconds: float, *, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self._clock = clock
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self._clock():
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.ttl_seconds > 0:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_CONFIG_CACHE: Optional[TTLCache] = None
+
+
+def get_config_cache() -> TTLCache:
+    """进程级配置缓存，按配置懒加载。"""
+    global _CONFIG_CACHE
+    if _CONFIG_CACHE is None:
+        _CONFIG_CACHE = TTLCache(settings.config_cache_ttl_seconds)
+    return _CONFIG_CACHE
+
+
+async def get_system_config_value(session: AsyncSession, key: str) -> Optional[str]:
+    """读取 SystemConfig 键值（不存在时为 None），结果按 TTL 缓存。"""
+    cache = get_config_cache()
+    hit, value = cache.get((_SYSTEM, key))
+    if hit:
+        return value
+    record = await SystemConfigRepository(session).get_by_key(key)
+    value = record.value if record else None
+    cache.set((_SYSTEM, key), value)
+    return value
+
+
+async def get_admin_setting_value(session: AsyncSession, key: str) -> Optional[str]:
+    """读取 AdminSetting 键值（不存在时为 None），结果按 TTL 缓存。"""
+    cache = get_config_cache()
+    hit, value = cache.get((_ADMIN, key))
+    if hit:
+        return value
+    value = await AdminSettingRepository(session).get_value(key)
+    cache.set((_ADMIN, key), value)
+    return value
+
+
+async def get_active_llm_config(session: AsyncSession, user_id: int) -> Optional[Dict[str, Optional[str]]]:
+    """读取用户激活的 LLM 配置快照（api_key / base_url / model / api_format），结果按 TTL 缓存。"""
+    cache = get_config_cache()
+    hit, value = cache.get((_LLM_ACTIVE, user_id))
+    if hit:
+        return value
+    config = await LLMConfigRepository(session).get_active_config(user_id)
+    value = (
+        {
+            "api_key": config.llm_provider_api_key,
+            "base_url": config.llm_provider_url,
+            "model": config.llm_provider_model,
+            "api_format": getattr(config, "api_format", None),
+        }
+        if config
+        else None
+    )
+    cache.set((_LLM_ACTIVE, user_id), value)
+    return value
+
+
+def invalidate_system_config(key: str) -> None:
+    get_config_cache().invalidate((_SYSTEM, key))
+
+
+def invalidate_admin_setting(key: str) -> None:
+    get_config_cache().invalidate((_ADMIN, key))
+
+
+def invalidate_llm_config(user_id: int) -> None:
+    get_config_cache().invalidate((_LLM_ACTIVE, user_id))
+
+
+def config_cache_stats() -> Dict[str, Any]:
+    return get_config_cache().stats()
+
+
+__all__ = [
+    "TTLCache",
+    "config_cache_stats",
+    "get_active_llm_config",
+    "get_admin_setting_value",
+    "get_config_cache",
+    "get_system_config_value",
+    "invalidate_admin_setting",
+    "invalidate_llm_config",
+    "invalidate_system_config",
+]
@@ -1,4 +1,4 @@
-# AIMETA P=配置服务_系统配置业务逻辑|R=配置读写|NR=不含数据访问|E=ConfigService|X=internal|A=服务类|D=sqlalchemy|S=db|RD=./README.ai
+# AIMETA P=配置服务_系统配置业务逻辑|R=配置读写_写后失效缓存|NR=不含数据访问|E=ConfigService|X=internal|A=服务类|D=sqlalchemy|S=db|RD=./README.ai
 from typing import Iterable, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..repositories.system_config_repository import SystemConfigRepository
 from ..models import SystemConfig
 from ..schemas.config import SystemConfigCreate, SystemConfigRead, SystemConfigUpdate
+from .config_cache import invalidate_system_config
 
 
 class ConfigService:
@@ -31,6 +32,7 @@ class ConfigService:
             instance = SystemConfig(**payload.model_dump())
             await self.repo.add(instance)
         await self.session.commit()
+        invalidate_system_config(payload.key)
         return SystemConfigRead.model_validate(instance)
 
     async def patch_config(self, key: str, payload: SystemConfigUpdate) -> Optional[SystemConfigRead]:
@@ -39,6 +41,7 @@ class ConfigService:
             return None
         await self.repo.update_fields(instance, **payload.model_dump(exclude_unset=True))
         await self.session.commit()
+        invalidate_system_config(key)
         return SystemConfigRead.model_validate(instance)
 
     async def remove_config(self, key: str) -> bool:
@@ -47,4 +50,5 @@ class ConfigService:
             return False
         await self.repo.delete(instance)
         await self.session.commit()
+        invalidate_system_config(key)
         return True
@@ -0,0 +1,262 @@
+# AIMETA P=嵌入向量缓存_内容寻址两级缓存|R=LRU内存层_SQLite磁盘层_容量淘汰_命中统计|NR=不含嵌入请求逻辑|E=EmbeddingCache_get_embedding_cache|X=internal|A=缓存读写_淘汰_统计|D=sqlite3|S=mem,fs|RD=./README.ai
+"""
+嵌入向量缓存 (EmbeddingCache)
+
+以 (命名空间/模型, 文本 SHA-256) 为键的内容寻址缓存，供 EmbeddingService 与 LLMService 共用：
+1. 内存层：按条数上限的 LRU；
+2. 磁盘层：SQLite 文件，按总字节数上限淘汰最久未访问的记录；
+3. 命中/未命中/淘汰计数，便于观察重复入库时的节省情况。
+
+章节编辑后重新入库时，未改动的分块直接命中缓存，只有变化的分块才会请求嵌入接口。
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+
+class EmbeddingCache:
+    """两级嵌入缓存；磁盘层不可用时仅使用内存层。"""
+
+    def __init__(
+        self,
+        *,
+        memory_entries: int,
+        disk_path: Optional[str],
+        max_disk_bytes: int,
+    ) -> None:
+        self._memory_entries = max(0, memory_entries)
+        self._max_disk_bytes = max(0, max_disk_bytes)
+        self._memory: "OrderedDict[CacheKey, List[float]]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        self._stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+        if disk_path and self._max_disk_bytes > 0:
+            self._open_disk(disk_path)
+
+    # ------------------------------------------------------------------
+    # 对外接口
+    # ------------------------------------------------------------------
+    @staticmethod
+    def make_key(namespace: str, text: str) -> CacheKey:
+        return namespace, hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    async def get_many(self, namespace: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """批量查询，结果与输入一一对应，未命中为 None。"""
+        keys = [self.make_key(namespace, text) for text in texts]
+        results: List[Optional[List[float]]] = []
+        missing: Dict[CacheKey, List[int]] = {}
+        with self._memory_lock:
+            for idx, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                else:
+                    missing.setdefault(key, []).append(idx)
+                results.append(vector)
+
+        if missing and self._conn is not None:
+            found = await asyncio.to_thread(self._disk_get, list(missing))
+            for key, vector in found.items():
+                self._remember(key, vector)
+                for idx in missing.pop(key):
+                    results[idx] = vector
+                    self._stats["disk_hits"] += 1
+
+        self._stats["misses"] += sum(len(indices) for indices in missing.values())
+        return results
+
+    async def put_many(
+        self,
+        namespace: str,
+        texts: Sequence[str],
+        vectors: Sequence[Optional[Sequence[float]]],
+    ) -> None:
+        """写入两级缓存，空向量不会被缓存。"""
+        entries: Dict[CacheKey, List[float]] = {}
+        for text, vector in zip(texts, vectors):
+            if vector:
+                entries[self.make_key(namespace, text)] = list(vector)
+        if not entries:
+            return
+        for key, vector in entries.items():
+            self._remember(key, vector)
+        self._stats["writes"] += len(entries)
+        if self._conn is not None:
+            await asyncio.to_thread(self._disk_put, entries)
+
+    async def get(self, namespace: str, text: str) -> Optional[List[float]]:
+        return (await self.get_many(namespace, [text]))[0]
+
+    async def put(self, namespace: str, text: str, vector: Optional[Sequence[float]]) -> None:
+        await self.put_many(namespace, [text], [vector])
+
+    def stats(self) -> Dict[str, int]:
+        """返回命中统计与当前容量。"""
+        with self._memory_lock:
+            memory_size = len(self._memory)
+        return {**self._stats, "memory_entries": memory_size, "disk_bytes": self._disk_bytes}
+
+    def clear(self) -> None:
+        """清空两级缓存（统计计数保留）。"""
+        with self._memory_lock:
+            self._memory.clear()
+        if self._conn is not None:
+            with self._disk_lock:
+                self._conn.execute("DELETE FROM embedding_cache")
+                self._conn.commit()
+                self._disk_bytes = 0
+
+    # ------------------------------------------------------------------
+    # 内部实现
+    # ------------------------------------------------------------------
+    def _remember(self, key: CacheKey, vector: List[float]) -> None:
+        if not self._memory_entries:
+            return
+        with self._memory_lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._memory_entries:
+                self._memory.popitem(last=False)
+
+    def _open_disk(self, disk_path: str) -> None:
+        try:
+            path = Path(disk_path).expanduser().resolve()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    namespace TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (namespace, text_hash)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache(last_used)")
+            row = conn.execute("SELECT COALESCE(SUM(LENGTH(embedding)), 0) FROM embedding_cache").fetchone()
+            conn.commit()
+        except Exception as exc:  # pragma: no cover - 磁盘不可用时仅记录日志
+            logger.error("初始化嵌入磁盘缓存失败，将仅使用内存缓存: path=%s error=%s", disk_path, exc)
+            return
+        self._conn = conn
+        self._disk_bytes = int(row[0] or 0)
+        logger.info("嵌入磁盘缓存已就绪: path=%s size=%d bytes", path, self._disk_bytes)
+
+    def _disk_get(self, keys: List[CacheKey]) -> Dict[CacheKey, List[float]]:
+        found: Dict[CacheKey, List[float]] = {}
+        now = time.time()
+        with self._disk_lock:
+            try:
+                for namespace, text_hash in keys:
+                    row = self._conn.execute(  # type: ignore[union-attr]
+                        "SELECT embedding FROM embedding_cache WHERE namespace = ? AND text_hash = ?",
+                        (namespace, text_hash),
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    data = array("f")
+                    data.frombytes(row[0])
+                    found[(namespace, text_hash)] = list(data)
+                if found:
+                    self._conn.executemany(  # type: ignore[union-attr]
+                        "UPDATE embedding_cache SET last_used = ? WHERE namespace = ? AND text_hash = ?",
+                        [(now, namespace, text_hash) for namespace, text_hash in found],
+                    )
+                    self._conn.commit()  # type: ignore[union-attr]
+            except sqlite3.Error as exc:  # pragma: no cover - 读取失败视为未命中
+                logger.warning("读取嵌入磁盘缓存失败: %s", exc)
+        return found
+
+    def _disk_put(self, entries: Dict[CacheKey, List[float]]) -> None:
+        now = time.time()
+        rows = [
+            (namespace, text_hash, array("f", vector).tobytes(), now)
+            for (namespace, text_hash), vector in entries.items()
+        ]
+        with self._disk_lock:
+            try:
+                # 覆盖写入前扣除旧记录大小，保证容量统计准确
+                for namespace, text_hash, _, _ in rows:
+                    old = self._conn.execute(  # type: ignore[union-attr]
+                        "SELECT LENGTH(embedding) FROM embedding_cache WHERE namespace = ? AND text_hash = ?",
+                        (namespace, text_hash),
+                    ).fetchone()
+                    if old is not None:
+                        self._disk_bytes -= int(old[0] or 0)
+                self._conn.executemany(  # type: ignore[union-attr]
+                    "INSERT OR REPLACE INTO embedding_cache (namespace, text_hash, embedding, last_used) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._disk_bytes += sum(len(blob) for _, _, blob, _ in rows)
+                self._evict_disk()
+                self._conn.commit()  # type: ignore[union-attr]
+            except sqlite3.Error as exc:  # pragma: no cover - 写入失败不影响主流程
+                logger.warning("写入嵌入磁盘缓存失败: %s", exc)
+
+    def _evict_disk(self) -> None:
+        """超过容量上限时按最久未访问顺序淘汰，直至回落到上限的 90%。"""
+        if self._disk_bytes <= self._max_disk_bytes:
+            return
+        target = int(self._max_disk_bytes * 0.9)
+        cursor = self._conn.execute(  # type: ignore[union-attr]
+            "SELECT namespace, text_hash, LENGTH(embedding) FROM embedding_cache ORDER BY last_used ASC"
+        )
+        victims: List[CacheKey] = []
+        for namespace, text_hash, size in cursor:
+            if self._disk_bytes <= target:
+                break
+            victims.append((namespace, text_hash))
+            self._disk_bytes -= int(size or 0)
+        cursor.close()
+        self._conn.executemany(  # type: ignore[union-attr]
+            "DELETE FROM embedding_cache WHERE namespace = ? AND text_hash = ?",
+            victims,
+        )
+        self._stats["evictions"] += len(victims)
+        logger.info("嵌入磁盘缓存淘汰 %d 条记录，当前 %d bytes", len(victims), self._disk_bytes)
+
+
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """返回进程级嵌入缓存（惰性创建）。"""
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache(
+            memory_entries=settings.embedding_cache_memory_entries,
+            disk_path=settings.embedding_cache_path,
+            max_disk_bytes=settings.embedding_cache_max_disk_mb * 1024 * 1024,
+        )
+    return _cache
+
+
+__all__ = ["EmbeddingCache", "get_embedding_cache"]
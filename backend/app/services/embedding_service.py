@@ -1,4 +1,4 @@
-# AIMETA P=嵌入服务_文本向量化|R=文本嵌入_向量生成|NR=不含存储逻辑|E=EmbeddingService|X=internal|A=嵌入生成|D=openai|S=none|RD=./README.ai
+# AIMETA P=嵌入服务_文本向量化|R=文本嵌入_向量生成_共享缓存|NR=不含存储逻辑|E=EmbeddingService|X=internal|A=嵌入生成|D=openai|S=none|RD=./README.ai
 """
 嵌入服务 (EmbeddingService)
 
@@ -11,9 +11,9 @@
 """
 import logging
 from typing import List, Optional, Sequence
-import hashlib
 
 from ..core.config import settings
+from .embedding_cache import get_embedding_cache
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +28,7 @@ class EmbeddingService:
     def __init__(self):
         self._client = None
         self._model = settings.embedding_model if hasattr(settings, 'embedding_model') else "text-embedding-3-small"
-        self._cache = {}  # 简单的内存缓存
+        self._cache = get_embedding_cache()  # 与 LLMService 共用的两级嵌入缓存
         self._init_client()
     
     def _init_client(self):
@@ -65,10 +65,11 @@ class EmbeddingService:
             return None
         
         # 检查缓存
+        use_cache = use_cache and settings.embedding_cache_enabled
         if use_cache:
-            cache_key = self._get_cache_key(text)
-            if cache_key in self._cache:
-                return self._cache[cache_key]
+            cached = await self._cache.get(self._cache_namespace, text)
+            if cached:
+                return cached
         
         try:
             response = await self._client.embeddings.create(
@@ -79,7 +80,7 @@ class EmbeddingService:
             
             # 存入缓存
             if use_cache:
-                self._cache[cache_key] = embedding
+                await self._cache.put(self._cache_namespace, text, embedding)
             
             return embedding
         
@@ -105,21 +106,12 @@ class EmbeddingService:
         if not texts or not self._client:
             return [None] * len(texts)
         
-        results = []
-        uncached_indices = []
-        uncached_texts = []
-        
-        # 检查缓存
-        for i, text in enumerate(texts):
-            if use_cache:
-                cache_key = self._get_cache_key(text)
-                if cache_key in self._cache:
-                    results.append(self._cache[cache_key])
-                    continue
-            
-            results.append(None)
-            uncached_indices.append(i)
-            uncached_texts.append(text[:8000])
+        use_cache = use_cache and settings.embedding_cache_enabled
+        results: List[Optional[List[float]]] = (
+            await self._cache.get_many(self._cache_namespace, texts) if use_cache else [None] * len(texts)
+        )
+        uncached_indices = [i for i, embedding in enumerate(results) if not embedding]
+        uncached_texts = [texts[i][:8000] for i in uncached_indices]
         
         # 批量请求未缓存的文本
         if uncached_texts:
@@ -130,26 +122,28 @@ class EmbeddingService:
                 )
                 
                 for j, embedding_data in enumerate(response.data):
-                    idx = uncached_indices[j]
-                    embedding = embedding_data.embedding
-                    results[idx] = embedding
-                    
-                    # 存入缓存
-                    if use_cache:
-                        cache_key = self._get_cache_key(texts[idx])
-                        self._cache[cache_key] = embedding
+                    results[uncached_indices[j]] = embedding_data.embedding
+                
+                # 存入缓存
+                if use_cache:
+                    await self._cache.put_many(
+                        self._cache_namespace,
+                        [texts[idx] for idx in uncached_indices],
+                        [results[idx] for idx in uncached_indices],
+                    )
             
             except Exception as e:
                 logger.error(f"批量生成嵌入向量失败: {e}")
         
         return results
     
-    def _get_cache_key(self, text: str) -> str:
-        """生成缓存键"""
-        return hashlib.md5(text.encode()).hexdigest()
+    @property
+    def _cache_namespace(self) -> str:
+        """缓存命名空间，与 LLMService 的 OpenAI 兼容接口保持一致以便互相命中"""
+        return f"openai:{self._model}"
     
     def clear_cache(self):
-        """清空缓存"""
+        """清空缓存（共享缓存，会同时影响 LLMService）"""
         self._cache.clear()
     
     @property
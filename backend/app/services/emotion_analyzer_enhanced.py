@@ -3,11 +3,12 @@
 多维情感分析增强模块
 扩展原有的单维情感分析，增加多个维度的情感识别和分析
 """
-import re
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from ..utils.keyword_matcher import KeywordCounts, KeywordMatcher
+
 
 class EmotionType(Enum):
     """情感类型枚举"""
@@ -120,6 +121,23 @@ class EnhancedEmotionAnalyzer:
             'medium': ['正常', '平稳', '稳定', '持续', '进行'],
             'fast': ['快速', '迅速', '急速', '飞快', '突然', '猛然', '瞬间', '立刻', '马上', '冲', '跑', '追'],
         }
+        
+        # 转折点关键词
+        self.turning_keywords = {
+            'emotional_shift': ['突然', '忽然', '意外', '没想到', '竟然'],
+            'plot_twist': ['真相', '原来', '其实', '秘密', '揭露', '发现'],
+            'revelation': ['明白', '理解', '领悟', '醒悟', '意识到'],
+        }
+        
+        # 所有关键词族编译为一个匹配器，每章只扫描一遍
+        families = {}
+        for emotion_type, keywords_data in self.emotion_keywords.items():
+            families[(emotion_type, 'positive')] = keywords_data.get('positive', [])
+            families[(emotion_type, 'actions')] = keywords_data.get('actions', [])
+        families.update({('narrative', phase): keywords for phase, keywords in self.narrative_keywords.items()})
+        families.update({('pace', pace): keywords for pace, keywords in self.pace_keywords.items()})
+        families.update({('turning', tp_type): keywords for tp_type, keywords in self.turning_keywords.items()})
+        self.matcher = KeywordMatcher(families)
     
     def analyze_multidimensional_emotion(
         self, 
@@ -138,24 +156,26 @@ class EnhancedEmotionAnalyzer:
         Returns:
             EmotionPoint: 多维情感分析结果
         """
-        text = content + " " + summary
+        # 单遍扫描正文和摘要，统计所有关键词族
+        counts = self.matcher.scan(content, summary)
+        text_length = len(content) + 1 + len(summary)
         
         # 1. 计算各情感维度的分数
-        emotion_scores = self._calculate_emotion_scores(text)
+        emotion_scores = self._calculate_emotion_scores(counts, text_length)
         
         # 2. 确定主情感和次要情感
         primary_emotion, primary_intensity = self._get_primary_emotion(emotion_scores)
         secondary_emotions = self._get_secondary_emotions(emotion_scores, primary_emotion)
         
         # 3. 检测叙事阶段
-        narrative_phase = self._detect_narrative_phase(text, chapter_number)
+        narrative_phase = self._detect_narrative_phase(counts, chapter_number)
         
         # 4. 分析情感节奏
-        pace = self._analyze_pace(text)
+        pace = self._analyze_pace(counts)
         
         # 5. 检测转折点
         is_turning_point, turning_point_type = self._detect_turning_point(
-            text, emotion_scores, chapter_number
+            counts, emotion_scores, chapter_number
         )
         
         # 6. 生成情感描述
@@ -178,24 +198,16 @@ class EnhancedEmotionAnalyzer:
             raw_scores=emotion_scores
         )
     
-    def _calculate_emotion_scores(self, text: str) -> Dict[str, float]:
+    def _calculate_emotion_scores(self, counts: KeywordCounts, text_length: int) -> Dict[str, float]:
         """计算各情感维度的分数"""
         scores = {}
-        text_length = len(text)
         
         for emotion_type, keywords_data in self.emotion_keywords.items():
-            score = 0.0
             weight = keywords_data.get('weight', 1.0)
             
-            # 统计正面关键词
-            for keyword in keywords_data.get('positive', []):
-                count = text.count(keyword)
-                score += count * 2.0 * weight
-            
-            # 统计动作关键词
-            for keyword in keywords_data.get('actions', []):
-                count = text.count(keyword)
-                score += count * 1.5 * weight
+            # 正面关键词权重 2.0，动作关键词权重 1.5
+            score = counts.total((emotion_type, 'positive')) * 2.0 * weight
+            score += counts.total((emotion_type, 'actions')) * 1.5 * weight
             
             # 归一化到 0-10
             normalized_score = min(10.0, (score / max(text_length / 1000, 1)) * 10)
@@ -240,13 +252,11 @@ class EnhancedEmotionAnalyzer:
         # 最多返回 3 个次要情感
         return secondary[:3]
     
-    def _detect_narrative_phase(self, text: str, chapter_number: int) -> NarrativePhase:
+    def _detect_narrative_phase(self, counts: KeywordCounts, chapter_number: int) -> NarrativePhase:
         """检测叙事阶段"""
-        phase_scores = {}
-        
-        for phase, keywords in self.narrative_keywords.items():
-            score = sum(text.count(keyword) for keyword in keywords)
-            phase_scores[phase] = score
+        phase_scores = {
+            phase: counts.total(('narrative', phase)) for phase in self.narrative_keywords
+        }
         
         # 如果关键词不明显，根据章节编号推断
         if max(phase_scores.values()) < 2:
@@ -263,13 +273,9 @@ class EnhancedEmotionAnalyzer:
         
         return max(phase_scores.items(), key=lambda x: x[1])[0]
     
-    def _analyze_pace(self, text: str) -> str:
+    def _analyze_pace(self, counts: KeywordCounts) -> str:
         """分析情感节奏"""
-        pace_scores = {}
-        
-        for pace, keywords in self.pace_keywords.items():
-            score = sum(text.count(keyword) for keyword in keywords)
-            pace_scores[pace] = score
+        pace_scores = {pace: counts.total(('pace', pace)) for pace in self.pace_keywords}
         
         if max(pace_scores.values()) == 0:
             return 'medium'
@@ -278,21 +284,13 @@ class EnhancedEmotionAnalyzer:
     
     def _detect_turning_point(
         self, 
-        text: str, 
+        counts: KeywordCounts, 
         emotion_scores: Dict[str, float],
         chapter_number: int
     ) -> Tuple[bool, Optional[str]]:
         """检测是否为转折点"""
-        # 转折点关键词
-        turning_keywords = {
-            'emotional_shift': ['突然', '忽然', '意外', '没想到', '竟然'],
-            'plot_twist': ['真相', '原来', '其实', '秘密', '揭露', '发现'],
-            'revelation': ['明白', '理解', '领悟', '醒悟', '意识到'],
-        }
-        
-        for tp_type, keywords in turning_keywords.items():
-            count = sum(text.count(keyword) for keyword in keywords)
-            if count >= 3:
+        for tp_type in self.turning_keywords:
+            if counts.total(('turning', tp_type)) >= 3:
                 return True, tp_type
         
         # 情感强度超过 8.0 也可能是转折点
@@ -353,6 +351,10 @@ class EnhancedEmotionAnalyzer:
         return desc
 
 
+# 关键词匹配器编译一次后复用
+_default_analyzer = EnhancedEmotionAnalyzer()
+
+
 # 导出函数（保持向后兼容）
 def analyze_multidimensional_emotion(content: str, summary: str = "", chapter_number: int = 0) -> Dict:
     """
@@ -361,8 +363,7 @@ def analyze_multidimensional_emotion(content: str, summary: str = "", chapter_nu
     Returns:
         Dict: 包含多维情感分析结果的字典
     """
-    analyzer = EnhancedEmotionAnalyzer()
-    result = analyzer.analyze_multidimensional_emotion(content, summary, chapter_number)
+    result = _default_analyzer.analyze_multidimensional_emotion(content, summary, chapter_number)
     
     return {
         'primary_emotion': result.primary_emotion.value,
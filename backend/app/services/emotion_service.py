@@ -5,7 +5,7 @@ from typing import List, Dict, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.novel import Chapter, ChapterVersion, ChapterOutline
-from app.utils.emotion_analyzer import analyze_emotion, detect_narrative_phase, generate_emotion_description
+from app.utils.emotion_analyzer import analyze_chapter_emotion, generate_emotion_description
 
 logger = logging.getLogger(__name__)
 
@@ -146,8 +146,7 @@ class EmotionService:
             summary = outline.summary if outline else ""
             
             # 分析情感
-            emotion, intensity = analyze_emotion(content + " " + summary)
-            narrative_phase = detect_narrative_phase(content, summary)
+            emotion, intensity, narrative_phase = analyze_chapter_emotion(content, summary)
             description = generate_emotion_description(emotion, intensity, title)
             
             emotion_points.append({
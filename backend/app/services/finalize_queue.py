@@ -0,0 +1,362 @@
+# AIMETA P=定稿任务队列_持久化后台执行|R=任务入队_进程内worker池_Celery可选_项目串行_退避重试_退出进程任务回收|NR=不含定稿业务细节|E=FinalizeJobQueue_enqueue_finalize_job_process_finalize_job|X=job|A=后台任务调度|D=sqlalchemy,celery可选|S=db|RD=./README.ai
+"""
+章节定稿任务队列
+
+定稿请求先写入 finalize_jobs 表，再由后台执行：
+- local（默认）：进程内 worker 池轮询领取任务，进程重启后未完成的任务仍在表中，会被重新领取；
+- celery：入队后投递到 app.config.celery_config 的 finalize 队列，由 Celery worker 执行。
+
+两种方式共用 process_finalize_job：同一项目同时只执行一个任务，失败按指数退避重试，
+超过最大次数后标记为 failed；任务状态可通过 writer 路由查询。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import selectinload
+
+from ..core.config import settings
+from ..db.session import AsyncSessionLocal
+from ..models import Chapter, FinalizeJob
+from ..repositories.finalize_job_repository import FinalizeJobRepository
+from ..schemas.novel import ChapterGenerationStatus
+from .finalize_service import FinalizeService
+from .llm_service import LLMService
+from .summary_backfill import SummaryBackfillService
+from .vector_store_service import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentJobError(Exception):
+    """任务数据已失效（章节或版本不存在等），重试没有意义。"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def is_orphaned_worker(worker_id: Optional[str]) -> bool:
+    """
+    worker_id 属于本机且对应进程已退出时返回 True
+
+    与本进程 ID 相同也视为已退出（容器重启后进程号常常不变），调用方需排除本进程正在执行的任务；
+    其他主机的 worker 无法判断，返回 False，交由超时回收。
+    """
+    host, _, pid_text = (worker_id or "").rpartition(":")
+    if host != socket.gethostname() or not pid_text.isdigit():
+        return False
+    pid = int(pid_text)
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    """第 N 次失败后的等待时间：base * 2^(N-1)，不超过上限。"""
+    base = settings.finalize_job_retry_base_seconds
+    return float(min(base * (2 ** max(0, attempts - 1)), settings.finalize_job_retry_max_seconds))
+
+
+async def enqueue_finalize_job(
+    session: AsyncSession,
+    *,
+    project_id: str,
+    chapter_number: int,
+    selected_version_id: int,
+    user_id: int,
+    skip_vector_update: bool = False,
+) -> FinalizeJob:
+    """写入定稿任务并通知后台执行；同一章节同一版本已有未完成任务时直接返回该任务。"""
+    repo = FinalizeJobRepository(session)
+    job = await repo.find_active(
+        project_id=project_id,
+        chapter_number=chapter_number,
+        selected_version_id=selected_version_id,
+    )
+    if job is not None:
+        return job
+
+    job = await repo.enqueue(
+        project_id=project_id,
+        chapter_number=chapter_number,
+        selected_version_id=selected_version_id,
+        user_id=user_id,
+        skip_vector_update=skip_vector_update,
+        max_attempts=settings.finalize_job_max_attempts,
+    )
+    await session.commit()
+    logger.info(
+        "定稿任务已入队: job=%s project=%s chapter=%s backend=%s",
+        job.id,
+        project_id,
+        chapter_number,
+        settings.finalize_queue_backend,
+    )
+
+    if settings.finalize_queue_backend == "celery":
+        from ..tasks.finalize_tasks import run_finalize_job
+
+        run_finalize_job.apply_async(args=[job.id])
+    else:
+        get_finalize_queue().notify()
+    return job
+
+
+async def execute_finalize(job: FinalizeJob, *, session_factory: async_sessionmaker) -> Dict[str, Any]:
+    """执行一次定稿：确认选中版本后调用 FinalizeService，失败时抛出异常以触发重试。"""
+    async with session_factory() as session:
+        stmt = (
+            select(Chapter)
+            .options(selectinload(Chapter.versions))
+            .where(
+                Chapter.project_id == job.project_id,
+                Chapter.chapter_number == job.chapter_number,
+            )
+        )
+        result = await session.execute(stmt)
+        chapter = result.scalars().first()
+        if not chapter:
+            raise PermanentJobError("章节不存在")
+
+        selected_version = next(
+            (v for v in chapter.versions if v.id == job.selected_version_id),
+            None,
+        )
+        if not selected_version or not selected_version.content:
+            raise PermanentJobError("选中的版本不存在或内容为空")
+
+        chapter.selected_version_id = selected_version.id
+        chapter.status = ChapterGenerationStatus.SUCCESSFUL.value
+        chapter.word_count = len(selected_version.content or "")
+        await session.commit()
+
+        vector_store = None
+        if settings.vector_store_enabled and not job.skip_vector_update:
+            try:
+                vector_store = VectorStoreService()
+            except RuntimeError as exc:
+                logger.warning("向量库初始化失败，跳过定稿写入: %s", exc)
+
+        finalize_service = FinalizeService(
+            session,
+            LLMService(session),
+            vector_store,
+            session_factory=session_factory,
+        )
+        finalize_result = await finalize_service.finalize_chapter(
+            project_id=job.project_id,
+            chapter_number=job.chapter_number,
+            chapter_text=selected_version.content,
+            user_id=job.user_id,
+            skip_vector_update=job.skip_vector_update,
+        )
+    if not finalize_result.get("success"):
+        raise RuntimeError(finalize_result.get("error") or "定稿处理失败")
+
+    # 定稿后预先生成本章摘要，后续章节生成时直接读取
+    try:
+        backfill = await SummaryBackfillService(session_factory).backfill_project(
+            job.project_id, job.user_id, chapter_numbers=[job.chapter_number]
+        )
+        finalize_result["chapter_real_summary"] = "updated" if backfill.generated else "unchanged"
+    except Exception as exc:  # noqa: BLE001 - 摘要失败不影响定稿结果
+        logger.warning("定稿后生成章节摘要失败: job=%s error=%s", job.id, exc)
+        finalize_result["chapter_real_summary"] = "failed"
+    return finalize_result
+
+
+async def process_finalize_job(job: FinalizeJob, *, session_factory: async_sessionmaker) -> str:
+    """执行已领取的任务并记录结果，返回任务的新状态（succeeded / queued / failed）。"""
+    try:
+        result = await execute_finalize(job, session_factory=session_factory)
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        permanent = isinstance(exc, PermanentJobError) or job.attempts >= job.max_attempts
+        delay = None if permanent else retry_delay_seconds(job.attempts)
+        async with session_factory() as session:
+            status = await FinalizeJobRepository(session).mark_failed(job.id, str(exc), retry_delay=delay)
+        logger.warning(
+            "定稿任务失败: job=%s attempt=%s/%s status=%s retry_in=%s error=%s",
+            job.id,
+            job.attempts,
+            job.max_attempts,
+            status,
+            delay,
+            exc,
+        )
+        return status
+
+    async with session_factory() as session:
+        await FinalizeJobRepository(session).mark_succeeded(job.id, result)
+    logger.info("定稿任务完成: job=%s project=%s chapter=%s", job.id, job.project_id, job.chapter_number)
+    return "succeeded"
+
+
+class FinalizeJobQueue:
+    """进程内 worker 池：轮询领取到期任务，同一项目串行执行，worker 数即并发上限。"""
+
+    def __init__(
+        self,
+        *,
+        session_factory: async_sessionmaker,
+        workers: int,
+        poll_interval: float,
+        stale_after: float,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._workers = max(1, workers)
+        self._poll_interval = poll_interval
+        self._stale_after = stale_after
+        self._worker_id = worker_id or default_worker_id()
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._running_projects: Set[str] = set()
+        self._claim_lock = asyncio.Lock()
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    def notify(self) -> None:
+        """有新任务入队时唤醒空闲 worker。"""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        # 本机已退出进程持有的任务立即回收，避免阻塞同项目的后续定稿
+        await self._requeue_orphaned()
+        await self._requeue_stale()
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(index), name=f"finalize-worker-{index}")
+            for index in range(self._workers)
+        ]
+        logger.info("定稿任务 worker 已启动: workers=%d worker_id=%s", self._workers, self._worker_id)
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info("定稿任务 worker 已停止")
+
+    async def _worker_loop(self, index: int) -> None:
+        idle_rounds = 0
+        while True:
+            self._wakeup.clear()
+            job = await self._claim()
+            if job is None:
+                idle_rounds += 1
+                # 由第 0 号 worker 周期性回收超时任务
+                if index == 0 and idle_rounds * self._poll_interval >= 60:
+                    idle_rounds = 0
+                    await self._requeue_orphaned()
+                    await self._requeue_stale()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await process_finalize_job(job, session_factory=self._session_factory)
+            except asyncio.CancelledError:
+                await self._release(job.id)
+                raise
+            except Exception as exc:  # pragma: no cover - 记录状态失败时仅打印日志
+                logger.error("处理定稿任务异常: job=%s error=%s", job.id, exc, exc_info=True)
+            finally:
+                self._running_projects.discard(job.project_id)
+            # 可能有同项目的后续任务在等待
+            self._wakeup.set()
+
+    async def _claim(self) -> Optional[FinalizeJob]:
+        async with self._claim_lock:
+            try:
+                async with self._session_factory() as session:
+                    job = await FinalizeJobRepository(session).claim_next(
+                        worker_id=self._worker_id,
+                        exclude_projects=self._running_projects,
+                    )
+            except Exception as exc:  # pragma: no cover - 数据库暂不可用时等待下一轮
+                logger.warning("领取定稿任务失败: %s", exc)
+                return None
+            if job is not None:
+                self._running_projects.add(job.project_id)
+            return job
+
+    async def _release(self, job_id: str) -> None:
+        try:
+            async with self._session_factory() as session:
+                await FinalizeJobRepository(session).release(job_id)
+        except Exception as exc:  # pragma: no cover - 停机阶段失败时交由超时回收
+            logger.warning("归还定稿任务失败: job=%s error=%s", job_id, exc)
+
+    async def _requeue_orphaned(self) -> None:
+        try:
+            async with self._session_factory() as session:
+                repo = FinalizeJobRepository(session)
+                # 启动后本进程自身的任务仍在执行，只回收其他已退出进程的任务
+                dead = [
+                    worker_id
+                    for worker_id in await repo.list_running_workers()
+                    if (worker_id != self._worker_id or not self._tasks) and is_orphaned_worker(worker_id)
+                ]
+                count = await repo.requeue_workers(dead)
+        except Exception as exc:  # pragma: no cover - 回收失败不影响主循环
+            logger.warning("回收已退出 worker 的定稿任务失败: %s", exc)
+            return
+        if count:
+            logger.warning("已重新入队 %d 个已退出 worker 的定稿任务: workers=%s", count, dead)
+
+    async def _requeue_stale(self) -> None:
+        try:
+            async with self._session_factory() as session:
+                count = await FinalizeJobRepository(session).requeue_stale(stale_after_seconds=self._stale_after)
+        except Exception as exc:  # pragma: no cover - 回收失败不影响主循环
+            logger.warning("回收超时定稿任务失败: %s", exc)
+            return
+        if count:
+            logger.warning("已重新入队 %d 个超时定稿任务", count)
+
+
+_queue: Optional[FinalizeJobQueue] = None
+
+
+def get_finalize_queue() -> FinalizeJobQueue:
+    """返回进程级定稿任务队列（惰性创建）。"""
+    global _queue
+    if _queue is None:
+        _queue = FinalizeJobQueue(
+            session_factory=AsyncSessionLocal,
+            workers=settings.finalize_queue_workers,
+            poll_interval=settings.finalize_queue_poll_seconds,
+            stale_after=settings.finalize_job_stale_seconds,
+        )
+    return _queue
+
+
+__all__ = [
+    "FinalizeJobQueue",
+    "PermanentJobError",
+    "enqueue_finalize_job",
+    "execute_finalize",
+    "get_finalize_queue",
+    "is_orphaned_worker",
+    "process_finalize_job",
+]
@@ -10,18 +10,27 @@
 5. 创建章节快照 (chapter_snapshot)
 
 这是"生成后闭环"的核心服务，确保长程一致性。
+其中 1-4 及章节摘要互不依赖，由阶段执行器并发执行，结果汇总后统一提交一次，
+各阶段耗时与失败信息写入返回结果的 updates.stage_timings。
 """
+import json
 import logging
-from typing import Optional, Dict, Any, List
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Dict, Any, List
 from datetime import datetime
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.config import settings
 
 from ..models.project_memory import ProjectMemory, ChapterSnapshot
 from ..models.memory_layer import CharacterState
 from ..models.novel import Chapter, ChapterVersion, NovelProject
 from ..models.chapter_blueprint import ChapterBlueprint
 from .llm_service import LLMService
+from .stage_executor import Stage, run_stages
 from .vector_store_service import VectorStoreService
 
 logger = logging.getLogger(__name__)
@@ -141,17 +150,22 @@ class FinalizeService:
     定稿服务
     
     负责章节定稿后的一系列处理，包括更新记忆、状态和向量库。
+    
+    传入 session_factory 时，各 LLM 阶段在独立会话中并发执行（LLMService 会在会话上读写配置与计数，
+    同一会话不能被多个协程共用）；否则复用 llm_service 逐个执行。
     """
     
     def __init__(
         self,
-        db: Session,
+        db: AsyncSession,
         llm_service: LLMService,
-        vector_store_service: Optional[VectorStoreService] = None
+        vector_store_service: Optional[VectorStoreService] = None,
+        session_factory: Optional[async_sessionmaker] = None,
     ):
         self.db = db
         self.llm_service = llm_service
         self.vector_store_service = vector_store_service
+        self._session_factory = session_factory
     
     async def finalize_chapter(
         self,
@@ -181,58 +195,77 @@ class FinalizeService:
             "chapter_number": chapter_number,
             "updates": {}
         }
+        updates = result["updates"]
+        started = time.perf_counter()
         
         try:
-            # 1. 获取或创建项目记忆
+            # 1. 读取项目记忆与角色状态（数据库读取在并发阶段之前完成）
             project_memory = await self._get_or_create_project_memory(project_id)
+            old_summary = project_memory.global_summary or ""
+            old_plot_arcs = project_memory.plot_arcs or {}
+            old_state = await self._get_character_state_text(project_id)
             
-            # 2. 更新全局摘要
-            new_summary = await self._update_global_summary(
-                chapter_text=chapter_text,
-                old_summary=project_memory.global_summary or "",
-                user_id=user_id
-            )
+            # 2. 互不依赖的 LLM / 向量库阶段并发执行
+            stages = [
+                Stage("global_summary", lambda _: self._update_global_summary(
+                    chapter_text=chapter_text,
+                    old_summary=old_summary,
+                    user_id=user_id
+                )),
+                Stage("character_state", lambda _: self._update_character_state(
+                    chapter_text=chapter_text,
+                    old_state=old_state,
+                    user_id=user_id
+                )),
+                Stage("plot_arcs", lambda _: self._update_plot_arcs(
+                    chapter_text=chapter_text,
+                    chapter_number=chapter_number,
+                    old_plot_arcs=old_plot_arcs,
+                    user_id=user_id
+                )),
+                Stage("chapter_summary", lambda _: self._generate_chapter_summary(
+                    chapter_text=chapter_text,
+                    chapter_number=chapter_number,
+                    user_id=user_id
+                )),
+            ]
+            if not skip_vector_update and self.vector_store_service:
+                stages.append(Stage("vector_store", lambda _: self._update_vector_store(
+                    project_id=project_id,
+                    chapter_number=chapter_number,
+                    chapter_text=chapter_text
+                )))
+            max_concurrency = settings.finalize_stage_concurrency if self._session_factory else 1
+            outcomes = await run_stages(stages, max_concurrency=max_concurrency)
+            updates["stage_timings"] = {name: outcome.timing() for name, outcome in outcomes.items()}
+            
+            def _stage_result(name: str) -> Any:
+                outcome = outcomes.get(name)
+                if outcome is None:
+                    return None
+                if not outcome.ok:
+                    updates[name] = "failed"
+                    return None
+                return outcome.result
+            
+            new_summary = _stage_result("global_summary")
+            new_state = _stage_result("character_state")
+            new_plot_arcs = _stage_result("plot_arcs")
+            chapter_summary = _stage_result("chapter_summary")
+            if "vector_store" in outcomes:
+                updates["vector_store"] = "updated" if outcomes["vector_store"].ok else "failed"
+            
+            # 3. 汇总写库，最后统一提交一次
             if new_summary:
                 project_memory.global_summary = new_summary
-                result["updates"]["global_summary"] = "updated"
-            
-            # 3. 更新角色状态
-            old_state = await self._get_character_state_text(project_id)
-            new_state = await self._update_character_state(
-                chapter_text=chapter_text,
-                old_state=old_state,
-                user_id=user_id
-            )
+                updates["global_summary"] = "updated"
             if new_state:
                 await self._save_character_state(project_id, chapter_number, new_state)
-                result["updates"]["character_state"] = "updated"
-            
-            # 4. 更新剧情线追踪
-            new_plot_arcs = await self._update_plot_arcs(
-                chapter_text=chapter_text,
-                chapter_number=chapter_number,
-                old_plot_arcs=project_memory.plot_arcs or {},
-                user_id=user_id
-            )
+                updates["character_state"] = "updated"
             if new_plot_arcs:
                 project_memory.plot_arcs = new_plot_arcs
-                result["updates"]["plot_arcs"] = "updated"
+                updates["plot_arcs"] = "updated"
             
-            # 5. 更新向量库
-            if not skip_vector_update and self.vector_store_service:
-                await self._update_vector_store(
-                    project_id=project_id,
-                    chapter_number=chapter_number,
-                    chapter_text=chapter_text
-                )
-                result["updates"]["vector_store"] = "updated"
-            
-            # 6. 创建章节快照
-            chapter_summary = await self._generate_chapter_summary(
-                chapter_text=chapter_text,
-                chapter_number=chapter_number,
-                user_id=user_id
-            )
             await self._create_chapter_snapshot(
                 project_id=project_id,
                 chapter_number=chapter_number,
@@ -242,31 +275,48 @@ class FinalizeService:
                 chapter_summary=chapter_summary,
                 word_count=len(chapter_text)
             )
-            result["updates"]["snapshot"] = "created"
+            updates["snapshot"] = "created"
             
-            # 7. 更新项目记忆的最后更新章节
+            # 4. 更新项目记忆的最后更新章节
             project_memory.last_updated_chapter = chapter_number
             project_memory.version += 1
             
-            # 8. 更新章节蓝图状态
+            # 5. 更新章节蓝图状态
             await self._update_blueprint_status(project_id, chapter_number)
             
-            self.db.commit()
-            logger.info(f"定稿处理完成: project={project_id}, chapter={chapter_number}")
+            await self.db.commit()
+            logger.info(
+                "定稿处理完成: project=%s chapter=%s total_ms=%.1f stages=%s",
+                project_id,
+                chapter_number,
+                (time.perf_counter() - started) * 1000,
+                updates["stage_timings"],
+            )
             
         except Exception as e:
             logger.error(f"定稿处理失败: {e}")
-            self.db.rollback()
+            await self.db.rollback()
             result["success"] = False
             result["error"] = str(e)
         
+        updates["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
         return result
     
+    @asynccontextmanager
+    async def _stage_llm(self) -> AsyncIterator[LLMService]:
+        """为单个阶段提供 LLMService：有会话工厂时使用独立会话，否则复用注入的实例。"""
+        if self._session_factory is None:
+            yield self.llm_service
+            return
+        async with self._session_factory() as stage_session:
+            yield LLMService(stage_session)
+    
     async def _get_or_create_project_memory(self, project_id: str) -> ProjectMemory:
         """获取或创建项目记忆"""
-        memory = self.db.query(ProjectMemory).filter(
-            ProjectMemory.project_id == project_id
-        ).first()
+        result = await self.db.execute(
+            select(ProjectMemory).where(ProjectMemory.project_id == project_id)
+        )
+        memory = result.scalars().first()
         
         if not memory:
             memory = ProjectMemory(
@@ -279,7 +329,7 @@ class FinalizeService:
                 }
             )
             self.db.add(memory)
-            self.db.flush()
+            await self.db.flush()
         
         return memory
     
@@ -295,24 +345,24 @@ class FinalizeService:
             global_summary=old_summary
         )
         
-        try:
-            response = await self.llm_service.generate(
+        async with self._stage_llm() as llm_service:
+            response = await llm_service.generate(
                 prompt=prompt,
                 user_id=user_id,
                 max_tokens=3000,
                 temperature=0.3
             )
-            return response.strip() if response else None
-        except Exception as e:
-            logger.error(f"更新全局摘要失败: {e}")
-            return None
+        return response.strip() if response else None
     
     async def _get_character_state_text(self, project_id: str) -> str:
         """获取角色状态文本"""
         # 获取最新的角色状态记录
-        states = self.db.query(CharacterState).filter(
-            CharacterState.project_id == project_id
-        ).order_by(CharacterState.chapter_number.desc()).all()
+        result = await self.db.execute(
+            select(CharacterState)
+            .where(CharacterState.project_id == project_id)
+            .order_by(CharacterState.chapter_number.desc())
+        )
+        states = result.scalars().all()
         
         if not states:
             return ""
@@ -354,17 +404,14 @@ class FinalizeService:
             old_state=old_state or "（暂无角色状态记录）"
         )
         
-        try:
-            response = await self.llm_service.generate(
+        async with self._stage_llm() as llm_service:
+            response = await llm_service.generate(
                 prompt=prompt,
                 user_id=user_id,
                 max_tokens=4000,
                 temperature=0.3
             )
-            return response.strip() if response else None
-        except Exception as e:
-            logger.error(f"更新角色状态失败: {e}")
-            return None
+        return response.strip() if response else None
     
     async def _save_character_state(
         self,
@@ -392,36 +439,29 @@ class FinalizeService:
         old_plot_arcs: Dict,
         user_id: int
     ) -> Optional[Dict]:
-        """更新剧情线追踪"""
-        import json
-        
+        """更新剧情线追踪（返回内容无法解析为 JSON 时抛出异常，由阶段执行器记录）"""
         prompt = UPDATE_PLOT_ARCS_PROMPT.format(
             chapter_text=chapter_text,
             chapter_number=chapter_number,
             plot_arcs=json.dumps(old_plot_arcs, ensure_ascii=False, indent=2)
         )
         
-        try:
-            response = await self.llm_service.generate(
+        async with self._stage_llm() as llm_service:
+            response = await llm_service.generate(
                 prompt=prompt,
                 user_id=user_id,
                 max_tokens=2000,
                 temperature=0.3
             )
-            if response:
-                # 尝试解析JSON
-                response = response.strip()
-                if response.startswith("```"):
-                    response = response.split("```")[1]
-                    if response.startswith("json"):
-                        response = response[4:]
-                return json.loads(response)
-        except json.JSONDecodeError as e:
-            logger.error(f"解析剧情线JSON失败: {e}")
-        except Exception as e:
-            logger.error(f"更新剧情线失败: {e}")
-        
-        return None
+        if not response:
+            return None
+        # 尝试解析JSON
+        response = response.strip()
+        if response.startswith("```"):
+            response = response.split("```")[1]
+            if response.startswith("json"):
+                response = response[4:]
+        return json.loads(response)
     
     async def _update_vector_store(
         self,
@@ -433,15 +473,12 @@ class FinalizeService:
         if not self.vector_store_service:
             return
         
-        try:
-            # 将章节文本分块并存入向量库
-            await self.vector_store_service.add_chapter_to_store(
-                project_id=project_id,
-                chapter_number=chapter_number,
-                content=chapter_text
-            )
-        except Exception as e:
-            logger.error(f"更新向量库失败: {e}")
+        # 将章节文本分块并存入向量库
+        await self.vector_store_service.add_chapter_to_store(
+            project_id=project_id,
+            chapter_number=chapter_number,
+            content=chapter_text
+        )
     
     async def _generate_chapter_summary(
         self,
@@ -455,17 +492,14 @@ class FinalizeService:
             chapter_number=chapter_number
         )
         
-        try:
-            response = await self.llm_service.generate(
+        async with self._stage_llm() as llm_service:
+            response = await llm_service.generate(
                 prompt=prompt,
                 user_id=user_id,
                 max_tokens=500,
                 temperature=0.3
             )
-            return response.strip() if response else None
-        except Exception as e:
-            logger.error(f"生成章节摘要失败: {e}")
-            return None
+        return response.strip() if response else None
     
     async def _create_chapter_snapshot(
         self,
@@ -491,10 +525,13 @@ class FinalizeService:
     
     async def _update_blueprint_status(self, project_id: str, chapter_number: int):
         """更新章节蓝图状态"""
-        blueprint = self.db.query(ChapterBlueprint).filter(
-            ChapterBlueprint.project_id == project_id,
-            ChapterBlueprint.chapter_number == chapter_number
-        ).first()
+        result = await self.db.execute(
+            select(ChapterBlueprint).where(
+                ChapterBlueprint.project_id == project_id,
+                ChapterBlueprint.chapter_number == chapter_number
+            )
+        )
+        blueprint = result.scalars().first()
         
         if blueprint:
             blueprint.is_finalized = True
@@ -509,15 +546,22 @@ class FinalizeService:
         
         用于在生成章节时提供上下文参考。
         """
-        memory = self.db.query(ProjectMemory).filter(
-            ProjectMemory.project_id == project_id
-        ).first()
+        memory_result = await self.db.execute(
+            select(ProjectMemory).where(ProjectMemory.project_id == project_id)
+        )
+        memory = memory_result.scalars().first()
         
         # 获取最近的章节快照
-        recent_snapshots = self.db.query(ChapterSnapshot).filter(
-            ChapterSnapshot.project_id == project_id,
-            ChapterSnapshot.chapter_number < chapter_number
-        ).order_by(ChapterSnapshot.chapter_number.desc()).limit(3).all()
+        snapshot_result = await self.db.execute(
+            select(ChapterSnapshot)
+            .where(
+                ChapterSnapshot.project_id == project_id,
+                ChapterSnapshot.chapter_number < chapter_number
+            )
+            .order_by(ChapterSnapshot.chapter_number.desc())
+            .limit(3)
+        )
+        recent_snapshots = snapshot_result.scalars().all()
         
         return {
             "global_summary": memory.global_summary if memory else None,
@@ -0,0 +1,162 @@
+# AIMETA P=生成事件流_章节生成SSE推送|R=阶段事件_逐token转发_心跳_断开取消|NR=不含生成逻辑|E=GenerationEventStream_TokenSink_stream_generation_format_sse|X=internal|A=事件队列_SSE编码|D=asyncio|S=memory|RD=./README.ai
+"""
+章节生成事件流
+
+原有生成接口要等全部版本、审查和落库完成后才返回，客户端在几分钟内收不到任何字节。
+流式接口把生成过程转成 SSE 事件：
+
+- ``stage``：mission / rag / version / review / persist 等阶段的 start / done / failed；
+- ``token``：各版本正文的增量文本（``{"version": 序号, "text": 增量}``），连续的同版本 token 合并后发送；
+- ``version_reset``：某版本的 LLM 调用重试，客户端应清空该版本已收到的文本；
+- ``result`` / ``error``：最终结果或错误，之后流结束。
+
+客户端断开时取消生成任务；长时间无事件时发送注释行心跳，避免代理断开空闲连接。
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+_CLOSE = object()
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+class TokenSink:
+    """把某个版本的 LLM 增量输出转发到事件流。"""
+
+    __slots__ = ("_stream", "version")
+
+    def __init__(self, stream: "GenerationEventStream", version: int) -> None:
+        self._stream = stream
+        self.version = version
+
+    def write(self, text: str) -> None:
+        if text:
+            self._stream.emit("token", {"version": self.version, "text": text})
+
+    def reset(self) -> None:
+        self._stream.emit("version_reset", {"version": self.version})
+
+
+class GenerationEventStream:
+    """生成过程中的事件队列；生产方同步 emit，消费方通过 stream_generation 读取。"""
+
+    def __init__(self) -> None:
+        self._items: Deque[Any] = deque()
+        self._ready = asyncio.Event()
+        self.closed = False
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        self._items.append((event, data))
+        self._ready.set()
+
+    def stage(self, name: str, status: str, **data: Any) -> None:
+        self.emit("stage", {"stage": name, "status": status, **data})
+
+    def token_sink(self, version: int) -> TokenSink:
+        return TokenSink(self, version)
+
+    def close(self) -> None:
+        self._items.append(_CLOSE)
+        self._ready.set()
+
+    async def next_event(self, timeout: float) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        等待下一个事件：超时返回 None，流关闭后返回 None 并将 closed 置为 True
+
+        连续的同版本 token 合并为一个事件。
+        """
+        while not self._items:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self._items[0] is _CLOSE:
+            self.closed = True
+            return None
+        event, data = self._items.popleft()
+        if event != "token":
+            return event, data
+        texts = [data["text"]]
+        while self._items:
+            following = self._items[0]
+            if following is _CLOSE or following[0] != "token" or following[1]["version"] != data["version"]:
+                break
+            texts.append(self._items.popleft()[1]["text"])
+        return event, {"version": data["version"], "text": "".join(texts)}
+
+
+async def stream_generation(
+    run: Callable[[GenerationEventStream], Awaitable[Any]],
+    *,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    heartbeat_seconds: float = 15.0,
+    on_abort: Optional[Callable[[], Awaitable[None]]] = None,
+) -> AsyncIterator[str]:
+    """
+    运行 run(events) 并以 SSE 文本产出其事件，结束时产出 result 或 error 事件
+
+    客户端断开（is_disconnected 返回 True，或 StreamingResponse 取消本生成器）时取消任务，
+    任务失败或被取消时调用 on_abort 做状态收尾。
+    """
+    events = GenerationEventStream()
+
+    async def _runner() -> Any:
+        try:
+            return await run(events)
+        finally:
+            events.close()
+
+    task = asyncio.create_task(_runner(), name="chapter-generation-stream")
+    finished = False
+    try:
+        while True:
+            item = await events.next_event(heartbeat_seconds)
+            if events.closed:
+                break
+            if item is None:
+                if is_disconnected is not None and await is_disconnected():
+                    logger.info("客户端已断开，取消流式生成")
+                    return
+                yield ": ping\n\n"
+                continue
+            yield format_sse(*item)
+
+        try:
+            result = await task
+        except HTTPException as exc:
+            yield format_sse("error", {"status_code": exc.status_code, "detail": exc.detail})
+        except Exception as exc:  # noqa: BLE001 - 错误以事件形式返回，HTTP 状态码已发送
+            logger.exception("流式生成失败: %s", exc)
+            yield format_sse("error", {"status_code": 500, "detail": f"生成章节失败: {str(exc)[:200]}"})
+        else:
+            finished = True
+            yield format_sse("result", result)
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if not finished and on_abort is not None:
+            try:
+                await on_abort()
+            except Exception as exc:  # noqa: BLE001 - 收尾失败不影响连接关闭
+                logger.warning("流式生成收尾失败: %s", exc)
+
+
+__all__ = [
+    "GenerationEventStream",
+    "TokenSink",
+    "format_sse",
+    "stream_generation",
+]
@@ -0,0 +1,382 @@
+# AIMETA P=小说导入任务_后台执行与进度|R=登记任务_后台导入_阶段进度_取消_中断回收_SSE进度|NR=不含分章与AI分析细节|E=ImportJobManager_ImportJobCancelled_get_import_job_manager|X=job|A=后台任务调度|D=asyncio,sqlalchemy|S=db,tmpfile|RD=./README.ai
+"""
+小说导入任务
+
+原先 /novels/import 在请求内同步完成分章、两次 LLM 分析和全部写库，常因代理超时失败。
+现在请求只把上传内容复制到临时文件、登记 import_jobs 任务并立即返回任务 ID，导入在后台执行：
+
+- parse：分章、统计人名候选、截取样本；
+- census / profiling：两次 LLM 分析（角色筛选、蓝图分析）；
+- persist：创建项目并分批写入章节，进度为已写入章数 / 总章数；
+- ingest：安排导入后的章节摘要补全。
+
+进度写入任务表，客户端轮询任务或订阅 SSE。取消请求写入任务表，执行进程在进度回调或心跳中发现后
+中止导入并删除已创建的项目；章节写入提交后导入即告完成，不再响应取消。
+上传内容只保存在执行进程的临时文件中，无法续跑：执行进程已退出（本机进程不存在，或心跳超时）的
+未完成任务在启动时及之后定期标记为失败，并删除其已创建的项目（项目创建后立即记入任务表）。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from typing import IO, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..core.config import settings
+from ..db.session import AsyncSessionLocal
+from ..models import ImportJob
+from ..repositories.finalize_job_repository import utcnow
+from ..repositories.import_job_repository import ImportJobRepository
+from ..schemas.novel import ImportJobStatus
+from .finalize_queue import default_worker_id, is_orphaned_worker
+from .generation_events import format_sse
+from .import_service import ImportService
+from .novel_service import NovelService
+from .summary_backfill import schedule_summary_backfill
+
+logger = logging.getLogger(__name__)
+
+IMPORT_STAGES = ("parse", "census", "profiling", "persist", "ingest")
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+# persist 阶段每批都会回调，两次写库之间至少间隔该秒数（最后一批总会写入）
+_PROGRESS_MIN_INTERVAL = 0.5
+
+
+class ImportJobCancelled(Exception):
+    """执行中发现任务已被请求取消。"""
+
+
+def _spool_upload(source: IO[bytes]) -> Tuple[IO[bytes], int]:
+    """把上传内容复制到本任务独占的临时文件；请求结束后 UploadFile 会被关闭。"""
+    spool = tempfile.TemporaryFile()
+    try:
+        shutil.copyfileobj(source, spool, 1 << 20)
+        size = spool.tell()
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool, size
+
+
+class _ProgressReporter:
+    """ImportService 的进度回调：写入任务表，发现取消请求时抛出 ImportJobCancelled。"""
+
+    def __init__(
+        self, session_factory: async_sessionmaker, job_id: str, on_cancel: Callable[[], None]
+    ) -> None:
+        self._session_factory = session_factory
+        self._job_id = job_id
+        self._on_cancel = on_cancel
+        self._stage: Optional[str] = None
+        self._written_at = 0.0
+        self.chapters = 0
+
+    async def __call__(self, stage: str, done: int = 0, total: int = 0) -> None:
+        now = time.monotonic()
+        if stage == "persist":
+            self.chapters = total
+            if stage == self._stage and done < total and now - self._written_at < _PROGRESS_MIN_INTERVAL:
+                return
+        self._stage = stage
+        self._written_at = now
+        async with self._session_factory() as session:
+            cancel_requested = await ImportJobRepository(session).report_progress(
+                self._job_id, stage=stage, done=done, total=total
+            )
+        if cancel_requested:
+            self._on_cancel()
+            raise ImportJobCancelled(self._job_id)
+
+
+class ImportJobManager:
+    """进程内导入任务执行器：信号量限制同时执行的导入数，超出的任务保持 queued 排队。"""
+
+    def __init__(
+        self,
+        *,
+        session_factory: async_sessionmaker,
+        concurrency: int,
+        stale_after: float,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._stale_after = stale_after
+        self._heartbeat_interval = max(0.05, min(30.0, stale_after / 3))
+        self._recover_interval = max(0.1, min(60.0, stale_after / 2))
+        self._recover_task: Optional[asyncio.Task] = None
+        self._worker_id = worker_id or default_worker_id()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # 仍可取消的任务（章节写入提交前）与已被取消的任务
+        self._cancellable: Set[str] = set()
+        self._cancelled: Set[str] = set()
+
+    async def submit(self, user_id: int, upload: UploadFile) -> ImportJob:
+        """登记导入任务并在后台开始执行，返回 queued 状态的任务。"""
+        await upload.seek(0)
+        spool, size = await asyncio.to_thread(_spool_upload, upload.file)
+        filename = upload.filename or ""
+        try:
+            async with self._session_factory() as session:
+                job = await ImportJobRepository(session).create(
+                    user_id=user_id,
+                    filename=filename[:255],
+                    file_size=size,
+                    worker_id=self._worker_id,
+                )
+                await session.commit()
+                await session.refresh(job)
+        except BaseException:
+            spool.close()
+            raise
+
+        self._cancellable.add(job.id)
+        task = asyncio.create_task(self._run(job.id, user_id, spool, filename), name=f"import-job-{job.id}")
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _task, job_id=job.id: self._forget(job_id))
+        logger.info("导入任务已登记: job=%s user=%s file=%s size=%d", job.id, user_id, filename, size)
+        return job
+
+    async def cancel(self, job_id: str, user_id: int) -> Optional[ImportJob]:
+        """请求取消任务；任务在本进程执行时立即中断，否则由执行进程在下一次心跳时中断。"""
+        async with self._session_factory() as session:
+            repo = ImportJobRepository(session)
+            job = await repo.get_for_user(job_id, user_id)
+            if job is None:
+                return None
+            if job.status in TERMINAL_STATUSES:
+                return job
+            await repo.request_cancel(job_id)
+            self._abort(job_id)
+            return await repo.get_by_id(job_id)
+
+    async def get(self, job_id: str, user_id: int) -> Optional[ImportJob]:
+        async with self._session_factory() as session:
+            return await ImportJobRepository(session).get_for_user(job_id, user_id)
+
+    async def wait(self, job_id: str) -> None:
+        """等待本进程中的任务结束（测试与停机使用）。"""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def start(self) -> None:
+        """回收上次运行遗留的任务，并定期回收心跳超时的任务（可能属于其他已退出的进程）。"""
+        if self._recover_task is not None:
+            return
+        await self.recover_interrupted()
+        self._recover_task = asyncio.create_task(self._recover_loop(), name="import-job-recover")
+
+    async def recover_interrupted(self) -> int:
+        """
+        把执行进程已退出的未完成任务标记为失败，并删除其写了一半的项目，返回处理的任务数
+
+        本机进程已不存在（或进程号与本进程相同但任务不在本进程中）的任务立即回收；
+        其他主机的任务在心跳超过 stale_after 后回收。上传内容随原进程的临时文件一起丢失，无法续跑。
+        """
+        deadline = utcnow() - timedelta(seconds=self._stale_after)
+        interrupted: List[Tuple[str, Optional[str], int]] = []
+        try:
+            async with self._session_factory() as session:
+                repo = ImportJobRepository(session)
+                for job in await repo.list_active():
+                    if job.id in self._tasks:
+                        continue
+                    stale = job.heartbeat_at is None or job.heartbeat_at < deadline
+                    if not stale and not is_orphaned_worker(job.worker_id):
+                        continue
+                    # 标记失败会同步清空会话内对象的 project_id，先记下待删除的项目
+                    orphan = (job.id, job.project_id, job.user_id)
+                    if await repo.mark_interrupted(job.id, error="导入进程已退出，任务中断，请重新上传"):
+                        interrupted.append(orphan)
+        except Exception as exc:  # pragma: no cover - 回收失败不影响启动，下一轮重试
+            logger.warning("回收中断的导入任务失败: %s", exc)
+            return 0
+
+        for _job_id, project_id, user_id in interrupted:
+            if project_id:
+                await self._discard_project(project_id, user_id)
+        if interrupted:
+            logger.warning("已将 %d 个中断的导入任务标记为失败", len(interrupted))
+        return len(interrupted)
+
+    async def shutdown(self) -> None:
+        if self._recover_task is not None:
+            self._recover_task.cancel()
+            await asyncio.gather(self._recover_task, return_exceptions=True)
+            self._recover_task = None
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tasks:
+            logger.info("已中断 %d 个导入任务", len(tasks))
+
+    async def _recover_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._recover_interval)
+            await self.recover_interrupted()
+
+    async def _discard_project(self, project_id: str, user_id: int) -> None:
+        try:
+            async with self._session_factory() as session:
+                await NovelService(session).delete_projects([project_id], user_id)
+        except Exception as exc:  # noqa: BLE001 - 项目可能已被删除
+            logger.warning("删除中断导入的项目 %s 失败: %s", project_id, exc)
+            return
+        logger.info("已删除中断导入的项目 %s", project_id)
+
+    async def job_events(
+        self,
+        job_id: str,
+        user_id: int,
+        *,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+        poll_seconds: float = 1.0,
+        heartbeat_seconds: float = 15.0,
+    ) -> AsyncIterator[str]:
+        """
+        以 SSE 推送任务状态：状态或进度变化时发送 progress 事件，任务结束后发送 done 事件并结束
+
+        任务可能在其他进程执行，因此轮询任务表而不是订阅进程内事件；
+        LLM 分析阶段长时间没有变化时发送注释行心跳，避免代理断开空闲连接。
+        """
+        last: Optional[Dict[str, Any]] = None
+        idle = 0.0
+        while True:
+            job = await self.get(job_id, user_id)
+            if job is None:
+                yield format_sse("error", {"status_code": 404, "detail": "导入任务不存在"})
+                return
+            payload = ImportJobStatus.model_validate(job).model_dump(mode="json")
+            if job.status in TERMINAL_STATUSES:
+                yield format_sse("done", payload)
+                return
+            if payload != last:
+                yield format_sse("progress", payload)
+                last = payload
+                idle = 0.0
+            elif idle >= heartbeat_seconds:
+                yield ": ping\n\n"
+                idle = 0.0
+            if is_disconnected is not None and await is_disconnected():
+                return
+            await asyncio.sleep(poll_seconds)
+            idle += poll_seconds
+
+    def _forget(self, job_id: str) -> None:
+        self._tasks.pop(job_id, None)
+        self._cancellable.discard(job_id)
+        self._cancelled.discard(job_id)
+
+    def _abort(self, job_id: str) -> None:
+        task = self._tasks.get(job_id)
+        # 已在中止（清理已创建的项目）的任务不再重复取消
+        if task is None or job_id not in self._cancellable or job_id in self._cancelled or task.done():
+            return
+        self._cancelled.add(job_id)
+        task.cancel()
+
+    async def _run(self, job_id: str, user_id: int, spool: IO[bytes], filename: str) -> None:
+        watcher = asyncio.create_task(self._watch(job_id), name=f"import-job-watch-{job_id}")
+        try:
+            async with self._semaphore:
+                async with self._session_factory() as session:
+                    started = await ImportJobRepository(session).mark_running(job_id)
+                if not started:
+                    raise ImportJobCancelled(job_id)
+                result = await self._execute(job_id, user_id, spool, filename)
+        except ImportJobCancelled:
+            await self._finish(job_id, "cancelled")
+        except asyncio.CancelledError:
+            if job_id in self._cancelled:
+                await self._finish(job_id, "cancelled")
+            else:
+                await self._finish(job_id, "failed", error="服务关闭，导入中断，请重新上传")
+                raise
+        except HTTPException as exc:
+            await self._finish(job_id, "failed", error=str(exc.detail))
+        except Exception as exc:  # noqa: BLE001 - 失败原因记录到任务表
+            logger.exception("导入任务失败: job=%s error=%s", job_id, exc)
+            await self._finish(job_id, "failed", error=f"导入失败: {exc}")
+        else:
+            await self._finish(job_id, "succeeded", project_id=result["project_id"], result=result)
+        finally:
+            watcher.cancel()
+            spool.close()
+
+    async def _execute(self, job_id: str, user_id: int, spool: IO[bytes], filename: str) -> Dict[str, Any]:
+        reporter = _ProgressReporter(self._session_factory, job_id, lambda: self._cancelled.add(job_id))
+        async with self._session_factory() as session:
+            project_id = await ImportService(session).import_novel(
+                user_id,
+                spool,
+                filename,
+                progress=reporter,
+                on_project_created=lambda created_id: self._record_project(job_id, created_id),
+            )
+        # 章节已提交，导入完成；之后的取消请求不再中断任务
+        self._cancellable.discard(job_id)
+        async with self._session_factory() as session:
+            await ImportJobRepository(session).report_progress(job_id, stage="ingest", done=0, total=0)
+        backfill = settings.summary_backfill_on_import and schedule_summary_backfill(project_id, user_id)
+        logger.info("导入任务完成: job=%s project=%s chapters=%d", job_id, project_id, reporter.chapters)
+        return {"project_id": project_id, "chapters": reporter.chapters, "summary_backfill": bool(backfill)}
+
+    async def _record_project(self, job_id: str, project_id: str) -> None:
+        async with self._session_factory() as session:
+            await ImportJobRepository(session).set_project(job_id, project_id)
+
+    async def _watch(self, job_id: str) -> None:
+        """定期刷新心跳；其他进程写入的取消请求也在这里发现。"""
+        while True:
+            await asyncio.sleep(self._heartbeat_interval)
+            try:
+                async with self._session_factory() as session:
+                    cancel_requested = await ImportJobRepository(session).heartbeat(job_id)
+            except Exception as exc:  # pragma: no cover - 数据库暂不可用时等待下一轮
+                logger.warning("刷新导入任务心跳失败: job=%s error=%s", job_id, exc)
+                continue
+            if cancel_requested:
+                self._abort(job_id)
+                return
+
+    async def _finish(self, job_id: str, status: str, **values: Any) -> None:
+        try:
+            async with self._session_factory() as session:
+                await ImportJobRepository(session).finish(job_id, status, **values)
+        except Exception as exc:  # pragma: no cover - 记录失败时交由启动回收
+            logger.warning("更新导入任务状态失败: job=%s status=%s error=%s", job_id, status, exc)
+            return
+        logger.info("导入任务结束: job=%s status=%s", job_id, status)
+
+
+_manager: Optional[ImportJobManager] = None
+
+
+def get_import_job_manager() -> ImportJobManager:
+    """返回进程级导入任务执行器（惰性创建）。"""
+    global _manager
+    if _manager is None:
+        _manager = ImportJobManager(
+            session_factory=AsyncSessionLocal,
+            concurrency=settings.import_job_concurrency,
+            stale_after=settings.import_job_stale_seconds,
+        )
+    return _manager
+
+
+__all__ = [
+    "IMPORT_STAGES",
+    "ImportJobCancelled",
+    "ImportJobManager",
+    "get_import_job_manager",
+]
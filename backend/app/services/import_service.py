@@ -1,17 +1,19 @@
 # AIMETA P=导入服务_小说导入业务逻辑|R=小说导入_格式转换|NR=不含内容生成|E=ImportService|X=internal|A=服务类|D=sqlalchemy|S=db,fs|RD=./README.ai
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-import re
-from typing import Dict, List, Optional, Tuple
+from typing import Awaitable, BinaryIO, Callable, Dict, List, Optional, Protocol
 
 from fastapi import HTTPException, UploadFile, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import Chapter
 from ..schemas.novel import Blueprint
+from ..services.chapter_bulk_import import ChapterBulkImporter
 from ..services.llm_service import LLMService
+from ..services.novel_text_reader import NovelTextReader
 from ..services.novel_service import NovelService
 from ..services.prompt_service import PromptService
 from ..utils.json_utils import remove_think_tags, sanitize_json_like_text, unwrap_markdown_json
@@ -19,6 +21,16 @@ from ..utils.json_utils import remove_think_tags, sanitize_json_like_text, unwra
 logger = logging.getLogger(__name__)
 
 
+class ImportProgress(Protocol):
+    """导入阶段进度回调：stage 为 parse / census / profiling / persist，done / total 为阶段内进度。"""
+
+    def __call__(self, stage: str, done: int = 0, total: int = 0) -> Awaitable[None]: ...
+
+
+async def _ignore_progress(stage: str, done: int = 0, total: int = 0) -> None:
+    return None
+
+
 class ImportService:
     """处理小说文件导入、分章与AI分析的服务。"""
 
@@ -28,20 +40,46 @@ class ImportService:
         self.llm_service = LLMService(session)
         self.prompt_service = PromptService(session)
 
-    async def import_novel_from_file(self, user_id: int, file: UploadFile) -> str:
+    async def import_novel_from_file(
+        self,
+        user_id: int,
+        file: UploadFile,
+        *,
+        progress: Optional[ImportProgress] = None,
+    ) -> str:
         """
         导入小说文件，执行分章、分析并创建项目。
         返回新创建的项目ID。
         """
-        content = await self._read_file_content(file)
-        if not content:
-            raise HTTPException(status_code=400, detail="文件内容为空")
+        # 上传内容保存在 SpooledTemporaryFile 中，按块解码、逐章读取，不把全文载入内存
+        await file.seek(0)
+        return await self.import_novel(user_id, file.file, file.filename or "", progress=progress)
 
-        # 1. 智能分段（分章）
-        chapters = self._split_into_chapters(content)
-        if not chapters:
-            # 如果无法分章，将整个文件作为一个章节
-            chapters = [("第一章 全文", content)]
+    async def import_novel(
+        self,
+        user_id: int,
+        fileobj: BinaryIO,
+        filename: str,
+        *,
+        progress: Optional[ImportProgress] = None,
+        on_project_created: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> str:
+        """
+        从可 seek 的二进制文件导入小说，返回新创建的项目ID
+
+        progress 在每个阶段开始时以及章节写入的每一批之后调用；回调抛出的异常（如取消）会中止导入，
+        已创建的项目会被删除。on_project_created 在项目创建后、写入章节前调用，
+        供后台任务记录项目 ID，以便进程意外退出后清理未完成的项目。
+        """
+        report = progress or _ignore_progress
+        reader = NovelTextReader(fileobj)
+
+        # 1. 智能分段（分章），同一遍中预提取人名 (基于全文)
+        await report("parse")
+        scan = await asyncio.to_thread(reader.scan)
+        if not scan.titles:
+            raise HTTPException(status_code=400, detail="文件内容为空")
+        potential_characters = scan.character_candidates(top_n=150) # 扩大到150，广撒网
 
         # 2. 准备分析用的文本样本
         # 策略改进：混合采样 (均匀剧情采样 + 角色高光采样)
@@ -51,11 +89,8 @@ class ImportService:
         MAX_CHAPTER_CHARS = 1000
         
         plot_sample_text = ""
-        chapter_titles = [title for title, _ in chapters]
-        total_chapters = len(chapters)
-        
-        # 预提取人名 (基于全文)
-        potential_characters = self._extract_potential_characters(content, top_n=150) # 扩大到150，广撒网
+        chapter_titles = scan.titles
+        total_chapters = len(chapter_titles)
         
         # 确定要采样的章节索引 (均匀分布)
         indices = []
@@ -78,26 +113,33 @@ class ImportService:
             indices.extend(last_indices)
             indices = sorted(list(set(indices)))
 
+        # B. 角色高光采样 (约 20k-30k 字)
+        # 为每个潜在角色提取一段精彩片段，与剧情采样在同一遍读取中完成
+        # 优化：Top 150 采样，窗口适当缩小，只求证明存在
+        excerpts, char_highlights_text = await asyncio.to_thread(
+            reader.collect_samples,
+            indices,
+            potential_characters,
+            sample_chars=MAX_CHAPTER_CHARS,
+            context_window=200,
+            total_chapters=total_chapters,
+        )
+
         for i in indices:
-            if 0 <= i < len(chapters):
-                title, body = chapters[i]
-                clean_body = body[:MAX_CHAPTER_CHARS].strip()
-                plot_sample_text += f"第{i+1}章 {title}\n{clean_body}\n\n"
+            if i in excerpts:
+                plot_sample_text += f"第{i+1}章 {chapter_titles[i]}\n{excerpts[i]}\n\n"
         
         if len(plot_sample_text) > MAX_PLOT_CHARS:
             plot_sample_text = plot_sample_text[:MAX_PLOT_CHARS] + "...\n(截断)"
             
-        # B. 角色高光采样 (约 20k-30k 字)
-        # 为每个潜在角色提取一段精彩片段
-        # 优化：Top 150 采样，窗口适当缩小，只求证明存在
-        char_highlights_text = self._extract_character_highlights(content, potential_characters, context_window=200)
-        
         # 3. 分阶段分析
         # 阶段一：先筛选出确定的角色名单 (Stable Census)
+        await report("census")
         verified_characters = await self._filter_characters_only(user_id, potential_characters, char_highlights_text)
         logger.info(f"角色筛选完成，潜在 {len(potential_characters)} -> 确认 {len(verified_characters)}")
         
         # 阶段二：详细分析 (Deep Profiling)
+        await report("profiling")
         blueprint_data = await self._analyze_content(
             user_id, 
             plot_sample_text, 
@@ -108,17 +150,36 @@ class ImportService:
         )
         
         # 4. 创建项目
-        title = blueprint_data.title or file.filename.rsplit('.', 1)[0]
-        initial_prompt = f"导入自文件: {file.filename}"
+        await report("persist", 0, total_chapters)
+        title = blueprint_data.title or filename.rsplit('.', 1)[0]
+        initial_prompt = f"导入自文件: {filename}"
         project = await self.novel_service.create_project(user_id, title, initial_prompt)
-        
+        try:
+            if on_project_created is not None:
+                await on_project_created(project.id)
+            await self._persist_project(project, blueprint_data, chapter_titles, reader, report)
+        except BaseException:
+            # 失败或被取消时删除已创建的项目，避免留下只有蓝图、章节不全的项目
+            await self._discard_project(project.id, user_id)
+            raise
+        return project.id
+
+    async def _persist_project(
+        self,
+        project,
+        blueprint_data: Blueprint,
+        chapter_titles: List[str],
+        reader: NovelTextReader,
+        report: ImportProgress,
+    ) -> None:
+        total_chapters = len(chapter_titles)
         # 5. 保存蓝图
         # 确保 blueprint_data 中的 chapter_outline 包含所有章节（如果AI没返回全部）
         if blueprint_data.chapter_outline:
             # 建立映射以合并AI生成的摘要和实际章节列表
             ai_outlines = {o.chapter_number: o for o in blueprint_data.chapter_outline}
             final_outlines = []
-            for i, (chap_title, _) in enumerate(chapters, 1):
+            for i, chap_title in enumerate(chapter_titles, 1):
                 if i in ai_outlines:
                     outline = ai_outlines[i]
                     outline.title = chap_title # 优先使用解析出的真实标题
@@ -135,192 +196,33 @@ class ImportService:
         
         await self.novel_service.replace_blueprint(project.id, blueprint_data)
         
-        # 6. 保存章节内容
-        for i, (chap_title, chap_content) in enumerate(chapters, 1):
-            chapter = await self.novel_service.get_or_create_chapter(project.id, i)
-            # 创建初始版本
-            await self.novel_service.replace_chapter_versions(
-                chapter, 
-                [chap_content], 
-                metadata=[{"source": "file_import"}]
-            )
-            # 自动选择第一个版本（即导入的内容）
-            await self.novel_service.select_chapter_version(chapter, 0)
+        # 6. 保存章节内容：边读取边分批插入章节和导入版本（逐批提交，中止时整个项目被删除），并直接选中导入的版本
+        importer = ChapterBulkImporter(self.session)
+
+        async def _on_batch(done: int, total: int) -> None:
+            # 每批提交一次再汇报进度：进度由其他会话写入任务表，SQLite 下不能在持有写锁时等待它
+            await self.session.commit()
+            await report("persist", done, total)
+
+        stats = await importer.import_batches(
+            project.id,
+            reader.iter_content_batches(importer.batch_size),
+            total=total_chapters,
+            metadata={"source": "file_import"},
+            progress=_on_batch,
+        )
+        logger.info("导入项目 %s 写入章节: %s", project.id, stats.as_dict())
 
         # 更新项目状态
         project.status = "blueprint_ready"
         await self.session.commit()
-        
-        return project.id
 
-    async def _read_file_content(self, file: UploadFile) -> str:
-        content_bytes = await file.read()
+    async def _discard_project(self, project_id: str, user_id: int) -> None:
         try:
-            return content_bytes.decode('utf-8')
-        except UnicodeDecodeError:
-            try:
-                return content_bytes.decode('gbk')
-            except UnicodeDecodeError:
-                raise HTTPException(status_code=400, detail="文件编码不支持，请使用 UTF-8 或 GBK")
-
-    def _extract_potential_characters(self, content: str, top_n: int = 100) -> List[str]:
-        """
-        基于正则和统计，从全文中提取最可能的人名。
-        策略：寻找 "XXX说"、"XXX道" 等高频对话模式。
-        """
-        # 常见对话引导词
-        verbs = r"(?:说|道|问|回答|冷笑|大笑|苦笑|点头|摇头|叹气|叹道|解释|怒道|吼道|低语|传音|喊道|叫道|哭道|骂道)"
-        
-        # 模式1: 名字+动词 (e.g. "张三笑道")
-        # 限制名字长度为2-4字，排除单字名以减少误报
-        p1 = fr"([\u4e00-\u9fa5]{{2,4}}){verbs}"
-        
-        # 模式2: 名字+空格/标点+说 (e.g. "张三：") - 剧本模式或特定排版
-        p2 = r"([\u4e00-\u9fa5]{2,4})[：:]\s*“"
-        
-        # 模式3: “...”+名字+说 (e.g. “...”张三说道。)
-        # 这种比较难用简单正则匹配准确，暂略
-        
-        matches = []
-        matches.extend(re.findall(p1, content))
-        matches.extend(re.findall(p2, content))
-        
-        # 统计频率
-        from collections import Counter
-        counter = Counter(matches)
-        
-        # 过滤黑名单（非人名的常用词）
-        stop_words = {
-            "自己", "怎么", "于是", "接着", "忽然", "突然", "虽然", "既然", "如果", "只要", "为了", 
-            "并且", "而且", "不仅", "甚至", "难道", "毕竟", "到底", "终于", "立刻", "马上", 
-            "缓缓", "轻轻", "大声", "小声", "连忙", "赶紧", "不禁", "不由", "只能", "只好", 
-            "众人", "大家", "某人", "那个", "这个", "什么", "此时", "此刻", "随后", "然后",
-            "原来", "其实", "顺便", "根本", "简直", "仿佛", "好像", "似乎", "一直", "曾经",
-            "已经", "正在", "准备", "开始", "继续", "重新", "互相", "彼此", "对方", "两者",
-            "一人", "两人", "三人", "四人", "五人", "少年", "少女", "男子", "女子", "老者", 
-            "老头", "大汉", "青年", "中年", "小孩", "丫头", "家伙", "兄弟", "姐妹", "师父",
-            "师兄", "师弟", "师姐", "师妹", "陛下", "殿下", "娘娘", "将军", "大人", "掌门",
-            "宗主", "长老", "护法", "弟子", "属下", "奴才", "微臣", "老夫", "老朽", "在下",
-            "贫道", "本座", "本王", "本宫", "朕", "寡人", "哀家", "这时候", "那个时候",
-            "一声", "一把", "一眼", "一手", "一步", "一下", "一脚", "一口", "一个", "一名", "一位",
-            "今日", "明日", "昨日", "每天", "白天", "晚上", "半夜", "清晨", "黄昏", "刚刚", "刚才",
-            "这里", "那里", "哪里", "那边", "这边", "里面", "外面", "前面", "后面", "上面", "下面",
-            "左边", "右边", "中间", "周围", "四处", "到处", "满脸", "满身", "全身", "浑身",
-            "双手", "双眼", "双脚", "双腿", "两眼", "两手", "两脚", "两腿", "心中", "心里", "心头",
-            "手中", "手里", "手头", "眼中", "眼里", "口中", "嘴里", "身上", "身下", "身边", "身旁",
-            "此时此刻", "不得不", "能不能", "是不是", "会不会", "有没有", "想了想", "摇了摇头", "点了点头"
-        }
-        
-        candidates = []
-        for name, count in counter.most_common():
-            if name not in stop_words and count >= 2: # 至少出现2次
-                candidates.append(name)
-                if len(candidates) >= top_n:
-                    break
-                    
-        return candidates
-
-    def _extract_character_highlights(self, content: str, characters: List[str], context_window: int = 300) -> str:
-        """
-        为每个潜在角色提取一段“高光时刻”。
-        优先选择对话密集或有动作描写的段落。
-        """
-        highlights = []
-        used_ranges = [] # 记录已使用的文本范围 (start, end)，避免重复
-        
-        # 简单的去重辅助函数
-        def is_overlapping(start, end):
-            for s, e in used_ranges:
-                if not (end < s or start > e): # 如果有交集
-                    return True
-            return False
-
-        for char in characters:
-            # 查找该角色的所有出现位置
-            # 为了性能，限制查找前N个匹配
-            matches = list(re.finditer(re.escape(char), content))
-            if not matches:
-                continue
-                
-            best_score = -1
-            best_snippet = ""
-            best_range = (0, 0)
-            
-            # 简单的评分机制：找对话最多的片段
-            # 只需要检查前几个和中间几个出现位置，不必遍历所有，节省时间
-            # 采样点：前3次，中间3次，最后3次
-            sample_indices = []
-            total = len(matches)
-            if total <= 10:
-                sample_indices = range(total)
-            else:
-                sample_indices = list(range(3)) + list(range(total//2 - 1, total//2 + 2)) + list(range(total-3, total))
-                
-            for idx in sample_indices:
-                if idx < 0 or idx >= total: continue
-                
-                m = matches[idx]
-                start = max(0, m.start() - context_window)
-                end = min(len(content), m.end() + context_window)
-                
-                # 如果这个范围已经被大幅占用了，跳过
-                if is_overlapping(start + 50, end - 50): # 允许边缘少量重叠
-                    continue
-                    
-                snippet = content[start:end]
-                
-                # 评分：双引号数量（对话）+ 标点符号丰富度
-                score = snippet.count('“') * 2 + snippet.count('”') * 2 + snippet.count('！') + snippet.count('？')
-                
-                if score > best_score:
-                    best_score = score
-                    best_snippet = snippet
-                    best_range = (start, end)
-            
-            if best_snippet:
-                # 清理首尾不完整的句子
-                # 简单处理：找到第一个换行符和最后一个换行符
-                first_nl = best_snippet.find('\n')
-                last_nl = best_snippet.rfind('\n')
-                if first_nl != -1 and last_nl != -1 and first_nl < last_nl:
-                    clean_snippet = best_snippet[first_nl:last_nl].strip()
-                else:
-                    clean_snippet = best_snippet.strip()
-                
-                if len(clean_snippet) > 50: # 太短的不要
-                    highlights.append(f"--- 【{char}】的出场片段 ---\n{clean_snippet}\n")
-                    used_ranges.append(best_range)
-        
-        return "\n".join(highlights)
-
-    def _split_into_chapters(self, content: str) -> List[Tuple[str, str]]:
-        """
-        使用正则匹配章节标题。
-        支持格式：
-        第1章
-        第一章
-        Chapter 1
-        """
-        # 正则表达式匹配行首的章节标题
-        # 常见格式：第xxx章、Chapter xxx、xxx、(xxx)
-        pattern = r"(^\s*第[0-9零一二三四五六七八九十百千]+[章卷回节].*|^\s*Chapter\s+[0-9]+.*)"
-        
-        # 使用 split 保留分隔符（即标题）
-        parts = re.split(pattern, content, flags=re.MULTILINE)
-        
-        chapters = []
-        # split 后第一个元素通常是标题前的内容（序章或前言），如果非空也算一章
-        if parts[0].strip():
-             chapters.append(("序章", parts[0].strip()))
-             
-        # 后续元素是 标题, 内容, 标题, 内容...
-        for i in range(1, len(parts), 2):
-            title = parts[i].strip()
-            body = parts[i+1].strip() if i+1 < len(parts) else ""
-            if body:
-                chapters.append((title, body))
-                
-        return chapters
+            await self.session.rollback()
+            await self.novel_service.delete_projects([project_id], user_id)
+        except Exception as exc:  # noqa: BLE001 - 清理失败只记录，保留原始异常
+            logger.warning("导入中止后删除项目 %s 失败: %s", project_id, exc)
 
     async def _filter_characters_only(self, user_id: int, potential_characters: List[str], char_highlights: str) -> List[str]:
         """
@@ -14,7 +14,9 @@ import logging
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from ..models.project_memory import ProjectMemory
 from ..models.chapter_blueprint import ChapterBlueprint
@@ -168,7 +170,7 @@ class KnowledgeRetrievalService:
     
     def __init__(
         self,
-        db: Session,
+        db: AsyncSession,
         llm_service: LLMService,
         vector_store_service: Optional[VectorStoreService] = None
     ):
@@ -200,7 +202,7 @@ class KnowledgeRetrievalService:
             FilteredContext
         """
         # 1. 获取章节蓝图信息
-        blueprint = self._get_chapter_blueprint(project_id, chapter_number)
+        blueprint = await self._get_chapter_blueprint(project_id, chapter_number)
         
         # 2. 生成检索关键词
         queries = await self._generate_search_queries(
@@ -218,9 +220,7 @@ class KnowledgeRetrievalService:
         )
         
         # 4. 获取前文摘要
-        memory = self.db.query(ProjectMemory).filter(
-            ProjectMemory.project_id == project_id
-        ).first()
+        memory = await self._get_project_memory(project_id)
         global_summary = memory.global_summary if memory else ""
         
         # 5. 过滤和结构化
@@ -268,16 +268,14 @@ class KnowledgeRetrievalService:
         context = {}
         
         # 1. 获取项目记忆
-        memory = self.db.query(ProjectMemory).filter(
-            ProjectMemory.project_id == project_id
-        ).first()
+        memory = await self._get_project_memory(project_id)
         
         if memory:
             context["global_summary"] = memory.global_summary
             context["plot_arcs"] = memory.plot_arcs
         
         # 2. 获取章节蓝图
-        blueprint = self._get_chapter_blueprint(project_id, chapter_number)
+        blueprint = await self._get_chapter_blueprint(project_id, chapter_number)
         if blueprint:
             context["blueprint"] = {
                 "chapter_focus": blueprint.chapter_focus,
@@ -333,7 +331,7 @@ class KnowledgeRetrievalService:
         基于前文内容和章节蓝图，生成针对性的写作摘要。
         """
         # 获取章节蓝图
-        blueprint = self._get_chapter_blueprint(project_id, chapter_number)
+        blueprint = await self._get_chapter_blueprint(project_id, chapter_number)
         if not blueprint:
             return None
         
@@ -373,16 +371,26 @@ class KnowledgeRetrievalService:
             logger.error(f"生成章节摘要失败: {e}")
             return None
     
-    def _get_chapter_blueprint(
+    async def _get_project_memory(self, project_id: str) -> Optional[ProjectMemory]:
+        """获取项目记忆"""
+        result = await self.db.execute(
+            select(ProjectMemory).where(ProjectMemory.project_id == project_id)
+        )
+        return result.scalars().first()
+    
+    async def _get_chapter_blueprint(
         self,
         project_id: str,
         chapter_number: int
     ) -> Optional[ChapterBlueprint]:
         """获取章节蓝图"""
-        return self.db.query(ChapterBlueprint).filter(
-            ChapterBlueprint.project_id == project_id,
-            ChapterBlueprint.chapter_number == chapter_number
-        ).first()
+        result = await self.db.execute(
+            select(ChapterBlueprint).where(
+                ChapterBlueprint.project_id == project_id,
+                ChapterBlueprint.chapter_number == chapter_number
+            )
+        )
+        return result.scalars().first()
     
     async def _generate_search_queries(
         self,
@@ -562,10 +570,16 @@ class KnowledgeRetrievalService:
         """获取前几章摘要"""
         from ..models.project_memory import ChapterSnapshot
         
-        snapshots = self.db.query(ChapterSnapshot).filter(
-            ChapterSnapshot.project_id == project_id,
-            ChapterSnapshot.chapter_number < current_chapter
-        ).order_by(ChapterSnapshot.chapter_number.desc()).limit(count).all()
+        result = await self.db.execute(
+            select(ChapterSnapshot)
+            .where(
+                ChapterSnapshot.project_id == project_id,
+                ChapterSnapshot.chapter_number < current_chapter
+            )
+            .order_by(ChapterSnapshot.chapter_number.desc())
+            .limit(count)
+        )
+        snapshots = result.scalars().all()
         
         return [
             {
@@ -584,10 +598,18 @@ class KnowledgeRetrievalService:
         """获取前几章内容"""
         from ..models.novel import Chapter, ChapterVersion
         
-        chapters = self.db.query(Chapter).filter(
-            Chapter.project_id == project_id,
-            Chapter.chapter_number < current_chapter
-        ).order_by(Chapter.chapter_number.desc()).limit(count).all()
+        # 异步会话不能懒加载关系，版本需随章节一并预加载
+        chapter_result = await self.db.execute(
+            select(Chapter)
+            .options(selectinload(Chapter.selected_version), selectinload(Chapter.versions))
+            .where(
+                Chapter.project_id == project_id,
+                Chapter.chapter_number < current_chapter
+            )
+            .order_by(Chapter.chapter_number.desc())
+            .limit(count)
+        )
+        chapters = chapter_result.scalars().all()
         
         result = []
         for ch in reversed(chapters):
@@ -608,10 +630,16 @@ class KnowledgeRetrievalService:
         """获取角色状态"""
         from ..models.memory_layer import CharacterState
         
-        states = self.db.query(CharacterState).filter(
-            CharacterState.project_id == project_id,
-            CharacterState.character_name == "__all__"
-        ).order_by(CharacterState.chapter_number.desc()).first()
+        result = await self.db.execute(
+            select(CharacterState)
+            .where(
+                CharacterState.project_id == project_id,
+                CharacterState.character_name == "__all__"
+            )
+            .order_by(CharacterState.chapter_number.desc())
+            .limit(1)
+        )
+        states = result.scalars().first()
         
         if states and states.extra:
             return states.extra.get("raw_state_text")
@@ -11,6 +11,7 @@ from ..models import LLMConfig
 from ..repositories.llm_config_repository import LLMConfigRepository
 from ..repositories.system_config_repository import SystemConfigRepository
 from ..schemas.llm_config import LLMConfigCreate, LLMConfigUpdate, LLMConfigRead
+from .config_cache import invalidate_llm_config
 from ..utils.llm_tool import ChatMessage, create_llm_client, ApiFormatType
 
 
@@ -99,6 +100,7 @@ class LLMConfigService:
         )
         await self.repo.add(instance)
         await self.session.commit()
+        invalidate_llm_config(user_id)
 
         # 刷新实例以获取数据库生成的值（id, created_at, updated_at）
         await self.session.refresh(instance)
@@ -118,6 +120,7 @@ class LLMConfigService:
 
         await self.repo.update_fields(instance, **data)
         await self.session.commit()
+        invalidate_llm_config(user_id)
 
         # 刷新实例以获取最新的数据库值（updated_at）
         await self.session.refresh(instance)
@@ -134,6 +137,7 @@ class LLMConfigService:
         was_active = instance.is_active
         await self.repo.delete(instance)
         await self.session.commit()
+        invalidate_llm_config(user_id)
 
         # 如果删除的是激活配置，自动激活下一个配置
         if was_active:
@@ -142,6 +146,7 @@ class LLMConfigService:
                 next_config = remaining_configs[0]
                 next_config.is_active = True
                 await self.session.commit()
+                invalidate_llm_config(user_id)
                 logger.info("用户 %s 删除了激活配置，自动激活了配置 ID=%s", user_id, next_config.id)
 
         logger.info("用户 %s 删除了 LLM 配置 ID=%s", user_id, config_id)
@@ -159,6 +164,7 @@ class LLMConfigService:
         # 激活目标配置
         instance.is_active = True
         await self.session.commit()
+        invalidate_llm_config(user_id)
 
         # 刷新实例以获取最新的数据库值（包括 updated_at）
         await self.session.refresh(instance)
@@ -215,7 +221,7 @@ class LLMConfigService:
         """
         start = time.time()
         try:
-            client = create_llm_client(api_format, api_key, base_url)
+            client = create_llm_client(api_format, api_key, base_url, pooled=False)
             messages = [ChatMessage(role="user", content="Hi")]
             response = ""
 
@@ -2,20 +2,29 @@
 import asyncio
 import logging
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import httpx
 from fastapi import HTTPException, status
-from openai import APIConnectionError, APIError, APIStatusError, APITimeoutError, AsyncOpenAI, InternalServerError
+from openai import APIConnectionError, APIError, APIStatusError, APITimeoutError, InternalServerError
 
 from ..core.config import settings
 from ..repositories.llm_config_repository import LLMConfigRepository
 from ..repositories.system_config_repository import SystemConfigRepository
 from ..repositories.user_repository import UserRepository
-from ..services.admin_setting_service import AdminSettingService
+from ..services.config_cache import get_active_llm_config, get_admin_setting_value, get_system_config_value
+from ..services.embedding_cache import get_embedding_cache
+from ..services.generation_events import TokenSink
 from ..services.prompt_service import PromptService
+from ..services.usage_counters import get_usage_counters
 from ..services.usage_service import UsageService
-from ..utils.llm_tool import ChatMessage, LLMClient, create_llm_client, normalize_google_base_url
+from ..utils.llm_tool import (
+    ChatMessage,
+    LLMClient,
+    create_llm_client,
+    get_llm_client_registry,
+    normalize_google_base_url,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +33,13 @@ try:  # pragma: no cover - 运行环境未安装时兼容
 except ImportError:  # pragma: no cover - Ollama 为可选依赖
     OllamaAsyncClient = None
 
+# 各提供方单次嵌入请求允许的最大条数
+_EMBEDDING_BATCH_LIMITS = {
+    "openai": 2048,
+    "google": 100,
+    "ollama": 512,
+}
+
 
 class LLMService:
     """封装与大模型交互的所有逻辑，包括配额控制与配置选择。"""
@@ -33,7 +49,6 @@ class LLMService:
         self.llm_repo = LLMConfigRepository(session)
         self.system_config_repo = SystemConfigRepository(session)
         self.user_repo = UserRepository(session)
-        self.admin_setting_service = AdminSettingService(session)
         self.usage_service = UsageService(session)
         self._embedding_dimensions: Dict[str, int] = {}
 
@@ -48,7 +63,9 @@ class LLMService:
         response_format: Optional[str] = None,
         max_tokens: Optional[int] = None,
         top_p: Optional[float] = None,
+        token_sink: Optional[TokenSink] = None,
     ) -> str:
+        """token_sink 不为空时，模型的增量输出会同时逐段转发给它（用于流式接口）。"""
         messages = [{"role": "system", "content": system_prompt}, *conversation_history]
         return await self._stream_and_collect(
             messages,
@@ -58,6 +75,7 @@ class LLMService:
             response_format=response_format,
             max_tokens=max_tokens,
             top_p=top_p,
+            token_sink=token_sink,
         )
 
     async def generate(
@@ -115,6 +133,7 @@ class LLMService:
         response_format: Optional[str] = None,
         max_tokens: Optional[int] = None,
         top_p: Optional[float] = None,
+        token_sink: Optional[TokenSink] = None,
     ) -> str:
         config = await self._resolve_llm_config(user_id)
         api_format = config.get("api_format", "openai_responses")
@@ -162,6 +181,9 @@ class LLMService:
         )
 
         for attempt in range(1, total_attempts + 1):
+            if full_response and token_sink is not None:
+                # 重试会重新生成全文，通知流式消费方丢弃已转发的部分
+                token_sink.reset()
             full_response = ""
             finish_reason = None
             try:
@@ -177,6 +199,8 @@ class LLMService:
                     ):
                         if part.get("content"):
                             full_response += part["content"]
+                            if token_sink is not None:
+                                token_sink.write(part["content"])
                         if part.get("finish_reason"):
                             finish_reason = part["finish_reason"]
 
@@ -478,11 +502,11 @@ class LLMService:
         return full_response
 
     async def _resolve_llm_config(self, user_id: Optional[int]) -> Dict[str, Optional[str]]:
-        active_config = await self.llm_repo.get_active_config(user_id) if user_id else None
-        active_api_key = (active_config.llm_provider_api_key or "").strip() if active_config else ""
-        active_base_url = active_config.llm_provider_url if active_config and active_config.llm_provider_url else None
-        active_model = active_config.llm_provider_model if active_config and active_config.llm_provider_model else None
-        active_api_format = getattr(active_config, "api_format", None) if active_config else None
+        active_config = await get_active_llm_config(self.session, user_id) if user_id else None
+        active_api_key = (active_config["api_key"] or "").strip() if active_config else ""
+        active_base_url = (active_config["base_url"] or None) if active_config else None
+        active_model = (active_config["model"] or None) if active_config else None
+        active_api_format = active_config["api_format"] if active_config else None
 
         system_api_key = await self._get_config_value("llm.api_key")
         system_base_url = await self._get_config_value("llm.base_url")
@@ -515,20 +539,13 @@ class LLMService:
         model: Optional[str] = None,
     ) -> List[float]:
         """生成文本向量，用于章节 RAG 检索，支持 openai、ollama、google、anthropic 多提供方。"""
-        provider = await self._get_config_value("embedding.provider") or "openai"
-
-        # 获取用户 LLM 配置，用于判断 api_format
-        config = await self._resolve_llm_config(user_id)
-        api_format = config.get("api_format", "openai_chat")
-
-        # 根据 api_format 确定默认嵌入模型
-        if provider == "ollama":
-            default_model = await self._get_config_value("ollama.embedding_model") or "nomic-embed-text:latest"
-        elif api_format == "google":
-            default_model = await self._get_config_value("embedding.model") or "text-embedding-004"
-        else:
-            default_model = await self._get_config_value("embedding.model") or "text-embedding-3-large"
-        target_model = model or default_model
+        provider, config, api_format, target_model = await self._resolve_embedding_target(user_id, model)
+        cache_namespace = self._embedding_cache_namespace(provider, api_format, target_model)
+        if settings.embedding_cache_enabled:
+            cached = await get_embedding_cache().get(cache_namespace, text)
+            if cached:
+                self._embedding_dimensions[target_model] = len(cached)
+                return cached
 
         embedding: Optional[List[float]] = None
 
@@ -590,8 +607,157 @@ class LLMService:
                 dimension = int(vector_size_str)
         if dimension:
             self._embedding_dimensions[target_model] = dimension
+        if settings.embedding_cache_enabled:
+            await get_embedding_cache().put(cache_namespace, text, embedding)
         return embedding
 
+    async def get_embeddings_batch(
+        self,
+        texts: Sequence[str],
+        *,
+        user_id: Optional[int] = None,
+        model: Optional[str] = None,
+    ) -> List[List[float]]:
+        """批量生成文本向量，结果与输入一一对应，失败项为空列表。
+
+        配置解析与日次数扣减只执行一次；命中嵌入缓存的文本不再请求，其余按提供方单次请求上限切分批次，
+        各批次在有界并发下请求（OpenAI 兼容 / Google batchEmbedContents / Ollama embed）。
+        """
+        if not texts:
+            return []
+
+        provider, config, api_format, target_model = await self._resolve_embedding_target(user_id, model)
+        cache_namespace = self._embedding_cache_namespace(provider, api_format, target_model)
+        cache = get_embedding_cache() if settings.embedding_cache_enabled else None
+        if cache is not None:
+            cached = await cache.get_many(cache_namespace, texts)
+        else:
+            cached = [None] * len(texts)
+        pending = [idx for idx, vector in enumerate(cached) if not vector]
+        if not pending:
+            self._embedding_dimensions[target_model] = len(cached[0])
+            logger.info("批量嵌入全部命中缓存: model=%s texts=%d", target_model, len(texts))
+            return [list(vector) for vector in cached]
+        pending_texts = [texts[idx] for idx in pending]
+
+        if provider == "ollama":
+            if OllamaAsyncClient is None:
+                logger.error("未安装 ollama 依赖，无法调用本地嵌入模型。")
+                raise HTTPException(status_code=500, detail="缺少 Ollama 依赖，请先安装 ollama 包。")
+            base_url = (
+                await self._get_config_value("ollama.embedding_base_url")
+                or await self._get_config_value("embedding.base_url")
+            )
+            batch_limit = _EMBEDDING_BATCH_LIMITS["ollama"]
+
+            async def _request(batch: List[str]) -> Optional[List[List[float]]]:
+                return await self._get_ollama_embeddings(batch, target_model, base_url)
+
+        elif api_format == "google":
+            batch_limit = _EMBEDDING_BATCH_LIMITS["google"]
+
+            async def _request(batch: List[str]) -> Optional[List[List[float]]]:
+                return await self._get_google_embeddings(batch, target_model, config)
+
+        else:
+            if api_format == "anthropic":
+                logger.warning(
+                    "Anthropic 不提供嵌入 API，尝试使用 OpenAI 兼容接口: user_id=%s",
+                    user_id,
+                )
+            # 批次并发前一次性解析凭据，避免多个协程同时使用数据库会话
+            api_key = config["api_key"] or await self._get_config_value("embedding.api_key")
+            base_url = config.get("base_url") or await self._get_config_value("embedding.base_url")
+            batch_limit = _EMBEDDING_BATCH_LIMITS["openai"]
+
+            async def _request(batch: List[str]) -> Optional[List[List[float]]]:
+                return await self._get_openai_embeddings(batch, target_model, api_key, base_url, user_id)
+
+        batch_size = max(1, min(settings.embedding_batch_size, batch_limit))
+        batches = [pending_texts[start:start + batch_size] for start in range(0, len(pending_texts), batch_size)]
+        semaphore = asyncio.Semaphore(max(1, settings.embedding_batch_concurrency))
+
+        async def _run(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                vectors = await _request(batch)
+            if not vectors or len(vectors) != len(batch):
+                logger.warning(
+                    "批量嵌入结果数量不匹配，整批置空: model=%s expected=%d got=%d",
+                    target_model,
+                    len(batch),
+                    len(vectors or []),
+                )
+                return [[] for _ in batch]
+            return [list(vector) if vector else [] for vector in vectors]
+
+        batch_results = await asyncio.gather(*(_run(batch) for batch in batches))
+        fresh = [vector for result in batch_results for vector in result]
+        if cache is not None:
+            await cache.put_many(cache_namespace, pending_texts, fresh)
+
+        embeddings: List[List[float]] = [list(vector) if vector else [] for vector in cached]
+        for idx, vector in zip(pending, fresh):
+            embeddings[idx] = vector
+
+        dimension = next((len(vector) for vector in embeddings if vector), 0)
+        if dimension:
+            self._embedding_dimensions[target_model] = dimension
+        logger.info(
+            "批量嵌入完成: model=%s texts=%d cached=%d requests=%d success=%d",
+            target_model,
+            len(texts),
+            len(texts) - len(pending),
+            len(batches),
+            sum(1 for vector in embeddings if vector),
+        )
+        return embeddings
+
+    @staticmethod
+    def _embedding_cache_namespace(provider: str, api_format: str, target_model: str) -> str:
+        """嵌入缓存命名空间：按实际调用的接口类型与模型区分，Anthropic 走 OpenAI 兼容接口。"""
+        if provider == "ollama":
+            kind = "ollama"
+        elif api_format == "google":
+            kind = "google"
+        else:
+            kind = "openai"
+        return f"{kind}:{target_model}"
+
+    async def _resolve_embedding_target(
+        self,
+        user_id: Optional[int],
+        model: Optional[str],
+    ) -> Tuple[str, Dict[str, Optional[str]], str, str]:
+        """解析嵌入提供方、LLM 配置、接口格式与目标模型（含一次日次数检查）。"""
+        provider = await self._get_config_value("embedding.provider") or "openai"
+
+        # 获取用户 LLM 配置，用于判断 api_format
+        config = await self._resolve_llm_config(user_id)
+        api_format = config.get("api_format", "openai_chat")
+
+        target_model = model or await self._default_embedding_model(provider, api_format)
+        return provider, config, api_format, target_model
+
+    async def get_embedding_namespace(self, *, user_id: Optional[int] = None, model: Optional[str] = None) -> str:
+        """返回当前嵌入命名空间（接口类型:模型），不请求接口也不占用日次数，供向量库判断已有向量能否复用。"""
+        provider = await self._get_config_value("embedding.provider") or "openai"
+        active_config = await get_active_llm_config(self.session, user_id) if user_id else None
+        api_format = (
+            (active_config["api_format"] if active_config else None)
+            or await self._get_config_value("llm.api_format")
+            or "openai_responses"
+        )
+        target_model = model or await self._default_embedding_model(provider, api_format)
+        return self._embedding_cache_namespace(provider, api_format, target_model)
+
+    async def _default_embedding_model(self, provider: str, api_format: str) -> str:
+        """根据提供方与 api_format 确定默认嵌入模型。"""
+        if provider == "ollama":
+            return await self._get_config_value("ollama.embedding_model") or "nomic-embed-text:latest"
+        if api_format == "google":
+            return await self._get_config_value("embedding.model") or "text-embedding-004"
+        return await self._get_config_value("embedding.model") or "text-embedding-3-large"
+
     async def _get_openai_embedding(
         self,
         text: str,
@@ -602,12 +768,12 @@ class LLMService:
         """通过 OpenAI 兼容接口获取嵌入向量。"""
         api_key = config["api_key"] or await self._get_config_value("embedding.api_key")
         base_url = config.get("base_url") or await self._get_config_value("embedding.base_url")
-        client = AsyncOpenAI(api_key=api_key, base_url=base_url)
         try:
-            response = await client.embeddings.create(
-                input=text,
-                model=model,
-            )
+            async with get_llm_client_registry().openai_sdk(api_key, base_url) as client:
+                response = await client.embeddings.create(
+                    input=text,
+                    model=model,
+                )
         except Exception as exc:  # pragma: no cover - 网络或鉴权失败
             logger.error(
                 "OpenAI 嵌入请求失败: model=%s base_url=%s user_id=%s error=%s",
@@ -644,8 +810,8 @@ class LLMService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(url, json=body)
+            async with get_llm_client_registry().http_client("google_embedding", base_url, api_key) as client:
+                response = await client.post(url, json=body, timeout=60.0)
                 if response.status_code >= 400:
                     error_detail = f"HTTP {response.status_code}"
                     try:
@@ -684,6 +850,101 @@ class LLMService:
             )
             return None
 
+    async def _get_openai_embeddings(
+        self,
+        texts: List[str],
+        model: str,
+        api_key: Optional[str],
+        base_url: Optional[str],
+        user_id: Optional[int],
+    ) -> Optional[List[List[float]]]:
+        """通过 OpenAI 兼容接口一次请求多条文本的嵌入向量。"""
+        try:
+            async with get_llm_client_registry().openai_sdk(api_key, base_url) as client:
+                response = await client.embeddings.create(input=texts, model=model)
+        except Exception as exc:  # pragma: no cover - 网络或鉴权失败
+            logger.error(
+                "OpenAI 批量嵌入请求失败: model=%s base_url=%s user_id=%s count=%d error=%s",
+                model,
+                base_url,
+                user_id,
+                len(texts),
+                exc,
+                exc_info=True,
+            )
+            return None
+        if not response.data:
+            logger.warning("OpenAI 批量嵌入请求返回空数据: model=%s user_id=%s", model, user_id)
+            return None
+        ordered = sorted(response.data, key=lambda item: getattr(item, "index", 0))
+        return [item.embedding for item in ordered]
+
+    async def _get_google_embeddings(
+        self,
+        texts: List[str],
+        model: str,
+        config: Dict[str, Optional[str]],
+    ) -> Optional[List[List[float]]]:
+        """通过 Google batchEmbedContents 接口批量获取嵌入向量。"""
+        api_key = config["api_key"]
+        base_url = normalize_google_base_url(config.get("base_url"))
+        url = f"{base_url}/models/{model}:batchEmbedContents?key={api_key}"
+        body = {
+            "requests": [
+                {"model": f"models/{model}", "content": {"parts": [{"text": text}]}}
+                for text in texts
+            ]
+        }
+
+        try:
+            async with get_llm_client_registry().http_client("google_embedding", base_url, api_key) as client:
+                response = await client.post(url, json=body, timeout=120.0)
+            if response.status_code >= 400:
+                logger.error(
+                    "Google 批量嵌入请求失败: model=%s base_url=%s status=%s body=%s",
+                    model,
+                    base_url,
+                    response.status_code,
+                    response.text[:500],
+                )
+                return None
+            data = response.json()
+        except Exception as exc:  # pragma: no cover - 网络或鉴权失败
+            logger.error(
+                "Google 批量嵌入请求异常: model=%s base_url=%s error=%s",
+                model,
+                base_url,
+                exc,
+                exc_info=True,
+            )
+            return None
+
+        # Google 响应格式: {"embeddings": [{"values": [...]}, ...]}
+        return [item.get("values", []) for item in data.get("embeddings", [])]
+
+    async def _get_ollama_embeddings(
+        self,
+        texts: List[str],
+        model: str,
+        base_url: Optional[str],
+    ) -> Optional[List[List[float]]]:
+        """通过 Ollama embed 接口批量获取嵌入向量。"""
+        client = OllamaAsyncClient(host=base_url)
+        try:
+            response = await client.embed(model=model, input=texts)
+        except Exception as exc:  # pragma: no cover - 本地服务调用失败
+            logger.error(
+                "Ollama 批量嵌入请求失败: model=%s base_url=%s error=%s",
+                model,
+                base_url,
+                exc,
+                exc_info=True,
+            )
+            return None
+        if isinstance(response, dict):
+            return response.get("embeddings")
+        return getattr(response, "embeddings", None)
+
     async def get_embedding_dimension(self, model: Optional[str] = None) -> Optional[int]:
         """获取嵌入向量维度，优先返回缓存结果，其次读取配置。"""
         provider = await self._get_config_value("embedding.provider") or "openai"
@@ -699,21 +960,22 @@ class LLMService:
         return int(vector_size_str) if vector_size_str else None
 
     async def _enforce_daily_limit(self, user_id: int) -> None:
-        limit_str = await self.admin_setting_service.get("daily_request_limit", "100")
-        limit = int(limit_str or 10)
-        used = await self.user_repo.get_daily_request(user_id)
-        if used >= limit:
+        limit_str = await get_admin_setting_value(self.session, "daily_request_limit")
+        limit = int(limit_str or 100)
+        # 原子预占当日额度，计数由 usage_counters 批量写回，不在当前会话上提交
+        reserved = await get_usage_counters().reserve_daily(
+            user_id, limit, lambda: self.user_repo.get_daily_request(user_id)
+        )
+        if not reserved:
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="今日请求次数已达上限，请明日再试或设置自定义 API Key。",
             )
-        await self.user_repo.increment_daily_request(user_id)
-        await self.session.commit()
 
     async def _get_config_value(self, key: str) -> Optional[str]:
-        record = await self.system_config_repo.get_by_key(key)
-        if record:
-            return record.value
+        value = await get_system_config_value(self.session, key)
+        if value is not None:
+            return value
         # 兼容环境变量，首次迁移时无需立即写入数据库
         env_key = key.upper().replace(".", "_")
         return os.getenv(env_key)
@@ -0,0 +1,141 @@
+# AIMETA P=事件循环阻塞监控_循环延迟采样与卡顿栈捕获|R=定时采样延迟_超阈值告警_看门狗线程抓取阻塞栈|NR=不含业务逻辑|E=LoopLagMonitor_get_loop_monitor|X=internal|A=循环延迟监控|D=asyncio,threading|S=memory|RD=./README.ai
+"""
+事件循环阻塞监控
+
+协程里任何同步调用（同步 ORM 查询、文件读写、CPU 密集计算）都会卡住整个事件循环，
+所有并发请求一起等待。这里用两种方式发现这类回归：
+
+- 采样协程每隔 interval 秒 sleep 一次，醒来时间比预期晚出的部分即循环延迟，
+  超过 loop_lag_threshold_ms 记为一次卡顿并告警；
+- 看门狗线程检查采样协程的心跳，循环停顿超过阈值时直接抓取事件循环线程的当前调用栈，
+  告警日志中即可看到正在阻塞的协程与代码行（采样协程只能在阻塞结束后才知道发生过卡顿）。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STACK_LIMIT = 12
+
+
+class LoopLagMonitor:
+    """测量事件循环延迟，超过阈值时记录并输出阻塞位置。"""
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        *,
+        interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = max(0.001, threshold_ms / 1000)
+        self.interval = interval if interval is not None else min(0.5, max(0.05, self.threshold / 2))
+        self._clock = clock
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._beat: float = 0.0
+        self._stall_reported = False
+        self.samples = 0
+        self.slow_count = 0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.last_stall_stack: List[str] = []
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = self._clock()
+        self._stall_reported = False
+        self._stop_event.clear()
+        self._task = asyncio.create_task(self._sample_loop(), name="loop-lag-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._stop_event.set()
+        watchdog, self._watchdog = self._watchdog, None
+        if watchdog is not None:
+            watchdog.join(timeout=1.0)
+
+    async def _sample_loop(self) -> None:
+        while True:
+            started = self._clock()
+            await asyncio.sleep(self.interval)
+            self._record(self._clock() - started - self.interval)
+
+    def _record(self, lag: float) -> None:
+        lag = max(0.0, lag)
+        self.samples += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self._beat = self._clock()
+        self._stall_reported = False
+        if lag >= self.threshold:
+            self.slow_count += 1
+            logger.warning("事件循环被阻塞 %.0f ms（阈值 %.0f ms）", lag * 1000, self.threshold * 1000)
+
+    def _watch(self) -> None:
+        """看门狗线程：心跳停滞超过阈值时抓取事件循环线程的调用栈。"""
+        while not self._stop_event.wait(self.threshold / 2):
+            stalled = self._clock() - self._beat - self.interval
+            if stalled < self.threshold or self._stall_reported:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._stall_reported = True
+            self.last_stall_stack = traceback.format_stack(frame, limit=_STACK_LIMIT)
+            logger.warning(
+                "事件循环已阻塞 %.0f ms，当前执行位置：\n%s",
+                stalled * 1000,
+                "".join(self.last_stall_stack),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "interval_ms": round(self.interval * 1000, 1),
+            "samples": self.samples,
+            "slow_count": self.slow_count,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "last_stall_stack": self.last_stall_stack,
+        }
+
+
+_MONITOR: Optional[LoopLagMonitor] = None
+
+
+def get_loop_monitor() -> LoopLagMonitor:
+    """进程级循环延迟监控，按配置懒加载。"""
+    global _MONITOR
+    if _MONITOR is None:
+        _MONITOR = LoopLagMonitor(settings.loop_lag_threshold_ms)
+    return _MONITOR
+
+
+__all__ = [
+    "LoopLagMonitor",
+    "get_loop_monitor",
+]
@@ -78,7 +78,7 @@ def _clean_string(text: str, parse_json: bool = True) -> str:
     )
 
 from fastapi import HTTPException, status
-from sqlalchemy import delete, func, select, update
+from sqlalchemy import delete, func, inspect, select, update
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -93,17 +93,19 @@ from ..models import (
     NovelConversation,
     NovelProject,
 )
-from ..repositories.novel_repository import NovelRepository
+from ..repositories.novel_repository import NovelRepository, ProjectLoad
 from ..schemas.admin import AdminNovelSummary
 from ..schemas.novel import (
     Blueprint,
     Chapter as ChapterSchema,
     ChapterGenerationStatus,
     ChapterOutline as ChapterOutlineSchema,
+    ChapterPage as ChapterPageSchema,
     NovelProject as NovelProjectSchema,
     NovelProjectSummary,
     NovelSectionResponse,
     NovelSectionType,
+    ProjectChapterDelta,
 )
 
 
@@ -188,8 +190,18 @@ class NovelService:
         await self.session.commit()
         return int(result.rowcount or 0)
 
-    async def ensure_project_owner(self, project_id: str, user_id: int) -> NovelProject:
-        project = await self.repo.get_by_id(project_id)
+    async def ensure_project_owner(
+        self,
+        project_id: str,
+        user_id: int,
+        load: ProjectLoad = ProjectLoad.FULL,
+        *,
+        include_selected_content: bool = False,
+    ) -> NovelProject:
+        """校验项目归属并按 load 层级加载项目；仅需校验时传 ProjectLoad.OWNER。"""
+        project = await self.repo.get_by_id(
+            project_id, load, include_selected_content=include_selected_content
+        )
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
         if project.user_id != user_id:
@@ -206,7 +218,7 @@ class NovelService:
         user_id: int,
         section: NovelSectionType,
     ) -> NovelSectionResponse:
-        project = await self.ensure_project_owner(project_id, user_id)
+        project = await self.ensure_project_owner(project_id, user_id, ProjectLoad.METADATA)
         return self._build_section_response(project, section)
 
     async def get_chapter_schema(
@@ -215,8 +227,56 @@ class NovelService:
         user_id: int,
         chapter_number: int,
     ) -> ChapterSchema:
-        project = await self.ensure_project_owner(project_id, user_id)
-        return self._build_chapter_schema(project, chapter_number)
+        project = await self.ensure_project_owner(project_id, user_id, ProjectLoad.OWNER)
+        return await self._load_chapter_schema(project, chapter_number)
+
+    async def get_chapter_page(
+        self,
+        project_id: str,
+        user_id: int,
+        *,
+        start: int = 1,
+        limit: int = 20,
+        include_content: bool = False,
+    ) -> ChapterPageSchema:
+        """按章节号分页读取章节，只加载当前页涉及的大纲和章节。"""
+        project = await self.ensure_project_owner(project_id, user_id, ProjectLoad.OWNER)
+        all_numbers = await self.repo.list_chapter_numbers(project_id)
+        remaining = [number for number in all_numbers if number >= start]
+        chapters = await self._build_chapter_range(project, remaining[:limit], include_content=include_content)
+        return ChapterPageSchema(
+            project_id=project.id,
+            revision=project.revision or 0,
+            total=len(all_numbers),
+            start=start,
+            limit=limit,
+            next_start=remaining[limit] if len(remaining) > limit else None,
+            chapters=chapters,
+        )
+
+    async def get_chapter_delta(
+        self,
+        project_id: str,
+        chapter_numbers: Iterable[int],
+    ) -> ProjectChapterDelta:
+        """
+        构建写作接口的增量响应
+
+        调用方需已完成所有权校验。chapter_numbers 中已不存在的章节（无大纲也无章节记录）
+        会出现在 removed_chapter_numbers 中。
+        """
+        project = await self.session.get(NovelProject, project_id, populate_existing=True)
+        if not project:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
+        numbers = sorted(set(chapter_numbers))
+        chapters = await self._build_chapter_range(project, numbers, include_content=True)
+        present = {chapter.chapter_number for chapter in chapters}
+        return ProjectChapterDelta(
+            project_id=project.id,
+            revision=project.revision or 0,
+            chapters=chapters,
+            removed_chapter_numbers=[number for number in numbers if number not in present],
+        )
 
     async def list_projects_for_user(self, user_id: int) -> List[NovelProjectSummary]:
         projects = await self.repo.list_by_user(user_id)
@@ -252,7 +312,8 @@ class NovelService:
 
     async def delete_projects(self, project_ids: List[str], user_id: int) -> None:
         for pid in project_ids:
-            project = await self.ensure_project_owner(pid, user_id)
+            # ORM 级联删除依赖已加载的子集合，这里必须加载完整对象图
+            project = await self.ensure_project_owner(pid, user_id, ProjectLoad.FULL)
             await self.repo.delete(project)
         await self.session.commit()
 
@@ -533,10 +594,13 @@ class NovelService:
         await self.session.flush()
         return outline
 
+    async def get_chapter(self, project_id: str, chapter_number: int) -> Optional[Chapter]:
+        return await self.repo.get_chapter(project_id, chapter_number)
+
     async def get_or_create_chapter(self, project_id: str, chapter_number: int) -> Chapter:
         stmt = (
             select(Chapter)
-            .options(selectinload(Chapter.selected_version))
+            .options(selectinload(Chapter.selected_version), selectinload(Chapter.versions))
             .where(
                 Chapter.project_id == project_id,
                 Chapter.chapter_number == chapter_number,
@@ -636,7 +700,7 @@ class NovelService:
         project_id: str,
         section: NovelSectionType,
     ) -> NovelSectionResponse:
-        project = await self.repo.get_by_id(project_id)
+        project = await self.repo.get_by_id(project_id, ProjectLoad.METADATA)
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
         return self._build_section_response(project, section)
@@ -646,10 +710,21 @@ class NovelService:
         project_id: str,
         chapter_number: int,
     ) -> ChapterSchema:
-        project = await self.repo.get_by_id(project_id)
+        project = await self.repo.get_by_id(project_id, ProjectLoad.OWNER)
         if not project:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
-        return self._build_chapter_schema(project, chapter_number)
+        return await self._load_chapter_schema(project, chapter_number)
+
+    async def _load_chapter_schema(self, project: NovelProject, chapter_number: int) -> ChapterSchema:
+        """只加载单个章节及其大纲来构建章节详情，不加载整个项目。"""
+        outline = await self.get_outline(project.id, chapter_number)
+        chapter = await self.get_chapter(project.id, chapter_number)
+        return self._build_chapter_schema(
+            project,
+            chapter_number,
+            outlines_map={chapter_number: outline} if outline else {},
+            chapters_map={chapter_number: chapter} if chapter else {},
+        )
 
     async def _serialize_project(self, project: NovelProject) -> NovelProjectSchema:
         conversations = [
@@ -678,6 +753,7 @@ class NovelService:
             title=project.title,
             initial_prompt=project.initial_prompt or "",
             status=project.status or "draft",
+            revision=project.revision or 0,
             conversation_history=conversations,
             blueprint=blueprint_schema,
             chapters=chapters_schema,
@@ -687,10 +763,45 @@ class NovelService:
         await self.session.execute(
             update(NovelProject)
             .where(NovelProject.id == project_id)
-            .values(updated_at=datetime.now(timezone.utc))
+            .values(updated_at=datetime.now(timezone.utc), revision=NovelProject.revision + 1)
         )
         await self.session.commit()
 
+    async def _build_chapter_range(
+        self,
+        project: NovelProject,
+        chapter_numbers: List[int],
+        *,
+        include_content: bool,
+    ) -> List[ChapterSchema]:
+        """只加载指定章节号的大纲和章节并构建章节结构，跳过两者都不存在的章节号。"""
+        if not chapter_numbers:
+            return []
+        result = await self.session.execute(
+            select(ChapterOutline).where(
+                ChapterOutline.project_id == project.id,
+                ChapterOutline.chapter_number.in_(chapter_numbers),
+            )
+        )
+        outlines_map = {outline.chapter_number: outline for outline in result.scalars()}
+        chapters_map = {
+            chapter.chapter_number: chapter
+            for chapter in await self.repo.get_chapters(
+                project.id, chapter_numbers, include_versions=include_content
+            )
+        }
+        return [
+            self._build_chapter_schema(
+                project,
+                number,
+                outlines_map=outlines_map,
+                chapters_map=chapters_map,
+                include_content=include_content,
+            )
+            for number in chapter_numbers
+            if number in outlines_map or number in chapters_map
+        ]
+
     def _build_blueprint_schema(self, project: NovelProject) -> Blueprint:
         blueprint_obj = project.blueprint
         if blueprint_obj:
@@ -816,10 +927,12 @@ class NovelService:
         chapters_map: Optional[Dict[int, Chapter]] = None,
         include_content: bool = True,
     ) -> ChapterSchema:
-        outlines = outlines_map or {outline.chapter_number: outline for outline in project.outlines}
-        chapters = chapters_map or {chapter.chapter_number: chapter for chapter in project.chapters}
-        outline = outlines.get(chapter_number)
-        chapter = chapters.get(chapter_number)
+        if outlines_map is None:
+            outlines_map = {outline.chapter_number: outline for outline in project.outlines}
+        if chapters_map is None:
+            chapters_map = {chapter.chapter_number: chapter for chapter in project.chapters}
+        outline = outlines_map.get(chapter_number)
+        chapter = chapters_map.get(chapter_number)
 
         if not outline and not chapter:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="章节不存在")
@@ -836,8 +949,10 @@ class NovelService:
         if chapter:
             status_value = chapter.status or ChapterGenerationStatus.NOT_GENERATED.value
             word_count = chapter.word_count or 0
-            if word_count == 0 and chapter.selected_version and chapter.selected_version.content:
-                word_count = len(chapter.selected_version.content or "")
+            selected = chapter.selected_version
+            # METADATA 层级下正文未加载，此时不回退到按正文计算字数
+            if word_count == 0 and selected and "content" not in inspect(selected).unloaded and selected.content:
+                word_count = len(selected.content)
 
             # 只有在 include_content=True 时才包含完整内容
             if include_content:
@@ -0,0 +1,330 @@
+# AIMETA P=小说文本流式读取_分章与角色候选统计|R=编码探测_增量解码_逐章产出_角色候选统计_采样与高光片段|NR=不含AI分析与落库|E=NovelTextReader_TextScan_ParsedChapter|X=internal|A=流式解析|D=pyahocorasick可选|S=fs|RD=./README.ai
+"""
+小说文本流式读取
+
+导入原先把整个上传文件读入内存并解码成一个字符串，再对全文多次执行分章、人名统计和
+高光片段正则，几百 MB 的 TXT 会让 worker 内存暴涨。NovelTextReader 直接读取上传的
+SpooledTemporaryFile（超过阈值时已落盘），按块增量解码、按行识别章节标题，
+任何时刻只持有当前章节的正文。
+
+导入分三遍顺序读取同一文件，每遍内存都以单章大小为上限：
+1. scan：确定编码，收集章节标题，并在同一遍中累计角色候选统计；
+2. collect_samples：章节数已知后，收集均匀采样的剧情片段和各候选角色的高光片段；
+3. iter_content_batches：项目创建后分批产出章节正文，交给 ChapterBulkImporter 写库。
+
+编码探测：有 BOM 时按 BOM（UTF-8 / UTF-16），否则先按 UTF-8，解码失败时整遍改用 GBK 重来。
+"""
+from __future__ import annotations
+
+import asyncio
+import codecs
+import re
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import AsyncIterator, BinaryIO, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from fastapi import HTTPException
+
+from ..utils.name_index import CharacterNameIndex, NameHit
+
+CHAPTER_HEADING = re.compile(r"\s*(第[0-9零一二三四五六七八九十百千]+[章卷回节].*|Chapter\s+[0-9]+.*)")
+PREFACE_TITLE = "序章"
+
+# 常见对话引导词
+_DIALOGUE_VERBS = r"(?:说|道|问|回答|冷笑|大笑|苦笑|点头|摇头|叹气|叹道|解释|怒道|吼道|低语|传音|喊道|叫道|哭道|骂道)"
+# 模式1: 名字+动词 (e.g. "张三笑道")，限制名字长度为2-4字，排除单字名以减少误报
+_NAME_BEFORE_VERB = re.compile(fr"([\u4e00-\u9fa5]{{2,4}}){_DIALOGUE_VERBS}")
+# 模式2: 名字+冒号+引号 (e.g. "张三：“") - 剧本模式或特定排版
+_NAME_BEFORE_QUOTE = re.compile(r"([\u4e00-\u9fa5]{2,4})[：:]\s*“")
+
+# 过滤黑名单（非人名的常用词）
+CHARACTER_STOP_WORDS = frozenset({
+    "自己", "怎么", "于是", "接着", "忽然", "突然", "虽然", "既然", "如果", "只要", "为了",
+    "并且", "而且", "不仅", "甚至", "难道", "毕竟", "到底", "终于", "立刻", "马上",
+    "缓缓", "轻轻", "大声", "小声", "连忙", "赶紧", "不禁", "不由", "只能", "只好",
+    "众人", "大家", "某人", "那个", "这个", "什么", "此时", "此刻", "随后", "然后",
+    "原来", "其实", "顺便", "根本", "简直", "仿佛", "好像", "似乎", "一直", "曾经",
+    "已经", "正在", "准备", "开始", "继续", "重新", "互相", "彼此", "对方", "两者",
+    "一人", "两人", "三人", "四人", "五人", "少年", "少女", "男子", "女子", "老者",
+    "老头", "大汉", "青年", "中年", "小孩", "丫头", "家伙", "兄弟", "姐妹", "师父",
+    "师兄", "师弟", "师姐", "师妹", "陛下", "殿下", "娘娘", "将军", "大人", "掌门",
+    "宗主", "长老", "护法", "弟子", "属下", "奴才", "微臣", "老夫", "老朽", "在下",
+    "贫道", "本座", "本王", "本宫", "朕", "寡人", "哀家", "这时候", "那个时候",
+    "一声", "一把", "一眼", "一手", "一步", "一下", "一脚", "一口", "一个", "一名", "一位",
+    "今日", "明日", "昨日", "每天", "白天", "晚上", "半夜", "清晨", "黄昏", "刚刚", "刚才",
+    "这里", "那里", "哪里", "那边", "这边", "里面", "外面", "前面", "后面", "上面", "下面",
+    "左边", "右边", "中间", "周围", "四处", "到处", "满脸", "满身", "全身", "浑身",
+    "双手", "双眼", "双脚", "双腿", "两眼", "两手", "两脚", "两腿", "心中", "心里", "心头",
+    "手中", "手里", "手头", "眼中", "眼里", "口中", "嘴里", "身上", "身下", "身边", "身旁",
+    "此时此刻", "不得不", "能不能", "是不是", "会不会", "有没有", "想了想", "摇了摇头", "点了点头",
+})
+
+_FALLBACK_ENCODINGS = ("utf-8", "gbk")
+# 候选角色少于该出现次数时全部参与高光评分，否则取前 3 次、中部 3 次、最后 3 次
+_ALL_OCCURRENCES_LIMIT = 10
+
+
+@dataclass(frozen=True)
+class ParsedChapter:
+    title: str
+    body: str
+
+
+@dataclass
+class TextScan:
+    """第一遍扫描的结果：编码、章节标题与角色候选计数。"""
+
+    encoding: str
+    titles: List[str] = field(default_factory=list)
+    total_chars: int = 0
+    verb_counts: Counter = field(default_factory=Counter)
+    quote_counts: Counter = field(default_factory=Counter)
+
+    def character_candidates(self, top_n: int = 100) -> List[str]:
+        """出现至少 2 次、且不在黑名单中的高频人名候选（按频次降序）。"""
+        # 先合并“名字+动词”再合并“名字+引号”，频次相同时的先后顺序与整文 findall 一致
+        counter: Counter = Counter()
+        counter.update(self.verb_counts)
+        counter.update(self.quote_counts)
+        candidates: List[str] = []
+        for name, count in counter.most_common():
+            if name not in CHARACTER_STOP_WORDS and count >= 2:
+                candidates.append(name)
+                if len(candidates) >= top_n:
+                    break
+        return candidates
+
+
+@dataclass
+class _Occurrence:
+    chapter: int
+    start: int
+    end: int
+    snippet: str
+
+
+@dataclass
+class _CharacterOccurrences:
+    count: int = 0
+    head: List[_Occurrence] = field(default_factory=list)
+    middle: List[_Occurrence] = field(default_factory=list)
+    tail: Deque[_Occurrence] = field(default_factory=lambda: deque(maxlen=3))
+
+
+class NovelTextReader:
+    """
+    按块读取上传的小说文件并逐章产出
+
+    Args:
+        fileobj: 可重复 seek 的二进制文件对象（UploadFile.file）。
+        chunk_size: 每次读取的字节数。
+    """
+
+    def __init__(self, fileobj: BinaryIO, *, chunk_size: int = 1 << 20) -> None:
+        self._file = fileobj
+        self.chunk_size = chunk_size
+        self.encoding: Optional[str] = None
+        self._offset = 0
+
+    # ------------------------------------------------------------------
+    # 编码与逐行解码
+    # ------------------------------------------------------------------
+    def _sniff(self) -> Tuple[Tuple[str, ...], int]:
+        self._file.seek(0)
+        head = self._file.read(4)
+        if head.startswith(codecs.BOM_UTF8):
+            return ("utf-8",), len(codecs.BOM_UTF8)
+        if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            # utf-16 解码器自行识别并跳过 BOM
+            return ("utf-16",), 0
+        return _FALLBACK_ENCODINGS, 0
+
+    def _lines(self) -> Iterator[str]:
+        """按 \\n 切分的解码行（不含换行符），与正则 MULTILINE 的行边界一致。"""
+        if self.encoding is None:
+            raise RuntimeError("请先调用 scan() 确定编码")
+        self._file.seek(self._offset)
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        pending: List[str] = []
+        while True:
+            chunk = self._file.read(self.chunk_size)
+            text = decoder.decode(chunk, final=not chunk)
+            start = 0
+            newline = text.find("\n")
+            while newline >= 0:
+                pending.append(text[start:newline])
+                yield "".join(pending)
+                pending = []
+                start = newline + 1
+                newline = text.find("\n", start)
+            if start < len(text):
+                pending.append(text[start:])
+            if not chunk:
+                break
+        yield "".join(pending)
+
+    def _segments(self) -> Iterator[Tuple[Optional[str], List[str]]]:
+        """(标题行, 正文行)；第一段为首个标题之前的内容，标题行为 None。"""
+        heading: Optional[str] = None
+        lines: List[str] = []
+        for line in self._lines():
+            if CHAPTER_HEADING.match(line):
+                yield heading, lines
+                heading, lines = line, []
+            else:
+                lines.append(line)
+        yield heading, lines
+
+    def iter_chapters(self) -> Iterator[ParsedChapter]:
+        """逐章产出（正文为空的章节跳过，首个标题前的非空内容作为序章）。"""
+        for heading, lines in self._segments():
+            body = "\n".join(lines).strip()
+            if body:
+                yield ParsedChapter(title=heading.strip() if heading is not None else PREFACE_TITLE, body=body)
+
+    # ------------------------------------------------------------------
+    # 三遍读取
+    # ------------------------------------------------------------------
+    def scan(self) -> TextScan:
+        """第一遍：确定编码、收集章节标题并累计角色候选统计。"""
+        encodings, offset = self._sniff()
+        for encoding in encodings:
+            self.encoding, self._offset = encoding, offset
+            try:
+                return self._scan_once(encoding)
+            except UnicodeDecodeError:
+                continue
+        self.encoding = None
+        raise HTTPException(status_code=400, detail="文件编码不支持，请使用 UTF-8 或 GBK")
+
+    def _scan_once(self, encoding: str) -> TextScan:
+        scan = TextScan(encoding=encoding)
+        for heading, lines in self._segments():
+            raw = "\n".join(lines) if heading is None else "\n".join([heading, *lines])
+            scan.total_chars += len(raw)
+            scan.verb_counts.update(_NAME_BEFORE_VERB.findall(raw))
+            scan.quote_counts.update(_NAME_BEFORE_QUOTE.findall(raw))
+            body = "\n".join(lines).strip()
+            if body:
+                scan.titles.append(heading.strip() if heading is not None else PREFACE_TITLE)
+        return scan
+
+    def collect_samples(
+        self,
+        sample_indices: Iterable[int],
+        characters: Sequence[str],
+        *,
+        sample_chars: int = 1000,
+        context_window: int = 300,
+        total_chapters: Optional[int] = None,
+    ) -> Tuple[Dict[int, str], str]:
+        """
+        第二遍：返回 (采样章节序号 -> 开头 sample_chars 字, 角色高光片段文本)
+
+        高光片段为每个角色挑一段对话最密集的出场上下文；候选位置取前 3 次、
+        中部（全书后半段起）3 次、最后 3 次出现，出现不超过 10 次时全部参与评分。
+        """
+        wanted: Set[int] = set(sample_indices)
+        excerpts: Dict[int, str] = {}
+        name_index = CharacterNameIndex(characters)
+        occurrences: Dict[str, _CharacterOccurrences] = {name: _CharacterOccurrences() for name in name_index.names}
+        middle_chapter = (total_chapters or 0) // 2
+
+        for chapter_index, chapter in enumerate(self.iter_chapters()):
+            if chapter_index in wanted:
+                excerpts[chapter_index] = chapter.body[:sample_chars].strip()
+            body = chapter.body
+
+            def _occurrence(hit: NameHit) -> _Occurrence:
+                start = max(0, hit.start - context_window)
+                end = min(len(body), hit.end + context_window)
+                return _Occurrence(chapter_index, start, end, body[start:end])
+
+            # find_all 按名字分组返回命中，只为会被保留的命中截取上下文
+            for name, group in groupby(name_index.find_all(body), key=lambda hit: hit.name):
+                hits = list(group)
+                record = occurrences[name]
+                record.count += len(hits)
+                record.head.extend(_occurrence(hit) for hit in hits[: _ALL_OCCURRENCES_LIMIT - len(record.head)])
+                if chapter_index >= middle_chapter:
+                    record.middle.extend(_occurrence(hit) for hit in hits[: 3 - len(record.middle)])
+                record.tail.extend(_occurrence(hit) for hit in hits[-3:])
+
+        return excerpts, self._format_highlights(name_index.names, occurrences)
+
+    @staticmethod
+    def _format_highlights(names: Sequence[str], occurrences: Dict[str, _CharacterOccurrences]) -> str:
+        highlights: List[str] = []
+        used_ranges: List[Tuple[int, int, int]] = []  # 已使用的 (章节序号, 起点, 终点)，避免重复
+
+        def is_overlapping(chapter: int, start: int, end: int) -> bool:
+            return any(c == chapter and not (end < s or start > e) for c, s, e in used_ranges)
+
+        for name in names:
+            record = occurrences[name]
+            if record.count == 0:
+                continue
+            if record.count <= _ALL_OCCURRENCES_LIMIT:
+                samples = list(record.head)
+            else:
+                samples = record.head[:3] + record.middle + list(record.tail)
+
+            best_score = -1
+            best: Optional[_Occurrence] = None
+            seen: Set[Tuple[int, int]] = set()
+            for occurrence in samples:
+                key = (occurrence.chapter, occurrence.start)
+                if key in seen:
+                    continue
+                seen.add(key)
+                # 如果这个范围已经被大幅占用了，跳过（允许边缘少量重叠）
+                if is_overlapping(occurrence.chapter, occurrence.start + 50, occurrence.end - 50):
+                    continue
+                snippet = occurrence.snippet
+                # 评分：双引号数量（对话）+ 标点符号丰富度
+                score = snippet.count("“") * 2 + snippet.count("”") * 2 + snippet.count("！") + snippet.count("？")
+                if score > best_score:
+                    best_score, best = score, occurrence
+
+            if best is None:
+                continue
+            # 清理首尾不完整的句子：截取第一个与最后一个换行符之间的内容
+            first_nl = best.snippet.find("\n")
+            last_nl = best.snippet.rfind("\n")
+            if first_nl != -1 and last_nl != -1 and first_nl < last_nl:
+                clean_snippet = best.snippet[first_nl:last_nl].strip()
+            else:
+                clean_snippet = best.snippet.strip()
+            if len(clean_snippet) > 50:  # 太短的不要
+                highlights.append(f"--- 【{name}】的出场片段 ---\n{clean_snippet}\n")
+                used_ranges.append((best.chapter, best.start, best.end))
+
+        return "\n".join(highlights)
+
+    async def iter_content_batches(self, batch_size: int) -> AsyncIterator[List[str]]:
+        """第三遍：在线程中分批读取章节正文，避免大文件解析阻塞事件循环。"""
+        chapters = self.iter_chapters()
+
+        def _next_batch() -> List[str]:
+            batch: List[str] = []
+            for chapter in chapters:
+                batch.append(chapter.body)
+                if len(batch) >= batch_size:
+                    break
+            return batch
+
+        while True:
+            batch = await asyncio.to_thread(_next_batch)
+            if not batch:
+                return
+            yield batch
+
+
+__all__ = [
+    "CHAPTER_HEADING",
+    "CHARACTER_STOP_WORDS",
+    "NovelTextReader",
+    "ParsedChapter",
+    "TextScan",
+]
@@ -4,23 +4,29 @@ from __future__ import annotations
 import json
 import logging
 import os
+import time
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from ..core.config import settings
+from ..db.session import AsyncSessionLocal
 from ..models.novel import Chapter
 from ..models.project_memory import ProjectMemory
-from ..repositories.system_config_repository import SystemConfigRepository
+from ..repositories.novel_repository import ProjectLoad
 from ..services.ai_review_service import AIReviewService
+from ..services.blueprint_index_cache import get_blueprint_index_cache
 from ..services.chapter_context_service import ChapterContextService
 from ..services.chapter_guardrails import ChapterGuardrails
+from ..services.chapter_optimizer import ChapterOptimizer
+from ..services.config_cache import get_system_config_value
 from ..services.consistency_service import ConsistencyService, ViolationSeverity
 from ..services.enhanced_writing_flow import EnhancedWritingFlow
 from ..services.enrichment_service import EnrichmentService
+from ..services.generation_events import GenerationEventStream
 from ..services.llm_service import LLMService
 from ..services.knowledge_retrieval_service import KnowledgeRetrievalService, FilteredContext
 from ..services.memory_layer_service import MemoryLayerService
@@ -29,9 +35,12 @@ from ..services.preview_generation_service import PreviewGenerationService
 from ..services.prompt_service import PromptService
 from ..services.reader_simulator_service import ReaderSimulatorService, ReaderType
 from ..services.self_critique_service import CritiqueDimension, SelfCritiqueService
+from ..services.summary_backfill import schedule_summary_backfill
 from ..services.vector_store_service import VectorStoreService
+from ..services.version_fanout import collect_successful, run_versions_concurrently, run_versions_sequentially
 from ..services.writer_context_builder import WriterContextBuilder
 from ..utils.json_utils import remove_think_tags, unwrap_markdown_json
+from ..utils.name_index import CharacterNameIndex
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +49,7 @@ logger = logging.getLogger(__name__)
 class PipelineConfig:
     preset: str = "basic"
     version_count: int = 2
+    parallel_versions: bool = True
     enable_preview: bool = False
     enable_optimizer: bool = False
     enable_consistency: bool = False
@@ -60,14 +70,26 @@ class PipelineConfig:
 class PipelineOrchestrator:
     """统一写作流水线编排器。"""
 
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        session_factory: Optional[async_sessionmaker] = None,
+        events: Optional[GenerationEventStream] = None,
+    ):
         self.session = session
+        self.session_factory = session_factory or AsyncSessionLocal
+        # 流式接口传入事件流，用于推送阶段事件与各版本的增量正文；普通接口为 None
+        self.events = events
         self.llm_service = LLMService(session)
         self.prompt_service = PromptService(session)
         self.novel_service = NovelService(session)
         self.context_builder = WriterContextBuilder()
         self.guardrails = ChapterGuardrails()
 
+    def _emit_stage(self, name: str, status: str, **data: Any) -> None:
+        if self.events is not None:
+            self.events.stage(name, status, **data)
+
     async def generate_chapter(
         self,
         *,
@@ -78,7 +100,9 @@ class PipelineOrchestrator:
         flow_config: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         config = await self._resolve_config(flow_config)
-        project = await self.novel_service.ensure_project_owner(project_id, user_id)
+        project = await self.novel_service.ensure_project_owner(
+            project_id, user_id, ProjectLoad.METADATA, include_selected_content=True
+        )
 
         outline = await self.novel_service.get_outline(project_id, chapter_number)
         if not outline:
@@ -99,15 +123,22 @@ class PipelineOrchestrator:
             user_id=user_id,
         )
 
-        project_schema = await self.novel_service._serialize_project(project)
-        blueprint_dict = self._normalize_blueprint(project_schema.blueprint.model_dump())
+        # 只读蓝图视图与角色名索引按项目修订号缓存，各版本共享，不再逐次深拷贝和编译
+        project_blueprint = get_blueprint_index_cache().get(
+            project.id,
+            project.revision or 0,
+            lambda: self._normalize_blueprint(self.novel_service._build_blueprint_schema(project).model_dump()),
+        )
+        blueprint_dict = project_blueprint.blueprint
+        name_index = project_blueprint.name_index
 
         outline_title = outline.title or f"第{outline.chapter_number}章"
         outline_summary = outline.summary or "暂无摘要"
         writing_notes = writing_notes or "无额外写作指令"
 
-        all_characters = [c.get("name") for c in blueprint_dict.get("characters", []) if c.get("name")]
+        all_characters = list(name_index.names)
 
+        self._emit_stage("mission", "start")
         chapter_mission = await self._generate_chapter_mission(
             blueprint_dict=blueprint_dict,
             previous_summary=history_context["previous_summary"],
@@ -119,6 +150,7 @@ class PipelineOrchestrator:
             all_characters=all_characters,
             user_id=user_id,
         )
+        self._emit_stage("mission", "done", generated=bool(chapter_mission))
 
         allowed_new_characters = chapter_mission.get("allowed_new_characters", []) if chapter_mission else []
 
@@ -130,6 +162,7 @@ class PipelineOrchestrator:
             outline_summary=outline_summary,
             writing_notes=writing_notes,
             allowed_new_characters=allowed_new_characters,
+            name_index=name_index,
         )
 
         writer_blueprint = visibility_context["writer_blueprint"]
@@ -169,6 +202,7 @@ class PipelineOrchestrator:
         knowledge_context = None
         rag_stats = None
         if config.enable_rag:
+            self._emit_stage("rag", "start", mode=config.rag_mode)
             if config.rag_mode == "two_stage":
                 knowledge_context, rag_stats = await self._get_two_stage_rag_context(
                     project_id=project_id,
@@ -190,6 +224,7 @@ class PipelineOrchestrator:
                     "chunks": len(rag_context.get("chunks", [])) if rag_context else 0,
                     "summaries": len(rag_context.get("summaries", [])) if rag_context else 0,
                 }
+            self._emit_stage("rag", "done", stats=rag_stats)
 
         writer_prompt = await self.prompt_service.get_prompt("writing_v2")
         if not writer_prompt:
@@ -221,30 +256,68 @@ class PipelineOrchestrator:
         version_count = config.version_count
         version_style_hints = self._resolve_style_hints(enhanced_context, version_count)
 
-        versions: List[Dict[str, Any]] = []
-        for idx in range(version_count):
-            style_hint = version_style_hints[idx] if idx < len(version_style_hints) else None
-            versions.append(
-                await self._generate_single_version(
-                    index=idx,
-                    prompt_input=prompt_input,
-                    writer_prompt=writer_prompt,
-                    style_hint=style_hint,
-                    project_id=project_id,
-                    chapter_number=chapter_number,
-                    outline_title=outline_title,
-                    outline_summary=outline_summary,
-                    chapter_mission=chapter_mission,
-                    forbidden_characters=forbidden_characters,
-                    allowed_new_characters=allowed_new_characters,
-                    user_id=user_id,
-                    writer_blueprint=writer_blueprint,
-                    memory_context=memory_context,
-                    enhanced_context=enhanced_context,
-                    config=config,
+        version_kwargs: Dict[str, Any] = dict(
+            prompt_input=prompt_input,
+            writer_prompt=writer_prompt,
+            project_id=project_id,
+            chapter_number=chapter_number,
+            outline_title=outline_title,
+            outline_summary=outline_summary,
+            chapter_mission=chapter_mission,
+            forbidden_characters=forbidden_characters,
+            allowed_new_characters=allowed_new_characters,
+            user_id=user_id,
+            writer_blueprint=writer_blueprint,
+            memory_context=memory_context,
+            enhanced_context=enhanced_context,
+            config=config,
+            name_index=name_index,
+        )
+
+        def _style_hint(idx: int) -> Optional[str]:
+            return version_style_hints[idx] if idx < len(version_style_hints) else None
+
+        versions_started = time.perf_counter()
+        if config.parallel_versions and version_count > 1:
+            # 结束当前事务，避免请求会话在各版本独立会话写入期间持有锁
+            await self.session.commit()
+
+            async def _version_worker(idx: int, version_session: AsyncSession) -> Dict[str, Any]:
+                worker = PipelineOrchestrator(
+                    version_session, session_factory=self.session_factory, events=self.events
                 )
+                return await worker._generate_single_version(index=idx, style_hint=_style_hint(idx), **version_kwargs)
+
+            outcomes = await run_versions_concurrently(
+                version_count,
+                _version_worker,
+                session_factory=self.session_factory,
+                user_id=user_id,
+            )
+        else:
+            outcomes = await run_versions_sequentially(
+                version_count,
+                lambda idx: self._generate_single_version(index=idx, style_hint=_style_hint(idx), **version_kwargs),
+            )
+        versions_wall_ms = (time.perf_counter() - versions_started) * 1000
+        versions: List[Dict[str, Any]] = collect_successful(outcomes)
+        version_timings = [outcome.timing() for outcome in outcomes]
+        failed_count = sum(1 for outcome in outcomes if not outcome.ok)
+        for outcome in outcomes:
+            if not outcome.ok:
+                timing = outcome.timing()
+                timing.pop("status", None)
+                self._emit_stage("version", "failed", **timing)
+        if failed_count:
+            logger.warning(
+                "Pipeline versions partially failed: project=%s chapter=%s failed=%d kept=%d",
+                project_id,
+                chapter_number,
+                failed_count,
+                len(versions),
             )
 
+        self._emit_stage("review", "start")
         best_version_index, ai_review_result = await self._run_ai_review(
             versions=versions,
             chapter_mission=chapter_mission,
@@ -317,7 +390,9 @@ class PipelineOrchestrator:
 
             best_version["content"] = best_content
             best_version.setdefault("metadata", {})["review_summaries"] = review_summaries
+        self._emit_stage("review", "done", best_version_index=best_version_index)
 
+        self._emit_stage("persist", "start")
         contents = [v.get("content", "") for v in versions]
         metadata = [v.get("metadata") for v in versions]
         versions_models = await self.novel_service.replace_chapter_versions(chapter, contents, metadata)
@@ -325,6 +400,7 @@ class PipelineOrchestrator:
         # 生成完成后设置状态为 waiting_for_confirm，等待用户选择版本
         chapter.status = "waiting_for_confirm"
         await self.session.commit()
+        self._emit_stage("persist", "done", version_ids=[model.id for model in versions_models])
 
         variants = []
         for idx, version_model in enumerate(versions_models):
@@ -345,6 +421,9 @@ class PipelineOrchestrator:
             "review_summaries": review_summaries,
             "debug_metadata": {
                 "version_count": version_count,
+                "parallel_versions": config.parallel_versions and version_count > 1,
+                "versions_wall_ms": round(versions_wall_ms, 1),
+                "version_timings": version_timings,
                 "stages": self._build_stage_flags(config),
                 "retrieval_stats": rag_stats,
             },
@@ -354,7 +433,7 @@ class PipelineOrchestrator:
         flow_config = flow_config or {}
         preset = flow_config.get("preset", "basic")
 
-        config = PipelineConfig(preset=preset)
+        config = PipelineConfig(preset=preset, parallel_versions=settings.writer_parallel_versions)
         config.version_count = await self._resolve_version_count(flow_config.get("versions"))
 
         if preset in ("enhanced", "ultimate"):
@@ -374,6 +453,7 @@ class PipelineOrchestrator:
             config.enable_rag = True
 
         for key in (
+            "parallel_versions",
             "enable_preview",
             "enable_optimizer",
             "enable_consistency",
@@ -406,12 +486,11 @@ class PipelineOrchestrator:
             except (TypeError, ValueError):
                 pass
 
-        repo = SystemConfigRepository(self.session)
         for key in ("writer.chapter_versions", "writer.version_count"):
-            record = await repo.get_by_key(key)
-            if record and record.value:
+            value = await get_system_config_value(self.session, key)
+            if value:
                 try:
-                    val = int(record.value)
+                    val = int(value)
                     if val >= 1:
                         return val
                 except ValueError:
@@ -443,38 +522,37 @@ class PipelineOrchestrator:
         latest_prev_number = -1
         previous_summary_text = ""
         previous_tail_excerpt = ""
+        missing_summary = False
 
         for existing in chapters:
             if existing.chapter_number >= chapter_number:
                 continue
             if existing.selected_version is None or not existing.selected_version.content:
                 continue
-            if not existing.real_summary:
-                summary = await self.llm_service.get_summary(
-                    existing.selected_version.content,
-                    temperature=0.15,
-                    user_id=user_id,
-                    timeout=180.0,
-                )
-                existing.real_summary = remove_think_tags(summary)
-                await self.session.commit()
+            outline = outlines_map.get(existing.chapter_number)
+            # 请求内只读取已生成的摘要；缺失时先用大纲概要顶替，并在后台补全
+            summary = existing.real_summary
+            if not summary:
+                missing_summary = True
+                summary = outline.summary if outline and outline.summary else ""
 
             completed_chapters.append(
                 {
                     "chapter_number": existing.chapter_number,
-                    "title": outlines_map.get(existing.chapter_number).title
-                    if outlines_map.get(existing.chapter_number)
-                    else f"第{existing.chapter_number}章",
-                    "summary": existing.real_summary,
+                    "title": outline.title if outline else f"第{existing.chapter_number}章",
+                    "summary": summary,
                 }
             )
-            completed_summaries.append(existing.real_summary or "")
+            completed_summaries.append(summary)
 
             if existing.chapter_number > latest_prev_number:
                 latest_prev_number = existing.chapter_number
-                previous_summary_text = existing.real_summary or ""
+                previous_summary_text = summary
                 previous_tail_excerpt = self._extract_tail_excerpt(existing.selected_version.content)
 
+        if missing_summary:
+            schedule_summary_backfill(project_id, user_id, before_chapter=chapter_number)
+
         return {
             "completed_chapters": completed_chapters,
             "completed_summaries": completed_summaries,
@@ -609,8 +687,7 @@ class PipelineOrchestrator:
             logger.warning("向量库初始化失败，跳过两层 RAG: %s", exc)
             return None, {"mode": "two_stage", "enabled": False, "error": str(exc)}
 
-        sync_session = getattr(self.session, "sync_session", self.session)
-        retrieval_service = KnowledgeRetrievalService(sync_session, self.llm_service, vector_store)
+        retrieval_service = KnowledgeRetrievalService(self.session, self.llm_service, vector_store)
         filtered = await retrieval_service.retrieve_and_filter(
             project_id=project_id,
             chapter_number=chapter_number,
@@ -746,12 +823,14 @@ class PipelineOrchestrator:
         memory_context: Optional[str],
         enhanced_context: Optional[Dict[str, Any]],
         config: PipelineConfig,
+        name_index: Optional[CharacterNameIndex] = None,
     ) -> Dict[str, Any]:
         metadata: Dict[str, Any] = {
             "chapter_mission": chapter_mission,
             "style_hint": style_hint,
             "pipeline": {"preset": config.preset},
         }
+        self._emit_stage("version", "start", index=index)
 
         content = ""
         if config.enable_preview:
@@ -780,6 +859,7 @@ class PipelineOrchestrator:
                 user_id=user_id,
                 timeout=600.0,
                 response_format=None,
+                token_sink=self.events.token_sink(index) if self.events is not None else None,
             )
             cleaned = remove_think_tags(response)
             content = unwrap_markdown_json(cleaned)
@@ -789,6 +869,7 @@ class PipelineOrchestrator:
             forbidden_characters=forbidden_characters,
             allowed_new_characters=allowed_new_characters,
             pov=chapter_mission.get("pov") if chapter_mission else None,
+            name_index=name_index,
         )
         guardrail_metadata = {"passed": guardrail_result.passed, "violations": []}
 
@@ -816,6 +897,14 @@ class PipelineOrchestrator:
         metadata["guardrail"] = guardrail_metadata
         if parsed_json is not None:
             metadata["parsed_json"] = parsed_json
+        self._emit_stage(
+            "version",
+            "done",
+            index=index,
+            chars=len(extracted_text or content),
+            guardrail_passed=guardrail_result.passed,
+            rewritten=not guardrail_result.passed,
+        )
 
         return {
             "index": index,
@@ -998,7 +1087,9 @@ class PipelineOrchestrator:
         previous_summary: Optional[str],
         user_id: int,
     ) -> Dict[str, Any]:
-        service = ReaderSimulatorService(self.session, self.llm_service, self.prompt_service)
+        service = ReaderSimulatorService(
+            self.session, self.llm_service, self.prompt_service, session_factory=self.session_factory
+        )
         return await service.simulate_reading_experience(
             chapter_content=chapter_content,
             chapter_number=chapter_number,
@@ -1014,8 +1105,7 @@ class PipelineOrchestrator:
         chapter_text: str,
         user_id: int,
     ) -> Tuple[str, Dict[str, Any]]:
-        sync_session = getattr(self.session, "sync_session", self.session)
-        service = ConsistencyService(sync_session, self.llm_service)
+        service = ConsistencyService(self.session, self.llm_service)
         result = await service.check_consistency(project_id, chapter_text, user_id, include_foreshadowing=True)
         report = {
             "is_consistent": result.is_consistent,
@@ -1048,51 +1138,11 @@ class PipelineOrchestrator:
         return chapter_text, report
 
     async def _run_optimizer(self, chapter_content: str, *, user_id: int) -> Tuple[str, Dict[str, Any]]:
-        prompt_map = {
-            "dialogue": "optimize_dialogue",
-            "environment": "optimize_environment",
-            "psychology": "optimize_psychology",
-            "rhythm": "optimize_rhythm",
-        }
-
-        optimized_content = chapter_content
-        notes = []
-        for dimension, prompt_name in prompt_map.items():
-            prompt = await self.prompt_service.get_prompt(prompt_name)
-            if not prompt:
-                logger.warning("缺少优化提示词 %s，跳过 %s 维度", prompt_name, dimension)
-                continue
-
-            optimize_input = {
-                "original_content": optimized_content,
-                "additional_notes": "在不改变剧情走向的前提下优化该维度。",
-            }
-            try:
-                response = await self.llm_service.get_llm_response(
-                    system_prompt=prompt,
-                    conversation_history=[{"role": "user", "content": json.dumps(optimize_input, ensure_ascii=False)}],
-                    temperature=0.7,
-                    user_id=user_id,
-                    timeout=600.0,
-                )
-                cleaned = remove_think_tags(response)
-                normalized = unwrap_markdown_json(cleaned)
-                try:
-                    parsed = json.loads(normalized)
-                    optimized_content = parsed.get("optimized_content", cleaned)
-                    notes.append(
-                        {
-                            "dimension": dimension,
-                            "notes": parsed.get("optimization_notes", "优化完成"),
-                        }
-                    )
-                except json.JSONDecodeError:
-                    optimized_content = cleaned
-                    notes.append({"dimension": dimension, "notes": "优化完成（响应格式非标准JSON）"})
-            except Exception as exc:
-                logger.warning("优化维度 %s 失败: %s", dimension, exc)
-
-        return optimized_content, {"steps": notes}
+        result = await ChapterOptimizer(self.llm_service, self.prompt_service).optimize(
+            chapter_content,
+            user_id=user_id,
+        )
+        return result.content, result.report()
 
     async def _run_enrichment(
         self,
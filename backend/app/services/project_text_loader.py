@@ -0,0 +1,116 @@
+# AIMETA P=项目正文加载器_批量读取选中版本正文|R=单次联表查询_按章节顺序流式返回|NR=不含分析逻辑|E=ChapterText_iter_project_texts_load_project_texts|X=internal|A=数据加载|D=sqlalchemy|S=db|RD=./README.ai
+"""
+项目正文加载器
+
+分析类接口需要按章节顺序读取每章选中版本的正文。逐章查询 ChapterVersion
+会产生 N+1 次数据库往返，这里改为一次 Chapter ⟕ ChapterVersion 联表查询，
+再加一次大纲查询，按章节号顺序流式返回。
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import null, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.novel import Chapter, ChapterOutline, ChapterVersion
+
+
+@dataclass(frozen=True)
+class ChapterText:
+    """单章正文及其大纲信息。"""
+
+    chapter_id: int
+    chapter_number: int
+    status: str
+    outline_title: Optional[str]
+    outline_summary: str
+    real_summary: str
+    content: str
+
+    @property
+    def title(self) -> str:
+        """大纲标题，缺失时使用“第N章”。"""
+        return self.outline_title or f"第{self.chapter_number}章"
+
+
+async def _load_outlines(session: AsyncSession, project_id: str) -> Dict[int, Tuple[Optional[str], str]]:
+    result = await session.execute(
+        select(ChapterOutline.chapter_number, ChapterOutline.title, ChapterOutline.summary)
+        .where(ChapterOutline.project_id == project_id)
+        .order_by(ChapterOutline.chapter_number, ChapterOutline.id)
+    )
+    return {number: (title, summary or "") for number, title, summary in result.all()}
+
+
+async def iter_project_texts(
+    session: AsyncSession,
+    project_id: str,
+    *,
+    only_with_content: bool = False,
+    include_content: bool = True,
+    batch_size: int = 100,
+) -> AsyncIterator[ChapterText]:
+    """
+    按章节号顺序流式返回项目各章的选中版本正文
+
+    Args:
+        session: 数据库会话
+        project_id: 项目 ID
+        only_with_content: 为 True 时跳过没有选中版本或正文为空的章节
+        include_content: 为 False 时不读取正文（content 为空串），仅需大纲时使用
+        batch_size: 每批从游标读取的行数，避免一次性把全部正文读入内存
+    """
+    outlines = await _load_outlines(session, project_id)
+
+    content_column = ChapterVersion.content if include_content or only_with_content else null()
+    stmt = (
+        select(
+            Chapter.id,
+            Chapter.chapter_number,
+            Chapter.status,
+            Chapter.real_summary,
+            content_column,
+        )
+        .where(Chapter.project_id == project_id)
+        .order_by(Chapter.chapter_number)
+        .execution_options(yield_per=batch_size)
+    )
+    if include_content or only_with_content:
+        stmt = stmt.outerjoin(ChapterVersion, ChapterVersion.id == Chapter.selected_version_id)
+    if only_with_content:
+        stmt = stmt.where(ChapterVersion.content.is_not(None), ChapterVersion.content != "")
+
+    result = await session.stream(stmt)
+    async for chapter_id, chapter_number, status, real_summary, content in result:
+        title, summary = outlines.get(chapter_number, (None, ""))
+        yield ChapterText(
+            chapter_id=chapter_id,
+            chapter_number=chapter_number,
+            status=status or "",
+            outline_title=title,
+            outline_summary=summary,
+            real_summary=real_summary or "",
+            content=content or "",
+        )
+
+
+async def load_project_texts(
+    session: AsyncSession,
+    project_id: str,
+    *,
+    only_with_content: bool = False,
+    include_content: bool = True,
+) -> List[ChapterText]:
+    """一次性读取全部章节，适合需要章节总数或多次遍历的调用方。"""
+    return [
+        item
+        async for item in iter_project_texts(
+            session,
+            project_id,
+            only_with_content=only_with_content,
+            include_content=include_content,
+        )
+    ]
+
@@ -1,13 +1,23 @@
-# AIMETA P=项目导入导出服务_整项目传输|R=项目导入导出_备份迁移|NR=不含路由|E=ProjectTransferService|X=internal|A=服务类|D=fastapi,sqlalchemy|S=db|RD=./README.ai
+# AIMETA P=项目导入导出服务_整项目传输|R=项目导入导出_备份迁移_NDJSON流式导出导入|NR=不含路由|E=ProjectTransferService_iter_ndjson_records|X=internal|A=服务类|D=fastapi,sqlalchemy|S=db|RD=./README.ai
 from __future__ import annotations
 
+import asyncio
+import codecs
 import enum
+import gzip
+import json
 import logging
+import time
+import zlib
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import IO, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 
 from sqlalchemy import inspect, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import selectinload
+
+from ..core.config import settings
+from ..db.session import AsyncSessionLocal
 
 from ..models.chapter_blueprint import ChapterBlueprint
 from ..models.constitution import NovelConstitution
@@ -25,9 +35,17 @@ from ..models.foreshadowing import (
     ForeshadowingStatusHistory,
 )
 from ..models.memory_layer import CausalChain, CharacterState, StoryTimeTracker, TimelineEvent
-from ..models.novel import BlueprintCharacter, ChapterEvaluation, NovelProject
+from ..models.novel import (
+    BlueprintCharacter,
+    Chapter,
+    ChapterEvaluation,
+    ChapterOutline,
+    NovelConversation,
+    NovelProject,
+)
 from ..models.project_memory import ChapterSnapshot, ProjectMemory
 from ..models.writer_persona import WriterPersona
+from ..repositories.novel_repository import ProjectLoad
 from ..schemas.novel import Blueprint
 from ..services.novel_service import NovelService
 
@@ -37,13 +55,62 @@ EXPORT_FORMAT = "arboris-novel-project"
 EXPORT_VERSION = 1
 EXPORT_BUNDLE_FORMAT = "arboris-novel-bundle"
 EXPORT_BUNDLE_VERSION = 1
+# 流式导出：NDJSON，每行一条 {"type": ..., "data": ...} 记录，可整体 gzip 压缩
+EXPORT_STREAM_FORMAT = "arboris-novel-stream"
+EXPORT_STREAM_VERSION = 1
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _ndjson_line(record_type: str, data: Any = None, **extra: Any) -> bytes:
+    record = {"type": record_type, **extra}
+    if data is not None:
+        record["data"] = data
+    return (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+async def iter_ndjson_records(fileobj: IO[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    逐行读取 NDJSON 导出文件（自动识别 gzip），每次只解码一行
+
+    文件读取与解压在线程中进行；格式错误以 ValueError 抛出。
+    """
+    head = await asyncio.to_thread(fileobj.read, 2)
+    await asyncio.to_thread(fileobj.seek, 0)
+    raw: IO[bytes] = gzip.GzipFile(fileobj=fileobj, mode="rb") if head == _GZIP_MAGIC else fileobj
+    line_number = 0
+    while True:
+        try:
+            line = await asyncio.to_thread(raw.readline)
+        except (OSError, EOFError) as exc:
+            raise ValueError("导入文件已损坏，无法解压") from exc
+        if not line:
+            return
+        line_number += 1
+        if line_number == 1 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise ValueError(f"导入文件第 {line_number} 行不是合法的 JSON") from exc
+        if not isinstance(record, dict) or not isinstance(record.get("type"), str):
+            raise ValueError(f"导入文件第 {line_number} 行缺少记录类型")
+        yield record
 
 
 class ProjectTransferService:
     """项目导入/导出服务（用于整项目迁移/备份）。"""
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, session_factory: Optional[async_sessionmaker] = None):
         self.session = session
+        # 附属数据各部分在独立会话上并发读取
+        self.session_factory = session_factory or AsyncSessionLocal
         self.novel_service = NovelService(session)
 
     def _serialize_model(
@@ -92,9 +159,11 @@ class ProjectTransferService:
             return None
 
     async def export_project(self, project_id: str, user_id: int) -> Dict[str, Any]:
-        project = await self.novel_service.ensure_project_owner(project_id, user_id)
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        project = await self.novel_service.ensure_project_owner(project_id, user_id, ProjectLoad.FULL)
+        timings["project"] = _elapsed_ms(started)
 
-        blueprint = self.novel_service._build_blueprint_schema(project)
         conversations = [
             {
                 "role": convo.role,
@@ -107,82 +176,27 @@ class ProjectTransferService:
         outlines_map = {outline.chapter_number: outline for outline in project.outlines}
         chapters_map = {chapter.chapter_number: chapter for chapter in project.chapters}
         chapter_numbers = sorted(set(outlines_map.keys()) | set(chapters_map.keys()))
+        section_started = time.perf_counter()
+        chapters_payload = [
+            self._chapter_payload(number, outlines_map.get(number), chapters_map.get(number))
+            for number in chapter_numbers
+        ]
+        timings["chapters"] = _elapsed_ms(section_started)
 
-        chapters_payload: List[Dict[str, Any]] = []
-        for number in chapter_numbers:
-            outline = outlines_map.get(number)
-            chapter = chapters_map.get(number)
-
-            versions_payload: List[Dict[str, Any]] = []
-            selected_index: Optional[int] = None
-            evaluations_payload: List[Dict[str, Any]] = []
-            version_index_map: Dict[int, int] = {}
-
-            if chapter:
-                fallback_time = datetime.min.replace(tzinfo=timezone.utc)
-                versions_sorted = sorted(
-                    chapter.versions,
-                    key=lambda item: item.created_at or fallback_time,
-                )
-                for idx, version in enumerate(versions_sorted):
-                    version_index_map[version.id] = idx
-                    versions_payload.append(
-                        {
-                            "content": version.content,
-                            "metadata": version.metadata,
-                            "version_label": version.version_label,
-                            "provider": version.provider,
-                            "created_at": version.created_at.isoformat()
-                            if version.created_at
-                            else None,
-                        }
-                    )
-                    if chapter.selected_version_id == version.id:
-                        selected_index = idx
-
-                evaluations_sorted = sorted(
-                    chapter.evaluations,
-                    key=lambda item: item.created_at or fallback_time,
-                )
-                for evaluation in evaluations_sorted:
-                    evaluations_payload.append(
-                        {
-                            "version_index": version_index_map.get(evaluation.version_id),
-                            "decision": evaluation.decision,
-                            "feedback": evaluation.feedback,
-                            "score": evaluation.score,
-                            "created_at": evaluation.created_at.isoformat()
-                            if evaluation.created_at
-                            else None,
-                        }
-                    )
-
-            chapters_payload.append(
-                {
-                    "chapter_number": number,
-                    "title": outline.title if outline else f"第{number}章",
-                    "summary": outline.summary or "" if outline else "",
-                    "outline_metadata": outline.metadata if outline else None,
-                    "real_summary": chapter.real_summary if chapter else None,
-                    "status": chapter.status if chapter else "not_generated",
-                    "word_count": chapter.word_count if chapter else 0,
-                    "versions": versions_payload,
-                    "selected_version_index": selected_index,
-                    "evaluations": evaluations_payload,
-                }
-            )
-
-        project_memory = await self._load_project_memory(project_id)
         character_name_by_id = {c.id: c.name for c in project.characters}
+        auxiliary = await self._load_auxiliary_bundles(project_id, character_name_by_id, timings=timings)
+        diagnostics = {"section_timings_ms": timings, "total_ms": _elapsed_ms(started)}
+        logger.info("导出项目 %s 耗时: %s", project_id, diagnostics)
 
-        constitution = await self._load_constitution(project_id)
-        writer_personas = await self._load_writer_personas(project_id)
-        factions_bundle = await self._load_factions_bundle(project_id, character_name_by_id)
-        memory_layer = await self._load_memory_layer(project_id)
-        chapter_blueprints = await self._load_chapter_blueprints(project_id)
-        foreshadowing_bundle = await self._load_foreshadowing_bundle(project_id)
-        chapter_snapshots = await self._load_chapter_snapshots(project_id)
+        return {
+            **self._project_header(project, conversations),
+            "chapters": chapters_payload,
+            **auxiliary,
+            "diagnostics": diagnostics,
+        }
 
+    def _project_header(self, project: NovelProject, conversations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        blueprint = self.novel_service._build_blueprint_schema(project)
         return {
             "format": EXPORT_FORMAT,
             "version": EXPORT_VERSION,
@@ -196,17 +210,118 @@ class ProjectTransferService:
             },
             "blueprint": blueprint.model_dump(),
             "conversation_history": conversations,
-            "chapters": chapters_payload,
-            "project_memory": project_memory,
-            "constitution": constitution,
-            "writer_personas": writer_personas,
-            "factions": factions_bundle,
-            "memory_layer": memory_layer,
-            "chapter_blueprints": chapter_blueprints,
-            "foreshadowing": foreshadowing_bundle,
-            "chapter_snapshots": chapter_snapshots,
         }
 
+    def _chapter_payload(
+        self,
+        number: int,
+        outline: Optional[ChapterOutline],
+        chapter: Optional[Chapter],
+    ) -> Dict[str, Any]:
+        versions_payload: List[Dict[str, Any]] = []
+        selected_index: Optional[int] = None
+        evaluations_payload: List[Dict[str, Any]] = []
+        version_index_map: Dict[int, int] = {}
+
+        if chapter:
+            fallback_time = datetime.min.replace(tzinfo=timezone.utc)
+            versions_sorted = sorted(
+                chapter.versions,
+                key=lambda item: item.created_at or fallback_time,
+            )
+            for idx, version in enumerate(versions_sorted):
+                version_index_map[version.id] = idx
+                versions_payload.append(
+                    {
+                        "content": version.content,
+                        "metadata": version.metadata,
+                        "version_label": version.version_label,
+                        "provider": version.provider,
+                        "created_at": version.created_at.isoformat()
+                        if version.created_at
+                        else None,
+                    }
+                )
+                if chapter.selected_version_id == version.id:
+                    selected_index = idx
+
+            evaluations_sorted = sorted(
+                chapter.evaluations,
+                key=lambda item: item.created_at or fallback_time,
+            )
+            for evaluation in evaluations_sorted:
+                evaluations_payload.append(
+                    {
+                        "version_index": version_index_map.get(evaluation.version_id),
+                        "decision": evaluation.decision,
+                        "feedback": evaluation.feedback,
+                        "score": evaluation.score,
+                        "created_at": evaluation.created_at.isoformat()
+                        if evaluation.created_at
+                        else None,
+                    }
+                )
+
+        return {
+            "chapter_number": number,
+            "title": outline.title if outline else f"第{number}章",
+            "summary": outline.summary or "" if outline else "",
+            "outline_metadata": outline.metadata if outline else None,
+            "real_summary": chapter.real_summary if chapter else None,
+            "status": chapter.status if chapter else "not_generated",
+            "word_count": chapter.word_count if chapter else 0,
+            "versions": versions_payload,
+            "selected_version_index": selected_index,
+            "evaluations": evaluations_payload,
+        }
+
+    async def _load_auxiliary_bundles(
+        self,
+        project_id: str,
+        character_name_by_id: Dict[int, str],
+        *,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        项目记忆、宪法、人格、势力、记忆层、章节蓝图、伏笔和快照等附属数据
+
+        各部分互不依赖，按 export_auxiliary_concurrency 在独立会话上并发读取（为 1 时在当前会话上依次读取）；
+        各部分可能读到略有先后的快照，对导出备份没有影响。每部分耗时（毫秒）写入 timings。
+        """
+        loaders: Dict[str, Callable[["ProjectTransferService"], Awaitable[Any]]] = {
+            "project_memory": lambda service: service._load_project_memory(project_id),
+            "constitution": lambda service: service._load_constitution(project_id),
+            "writer_personas": lambda service: service._load_writer_personas(project_id),
+            "factions": lambda service: service._load_factions_bundle(project_id, character_name_by_id),
+            "memory_layer": lambda service: service._load_memory_layer(project_id),
+            "chapter_blueprints": lambda service: service._load_chapter_blueprints(project_id),
+            "foreshadowing": lambda service: service._load_foreshadowing_bundle(project_id),
+            "chapter_snapshots": lambda service: service._load_chapter_snapshots(project_id),
+        }
+        section_timings = timings if timings is not None else {}
+        concurrency = settings.export_auxiliary_concurrency
+
+        if concurrency <= 1:
+            bundles: Dict[str, Any] = {}
+            for name, load in loaders.items():
+                started = time.perf_counter()
+                bundles[name] = await load(self)
+                section_timings[name] = _elapsed_ms(started)
+            return bundles
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _load_section(name: str, load: Callable[["ProjectTransferService"], Awaitable[Any]]) -> Any:
+            async with semaphore:
+                started = time.perf_counter()
+                async with self.session_factory() as session:
+                    value = await load(ProjectTransferService(session, self.session_factory))
+                section_timings[name] = _elapsed_ms(started)
+                return value
+
+        values = await asyncio.gather(*(_load_section(name, load) for name, load in loaders.items()))
+        return dict(zip(loaders, values))
+
     async def export_bundle(self, user_id: int) -> Dict[str, Any]:
         result = await self.session.execute(
             select(NovelProject.id).where(NovelProject.user_id == user_id)
@@ -241,6 +356,183 @@ class ProjectTransferService:
             ids.append(await self.import_project(user_id, item))
         return ids
 
+    async def iter_bundle_ndjson(
+        self,
+        user_id: int,
+        *,
+        compress: bool = False,
+        chapter_batch_size: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        流式导出用户全部项目，产出 NDJSON 字节块（compress 为 True 时为 gzip 数据）
+
+        记录依次为 bundle、每个项目的 project / chapters（按批）/ project_end，以及 end。
+        每次只加载一个项目的元数据和一批章节（含全部版本），产出后清空会话的 identity map，
+        因此调用方应为本次导出提供独立的会话。中途失败时补齐 gzip 尾部后重新抛出，不写 end 记录。
+        """
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+        def _encode(chunk: bytes) -> bytes:
+            return compressor.compress(chunk) if compressor is not None else chunk
+
+        batch_size = max(1, chapter_batch_size or settings.export_stream_chapter_batch)
+        result = await self.session.execute(
+            select(NovelProject.id).where(NovelProject.user_id == user_id).order_by(NovelProject.created_at)
+        )
+        project_ids = [row[0] for row in result.all()]
+
+        yield _encode(
+            _ndjson_line(
+                "bundle",
+                format=EXPORT_STREAM_FORMAT,
+                version=EXPORT_STREAM_VERSION,
+                exported_at=datetime.now(timezone.utc).isoformat(),
+                projects=len(project_ids),
+            )
+        )
+        try:
+            for project_id in project_ids:
+                async for line in self._iter_project_ndjson(project_id, user_id, batch_size):
+                    chunk = _encode(line)
+                    if chunk:
+                        yield chunk
+        except Exception:
+            # 中途失败时不写 end 记录，只补齐 gzip 尾部，导入端据此判定文件不完整
+            if compressor is not None:
+                yield compressor.flush()
+            raise
+        tail = _encode(_ndjson_line("end", projects=len(project_ids)))
+        if compressor is not None:
+            tail += compressor.flush()
+        yield tail
+
+    async def _iter_project_ndjson(self, project_id: str, user_id: int, batch_size: int) -> AsyncIterator[bytes]:
+        project = await self.novel_service.ensure_project_owner(project_id, user_id, ProjectLoad.METADATA)
+        conversations_result = await self.session.execute(
+            select(NovelConversation)
+            .where(NovelConversation.project_id == project_id)
+            .order_by(NovelConversation.seq)
+        )
+        conversations = [
+            {"role": convo.role, "content": convo.content, "metadata": convo.metadata}
+            for convo in conversations_result.scalars()
+        ]
+        outlines_map = {outline.chapter_number: outline for outline in project.outlines}
+        chapter_numbers = sorted(set(outlines_map) | {chapter.chapter_number for chapter in project.chapters})
+        character_name_by_id = {c.id: c.name for c in project.characters}
+        header = self._project_header(project, conversations)
+        header["chapter_count"] = len(chapter_numbers)
+        yield _ndjson_line("project", header)
+        # 已脱离会话的大纲只保留已加载的列；项目对象不再引用，随 identity map 一起释放
+        self.session.expunge_all()
+        del project, conversations
+
+        for offset in range(0, len(chapter_numbers), batch_size):
+            numbers = chapter_numbers[offset : offset + batch_size]
+            result = await self.session.execute(
+                select(Chapter)
+                .where(Chapter.project_id == project_id, Chapter.chapter_number.in_(numbers))
+                .options(selectinload(Chapter.versions), selectinload(Chapter.evaluations))
+            )
+            chapters_map = {chapter.chapter_number: chapter for chapter in result.scalars()}
+            payload = [
+                self._chapter_payload(number, outlines_map.get(number), chapters_map.get(number))
+                for number in numbers
+            ]
+            self.session.expunge_all()
+            del chapters_map
+            yield _ndjson_line("chapters", payload)
+
+        timings: Dict[str, float] = {}
+        auxiliary = await self._load_auxiliary_bundles(project_id, character_name_by_id, timings=timings)
+        self.session.expunge_all()
+        yield _ndjson_line("project_end", {**auxiliary, "diagnostics": {"section_timings_ms": timings}})
+
+    async def import_bundle_stream(self, user_id: int, fileobj: IO[bytes]) -> List[str]:
+        """
+        逐条消费 iter_bundle_ndjson 的导出文件：project 记录创建项目，chapters 记录逐章写入，
+        project_end 记录恢复附属数据；任何时刻只持有一行记录。会清空会话的 identity map。
+
+        文件缺少 end 记录或项目数与头部/结尾记录不符（导出中途失败、文件被截断）时视为不完整，
+        删除本次已导入的项目后抛出 ValueError。
+        """
+        created: List[str] = []
+        try:
+            return await self._consume_bundle_stream(user_id, fileobj, created)
+        except ValueError:
+            if created:
+                await self.session.rollback()
+                self.session.expunge_all()
+                await self.novel_service.delete_projects(created, user_id)
+                logger.warning("流式导入失败，已删除本次导入的项目: count=%d", len(created))
+            raise
+
+    async def _consume_bundle_stream(self, user_id: int, fileobj: IO[bytes], created: List[str]) -> List[str]:
+        ids: List[str] = []
+        project_id: Optional[str] = None
+        chapter_id_map: Dict[int, int] = {}
+        project_meta: Dict[str, Any] = {}
+        expected_projects: Optional[int] = None
+        seen_header = False
+        seen_end = False
+
+        async for record in iter_ndjson_records(fileobj):
+            record_type = record["type"]
+            if not seen_header:
+                if record_type != "bundle" or record.get("format") != EXPORT_STREAM_FORMAT:
+                    raise ValueError("不是支持的流式导出文件")
+                if (self._safe_int(record.get("version")) or 0) > EXPORT_STREAM_VERSION:
+                    raise ValueError("导出文件版本过新，请升级后再导入")
+                expected_projects = self._safe_int(record.get("projects"))
+                seen_header = True
+                continue
+
+            if record_type == "project":
+                if project_id is not None:
+                    raise ValueError("导入文件不完整：项目缺少结束记录")
+                data = self._normalize_payload(record.get("data") or {})
+                project_id = (await self._begin_project_import(user_id, data)).id
+                created.append(project_id)
+                project_meta = data.get("project") or {}
+                chapter_id_map = {}
+            elif record_type == "chapters":
+                if project_id is None:
+                    raise ValueError("导入文件格式错误：章节记录不属于任何项目")
+                for chapter_data in record.get("data") or []:
+                    if isinstance(chapter_data, dict):
+                        await self._import_chapter_into(project_id, chapter_data, chapter_id_map)
+                # 已写入的章节与版本不再需要留在 identity map 中
+                self.session.expunge_all()
+            elif record_type == "project_end":
+                if project_id is None:
+                    raise ValueError("导入文件格式错误：多余的项目结束记录")
+                data = dict(record.get("data") or {})
+                data["project"] = project_meta
+                project = await self.session.get(NovelProject, project_id)
+                await self._finish_project_import(project, data, chapter_id_map)
+                ids.append(project_id)
+                logger.info("流式导入项目完成: project=%s chapters=%d", project_id, len(chapter_id_map))
+                project_id = None
+                self.session.expunge_all()
+            elif record_type == "end":
+                if project_id is not None:
+                    raise ValueError("导入文件不完整：项目缺少结束记录")
+                end_projects = self._safe_int(record.get("projects"))
+                if end_projects is not None:
+                    expected_projects = end_projects
+                seen_end = True
+                break
+
+        if not seen_header:
+            raise ValueError("导入文件为空")
+        if project_id is not None:
+            raise ValueError("导入文件不完整：项目缺少结束记录")
+        if not seen_end:
+            raise ValueError("导入文件不完整：缺少结束记录，导出可能中途失败或文件被截断")
+        if expected_projects is not None and expected_projects != len(ids):
+            raise ValueError(f"导入文件不完整：应包含 {expected_projects} 个项目，实际读取到 {len(ids)} 个")
+        return ids
+
     async def _load_constitution(self, project_id: str) -> Optional[Dict[str, Any]]:
         result = await self.session.execute(
             select(NovelConstitution).where(NovelConstitution.project_id == project_id)
@@ -377,7 +669,18 @@ class ProjectTransferService:
             raise ValueError("导入数据格式不正确")
 
         data = self._normalize_payload(payload)
+        project = await self._begin_project_import(user_id, data)
+
+        chapters = data.get("chapters") or []
+        chapter_id_map: Dict[int, int] = {}
+        for chapter_data in chapters:
+            await self._import_chapter_into(project.id, chapter_data, chapter_id_map)
 
+        await self._finish_project_import(project, data, chapter_id_map)
+        return project.id
+
+    async def _begin_project_import(self, user_id: int, data: Dict[str, Any]) -> NovelProject:
+        """创建项目并写入蓝图与对话记录。"""
         project_meta = data.get("project", {})
         title = project_meta.get("title") or data.get("title") or "导入的项目"
         initial_prompt = (
@@ -404,16 +707,21 @@ class ProjectTransferService:
                 content,
                 metadata=item.get("metadata"),
             )
+        return project
 
-        chapters = data.get("chapters") or []
-        chapter_id_map: Dict[int, int] = {}
-        for chapter_data in chapters:
-            chapter_number = chapter_data.get("chapter_number")
-            chapter_id = await self._import_chapter(project.id, chapter_data)
-            chapter_number_int = self._safe_int(chapter_number)
-            if chapter_id and chapter_number_int is not None:
-                chapter_id_map[chapter_number_int] = chapter_id
+    async def _import_chapter_into(
+        self, project_id: str, chapter_data: Dict[str, Any], chapter_id_map: Dict[int, int]
+    ) -> None:
+        chapter_id = await self._import_chapter(project_id, chapter_data)
+        chapter_number_int = self._safe_int(chapter_data.get("chapter_number"))
+        if chapter_id and chapter_number_int is not None:
+            chapter_id_map[chapter_number_int] = chapter_id
 
+    async def _finish_project_import(
+        self, project: NovelProject, data: Dict[str, Any], chapter_id_map: Dict[int, int]
+    ) -> None:
+        """章节写入后恢复附属数据（伏笔需要章节 ID 映射）并写回项目状态。"""
+        project_meta = data.get("project") or {}
         if data.get("project_memory"):
             await self._restore_project_memory(project.id, data["project_memory"])
 
@@ -449,8 +757,6 @@ class ProjectTransferService:
             project.status = project_meta.get("status")
             await self.session.commit()
 
-        return project.id
-
     def _normalize_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         fmt = payload.get("format")
         if fmt and fmt != EXPORT_FORMAT:
@@ -2,16 +2,24 @@
 读者模拟器服务
 
 模拟不同类型读者的阅读体验，提供爽点检测、弃书风险评估、追读欲望分析。
+
+爽点检测与钩子评估互不依赖，各读者画像只依赖爽点检测结果，三者按依赖关系并发执行
+（上限 reader_sim_concurrency）。单个画像超时或失败时记入 failed_personas，不计入总评分，其余结果照常返回；
+全部画像失败时 overall_score 为 None。
 """
-from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Dict, Any, List
 from enum import Enum
+import asyncio
 import json
 import logging
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from ..core.config import settings
 from .llm_service import LLMService
 from .prompt_service import PromptService
+from .stage_executor import Stage, run_stages
 
 logger = logging.getLogger(__name__)
 
@@ -77,10 +85,30 @@ class ReaderSimulatorService:
         },
     }
 
-    def __init__(self, db: AsyncSession, llm_service: LLMService, prompt_service: PromptService):
+    def __init__(
+        self,
+        db: AsyncSession,
+        llm_service: LLMService,
+        prompt_service: PromptService,
+        session_factory: Optional[async_sessionmaker] = None,
+    ):
+        """
+        传入 session_factory 时各 LLM 调用在独立会话中并发执行（同一会话不能被多个协程共用）；
+        否则复用 llm_service 逐个执行。
+        """
         self.db = db
         self.llm_service = llm_service
         self.prompt_service = prompt_service
+        self._session_factory = session_factory
+
+    @asynccontextmanager
+    async def _stage_llm(self) -> AsyncIterator[LLMService]:
+        """为单次调用提供 LLMService：有会话工厂时使用独立会话，否则复用注入的实例。"""
+        if self._session_factory is None:
+            yield self.llm_service
+            return
+        async with self._session_factory() as stage_session:
+            yield LLMService(stage_session)
 
     async def simulate_reading_experience(
         self,
@@ -102,35 +130,64 @@ class ReaderSimulatorService:
         results = {
             "overall_score": 0,
             "reader_feedbacks": {},
+            "failed_personas": [],
             "thrill_points": [],
             "abandon_risks": [],
             "hook_strength": 0,
             "recommendations": []
         }
         
-        # 1. 检测爽点
-        thrill_points = await self._detect_thrill_points(chapter_content, user_id)
-        results["thrill_points"] = thrill_points
-        
-        # 2. 模拟各类读者反馈
-        total_score = 0
+        # 1. 爽点检测与钩子评估并发执行，各读者画像在爽点检测完成后并发执行
+        persona_timeout = settings.reader_sim_persona_timeout_seconds
+
+        def _reader_stage(reader_type: ReaderType) -> Stage:
+            async def _run(deps: Dict[str, Any]) -> Dict[str, Any]:
+                return await asyncio.wait_for(
+                    self._simulate_single_reader(
+                        chapter_content, chapter_number, reader_type,
+                        deps.get("thrill_points") or [], previous_summary, user_id
+                    ),
+                    timeout=persona_timeout,
+                )
+            return Stage(f"reader:{reader_type.value}", _run, after=("thrill_points",))
+
+        stages = [
+            Stage("thrill_points", lambda _: self._detect_thrill_points(chapter_content, user_id)),
+            Stage("hook_strength", lambda _: self._evaluate_hook_strength(chapter_content, user_id)),
+            *(_reader_stage(reader_type) for reader_type in reader_types),
+        ]
+        max_concurrency = settings.reader_sim_concurrency if self._session_factory else 1
+        outcomes = await run_stages(stages, max_concurrency=max_concurrency)
+        results["stage_timings"] = {name: outcome.timing() for name, outcome in outcomes.items()}
+
+        thrill_outcome = outcomes["thrill_points"]
+        results["thrill_points"] = thrill_outcome.result if thrill_outcome.ok else []
+        hook_outcome = outcomes["hook_strength"]
+        results["hook_strength"] = hook_outcome.result if hook_outcome.ok else self._default_hook_strength()
+
+        # 2. 汇总读者反馈：超时或失败的画像单独列出，不计入总评分；全部失败时不给出总评分
+        scores = []
         for reader_type in reader_types:
-            feedback = await self._simulate_single_reader(
-                chapter_content, chapter_number, reader_type, 
-                thrill_points, previous_summary, user_id
-            )
-            results["reader_feedbacks"][reader_type.value] = feedback
-            total_score += feedback.get("satisfaction", 50)
-        
-        results["overall_score"] = round(total_score / len(reader_types), 1)
+            outcome = outcomes[f"reader:{reader_type.value}"]
+            if outcome.ok:
+                feedback = outcome.result
+                results["reader_feedbacks"][reader_type.value] = feedback
+                scores.append(feedback.get("satisfaction", 50))
+            else:
+                results["failed_personas"].append(
+                    {
+                        "reader_type": reader_type.value,
+                        "status": "timeout" if isinstance(outcome.error, asyncio.TimeoutError) else "failed",
+                        "error": str(outcome.error) or type(outcome.error).__name__,
+                    }
+                )
+
+        results["overall_score"] = round(sum(scores) / len(scores), 1) if scores else None
         
         # 3. 评估弃书风险
         results["abandon_risks"] = self._evaluate_abandon_risks(results["reader_feedbacks"])
         
-        # 4. 评估追读欲望（钩子强度）
-        results["hook_strength"] = await self._evaluate_hook_strength(chapter_content, user_id)
-        
-        # 5. 生成综合建议
+        # 4. 生成综合建议
         results["recommendations"] = self._generate_recommendations(results)
         
         return results
@@ -174,13 +231,14 @@ class ReaderSimulatorService:
 ```"""
 
         try:
-            response = await self.llm_service.get_llm_response(
-                system_prompt="你是一个专业的网文分析师，擅长识别读者爽点。请严格按照 JSON 格式输出。",
-                conversation_history=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                user_id=user_id,
-                timeout=120.0
-            )
+            async with self._stage_llm() as llm:
+                response = await llm.get_llm_response(
+                    system_prompt="你是一个专业的网文分析师，擅长识别读者爽点。请严格按照 JSON 格式输出。",
+                    conversation_history=[{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    user_id=user_id,
+                    timeout=120.0
+                )
             
             content = response
             json_start = content.find("{")
@@ -238,38 +296,25 @@ class ReaderSimulatorService:
 }}
 ```"""
 
-        try:
-            response = await self.llm_service.get_llm_response(
+        # 失败时直接抛出，由调用方记入 failed_personas，避免默认分数混入总评分
+        async with self._stage_llm() as llm:
+            response = await llm.get_llm_response(
                 system_prompt=f"你是一个{profile['name']}，正在阅读网络小说。请以真实读者的口吻回答。",
                 conversation_history=[{"role": "user", "content": prompt}],
                 temperature=0.7,
                 user_id=user_id,
                 timeout=120.0
             )
-            
-            content = response
-            json_start = content.find("{")
-            json_end = content.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                result = json.loads(content[json_start:json_end])
-                result["thrill_score"] = thrill_score
-                result["reader_type"] = reader_type.value
-                return result
-        except Exception as e:
-            logger.warning(f"模拟{profile['name']}失败: {e}")
-        
-        # 返回默认值
-        return {
-            "satisfaction": 50,
-            "emotions": [],
-            "highlights": [],
-            "complaints": [],
-            "would_continue": True,
-            "abandon_risk": 5,
-            "comment": "无法评价",
-            "thrill_score": thrill_score,
-            "reader_type": reader_type.value
-        }
+
+        content = response
+        json_start = content.find("{")
+        json_end = content.rfind("}") + 1
+        if json_start < 0 or json_end <= json_start:
+            raise ValueError(f"{profile['name']}的反馈不是 JSON")
+        result = json.loads(content[json_start:json_end])
+        result["thrill_score"] = thrill_score
+        result["reader_type"] = reader_type.value
+        return result
 
     def _calculate_thrill_score(
         self, 
@@ -330,13 +375,14 @@ class ReaderSimulatorService:
 ```"""
 
         try:
-            response = await self.llm_service.get_llm_response(
-                system_prompt="你是一个专业的网文编辑，擅长分析章节钩子。",
-                conversation_history=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                user_id=user_id,
-                timeout=60.0
-            )
+            async with self._stage_llm() as llm:
+                response = await llm.get_llm_response(
+                    system_prompt="你是一个专业的网文编辑，擅长分析章节钩子。",
+                    conversation_history=[{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    user_id=user_id,
+                    timeout=60.0
+                )
             
             content = response
             json_start = content.find("{")
@@ -346,6 +392,10 @@ class ReaderSimulatorService:
         except Exception as e:
             logger.warning(f"评估钩子强度失败: {e}")
         
+        return self._default_hook_strength()
+
+    @staticmethod
+    def _default_hook_strength() -> Dict[str, Any]:
         return {
             "hook_strength": 5,
             "hook_type": "未知",
@@ -358,8 +408,10 @@ class ReaderSimulatorService:
         recommendations = []
         
         # 基于整体得分
-        overall_score = results.get("overall_score", 50)
-        if overall_score < 60:
+        overall_score = results.get("overall_score")
+        if overall_score is None:
+            recommendations.append("读者模拟全部失败，本次没有满意度评分，建议稍后重试")
+        elif overall_score < 60:
             recommendations.append("整体满意度偏低，需要重点优化")
         
         # 基于爽点数量
@@ -418,9 +470,10 @@ class ReaderSimulatorService:
             user_id=user_id
         )
         
+        overall_score = results["overall_score"]
         lines = [
             "# 读者模拟反馈\n",
-            f"## 整体得分：{results['overall_score']}/100",
+            f"## 整体得分：{overall_score}/100" if overall_score is not None else "## 整体得分：暂无（读者模拟全部失败）",
             "",
             "## 爽点检测",
             f"- 发现 {len(results['thrill_points'])} 个爽点",
@@ -436,6 +489,9 @@ class ReaderSimulatorService:
             lines.append(f"### {reader_type}")
             lines.append(f"- 满意度：{feedback.get('satisfaction')}/100")
             lines.append(f"- 评价：{feedback.get('comment')}")
+        for failed in results["failed_personas"]:
+            lines.append(f"### {failed['reader_type']}")
+            lines.append(f"- 未完成（{failed['status']}），不计入整体得分")
         
         if results["recommendations"]:
             lines.append("")
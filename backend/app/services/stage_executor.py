@@ -0,0 +1,122 @@
+# AIMETA P=依赖感知阶段执行器_并发运行独立阶段|R=依赖调度_有界并发_阶段耗时_失败记录|NR=不含业务逻辑|E=Stage_StageOutcome_run_stages|X=internal|A=并发工具|D=asyncio|S=none|RD=./README.ai
+"""依赖感知的阶段执行器。
+
+每个阶段声明其依赖的阶段名，依赖全部结束（无论成功与否）后即可启动；
+互不依赖的阶段在信号量约束下并发执行。单个阶段失败只记录在结果中，
+依赖它的阶段会收到 ``None`` 作为该依赖的结果，由阶段自身决定如何降级。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class Stage:
+    """一个待执行阶段：``func`` 接收已完成阶段的结果字典。"""
+
+    name: str
+    func: StageFunc
+    after: Sequence[str] = field(default_factory=tuple)
+
+
+@dataclass
+class StageOutcome:
+    name: str
+    result: Any = None
+    error: Optional[BaseException] = None
+    started_ms: float = 0.0
+    duration_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def timing(self) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {
+            "status": "ok" if self.ok else "failed",
+            "started_ms": round(self.started_ms, 1),
+            "duration_ms": round(self.duration_ms, 1),
+        }
+        if self.error is not None:
+            entry["error"] = str(getattr(self.error, "detail", None) or self.error)[:200]
+        return entry
+
+
+async def run_stages(
+    stages: Iterable[Stage],
+    *,
+    max_concurrency: int = 4,
+) -> Dict[str, StageOutcome]:
+    """按依赖关系执行全部阶段，返回 ``{阶段名: StageOutcome}``（保持声明顺序）。"""
+    stages = list(stages)
+    names = {stage.name for stage in stages}
+    if len(names) != len(stages):
+        raise ValueError("阶段名称重复")
+    for stage in stages:
+        unknown = set(stage.after) - names
+        if unknown:
+            raise ValueError(f"阶段 {stage.name} 依赖未知阶段: {sorted(unknown)}")
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    outcomes: Dict[str, StageOutcome] = {stage.name: StageOutcome(name=stage.name) for stage in stages}
+    done: Dict[str, asyncio.Event] = {stage.name: asyncio.Event() for stage in stages}
+    results: Dict[str, Any] = {}
+    started = time.perf_counter()
+
+    async def _run(stage: Stage) -> None:
+        outcome = outcomes[stage.name]
+        try:
+            for dependency in stage.after:
+                await done[dependency].wait()
+            async with semaphore:
+                stage_started = time.perf_counter()
+                outcome.started_ms = (stage_started - started) * 1000
+                try:
+                    outcome.result = await stage.func({name: results.get(name) for name in stage.after})
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    outcome.error = exc
+                    logger.warning("阶段执行失败: stage=%s error=%s", stage.name, exc)
+                finally:
+                    outcome.duration_ms = (time.perf_counter() - stage_started) * 1000
+            if outcome.ok:
+                results[stage.name] = outcome.result
+        finally:
+            done[stage.name].set()
+
+    _detect_cycles(stages)
+    await asyncio.gather(*(_run(stage) for stage in stages))
+    return outcomes
+
+
+def _detect_cycles(stages: Sequence[Stage]) -> None:
+    """存在循环依赖时直接报错，避免阶段互相等待导致挂起。"""
+    graph = {stage.name: tuple(stage.after) for stage in stages}
+    visiting: set = set()
+    visited: set = set()
+
+    def _visit(name: str) -> None:
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"阶段存在循环依赖: {name}")
+        visiting.add(name)
+        for dependency in graph[name]:
+            _visit(dependency)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in graph:
+        _visit(name)
+
+
+__all__ = ["Stage", "StageOutcome", "run_stages"]
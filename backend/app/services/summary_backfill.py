@@ -0,0 +1,216 @@
+# AIMETA P=章节摘要补全_有界并发批量生成|R=查找缺失摘要_并发调用LLM_分批提交_后台调度|NR=不含摘要提示词|E=SummaryBackfillService_schedule_summary_backfill|X=job|A=后台补全|D=asyncio,sqlalchemy|S=db|RD=./README.ai
+"""
+章节摘要补全
+
+生成章节时需要前文各章的 real_summary。旧实现在请求里逐章串行调用 LLM 补全缺失摘要，
+导入的长篇小说生成第 N 章时会在一个请求内触发 N-1 次串行调用。
+
+现在摘要由 SummaryBackfillService 预先批量生成：
+- 每章在独立会话中调用 LLM，受单用户 + 全局两级并发限制；
+- 按 summary_backfill_commit_batch 分批，用一次 executemany 写回并提交；
+- 写回时校验选中版本未变且摘要仍为空，避免覆盖期间的编辑结果。
+
+触发点：导入小说后、章节定稿后、生成请求发现缺失摘要时（后台调度，请求本身只读取已有摘要）。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.config import settings
+from ..db.session import AsyncSessionLocal
+from ..models import Chapter, ChapterVersion
+from ..utils.json_utils import remove_think_tags
+from .llm_service import LLMService
+from .version_fanout import ConcurrencyLimiter, run_versions_concurrently
+
+logger = logging.getLogger(__name__)
+
+_SUMMARY_LIMITER: Optional[ConcurrencyLimiter] = None
+_RUNNING: Dict[str, asyncio.Task] = {}
+
+
+def get_summary_limiter() -> ConcurrencyLimiter:
+    """进程级摘要补全并发限制器，按配置懒加载。"""
+    global _SUMMARY_LIMITER
+    if _SUMMARY_LIMITER is None:
+        _SUMMARY_LIMITER = ConcurrencyLimiter(
+            global_limit=settings.summary_backfill_concurrency_global,
+            per_key_limit=settings.summary_backfill_concurrency_per_user,
+        )
+    return _SUMMARY_LIMITER
+
+
+@dataclass
+class SummaryBackfillResult:
+    pending: int = 0
+    generated: int = 0
+    failed: List[int] = field(default_factory=list)
+
+
+class SummaryBackfillService:
+    """为缺少 real_summary 的章节批量生成摘要。"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        *,
+        limiter: Optional[ConcurrencyLimiter] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.limiter = limiter or get_summary_limiter()
+        self.batch_size = max(1, batch_size or settings.summary_backfill_commit_batch)
+
+    async def list_pending(
+        self,
+        project_id: str,
+        *,
+        before_chapter: Optional[int] = None,
+        chapter_numbers: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[int, int, int]]:
+        """返回 (chapter_id, chapter_number, selected_version_id) 列表，只查询整数列。"""
+        stmt = (
+            select(Chapter.id, Chapter.chapter_number, Chapter.selected_version_id)
+            .where(
+                Chapter.project_id == project_id,
+                Chapter.selected_version_id.is_not(None),
+                or_(Chapter.real_summary.is_(None), Chapter.real_summary == ""),
+            )
+            .order_by(Chapter.chapter_number)
+        )
+        if before_chapter is not None:
+            stmt = stmt.where(Chapter.chapter_number < before_chapter)
+        if chapter_numbers is not None:
+            stmt = stmt.where(Chapter.chapter_number.in_(list(chapter_numbers)))
+        async with self.session_factory() as session:
+            result = await session.execute(stmt)
+            return [tuple(row) for row in result.all()]
+
+    async def backfill_project(
+        self,
+        project_id: str,
+        user_id: Optional[int],
+        *,
+        before_chapter: Optional[int] = None,
+        chapter_numbers: Optional[Iterable[int]] = None,
+    ) -> SummaryBackfillResult:
+        pending = await self.list_pending(
+            project_id, before_chapter=before_chapter, chapter_numbers=chapter_numbers
+        )
+        result = SummaryBackfillResult(pending=len(pending))
+        for offset in range(0, len(pending), self.batch_size):
+            batch = pending[offset : offset + self.batch_size]
+            generated, failed = await self._run_batch(batch, user_id)
+            result.generated += generated
+            result.failed.extend(failed)
+        if pending:
+            logger.info(
+                "项目 %s 摘要补全完成: pending=%s generated=%s failed=%s",
+                project_id,
+                result.pending,
+                result.generated,
+                result.failed,
+            )
+        return result
+
+    async def _run_batch(
+        self,
+        batch: List[Tuple[int, int, int]],
+        user_id: Optional[int],
+    ) -> Tuple[int, List[int]]:
+        version_ids = [version_id for _, _, version_id in batch]
+        async with self.session_factory() as session:
+            rows = await session.execute(
+                select(ChapterVersion.id, ChapterVersion.content).where(ChapterVersion.id.in_(version_ids))
+            )
+            contents = dict(rows.all())
+
+        async def _summarize(index: int, session: AsyncSession) -> Optional[str]:
+            content = contents.get(batch[index][2])
+            if not content:
+                return None
+            summary = await LLMService(session).get_summary(
+                content,
+                temperature=0.15,
+                user_id=user_id,
+                timeout=180.0,
+            )
+            return remove_think_tags(summary).strip() or None
+
+        outcomes = await run_versions_concurrently(
+            len(batch),
+            _summarize,
+            session_factory=self.session_factory,
+            user_id=user_id,
+            limiter=self.limiter,
+        )
+        updates = [
+            {"b_id": batch[o.index][0], "b_version": batch[o.index][2], "b_summary": o.result}
+            for o in outcomes
+            if o.ok and o.result
+        ]
+        failed = [batch[o.index][1] for o in outcomes if not o.ok]
+        if updates:
+            table = Chapter.__table__
+            stmt = (
+                update(table)
+                .where(
+                    table.c.id == bindparam("b_id"),
+                    table.c.selected_version_id == bindparam("b_version"),
+                    or_(table.c.real_summary.is_(None), table.c.real_summary == ""),
+                )
+                .values(real_summary=bindparam("b_summary"))
+            )
+            async with self.session_factory() as session:
+                await session.execute(stmt, updates)
+                await session.commit()
+        return len(updates), failed
+
+
+def schedule_summary_backfill(
+    project_id: str,
+    user_id: Optional[int],
+    *,
+    before_chapter: Optional[int] = None,
+) -> bool:
+    """
+    在当前事件循环后台补全项目摘要，同一项目同时只运行一个补全任务
+
+    返回 False 表示该项目已有补全任务在运行。
+    """
+    running = _RUNNING.get(project_id)
+    if running is not None and not running.done():
+        return False
+
+    async def _run() -> None:
+        try:
+            await SummaryBackfillService().backfill_project(
+                project_id, user_id, before_chapter=before_chapter
+            )
+        except Exception as exc:  # noqa: BLE001 - 后台任务只记录错误
+            logger.warning("项目 %s 摘要补全失败: %s", project_id, exc)
+        finally:
+            _RUNNING.pop(project_id, None)
+
+    _RUNNING[project_id] = asyncio.get_running_loop().create_task(_run())
+    return True
+
+
+def is_backfill_running(project_id: str) -> bool:
+    task = _RUNNING.get(project_id)
+    return task is not None and not task.done()
+
+
+__all__ = [
+    "SummaryBackfillResult",
+    "SummaryBackfillService",
+    "get_summary_limiter",
+    "is_backfill_running",
+    "schedule_summary_backfill",
+]
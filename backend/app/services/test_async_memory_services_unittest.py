@@ -0,0 +1,95 @@
+# AIMETA P=记忆与检索服务异步查询测试|R=AsyncSession查询_关系预加载_定稿记忆创建|NR=不调用真实LLM|E=unittest_async|X=internal|A=单元测试|D=unittest,sqlalchemy,aiosqlite|S=db|RD=./README.ai
+import unittest
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401 - 注册全部模型供 create_all 使用
+from app.db.base import Base
+from app.models.chapter_blueprint import ChapterBlueprint
+from app.models.foreshadowing import Foreshadowing
+from app.models.novel import Chapter, ChapterVersion, NovelBlueprint, NovelProject
+from app.models.project_memory import ChapterSnapshot, ProjectMemory
+from app.services.blueprint_service import BlueprintService
+from app.services.consistency_service import ConsistencyService
+from app.services.finalize_service import FinalizeService
+from app.services.knowledge_retrieval_service import KnowledgeRetrievalService
+
+
+class TestAsyncMemoryServices(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.session_factory() as session:
+            session.add(NovelProject(id="p1", user_id=1, title="t", initial_prompt=""))
+            session.add(NovelBlueprint(project_id="p1", genre="玄幻", style="热血"))
+            session.add(ProjectMemory(project_id="p1", global_summary="前情"))
+            session.add(ChapterBlueprint(project_id="p1", chapter_number=3, chapter_focus="主角成长"))
+            for number in (1, 2):
+                chapter = Chapter(project_id="p1", chapter_number=number)
+                session.add(chapter)
+                await session.flush()
+                version = ChapterVersion(chapter_id=chapter.id, content=f"第{number}章正文")
+                session.add(version)
+                await session.flush()
+                chapter.selected_version_id = version.id
+                session.add(ChapterSnapshot(project_id="p1", chapter_number=number, chapter_summary=f"摘要{number}"))
+            session.add(
+                Foreshadowing(
+                    project_id="p1", chapter_id=chapter.id, chapter_number=2, content="神秘玉佩", type="clue"
+                )
+            )
+            await session.commit()
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+
+    async def test_knowledge_retrieval_loads_context_without_lazy_loading(self) -> None:
+        async with self.session_factory() as session:
+            service = KnowledgeRetrievalService(session, llm_service=None)
+            context = await service.get_chapter_context("p1", 3, user_id=1, include_recent_chapters=2)
+            recent = await service._get_recent_chapter_content("p1", 3, 2)
+
+        self.assertEqual(context["global_summary"], "前情")
+        self.assertEqual(context["blueprint"]["chapter_focus"], "主角成长")
+        self.assertEqual([item["summary"] for item in context["recent_chapters"]], ["摘要1", "摘要2"])
+        self.assertEqual([item["content"] for item in recent], ["第1章正文", "第2章正文"])
+
+    async def test_consistency_context_reads_setting_memory_and_foreshadowing(self) -> None:
+        async with self.session_factory() as session:
+            context = await ConsistencyService(session, llm_service=None)._get_check_context("p1")
+
+        self.assertIn("类型: 玄幻", context["novel_setting"])
+        self.assertEqual(context["global_summary"], "前情")
+        self.assertIn("神秘玉佩", context["foreshadowings"])
+
+    async def test_finalize_creates_memory_and_reads_context(self) -> None:
+        async with self.session_factory() as session:
+            service = FinalizeService(session, llm_service=None)
+            memory = await service._get_or_create_project_memory("p2")
+            self.assertIsNotNone(memory.id)
+            context = await service.get_finalize_context("p1", 3)
+
+        self.assertEqual(context["global_summary"], "前情")
+        self.assertEqual([item["chapter_number"] for item in context["recent_snapshots"]], [2, 1])
+
+    async def test_blueprint_service_crud_and_templates(self) -> None:
+        async with self.session_factory() as session:
+            service = BlueprintService(session, llm_service=None)
+            await service.create_blueprint("p1", 4, chapter_function="climax")
+            await service.init_system_templates()
+            await service.init_system_templates()
+            templates = await service.get_system_templates()
+            applied = await service.apply_template("p1", 4, templates[0].id)
+            pacing = await service.analyze_pacing("p1")
+            deleted = await service.delete_blueprint("p1", 4)
+
+        self.assertEqual(len(templates), 4)
+        self.assertEqual(applied.chapter_number, 4)
+        self.assertEqual(pacing["total_chapters"], 2)
+        self.assertTrue(deleted)
+
+
+if __name__ == "__main__":
+    unittest.main()
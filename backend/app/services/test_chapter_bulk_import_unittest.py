@@ -0,0 +1,101 @@
+# AIMETA P=章节批量导入测试|R=分批插入_选中版本回填_进度回调_文件导入结果|NR=不调用真实LLM|E=unittest_async|X=internal|A=单元测试|D=unittest,sqlalchemy,aiosqlite|S=db|RD=./README.ai
+import io
+import unittest
+from unittest import mock
+
+from fastapi import UploadFile
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+import app.models  # noqa: F401 - 注册全部模型供 create_all 使用
+from app.db.base import Base
+from app.models.novel import Chapter, NovelProject
+from app.schemas.novel import Blueprint
+from app.services.chapter_bulk_import import ChapterBulkImporter
+from app.services.import_service import ImportService
+
+
+class TestChapterBulkImport(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.statements = []
+        event.listen(
+            self.engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: self.statements.append(statement),
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+
+    async def _chapters(self, project_id):
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(Chapter)
+                .options(selectinload(Chapter.selected_version), selectinload(Chapter.versions))
+                .where(Chapter.project_id == project_id)
+                .order_by(Chapter.chapter_number)
+            )
+            return result.scalars().all()
+
+    async def test_batches_insert_chapters_and_select_imported_version(self) -> None:
+        async with self.session_factory() as session:
+            session.add(NovelProject(id="p1", user_id=1, title="t", initial_prompt="", revision=3))
+            await session.commit()
+
+        progress = []
+
+        async def on_progress(done, total):
+            progress.append((done, total))
+
+        contents = [f"第{i}章正文" * i for i in range(1, 6)]
+        self.statements.clear()
+        async with self.session_factory() as session:
+            stats = await ChapterBulkImporter(session, batch_size=2).import_chapters(
+                "p1", contents, metadata={"source": "file_import"}, progress=on_progress
+            )
+            await session.commit()
+
+        self.assertEqual((stats.chapters, stats.batches, stats.statements), (5, 3, 11))
+        self.assertEqual(len([s for s in self.statements if not s.startswith(("BEGIN", "COMMIT"))]), 11)
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+
+        chapters = await self._chapters("p1")
+        self.assertEqual([c.chapter_number for c in chapters], [1, 2, 3, 4, 5])
+        for chapter, content in zip(chapters, contents):
+            self.assertEqual(chapter.status, "successful")
+            self.assertEqual(chapter.word_count, len(content))
+            self.assertEqual(len(chapter.versions), 1)
+            self.assertEqual(chapter.selected_version.content, content)
+            self.assertEqual(chapter.selected_version.metadata, {"source": "file_import"})
+            self.assertEqual(chapter.selected_version.version_label, "v1")
+        async with self.session_factory() as session:
+            self.assertEqual((await session.get(NovelProject, "p1")).revision, 4)
+
+    async def test_import_novel_from_file_writes_all_chapters(self) -> None:
+        text = "前言内容\n第一章 开端\n张三出场。\n第二章 发展\n李四出场。\n第三章 结局\n完。\n"
+        upload = UploadFile(io.BytesIO(text.encode("utf-8")), filename="小说.txt")
+        async with self.session_factory() as session:
+            service = ImportService(session)
+            with mock.patch.object(service, "_filter_characters_only", mock.AsyncMock(return_value=[])), \
+                    mock.patch.object(
+                        service, "_analyze_content", mock.AsyncMock(return_value=Blueprint(title="导入测试"))
+                    ):
+                project_id = await service.import_novel_from_file(1, upload)
+
+        chapters = await self._chapters(project_id)
+        self.assertEqual(
+            [c.selected_version.content for c in chapters],
+            ["前言内容", "张三出场。", "李四出场。", "完。"],
+        )
+        async with self.session_factory() as session:
+            project = await session.get(NovelProject, project_id)
+        self.assertEqual((project.title, project.status), ("导入测试", "blueprint_ready"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# AIMETA P=章节增量入库测试|R=内容哈希比对_仅嵌入变化片段_摘要跳过_模型切换重嵌_过期摘要删除|NR=不依赖向量库和模型|E=unittest_async|X=internal|A=单元测试|D=unittest|S=none|RD=./README.ai
+import unittest
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services.chapter_ingest_service import ChapterIngestionService
+
+
+class _FakeLLMService:
+    def __init__(self) -> None:
+        self.calls = []
+        self.namespace = "openai:text-embedding-3-large"
+
+    async def get_embedding_namespace(self, *, user_id=None, model=None):
+        return self.namespace
+
+    async def get_embeddings_batch(self, texts, *, user_id=None, model=None):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class _FakeVectorStore:
+    def __init__(self) -> None:
+        self.chunks = {}
+        self.summaries = {}
+
+    async def get_chapter_chunks(self, project_id, chapter_number):
+        return [
+            {
+                "id": record["id"],
+                "chunk_index": record["chunk_index"],
+                "chapter_title": record["chapter_title"],
+                "content_hash": record["metadata"]["content_hash"],
+                "embedding_namespace": record["metadata"]["embedding_namespace"],
+                "embedding": record["embedding"],
+            }
+            for record in self.chunks.values()
+            if record["chapter_number"] == chapter_number
+        ]
+
+    async def get_chapter_summary(self, project_id, chapter_number):
+        return self.summaries.get(chapter_number)
+
+    async def upsert_chunks(self, *, records):
+        for record in records:
+            self.chunks[record["id"]] = record
+
+    async def delete_chunks(self, project_id, chunk_ids):
+        for chunk_id in chunk_ids:
+            self.chunks.pop(chunk_id, None)
+
+    async def upsert_summaries(self, *, records):
+        for record in records:
+            self.summaries[record["chapter_number"]] = record
+
+    async def delete_summary(self, project_id, chapter_number):
+        self.summaries.pop(chapter_number, None)
+
+
+class TestIncrementalIngest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        patcher = patch.object(settings, "vector_db_url", "file:unused.db")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.llm = _FakeLLMService()
+        self.store = _FakeVectorStore()
+        self.service = ChapterIngestionService(llm_service=self.llm, vector_store=self.store)
+        self.service._split_into_chunks = lambda text: [part for part in text.split("|") if part]
+
+    async def _ingest(self, content, summary):
+        await self.service.ingest_chapter(
+            project_id="p",
+            chapter_number=1,
+            title="第一章",
+            content=content,
+            summary=summary,
+            user_id=1,
+        )
+
+    async def test_only_changed_chunks_and_summary_are_embedded(self) -> None:
+        await self._ingest("甲|乙|丙", "摘要")
+        self.assertEqual(self.llm.calls, [["甲", "乙", "丙", "摘要"]])
+
+        await self._ingest("甲|乙改|丙", "摘要")
+        self.assertEqual(self.llm.calls[1], ["乙改"])
+        self.assertEqual(self.store.chunks["p:1:1"]["content"], "乙改")
+
+        await self._ingest("甲|乙改|丙", "摘要")
+        self.assertEqual(len(self.llm.calls), 2)
+
+    async def test_shifted_chunks_reuse_vectors_and_extra_chunks_are_deleted(self) -> None:
+        await self._ingest("甲|乙|丙", None)
+        await self._ingest("乙|丙", None)
+
+        self.assertEqual(len(self.llm.calls), 1)
+        self.assertEqual(sorted(self.store.chunks), ["p:1:0", "p:1:1"])
+        self.assertEqual(self.store.chunks["p:1:0"]["content"], "乙")
+
+    async def test_model_switch_re_embeds_chunks_and_summary(self) -> None:
+        await self._ingest("甲|乙", "摘要")
+        self.llm.namespace = "ollama:nomic-embed-text:latest"
+
+        # 正文与摘要均未变化，但旧向量来自其他模型，不能复用
+        await self._ingest("甲|乙", None)
+        self.assertEqual(self.llm.calls[1], ["甲", "乙", "摘要"])
+        self.assertEqual(
+            {record["metadata"]["embedding_namespace"] for record in self.store.chunks.values()},
+            {"ollama:nomic-embed-text:latest"},
+        )
+
+        await self._ingest("甲|乙", None)
+        self.assertEqual(len(self.llm.calls), 2)
+
+    async def test_missing_summary_keeps_or_drops_previous_summary(self) -> None:
+        await self._ingest("甲|乙", "摘要")
+        await self._ingest("甲|乙", None)
+        self.assertEqual(self.store.summaries[1]["summary"], "摘要")
+        self.assertEqual(len(self.llm.calls), 1)
+
+        # 正文变化而未提供新摘要，旧摘要向量已过期
+        await self._ingest("甲|丙", None)
+        self.assertNotIn(1, self.store.summaries)
+        self.assertEqual(self.llm.calls[1], ["丙"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+# AIMETA P=章节补丁优化测试|R=补丁定位合并_冲突拒绝_单次调用_失败回退|NR=不调用真实LLM|E=unittest_async|X=internal|A=单元测试|D=unittest|S=none|RD=./README.ai
+import json
+import unittest
+
+from app.services.chapter_optimizer import ChapterOptimizer
+from app.utils.text_patch import TextPatch, apply_patches, number_paragraphs, parse_patches
+
+CHAPTER = "“你来了。”他说。\n\n窗外下着雨。\n\n她没有回答，只是  看着他。\n窗外下着雨。"
+
+
+class TestTextPatch(unittest.TestCase):
+    def test_paragraph_numbering_skips_blank_lines(self) -> None:
+        paragraphs = number_paragraphs(CHAPTER)
+        self.assertEqual([p["index"] for p in paragraphs], [1, 2, 3, 4])
+        self.assertEqual(paragraphs[2]["text"], "她没有回答，只是  看着他。")
+
+    def test_patches_are_scoped_to_paragraph_and_merged(self) -> None:
+        result = apply_patches(
+            CHAPTER,
+            [
+                TextPatch(original="窗外下着雨。", replacement="雨敲着窗。", paragraph=4),
+                TextPatch(original="“你来了。”他说。", replacement="“来了？”他没抬头。", paragraph=1),
+                TextPatch(original="只是看着他。", replacement="只是盯着他。", paragraph=3),
+            ],
+        )
+        self.assertEqual(len(result.applied), 3)
+        self.assertEqual(
+            result.content,
+            "“来了？”他没抬头。\n\n窗外下着雨。\n\n她没有回答，只是盯着他。\n雨敲着窗。",
+        )
+
+    def test_ambiguous_missing_and_overlapping_patches_are_rejected(self) -> None:
+        result = apply_patches(
+            CHAPTER,
+            [
+                TextPatch(original="窗外下着雨。", replacement="x"),
+                TextPatch(original="完全不存在的句子", replacement="x", paragraph=2),
+                TextPatch(original="他说。", replacement="他低声说。", paragraph=1),
+                TextPatch(original="“你来了。”他说", replacement="y", paragraph=1),
+            ],
+        )
+        self.assertEqual([reason for _, reason in result.rejected], ["not_found", "not_found", "overlap"])
+        self.assertTrue(result.content.startswith("“你来了。”他低声说。"))
+
+    def test_parse_patches_ignores_malformed_entries(self) -> None:
+        patches = parse_patches(
+            {"patches": [{"original": "a", "replacement": "b", "paragraph": "2"}, {"original": ""}, "bad"]}
+        )
+        self.assertEqual([(p.original, p.paragraph) for p in patches], [("a", 2)])
+
+
+class _FakePrompts:
+    def __init__(self, names):
+        self.names = set(names)
+
+    async def get_prompt(self, name):
+        return f"prompt:{name}" if name in self.names else None
+
+
+class _FakeLLM:
+    def __init__(self, patch_response):
+        self.patch_response = patch_response
+        self.calls = []
+
+    async def get_llm_response(self, system_prompt, conversation_history, **kwargs):
+        self.calls.append(system_prompt)
+        if system_prompt == "prompt:optimize_patch":
+            return self.patch_response
+        payload = json.loads(conversation_history[0]["content"])
+        return json.dumps(
+            {"optimized_content": payload["original_content"] + "+" + system_prompt[-6:], "optimization_notes": "ok"}
+        )
+
+
+ALL_PROMPTS = [
+    "optimize_patch",
+    "optimize_dialogue",
+    "optimize_environment",
+    "optimize_psychology",
+    "optimize_rhythm",
+]
+
+
+class TestChapterOptimizer(unittest.IsolatedAsyncioTestCase):
+    async def test_patch_mode_uses_single_call(self) -> None:
+        llm = _FakeLLM(
+            "```json\n"
+            + json.dumps(
+                {
+                    "patches": [{"paragraph": 2, "original": "窗外下着雨。", "replacement": "雨下大了。"}],
+                    "optimization_notes": "改了环境",
+                },
+                ensure_ascii=False,
+            )
+            + "\n```"
+        )
+        result = await ChapterOptimizer(llm, _FakePrompts(ALL_PROMPTS)).optimize(CHAPTER, user_id=1, mode="patch")
+
+        self.assertEqual(len(llm.calls), 1)
+        self.assertEqual(result.mode, "patch")
+        self.assertIn("\n\n雨下大了。\n\n", result.content)
+        self.assertEqual(result.report()["patches_applied"], 1)
+        self.assertEqual(result.notes, "改了环境")
+
+    async def test_unmatched_patches_fall_back_to_full_passes(self) -> None:
+        llm = _FakeLLM(json.dumps({"patches": [{"paragraph": 1, "original": "不存在", "replacement": "x"}]}))
+        result = await ChapterOptimizer(llm, _FakePrompts(ALL_PROMPTS)).optimize(CHAPTER, user_id=1, mode="patch")
+
+        self.assertEqual(len(llm.calls), 5)
+        self.assertEqual(result.mode, "full")
+        self.assertEqual(result.fallback_reason, "patches_unmatched:1/1")
+        self.assertEqual([step["dimension"] for step in result.steps], ["dialogue", "environment", "psychology", "rhythm"])
+
+    async def test_missing_patch_prompt_falls_back(self) -> None:
+        llm = _FakeLLM("{}")
+        result = await ChapterOptimizer(
+            llm, _FakePrompts(["optimize_dialogue"]), fallback_prompts={"rhythm": "builtin-rhythm"}
+        ).optimize(CHAPTER, user_id=1, dimensions=["dialogue", "rhythm"])
+
+        self.assertEqual(result.fallback_reason, "missing_prompt")
+        self.assertEqual(llm.calls, ["prompt:optimize_dialogue", "builtin-rhythm"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# AIMETA P=角色名索引与只读蓝图测试|R=单遍命中语义_修订号缓存_只读视图_护栏结果一致|NR=不依赖外部服务|E=unittest|X=internal|A=单元测试|D=unittest|S=memory|RD=./README.ai
+import copy
+import json
+import re
+import unittest
+
+from app.services.blueprint_index_cache import BlueprintIndexCache
+from app.services.chapter_guardrails import ChapterGuardrails
+from app.services.writer_context_builder import WriterContextBuilder
+from app.utils.frozen import ReadOnlyDict, freeze
+from app.utils.name_index import CharacterNameIndex
+
+NAMES = ["张三", "张三丰", "哈哈", "李四", "a.b"]
+TEXT = "张三丰看见张三。哈哈哈哈，李四笑道。a.b 与 axb 不同。张三丰又来了。"
+
+
+def _legacy_hits(text, names):
+    return [(name, m.start()) for name in names if name for m in re.finditer(re.escape(name), text)]
+
+
+def _blueprint():
+    return {
+        "title": "测试",
+        "full_synopsis": "剧透",
+        "characters": [{"name": "张三"}, {"name": "李四"}, {"name": "王五"}],
+        "relationships": [
+            {"from": "张三", "to": "李四"},
+            {"from": "张三", "to": "王五"},
+        ],
+    }
+
+
+class TestCharacterNameIndex(unittest.TestCase):
+    def test_hits_match_per_name_finditer_on_both_backends(self) -> None:
+        expected = _legacy_hits(TEXT, NAMES)
+        for use_automaton in (True, False):
+            index = CharacterNameIndex(NAMES, use_automaton=use_automaton)
+            hits = [(hit.name, hit.start) for hit in index.find_all(TEXT)]
+            self.assertEqual(hits, expected, index.backend)
+            subset = [(hit.name, hit.start) for hit in index.find_all(TEXT, ["李四", "赵六", "哈哈"])]
+            self.assertEqual(subset, _legacy_hits(TEXT, ["李四", "赵六", "哈哈"]))
+            self.assertEqual(index.detect(["", "李四来了", None, "张三"]), {"李四", "张三"})
+
+    def test_unindexed_names_are_found_by_direct_search(self) -> None:
+        index = CharacterNameIndex(["张三"])
+        hits = index.find_all("王五和王五", ["王五"])
+        self.assertEqual([(hit.name, hit.start, hit.end) for hit in hits], [("王五", 0, 2), ("王五", 3, 5)])
+
+
+class TestFrozenBlueprint(unittest.TestCase):
+    def test_frozen_view_rejects_writes_and_serializes(self) -> None:
+        view = freeze(_blueprint())
+        self.assertIsInstance(view, ReadOnlyDict)
+        with self.assertRaises(TypeError):
+            view["title"] = "x"
+        with self.assertRaises(TypeError):
+            view["characters"][0]["name"] = "x"
+        self.assertIs(freeze(view), view)
+        self.assertIs(copy.deepcopy(view), view)
+        self.assertEqual(json.loads(json.dumps(view)), _blueprint())
+
+    def test_visibility_context_trims_without_touching_source(self) -> None:
+        source = freeze(_blueprint())
+        context = WriterContextBuilder().build_visibility_context(
+            blueprint=source,
+            completed_summaries=["张三出场"],
+            previous_tail="",
+            outline_title="",
+            outline_summary="李四登场",
+            writing_notes="",
+        )
+        writer_blueprint = context["writer_blueprint"]
+        self.assertNotIn("full_synopsis", writer_blueprint)
+        self.assertEqual([c["name"] for c in writer_blueprint["characters"]], ["张三", "李四"])
+        self.assertEqual(len(writer_blueprint["relationships"]), 1)
+        self.assertEqual(context["forbidden_characters"], ["王五"])
+        self.assertIs(writer_blueprint["characters"][0], source["characters"][0])
+        self.assertEqual(json.loads(json.dumps(source)), _blueprint())
+
+
+class TestBlueprintIndexCache(unittest.TestCase):
+    def test_cached_by_revision_and_index_reused_when_names_unchanged(self) -> None:
+        cache = BlueprintIndexCache(max_projects=1)
+        builds = []
+
+        def build(title="测试"):
+            builds.append(title)
+            blueprint = _blueprint()
+            blueprint["title"] = title
+            return blueprint
+
+        first = cache.get("p1", 1, build)
+        self.assertIs(cache.get("p1", 1, build), first)
+        second = cache.get("p1", 2, lambda: build("改名"))
+        self.assertEqual(second.blueprint["title"], "改名")
+        self.assertIs(second.name_index, first.name_index)
+        self.assertEqual(second.character_names, ("张三", "李四", "王五"))
+        cache.get("p2", 1, build)
+        cache.get("p1", 2, build)
+        self.assertEqual(len(builds), 4)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["index_builds"], 3)
+
+
+class TestGuardrailsWithIndex(unittest.TestCase):
+    def test_violations_match_with_and_without_shared_index(self) -> None:
+        guardrails = ChapterGuardrails()
+        text = "王五推门而入。与此同时，陌生的赵六走来，赵六笑了。"
+        shared = CharacterNameIndex(["张三", "李四", "王五"])
+        with_index = guardrails.check(text, ["王五"], ["赵六", "钱七"], name_index=shared)
+        without_index = guardrails.check(text, ["王五"], ["赵六", "钱七"])
+        self.assertEqual(
+            [(v.type, v.position) for v in with_index.violations],
+            [(v.type, v.position) for v in without_index.violations],
+        )
+        self.assertEqual(
+            [(v.type, v.position) for v in with_index.violations],
+            [("forbidden_name", 0), ("omniscient_cue", 7)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
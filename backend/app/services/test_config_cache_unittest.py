@@ -0,0 +1,117 @@
+# AIMETA P=配置缓存测试|R=TTL过期_命中统计_写后失效|NR=不依赖外部服务|E=unittest_async|X=internal|A=单元测试|D=unittest,sqlalchemy,aiosqlite|S=db,memory|RD=./README.ai
+import unittest
+from unittest import mock
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import LLMConfig, SystemConfig, User
+from app.schemas.config import SystemConfigCreate, SystemConfigUpdate
+from app.schemas.llm_config import LLMConfigCreate
+from app.services import config_cache
+from app.services.config_cache import TTLCache, get_active_llm_config, get_system_config_value
+from app.services.config_service import ConfigService
+from app.services.llm_config_service import LLMConfigService
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_entries_expire_after_ttl(self) -> None:
+        clock = _Clock()
+        cache = TTLCache(10, clock=clock)
+        cache.set("k", None)
+        self.assertEqual(cache.get("k"), (True, None))
+        clock.now = 10.0
+        self.assertEqual(cache.get("k"), (False, None))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_zero_ttl_disables_caching(self) -> None:
+        cache = TTLCache(0)
+        cache.set("k", "v")
+        self.assertEqual(cache.get("k"), (False, None))
+
+
+class TestConfigCacheLookups(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(
+                Base.metadata.create_all,
+                tables=[User.__table__, SystemConfig.__table__, LLMConfig.__table__],
+            )
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.session_factory() as session:
+            session.add(User(id=1, username="u", hashed_password="x"))
+            session.add(SystemConfig(key="writer.chapter_versions", value="3"))
+            await session.commit()
+        patcher = mock.patch.object(config_cache, "_CONFIG_CACHE", TTLCache(60))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.statements = []
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self._record)
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    async def test_system_config_hit_issues_no_query(self) -> None:
+        async with self.session_factory() as session:
+            self.assertEqual(await get_system_config_value(session, "writer.chapter_versions"), "3")
+            self.assertIsNone(await get_system_config_value(session, "missing"))
+            queries = len(self.statements)
+            self.assertEqual(await get_system_config_value(session, "writer.chapter_versions"), "3")
+            self.assertIsNone(await get_system_config_value(session, "missing"))
+            self.assertEqual(len(self.statements), queries)
+        stats = config_cache.config_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 2))
+
+    async def test_config_service_writes_invalidate(self) -> None:
+        async with self.session_factory() as session:
+            service = ConfigService(session)
+            await get_system_config_value(session, "writer.chapter_versions")
+            await service.patch_config("writer.chapter_versions", SystemConfigUpdate(value="5"))
+            self.assertEqual(await get_system_config_value(session, "writer.chapter_versions"), "5")
+
+            await get_system_config_value(session, "new.key")
+            await service.upsert_config(SystemConfigCreate(key="new.key", value="v"))
+            self.assertEqual(await get_system_config_value(session, "new.key"), "v")
+
+            await service.remove_config("new.key")
+            self.assertIsNone(await get_system_config_value(session, "new.key"))
+
+    async def test_llm_config_service_writes_invalidate(self) -> None:
+        async with self.session_factory() as session:
+            service = LLMConfigService(session)
+            self.assertIsNone(await get_active_llm_config(session, 1))
+
+            first = await service.create_config(
+                1, LLMConfigCreate(name="a", llm_provider_api_key="k1", llm_provider_model="m1")
+            )
+            self.assertEqual((await get_active_llm_config(session, 1))["model"], "m1")
+
+            second = await service.create_config(
+                1, LLMConfigCreate(name="b", llm_provider_api_key="k2", llm_provider_model="m2")
+            )
+            await service.activate_config(1, second.id)
+            self.assertEqual((await get_active_llm_config(session, 1))["api_key"], "k2")
+
+            await service.delete_config(1, second.id)
+            self.assertEqual((await get_active_llm_config(session, 1))["model"], "m1")
+            await service.delete_config(1, first.id)
+            self.assertIsNone(await get_active_llm_config(session, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+# AIMETA P=嵌入向量缓存测试|R=LRU内存层_磁盘持久化_容量淘汰_命中统计|NR=不依赖外部服务|E=unittest_async|X=internal|A=单元测试|D=unittest,sqlite3|S=fs|RD=./README.ai
+import os
+import tempfile
+import unittest
+
+from app.services.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmpdir.name, "cache.db")
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    async def test_memory_then_disk_hits_across_instances(self) -> None:
+        cache = EmbeddingCache(memory_entries=10, disk_path=self.path, max_disk_bytes=1 << 20)
+        await cache.put_many("openai:m", ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+
+        self.assertEqual(await cache.get_many("openai:m", ["a", "x"]), [[1.0, 2.0], None])
+        self.assertIsNone(await cache.get("openai:other", "a"))
+
+        reopened = EmbeddingCache(memory_entries=10, disk_path=self.path, max_disk_bytes=1 << 20)
+        self.assertEqual(await reopened.get("openai:m", "b"), [3.0, 4.0])
+        self.assertEqual(await reopened.get("openai:m", "b"), [3.0, 4.0])
+        stats = reopened.stats()
+        self.assertEqual(stats["disk_hits"], 1)
+        self.assertEqual(stats["memory_hits"], 1)
+
+    async def test_memory_tier_is_lru_bounded(self) -> None:
+        cache = EmbeddingCache(memory_entries=2, disk_path=None, max_disk_bytes=0)
+        await cache.put_many("ns", ["a", "b"], [[1.0], [2.0]])
+        await cache.get("ns", "a")
+        await cache.put("ns", "c", [3.0])
+
+        self.assertEqual(await cache.get_many("ns", ["a", "b", "c"]), [[1.0], None, [3.0]])
+        self.assertEqual(cache.stats()["memory_entries"], 2)
+
+    async def test_disk_tier_evicts_least_recently_used_by_size(self) -> None:
+        vector = [0.5] * 64  # 256 bytes
+        cache = EmbeddingCache(memory_entries=0, disk_path=self.path, max_disk_bytes=1024)
+        for idx in range(4):
+            await cache.put("ns", f"t{idx}", vector)
+        await cache.get("ns", "t0")
+        await cache.put("ns", "t4", vector)
+
+        stats = cache.stats()
+        self.assertLessEqual(stats["disk_bytes"], 1024)
+        self.assertGreater(stats["evictions"], 0)
+        self.assertIsNotNone(await cache.get("ns", "t0"))
+        self.assertIsNone(await cache.get("ns", "t1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
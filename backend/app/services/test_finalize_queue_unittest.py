@@ -0,0 +1,119 @@
+# AIMETA P=定稿任务队列测试|R=项目串行领取_退避重试_超时回收_启动回收退出进程任务|NR=不调用LLM|E=unittest_async|X=internal|A=单元测试|D=unittest,sqlalchemy,aiosqlite|S=db|RD=./README.ai
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import FinalizeJob
+from app.repositories.finalize_job_repository import FinalizeJobRepository, utcnow
+from app.services.finalize_queue import FinalizeJobQueue, default_worker_id, retry_delay_seconds
+
+
+class TestFinalizeJobQueue(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[FinalizeJob.__table__])
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+
+    async def _enqueue(self, project_id: str, chapter_number: int) -> FinalizeJob:
+        async with self.session_factory() as session:
+            job = await FinalizeJobRepository(session).enqueue(
+                project_id=project_id,
+                chapter_number=chapter_number,
+                selected_version_id=chapter_number,
+                user_id=1,
+                skip_vector_update=False,
+                max_attempts=3,
+            )
+            await session.commit()
+            return job
+
+    async def test_claim_serializes_jobs_of_same_project(self) -> None:
+        first = await self._enqueue("p1", 1)
+        await self._enqueue("p1", 2)
+        other = await self._enqueue("p2", 1)
+
+        async with self.session_factory() as session:
+            repo = FinalizeJobRepository(session)
+            claimed = await repo.claim_next(worker_id="w1")
+            self.assertEqual(claimed.id, first.id)
+            self.assertEqual(claimed.attempts, 1)
+            # p1 已有任务在运行，下一个只能领取 p2
+            second = await repo.claim_next(worker_id="w2")
+            self.assertEqual(second.id, other.id)
+            self.assertIsNone(await repo.claim_next(worker_id="w3"))
+
+            await repo.mark_succeeded(first.id, {"success": True})
+            follow_up = await repo.claim_next(worker_id="w1")
+            self.assertEqual((follow_up.project_id, follow_up.chapter_number), ("p1", 2))
+
+    async def test_failed_job_waits_for_backoff_then_fails_permanently(self) -> None:
+        job = await self._enqueue("p1", 1)
+
+        async with self.session_factory() as session:
+            repo = FinalizeJobRepository(session)
+            await repo.claim_next(worker_id="w1")
+            status = await repo.mark_failed(job.id, "llm down", retry_delay=60)
+            self.assertEqual(status, "queued")
+            self.assertIsNone(await repo.claim_next(worker_id="w1"))
+
+            refreshed = await repo.get_by_id(job.id)
+            refreshed.next_run_at = utcnow() - timedelta(seconds=1)
+            await session.commit()
+            claimed = await repo.claim_next(worker_id="w1")
+            self.assertEqual(claimed.attempts, 2)
+
+            status = await repo.mark_failed(job.id, "llm down", retry_delay=None)
+            self.assertEqual(status, "failed")
+            self.assertEqual((await repo.get_by_id(job.id)).last_error, "llm down")
+
+    async def test_stale_running_job_is_requeued(self) -> None:
+        job = await self._enqueue("p1", 1)
+
+        async with self.session_factory() as session:
+            repo = FinalizeJobRepository(session)
+            await repo.claim_next(worker_id="w1")
+            claimed = await repo.get_by_id(job.id)
+            claimed.started_at = utcnow() - timedelta(hours=1)
+            await session.commit()
+
+            self.assertEqual(await repo.requeue_stale(stale_after_seconds=60), 1)
+            self.assertEqual((await repo.get_by_id(job.id)).status, "queued")
+
+    async def test_start_requeues_jobs_of_exited_local_worker(self) -> None:
+        crashed = await self._enqueue("p1", 1)
+        remote = await self._enqueue("p2", 1)
+        async with self.session_factory() as session:
+            repo = FinalizeJobRepository(session)
+            # 同一主机同一进程号重启：任务刚开始运行也应立即回收
+            await repo.try_claim(crashed.id, worker_id=default_worker_id())
+            await repo.try_claim(remote.id, worker_id="other-host:1")
+
+        queue = FinalizeJobQueue(session_factory=self.session_factory, workers=1, poll_interval=60, stale_after=1800)
+        with mock.patch.object(FinalizeJobQueue, "_worker_loop", mock.AsyncMock()):
+            await queue.start()
+            await queue.stop()
+
+        async with self.session_factory() as session:
+            repo = FinalizeJobRepository(session)
+            requeued = await repo.get_by_id(crashed.id)
+            self.assertEqual((requeued.status, requeued.worker_id), ("queued", None))
+            self.assertEqual((await repo.get_by_id(remote.id)).status, "running")
+            # p1 不再被占用，后续任务可以领取
+            self.assertEqual((await repo.claim_next(worker_id="w1")).id, crashed.id)
+
+    def test_retry_delay_grows_exponentially_with_cap(self) -> None:
+        delays = [retry_delay_seconds(attempt) for attempt in range(1, 12)]
+        self.assertEqual(delays, sorted(delays))
+        self.assertLess(delays[0], delays[1])
+        self.assertLessEqual(delays[-1], 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+# AIMETA P=章节生成事件流测试|R=token合并_阶段顺序_错误事件_断开取消_LLM增量转发|NR=不调用真实LLM|E=unittest_async|X=internal|A=单元测试|D=unittest|S=none|RD=./README.ai
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import httpx
+from fastapi import HTTPException
+
+from app.services.generation_events import GenerationEventStream, stream_generation
+from app.services.llm_service import LLMService
+
+
+def _parse(chunks):
+    events = []
+    for chunk in chunks:
+        if chunk.startswith(":"):
+            events.append(("ping", None))
+            continue
+        event_line, data_line = chunk.strip().split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+async def _collect(generator):
+    return [chunk async for chunk in generator]
+
+
+class TestStreamGeneration(unittest.IsolatedAsyncioTestCase):
+    async def test_stages_tokens_and_result_in_order(self) -> None:
+        async def run(events: GenerationEventStream):
+            events.stage("mission", "start")
+            sink = events.token_sink(0)
+            for text in ("第一", "句", "。"):
+                sink.write(text)
+            events.token_sink(1).write("另一版")
+            sink.write("续写")
+            events.stage("persist", "done")
+            return {"ok": True}
+
+        events = _parse(await _collect(stream_generation(run)))
+        self.assertEqual(
+            events,
+            [
+                ("stage", {"stage": "mission", "status": "start"}),
+                ("token", {"version": 0, "text": "第一句。"}),
+                ("token", {"version": 1, "text": "另一版"}),
+                ("token", {"version": 0, "text": "续写"}),
+                ("stage", {"stage": "persist", "status": "done"}),
+                ("result", {"ok": True}),
+            ],
+        )
+
+    async def test_failure_becomes_error_event_and_triggers_abort(self) -> None:
+        aborted = []
+
+        async def run(events: GenerationEventStream):
+            events.stage("mission", "start")
+            raise HTTPException(status_code=404, detail="蓝图中未找到对应章节纲要")
+
+        async def on_abort():
+            aborted.append(True)
+
+        events = _parse(await _collect(stream_generation(run, on_abort=on_abort)))
+        self.assertEqual(events[-1], ("error", {"status_code": 404, "detail": "蓝图中未找到对应章节纲要"}))
+        self.assertEqual(aborted, [True])
+
+    async def test_disconnect_cancels_generation(self) -> None:
+        cancelled = asyncio.Event()
+        aborted = []
+
+        async def run(events: GenerationEventStream):
+            events.stage("version", "start", index=0)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        disconnected = iter([False, True])
+
+        async def is_disconnected():
+            return next(disconnected)
+
+        async def on_abort():
+            aborted.append(True)
+
+        chunks = await _collect(
+            stream_generation(run, is_disconnected=is_disconnected, heartbeat_seconds=0.01, on_abort=on_abort)
+        )
+        self.assertEqual(
+            _parse(chunks),
+            [("stage", {"stage": "version", "status": "start", "index": 0}), ("ping", None)],
+        )
+        self.assertTrue(cancelled.is_set())
+        self.assertEqual(aborted, [True])
+
+
+class _FlakyClient:
+    base_url = None
+
+    def __init__(self):
+        self.calls = 0
+
+    async def stream_chat(self, **kwargs):
+        self.calls += 1
+        yield {"content": "半"}
+        if self.calls == 1:
+            raise httpx.RemoteProtocolError("断开")
+        yield {"content": "章", "finish_reason": "stop"}
+
+
+class TestLLMTokenSink(unittest.IsolatedAsyncioTestCase):
+    async def test_stream_forwards_tokens_and_resets_on_retry(self) -> None:
+        service = LLMService(None)
+        service.usage_service = mock.Mock(increment=mock.AsyncMock())
+        client = _FlakyClient()
+        events = GenerationEventStream()
+        config = {"api_key": "k", "model": "m", "api_format": "openai"}
+        with mock.patch.object(service, "_resolve_llm_config", mock.AsyncMock(return_value=config)), mock.patch(
+            "app.services.llm_service.create_llm_client", return_value=client
+        ), mock.patch("app.services.llm_service.settings.llm_stream_max_retries", 1):
+            result = await service.get_llm_response(
+                "系统", [{"role": "user", "content": "写"}], token_sink=events.token_sink(2)
+            )
+            plain = await service.get_llm_response("系统", [{"role": "user", "content": "写"}])
+
+        self.assertEqual(result, "半章")
+        self.assertEqual(plain, "半章")
+        received = []
+        events.close()
+        while (item := await events.next_event(0.01)) is not None:
+            received.append(item)
+        self.assertEqual(
+            received,
+            [
+                ("token", {"version": 2, "text": "半"}),
+                ("version_reset", {"version": 2}),
+                ("token", {"version": 2, "text": "半章"}),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
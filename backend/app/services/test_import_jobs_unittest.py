@@ -0,0 +1,180 @@
+# AIMETA P=小说导入任务测试|R=阶段进度顺序_成功结果_写入中取消删除项目_分析中取消_中断回收删除项目|NR=不调用真实LLM|E=unittest_async|X=internal|A=单元测试|D=unittest,sqlalchemy,aiosqlite|S=db,tmpfile|RD=./README.ai
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from fastapi import UploadFile
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401 - 注册全部模型供 create_all 使用
+from app.db.base import Base
+from app.models import Chapter, ImportJob, NovelProject
+from app.repositories.finalize_job_repository import utcnow
+from app.repositories.import_job_repository import ImportJobRepository
+from app.schemas.novel import Blueprint
+from app.services import import_jobs
+from app.services.finalize_queue import default_worker_id
+from app.services.import_jobs import ImportJobManager
+from app.services.import_service import ImportService
+
+TEXT = "第一章 开端\n张三出场。\n第二章 发展\n李四出场。\n第三章 结局\n完。\n"
+
+
+class TestImportJobs(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        # 任务执行与心跳并发使用多个会话，使用文件库避免共享同一个内存连接
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{self.db_path}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.manager = ImportJobManager(session_factory=self.session_factory, concurrency=1, stale_after=60)
+
+        self.stages = []
+        self.cancel_on_persist_progress = False
+        original = ImportJobRepository.report_progress
+        test = self
+
+        async def recording_report(repo, job_id, *, stage, done, total):
+            test.stages.append((stage, done, total))
+            if test.cancel_on_persist_progress and stage == "persist" and done > 0:
+                # 模拟另一个进程在章节写入中途收到取消请求
+                await repo.session.execute(update(ImportJob).where(ImportJob.id == job_id).values(cancel_requested=True))
+            return await original(repo, job_id, stage=stage, done=done, total=total)
+
+        self.blueprint = mock.AsyncMock(return_value=Blueprint(title="导入测试"))
+        patches = [
+            mock.patch.object(ImportJobRepository, "report_progress", recording_report),
+            mock.patch.object(ImportService, "_filter_characters_only", mock.AsyncMock(return_value=[])),
+            mock.patch.object(ImportService, "_analyze_content", self.blueprint),
+            mock.patch.object(import_jobs, "schedule_summary_backfill", mock.Mock(return_value=True)),
+            mock.patch.object(import_jobs, "_PROGRESS_MIN_INTERVAL", 0),
+            mock.patch.object(import_jobs.settings, "import_bulk_batch_size", 1),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self) -> None:
+        await self.manager.shutdown()
+        await self.engine.dispose()
+        os.remove(self.db_path)
+
+    async def _submit(self) -> ImportJob:
+        upload = UploadFile(io.BytesIO(TEXT.encode("utf-8")), filename="小说.txt")
+        job = await self.manager.submit(1, upload)
+        # 请求结束后上传文件会被关闭，任务只读取自己的临时副本
+        await upload.close()
+        return job
+
+    async def _count(self, model) -> int:
+        async with self.session_factory() as session:
+            return (await session.execute(select(func.count()).select_from(model))).scalar_one()
+
+    async def test_job_reports_stages_and_result(self) -> None:
+        job = await self._submit()
+        self.assertEqual((job.status, job.file_size), ("queued", len(TEXT.encode("utf-8"))))
+        await self.manager.wait(job.id)
+
+        finished = await self.manager.get(job.id, 1)
+        self.assertEqual(finished.status, "succeeded")
+        self.assertEqual(finished.stage, "ingest")
+        self.assertEqual(finished.result, {"project_id": finished.project_id, "chapters": 3, "summary_backfill": True})
+        self.assertEqual(
+            self.stages,
+            [
+                ("parse", 0, 0),
+                ("census", 0, 0),
+                ("profiling", 0, 0),
+                ("persist", 0, 3),
+                ("persist", 1, 3),
+                ("persist", 2, 3),
+                ("persist", 3, 3),
+                ("ingest", 0, 0),
+            ],
+        )
+        self.assertEqual(await self._count(Chapter), 3)
+        self.assertIsNone(await self.manager.get(job.id, 2))
+
+    async def test_cancel_during_persist_removes_project(self) -> None:
+        self.cancel_on_persist_progress = True
+        job = await self._submit()
+        await self.manager.wait(job.id)
+
+        finished = await self.manager.get(job.id, 1)
+        self.assertEqual(finished.status, "cancelled")
+        self.assertIsNone(finished.project_id)
+        self.assertEqual(self.stages[-1], ("persist", 1, 3))
+        self.assertEqual(await self._count(NovelProject), 0)
+        self.assertEqual(await self._count(Chapter), 0)
+
+    async def test_cancel_interrupts_running_analysis(self) -> None:
+        started = asyncio.Event()
+
+        async def slow_analysis(*args, **kwargs):
+            started.set()
+            await asyncio.sleep(60)
+
+        self.blueprint.side_effect = slow_analysis
+        job = await self._submit()
+        await asyncio.wait_for(started.wait(), timeout=5)
+
+        cancelled = await self.manager.cancel(job.id, 1)
+        self.assertTrue(cancelled.cancel_requested)
+        await asyncio.wait_for(self.manager.wait(job.id), timeout=5)
+
+        finished = await self.manager.get(job.id, 1)
+        self.assertEqual((finished.status, finished.stage), ("cancelled", "profiling"))
+        self.assertEqual(await self._count(NovelProject), 0)
+
+    async def test_recover_fails_orphaned_jobs_and_deletes_partial_projects(self) -> None:
+        fresh, stale = utcnow(), utcnow() - timedelta(seconds=120)
+        async with self.session_factory() as session:
+            session.add(NovelProject(id="partial", user_id=1, title="半成品", initial_prompt=""))
+            session.add_all(
+                [
+                    # 本机进程重启：进程号相同但任务不在本进程中，即使心跳未超时也立即回收
+                    ImportJob(id="crashed", user_id=1, filename="a.txt", status="running",
+                              worker_id=default_worker_id(), project_id="partial", heartbeat_at=fresh),
+                    ImportJob(id="remote-alive", user_id=1, filename="b.txt", status="running",
+                              worker_id="other-host:1", heartbeat_at=fresh),
+                    ImportJob(id="remote-stale", user_id=1, filename="c.txt", status="queued",
+                              worker_id="other-host:2", heartbeat_at=stale),
+                ]
+            )
+            await session.commit()
+
+        self.assertEqual(await self.manager.recover_interrupted(), 2)
+        statuses = {}
+        for job_id in ("crashed", "remote-alive", "remote-stale"):
+            job = await self.manager.get(job_id, 1)
+            statuses[job_id] = (job.status, job.project_id)
+        self.assertEqual(
+            statuses,
+            {"crashed": ("failed", None), "remote-alive": ("running", None), "remote-stale": ("failed", None)},
+        )
+        self.assertEqual(await self._count(NovelProject), 0)
+
+    async def test_project_id_recorded_before_chapters_are_written(self) -> None:
+        recorded = []
+        original = ImportJobRepository.set_project
+
+        async def recording_set_project(repo, job_id, project_id):
+            recorded.append(await self._count(Chapter))
+            return await original(repo, job_id, project_id)
+
+        with mock.patch.object(ImportJobRepository, "set_project", recording_set_project):
+            job = await self._submit()
+            await self.manager.wait(job.id)
+        finished = await self.manager.get(job.id, 1)
+        self.assertEqual((finished.status, recorded), ("succeeded", [0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# AIMETA P=关键词匹配器测试|R=计数与str.count一致_分析器结果不变|NR=不依赖外部服务|E=unittest|X=internal|A=单元测试|D=unittest|S=none|RD=./README.ai
+import random
+import unittest
+
+from app.services.emotion_analyzer_enhanced import EnhancedEmotionAnalyzer, analyze_multidimensional_emotion
+from app.utils.emotion_analyzer import EMOTION_KEYWORDS, NARRATIVE_PHASE_KEYWORDS, analyze_chapter_emotion
+from app.utils.keyword_matcher import KeywordMatcher
+
+
+FAMILIES = {
+    "pace": ["慢慢", "悠悠", "快速", "冲"],
+    "joy": ["笑", "微笑", "笑容", "开心"],
+    "shared": ["笑", "开始"],
+    "phase": ["开始", "始终"],
+}
+
+
+def _random_text(seed: int, length: int = 4000) -> str:
+    rng = random.Random(seed)
+    tokens = [word for words in FAMILIES.values() for word in words] + list("慢悠笑微容的了他在开始终")
+    return "".join(rng.choice(tokens) for _ in range(length))
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    def test_counts_match_str_count_for_every_backend(self) -> None:
+        text = "慢慢慢慢慢" + _random_text(1)
+        summary = _random_text(2, 200)
+        for use_automaton in (True, False):
+            matcher = KeywordMatcher(FAMILIES, use_automaton=use_automaton)
+            counts = matcher.scan(text, summary)
+            combined = text + " " + summary
+            for name, words in FAMILIES.items():
+                self.assertEqual(counts.total(name), sum(combined.count(word) for word in words), (matcher.backend, name))
+                self.assertEqual(counts.distinct(name), sum(1 for word in words if word in combined))
+
+    def test_empty_text(self) -> None:
+        counts = KeywordMatcher(FAMILIES).scan("", "")
+        self.assertEqual(counts.total("joy"), 0)
+        self.assertEqual(counts.count("笑"), 0)
+
+
+class TestAnalyzersUseSinglePass(unittest.TestCase):
+    def test_basic_analyzer_matches_per_keyword_scoring(self) -> None:
+        content = "他开心地笑了，露出笑容！！！然而危机突然出现，最终他们胜利了。"
+        summary = "主角终于反击"
+        combined = content + " " + summary
+
+        scores = {emotion: sum(combined.count(k) for k in words) for emotion, words in EMOTION_KEYWORDS.items()}
+        expected_emotion = max(scores, key=scores.get)
+        expected_intensity = min(10, max(1, scores[expected_emotion]) + (combined.count("！") + combined.count("!")) // 3)
+        phases = {phase: sum(1 for k in words if k in combined) for phase, words in NARRATIVE_PHASE_KEYWORDS.items()}
+
+        emotion, intensity, phase = analyze_chapter_emotion(content, summary)
+        self.assertEqual((emotion, intensity), (expected_emotion, expected_intensity))
+        self.assertEqual(phase, max(phases, key=phases.get))
+
+    def test_enhanced_analyzer_scores_from_single_scan(self) -> None:
+        content = "他突然愣住，震惊地瞪大眼睛。原来真相如此，其实秘密早已揭露。" * 20
+        result = analyze_multidimensional_emotion(content, "转折", chapter_number=5)
+
+        analyzer = EnhancedEmotionAnalyzer()
+        text = content + " 转折"
+        surprise = analyzer.emotion_keywords[next(e for e in analyzer.emotion_keywords if e.value == "surprise")]
+        raw = sum(text.count(k) for k in surprise["positive"]) * 2.0 * 0.8
+        raw += sum(text.count(k) for k in surprise["actions"]) * 1.5 * 0.8
+        expected = round(min(10.0, (raw / max(len(text) / 1000, 1)) * 10), 2)
+
+        self.assertAlmostEqual(result["raw_scores"]["surprise"], expected, places=2)
+        self.assertTrue(result["is_turning_point"])
+        self.assertEqual(result["turning_point_type"], "emotional_shift")
+
+
+if __name__ == "__main__":
+    unittest.main()
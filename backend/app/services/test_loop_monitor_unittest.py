@@ -0,0 +1,47 @@
+# AIMETA P=事件循环阻塞监控测试|R=同步阻塞告警_阻塞栈捕获_异步等待不误报|NR=不依赖外部服务|E=unittest_async|X=internal|A=单元测试|D=unittest|S=memory|RD=./README.ai
+import asyncio
+import time
+import unittest
+
+from app.services.loop_monitor import LoopLagMonitor
+
+
+def _blocking_sync_call() -> None:
+    time.sleep(0.25)
+
+
+class TestLoopLagMonitor(unittest.IsolatedAsyncioTestCase):
+    async def test_blocking_call_is_flagged_with_stack(self) -> None:
+        monitor = LoopLagMonitor(80, interval=0.02)
+        await monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            with self.assertLogs("app.services.loop_monitor", level="WARNING") as logs:
+                _blocking_sync_call()
+                await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+        stats = monitor.stats()
+        self.assertFalse(stats["running"])
+        self.assertGreaterEqual(stats["slow_count"], 1)
+        self.assertGreaterEqual(stats["max_lag_ms"], 150)
+        self.assertTrue(any("_blocking_sync_call" in line for line in stats["last_stall_stack"]))
+        self.assertTrue(any("_blocking_sync_call" in message for message in logs.output))
+
+    async def test_awaiting_does_not_count_as_lag(self) -> None:
+        monitor = LoopLagMonitor(200, interval=0.02)
+        await monitor.start()
+        try:
+            await asyncio.gather(*(asyncio.sleep(0.1) for _ in range(20)))
+        finally:
+            await monitor.stop()
+
+        stats = monitor.stats()
+        self.assertGreater(stats["samples"], 0)
+        self.assertEqual(stats["slow_count"], 0)
+        self.assertEqual(stats["last_stall_stack"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
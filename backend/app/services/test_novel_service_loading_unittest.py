@@ -0,0 +1,132 @@
+# AIMETA P=项目分层加载测试|R=所有权校验_元数据层级_单章加载_分页与增量|NR=不依赖外部服务|E=unittest_async|X=internal|A=单元测试|D=unittest,sqlalchemy,aiosqlite|S=db|RD=./README.ai
+import unittest
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models.novel import Chapter, ChapterEvaluation, ChapterOutline, ChapterVersion, NovelProject
+from app.repositories.novel_repository import NovelRepository, ProjectLoad
+from app.schemas.novel import NovelSectionType
+from app.services.novel_service import NovelService
+
+
+class TestNovelServiceLoading(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        await self._seed(5)
+        self.statements = []
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self._record)
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    async def _seed(self, chapter_count: int) -> None:
+        async with self.session_factory() as session:
+            session.add(NovelProject(id="p1", user_id=1, title="t", initial_prompt=""))
+            for number in range(1, chapter_count + 1):
+                session.add(ChapterOutline(project_id="p1", chapter_number=number, title=f"标题{number}", summary="概要"))
+                chapter = Chapter(project_id="p1", chapter_number=number, status="successful", word_count=number * 10)
+                session.add(chapter)
+                await session.flush()
+                versions = [ChapterVersion(chapter_id=chapter.id, content=f"正文{number}-{i}") for i in range(2)]
+                session.add_all(versions)
+                await session.flush()
+                chapter.selected_version_id = versions[0].id
+                session.add(ChapterEvaluation(chapter_id=chapter.id, version_id=versions[0].id, feedback=f"评审{number}"))
+            await session.commit()
+
+    async def test_owner_check_loads_project_row_only(self) -> None:
+        async with self.session_factory() as session:
+            service = NovelService(session)
+            project = await service.ensure_project_owner("p1", 1, ProjectLoad.OWNER)
+            self.assertEqual(project.title, "t")
+            self.assertEqual(len(self.statements), 1)
+
+            with self.assertRaises(HTTPException) as forbidden:
+                await service.ensure_project_owner("p1", 2, ProjectLoad.OWNER)
+            self.assertEqual(forbidden.exception.status_code, 403)
+            with self.assertRaises(HTTPException) as missing:
+                await service.ensure_project_owner("missing", 1, ProjectLoad.OWNER)
+            self.assertEqual(missing.exception.status_code, 404)
+
+    async def test_metadata_tier_skips_versions_and_content(self) -> None:
+        async with self.session_factory() as session:
+            response = await NovelService(session).get_section_data("p1", 1, NovelSectionType.CHAPTERS)
+
+        chapters = response.data["chapters"]
+        self.assertEqual([c["chapter_number"] for c in chapters], [1, 2, 3, 4, 5])
+        self.assertEqual(chapters[2]["word_count"], 30)
+        self.assertIsNone(chapters[2]["content"])
+        joined = "\n".join(self.statements)
+        self.assertNotIn("chapter_evaluations", joined)
+        self.assertNotIn("chapter_versions.content", joined)
+
+    async def test_metadata_tier_content_raises_unless_requested(self) -> None:
+        async with self.session_factory() as session:
+            project = await NovelRepository(session).get_by_id("p1", ProjectLoad.METADATA)
+            with self.assertRaises(InvalidRequestError):
+                _ = project.chapters[0].selected_version.content
+
+        async with self.session_factory() as session:
+            project = await NovelRepository(session).get_by_id(
+                "p1", ProjectLoad.METADATA, include_selected_content=True
+            )
+            self.assertEqual(project.chapters[0].selected_version.content, "正文1-0")
+
+    async def test_chapter_schema_loads_single_chapter(self) -> None:
+        async with self.session_factory() as session:
+            schema = await NovelService(session).get_chapter_schema("p1", 1, 3)
+
+        self.assertEqual(schema.title, "标题3")
+        self.assertEqual(schema.content, "正文3-0")
+        self.assertEqual(schema.versions, ["正文3-0", "正文3-1"])
+        self.assertEqual(schema.evaluation, "评审3")
+        # 项目行 + 大纲 + 章节 + 版本/评审/选中版本，与项目章节总数无关
+        self.assertLessEqual(len(self.statements), 6)
+
+    async def test_chapter_schema_missing_chapter_is_404(self) -> None:
+        async with self.session_factory() as session:
+            with self.assertRaises(HTTPException) as missing:
+                await NovelService(session).get_chapter_schema("p1", 1, 99)
+        self.assertEqual(missing.exception.status_code, 404)
+
+    async def test_chapter_page_loads_requested_range(self) -> None:
+        async with self.session_factory() as session:
+            page = await NovelService(session).get_chapter_page("p1", 1, start=2, limit=2)
+
+        self.assertEqual([c.chapter_number for c in page.chapters], [2, 3])
+        self.assertEqual((page.total, page.next_start), (5, 4))
+        self.assertIsNone(page.chapters[0].content)
+        self.assertEqual(page.chapters[1].word_count, 30)
+        self.assertNotIn("chapter_evaluations", "\n".join(self.statements))
+
+        async with self.session_factory() as session:
+            last = await NovelService(session).get_chapter_page("p1", 1, start=5, limit=2, include_content=True)
+        self.assertEqual([c.versions for c in last.chapters], [["正文5-0", "正文5-1"]])
+        self.assertIsNone(last.next_start)
+
+    async def test_chapter_delta_reports_changed_and_removed_chapters(self) -> None:
+        async with self.session_factory() as session:
+            service = NovelService(session)
+            chapter = await service.get_or_create_chapter("p1", 2)
+            await service.select_chapter_version(chapter, 1)
+            await service.delete_chapters("p1", [4])
+            delta = await service.get_chapter_delta("p1", [2, 4])
+
+        self.assertEqual(delta.revision, 2)
+        self.assertEqual([c.chapter_number for c in delta.chapters], [2])
+        self.assertEqual(delta.chapters[0].content, "正文2-1")
+        self.assertEqual(delta.removed_chapter_numbers, [4])
+
+
+if __name__ == "__main__":
+    unittest.main()
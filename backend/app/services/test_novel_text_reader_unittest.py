@@ -0,0 +1,106 @@
+# AIMETA P=小说文本流式读取测试|R=分章结果一致_编码探测_角色候选一致_高光片段_分批产出|NR=不调用真实LLM|E=unittest|X=internal|A=单元测试|D=unittest|S=none|RD=./README.ai
+import asyncio
+import codecs
+import io
+import re
+import unittest
+from collections import Counter
+
+from fastapi import HTTPException
+
+from app.services.novel_text_reader import CHARACTER_STOP_WORDS, NovelTextReader
+
+TEXT = (
+    "  前言：张三笑道，此书献给李四。\r\n"
+    "第一章 开端\r\n"
+    "张三笑道：“走吧。”李四点头。\n"
+    "李四：“好。”\n"
+    "\n"
+    "第二章 空章\n"
+    "   \n"
+    "　第三章　远行\n"
+    "张三说完，李四问道：“去哪？”张三冷笑。\n"
+    "Chapter 4 The End\n"
+    "李四叹气。王五说：“结束了。”王五说道。\n"
+)
+
+
+def _legacy_split(content):
+    pattern = r"(^\s*第[0-9零一二三四五六七八九十百千]+[章卷回节].*|^\s*Chapter\s+[0-9]+.*)"
+    parts = re.split(pattern, content, flags=re.MULTILINE)
+    chapters = []
+    if parts[0].strip():
+        chapters.append(("序章", parts[0].strip()))
+    for i in range(1, len(parts), 2):
+        body = parts[i + 1].strip() if i + 1 < len(parts) else ""
+        if body:
+            chapters.append((parts[i].strip(), body))
+    return chapters
+
+
+def _legacy_candidates(content, top_n):
+    verbs = r"(?:说|道|问|回答|冷笑|大笑|苦笑|点头|摇头|叹气|叹道|解释|怒道|吼道|低语|传音|喊道|叫道|哭道|骂道)"
+    matches = re.findall(fr"([\u4e00-\u9fa5]{{2,4}}){verbs}", content)
+    matches.extend(re.findall(r"([\u4e00-\u9fa5]{2,4})[：:]\s*“", content))
+    return [n for n, c in Counter(matches).most_common() if n not in CHARACTER_STOP_WORDS and c >= 2][:top_n]
+
+
+def _reader(data: bytes, chunk_size: int = 5) -> NovelTextReader:
+    reader = NovelTextReader(io.BytesIO(data), chunk_size=chunk_size)
+    reader.scan()
+    return reader
+
+
+class TestNovelTextReader(unittest.TestCase):
+    def test_chapters_and_candidates_match_full_text_parsing(self) -> None:
+        for chunk_size in (1, 5, 1 << 20):
+            reader = NovelTextReader(io.BytesIO(TEXT.encode("utf-8")), chunk_size=chunk_size)
+            scan = reader.scan()
+            chapters = [(c.title, c.body) for c in reader.iter_chapters()]
+            self.assertEqual(chapters, _legacy_split(TEXT), chunk_size)
+            self.assertEqual(scan.titles, [title for title, _ in chapters])
+            self.assertEqual(scan.character_candidates(150), _legacy_candidates(TEXT, 150))
+            self.assertEqual(scan.encoding, "utf-8")
+
+    def test_encoding_sniffing(self) -> None:
+        gbk = _reader(TEXT.encode("gbk"))
+        self.assertEqual(gbk.encoding, "gbk")
+        self.assertEqual([(c.title, c.body) for c in gbk.iter_chapters()], _legacy_split(TEXT))
+
+        bom = _reader(codecs.BOM_UTF8 + "第1章 起\n正文".encode("utf-8"))
+        self.assertEqual([(c.title, c.body) for c in bom.iter_chapters()], [("第1章 起", "正文")])
+        utf16 = _reader("第1章 起\n正文".encode("utf-16"))
+        self.assertEqual([(c.title, c.body) for c in utf16.iter_chapters()], [("第1章 起", "正文")])
+
+        with self.assertRaises(HTTPException) as ctx:
+            NovelTextReader(io.BytesIO(b"abc\xff\xff\xff")).scan()
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_samples_and_highlights(self) -> None:
+        filler = "\n".join(["旁白。" * 10] * 4)
+        text = (
+            "第一章 甲\n" + filler + "\n张三大笑：“哈哈！”\n" + filler + "\n"
+            "第二章 乙\n" + filler + "\n李四说：“嗯？”\n" + filler + "\n"
+        )
+        reader = _reader(text.encode("utf-8"), chunk_size=64)
+        excerpts, highlights = reader.collect_samples([1], ["张三", "李四", "赵六"], sample_chars=10, context_window=200)
+        self.assertEqual(excerpts, {1: filler[:10]})
+        # 片段截取在首尾换行之间，不跨章节
+        self.assertIn("--- 【张三】的出场片段 ---\n" + filler.split("\n", 1)[1] + "\n张三大笑：“哈哈！”", highlights)
+        self.assertIn("--- 【李四】的出场片段 ---", highlights)
+        self.assertNotIn("张三大笑", highlights.split("【李四】")[1])
+        self.assertNotIn("赵六", highlights)
+
+    def test_content_batches(self) -> None:
+        reader = _reader(TEXT.encode("utf-8"))
+
+        async def collect():
+            return [batch async for batch in reader.iter_content_batches(2)]
+
+        batches = asyncio.run(collect())
+        self.assertEqual([len(batch) for batch in batches], [2, 2])
+        self.assertEqual([body for batch in batches for body in batch], [b for _, b in _legacy_split(TEXT)])
+
+
+if __name__ == "__main__":
+    unittest.main()
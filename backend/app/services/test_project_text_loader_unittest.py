@@ -0,0 +1,83 @@
+# AIMETA P=项目正文加载器测试|R=章节顺序_大纲合并_查询次数恒定|NR=不依赖外部服务|E=unittest_async|X=internal|A=单元测试|D=unittest,sqlalchemy,aiosqlite|S=db|RD=./README.ai
+import unittest
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models.novel import Chapter, ChapterOutline, ChapterVersion, NovelProject
+from app.services.project_text_loader import iter_project_texts, load_project_texts
+
+
+class TestProjectTextLoader(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(
+                Base.metadata.create_all,
+                tables=[
+                    NovelProject.__table__,
+                    ChapterOutline.__table__,
+                    Chapter.__table__,
+                    ChapterVersion.__table__,
+                ],
+            )
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.statements = []
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self._record)
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    async def _seed(self, chapter_count: int) -> None:
+        async with self.session_factory() as session:
+            session.add(NovelProject(id="p1", user_id=1, title="t", initial_prompt=""))
+            # 倒序插入，验证返回结果按章节号排序
+            for number in range(chapter_count, 0, -1):
+                chapter = Chapter(project_id="p1", chapter_number=number, status="successful")
+                session.add(chapter)
+                await session.flush()
+                if number % 3 == 0:
+                    continue  # 未选定版本
+                version = ChapterVersion(chapter_id=chapter.id, content=f"正文{number}")
+                session.add(version)
+                await session.flush()
+                chapter.selected_version_id = version.id
+                if number != 2:
+                    session.add(ChapterOutline(project_id="p1", chapter_number=number, title=f"标题{number}", summary="概要"))
+            await session.commit()
+
+    async def test_loads_selected_content_in_chapter_order(self) -> None:
+        await self._seed(6)
+        async with self.session_factory() as session:
+            chapters = await load_project_texts(session, "p1")
+
+        self.assertEqual([c.chapter_number for c in chapters], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(chapters[0].content, "正文1")
+        self.assertEqual(chapters[0].title, "标题1")
+        self.assertEqual(chapters[1].title, "第2章")
+        self.assertIsNone(chapters[1].outline_title)
+        self.assertEqual(chapters[2].content, "")
+
+        async with self.session_factory() as session:
+            with_content = [c.chapter_number async for c in iter_project_texts(session, "p1", only_with_content=True)]
+            outlines_only = await load_project_texts(session, "p1", include_content=False)
+        self.assertEqual(with_content, [1, 2, 4, 5])
+        self.assertTrue(all(c.content == "" for c in outlines_only))
+
+    async def test_query_count_does_not_grow_with_chapters(self) -> None:
+        await self._seed(60)
+        self.statements.clear()
+        async with self.session_factory() as session:
+            chapters = await load_project_texts(session, "p1")
+
+        selects = [s for s in self.statements if s.lstrip().upper().startswith("SELECT")]
+        self.assertEqual(len(chapters), 60)
+        self.assertEqual(len(selects), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+# AIMETA P=项目流式导出导入测试|R=NDJSON记录顺序_章节分批_gzip往返_格式校验_附属数据并发读取_截断文件拒绝|NR=不调用LLM|E=unittest_async|X=internal|A=单元测试|D=unittest,sqlalchemy,aiosqlite|S=db|RD=./README.ai
+import gzip
+import io
+import json
+import unittest
+from unittest import mock
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401 - 注册全部模型供 create_all 使用
+from app.db.base import Base
+from app.models import ChapterEvaluation, NovelProject
+from app.models.project_memory import ProjectMemory
+from app.schemas.novel import Blueprint, ChapterOutline
+from app.services.chapter_bulk_import import ChapterBulkImporter
+from app.services.novel_service import NovelService
+from app.services.project_transfer_service import ProjectTransferService, settings
+
+
+def _comparable(export):
+    """去掉导出时间与各类时间戳，只比较内容。"""
+    data = json.loads(json.dumps(export, ensure_ascii=False))
+    data.pop("exported_at")
+    data.pop("diagnostics")
+    data["project"].pop("created_at")
+    data["project"].pop("updated_at")
+    for chapter in data["chapters"]:
+        for item in chapter["versions"] + chapter["evaluations"]:
+            item.pop("created_at")
+    for key in ("created_at", "updated_at"):
+        data["project_memory"].pop(key)
+    return data
+
+
+class TestProjectTransferStream(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with self.session_factory() as session:
+            service = NovelService(session)
+            project = await service.create_project(1, "长篇", "灵感")
+            await service.replace_blueprint(
+                project.id,
+                Blueprint(
+                    title="长篇",
+                    genre="仙侠",
+                    characters=[{"name": "张三"}],
+                    chapter_outline=[ChapterOutline(chapter_number=i, title=f"第{i}回", summary=f"梗概{i}") for i in range(1, 7)],
+                ),
+            )
+            await service.append_conversation(project.id, "user", "写一部仙侠", metadata={"k": 1})
+            await ChapterBulkImporter(session).import_chapters(project.id, [f"正文{i}" * i for i in range(1, 6)])
+            session.add(ProjectMemory(project_id=project.id, global_summary="全局摘要", version=2))
+            await session.commit()
+            chapter = await service.get_or_create_chapter(project.id, 2)
+            session.add(ChapterEvaluation(chapter_id=chapter.id, version_id=chapter.selected_version_id, decision="ok", score=8))
+            project.status = "writing"
+            await session.commit()
+            self.project_id = project.id
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+
+    async def _export_stream(self, **kwargs) -> bytes:
+        async with self.session_factory() as session:
+            chunks = [chunk async for chunk in ProjectTransferService(session, self.session_factory).iter_bundle_ndjson(1, **kwargs)]
+        return b"".join(chunks)
+
+    async def _export_project(self, project_id):
+        async with self.session_factory() as session:
+            return await ProjectTransferService(session, self.session_factory).export_project(project_id, 1)
+
+    async def test_stream_records_and_batches(self) -> None:
+        body = await self._export_stream(chapter_batch_size=4)
+        records = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+        self.assertEqual(
+            [r["type"] for r in records],
+            ["bundle", "project", "chapters", "chapters", "project_end", "end"],
+        )
+        self.assertEqual(records[0]["format"], "arboris-novel-stream")
+        self.assertEqual(records[1]["data"]["chapter_count"], 6)
+        self.assertEqual([len(r["data"]) for r in records[2:4]], [4, 2])
+
+        # 分批输出的章节、附属数据与整体导出一致
+        full = await self._export_project(self.project_id)
+        self.assertEqual(records[2]["data"] + records[3]["data"], json.loads(json.dumps(full["chapters"])))
+        self.assertEqual(records[4]["data"]["project_memory"]["global_summary"], "全局摘要")
+        self.assertEqual(records[1]["data"]["conversation_history"], full["conversation_history"])
+
+    async def test_gzip_round_trip(self) -> None:
+        body = await self._export_stream(compress=True, chapter_batch_size=4)
+        self.assertEqual(body[:2], b"\x1f\x8b")
+        self.assertEqual(
+            [json.loads(line)["type"] for line in gzip.decompress(body).splitlines()],
+            ["bundle", "project", "chapters", "chapters", "project_end", "end"],
+        )
+
+        async with self.session_factory() as session:
+            ids = await ProjectTransferService(session, self.session_factory).import_bundle_stream(2, io.BytesIO(body))
+        self.assertEqual(len(ids), 1)
+
+        async with self.session_factory() as session:
+            imported = await ProjectTransferService(session, self.session_factory).export_project(ids[0], 2)
+        original = await self._export_project(self.project_id)
+        self.assertEqual(_comparable(imported), _comparable(original))
+        self.assertEqual(imported["project"]["status"], "writing")
+
+    async def test_auxiliary_sections_load_concurrently_with_timings(self) -> None:
+        exports = {}
+        for concurrency in (1, 4):
+            with mock.patch.object(settings, "export_auxiliary_concurrency", concurrency):
+                exports[concurrency] = await self._export_project(self.project_id)
+
+        sections = [
+            "project_memory",
+            "constitution",
+            "writer_personas",
+            "factions",
+            "memory_layer",
+            "chapter_blueprints",
+            "foreshadowing",
+            "chapter_snapshots",
+        ]
+        for export in exports.values():
+            timings = export["diagnostics"]["section_timings_ms"]
+            self.assertEqual(set(timings), {"project", "chapters", *sections})
+            self.assertGreaterEqual(export["diagnostics"]["total_ms"], timings["project"])
+        self.assertEqual(_comparable(exports[1]), _comparable(exports[4]))
+        self.assertEqual(exports[4]["project_memory"]["global_summary"], "全局摘要")
+
+    async def _add_second_project(self) -> None:
+        async with self.session_factory() as session:
+            service = NovelService(session)
+            project = await service.create_project(1, "短篇", "灵感")
+            await ChapterBulkImporter(session).import_chapters(project.id, ["第二个项目正文"])
+            await session.commit()
+
+    async def _count_projects(self, user_id: int) -> int:
+        async with self.session_factory() as session:
+            stmt = select(func.count()).select_from(NovelProject).where(NovelProject.user_id == user_id)
+            return (await session.execute(stmt)).scalar_one()
+
+    async def _assert_import_rejected(self, user_id: int, data: bytes, message: str) -> None:
+        async with self.session_factory() as session:
+            with self.assertRaises(ValueError) as ctx:
+                await ProjectTransferService(session, self.session_factory).import_bundle_stream(user_id, io.BytesIO(data))
+        self.assertIn(message, str(ctx.exception))
+        # 已写入的项目随导入失败一并删除
+        self.assertEqual(await self._count_projects(user_id), 0)
+
+    async def test_rejects_stream_truncated_between_projects(self) -> None:
+        await self._add_second_project()
+        lines = (await self._export_stream()).splitlines(keepends=True)
+        first_end = next(i for i, line in enumerate(lines) if json.loads(line)["type"] == "project_end")
+        await self._assert_import_rejected(4, b"".join(lines[: first_end + 1]), "缺少结束记录")
+
+        # end 记录中的项目数与实际不符
+        tampered = lines[: first_end + 1] + [b'{"type": "end", "projects": 2}\n']
+        await self._assert_import_rejected(4, b"".join(tampered), "应包含 2 个项目，实际读取到 1 个")
+
+    async def test_failed_export_ends_without_end_record(self) -> None:
+        await self._add_second_project()
+        original = ProjectTransferService._iter_project_ndjson
+        calls = []
+
+        async def failing(service, project_id, user_id, batch_size):
+            calls.append(project_id)
+            if len(calls) == 2:
+                raise RuntimeError("数据库连接中断")
+            async for line in original(service, project_id, user_id, batch_size):
+                yield line
+
+        chunks = []
+        with mock.patch.object(ProjectTransferService, "_iter_project_ndjson", failing):
+            async with self.session_factory() as session:
+                with self.assertRaises(RuntimeError):
+                    async for chunk in ProjectTransferService(session, self.session_factory).iter_bundle_ndjson(
+                        1, compress=True
+                    ):
+                        chunks.append(chunk)
+
+        body = b"".join(chunks)
+        # gzip 尾部已补齐，可完整解压，但缺少 end 记录
+        self.assertEqual(
+            [json.loads(line)["type"] for line in gzip.decompress(body).splitlines()],
+            ["bundle", "project", "chapters", "project_end"],
+        )
+        await self._assert_import_rejected(5, body, "缺少结束记录")
+
+    async def test_rejects_malformed_streams(self) -> None:
+        body = await self._export_stream()
+        lines = body.splitlines(keepends=True)
+        cases = {
+            "不是支持的流式导出文件": b'{"type": "project", "data": {}}\n',
+            "缺少结束记录": b"".join(lines[:-2]),
+            "第 2 行不是合法的 JSON": lines[0] + b"{oops\n",
+            "导入文件为空": b"",
+        }
+        for message, data in cases.items():
+            async with self.session_factory() as session:
+                with self.assertRaises(ValueError) as ctx:
+                    await ProjectTransferService(session, self.session_factory).import_bundle_stream(3, io.BytesIO(data))
+            self.assertIn(message, str(ctx.exception))
+        self.assertEqual(await self._count_projects(3), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+# AIMETA P=读者模拟并发测试|R=并发扇出_画像超时_部分结果_失败画像不计分|NR=不调用真实LLM|E=unittest_async|X=internal|A=单元测试|D=unittest|S=none|RD=./README.ai
+import asyncio
+import json
+import unittest
+from contextlib import asynccontextmanager
+from unittest import mock
+
+from app.services.reader_simulator_service import ReaderSimulatorService, ReaderType
+
+
+class _FakeLLM:
+    in_flight = 0
+    peak = 0
+    slow_prompt = None
+    broken_prompt = None
+
+    def __init__(self, session=None):
+        self.session = session
+
+    async def get_llm_response(self, system_prompt, conversation_history, **kwargs):
+        cls = type(self)
+        cls.in_flight += 1
+        cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+            if cls.slow_prompt and cls.slow_prompt in system_prompt:
+                await asyncio.sleep(1)
+            if cls.broken_prompt and cls.broken_prompt in system_prompt:
+                return "无法评价"
+            if "识别读者爽点" in system_prompt:
+                return json.dumps({"thrill_points": [{"type": "打脸", "intensity": 8}]})
+            if "钩子" in system_prompt:
+                return json.dumps({"hook_strength": 9, "hook_type": "悬念"})
+            satisfaction = 80 if "爽点读者" in system_prompt else 60
+            return json.dumps({"satisfaction": satisfaction, "abandon_risk": 2, "complaints": []})
+        finally:
+            cls.in_flight -= 1
+
+
+@asynccontextmanager
+async def _session_factory():
+    yield None
+
+
+class TestReaderSimulator(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        _FakeLLM.in_flight = _FakeLLM.peak = 0
+        _FakeLLM.slow_prompt = _FakeLLM.broken_prompt = None
+        patcher = mock.patch("app.services.reader_simulator_service.LLMService", _FakeLLM)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _service(self, session_factory=_session_factory) -> ReaderSimulatorService:
+        return ReaderSimulatorService(None, _FakeLLM(), None, session_factory=session_factory)
+
+    async def test_personas_run_concurrently_after_thrill_detection(self) -> None:
+        readers = [ReaderType.THRILL_SEEKER, ReaderType.CRITIC, ReaderType.CASUAL]
+        with mock.patch("app.services.reader_simulator_service.settings.reader_sim_concurrency", 4):
+            results = await self._service().simulate_reading_experience("正文" * 100, 3, readers)
+
+        # 三个画像同时进行；钩子评估与爽点检测并行，调度较慢时可能与画像重叠，但不超过并发上限
+        self.assertGreaterEqual(_FakeLLM.peak, 3)
+        self.assertLessEqual(_FakeLLM.peak, 4)
+        self.assertEqual(results["hook_strength"]["hook_strength"], 9)
+        self.assertEqual(results["reader_feedbacks"]["thrill_seeker"]["thrill_score"], 80.0)
+        self.assertEqual(results["overall_score"], round((80 + 60 + 60) / 3, 1))
+        thrill_timing = results["stage_timings"]["thrill_points"]
+        reader_timing = results["stage_timings"]["reader:critic"]
+        self.assertGreaterEqual(reader_timing["started_ms"], thrill_timing["duration_ms"])
+
+    async def test_timed_out_persona_is_reported_but_not_scored(self) -> None:
+        _FakeLLM.slow_prompt = "挑剔读者"
+        readers = [ReaderType.THRILL_SEEKER, ReaderType.CRITIC]
+        with mock.patch("app.services.reader_simulator_service.settings.reader_sim_persona_timeout_seconds", 0.2):
+            results = await self._service().simulate_reading_experience("正文", 1, readers)
+
+        self.assertNotIn("critic", results["reader_feedbacks"])
+        self.assertEqual(
+            [(item["reader_type"], item["status"]) for item in results["failed_personas"]],
+            [("critic", "timeout")],
+        )
+        self.assertEqual(results["overall_score"], 80)
+        self.assertEqual(results["stage_timings"]["reader:critic"]["status"], "failed")
+
+    async def test_all_personas_failing_yields_no_score(self) -> None:
+        _FakeLLM.broken_prompt = "读者，正在阅读"
+        results = await self._service().simulate_reading_experience(
+            "正文", 1, [ReaderType.THRILL_SEEKER, ReaderType.CRITIC]
+        )
+
+        self.assertEqual(results["reader_feedbacks"], {})
+        self.assertEqual([item["status"] for item in results["failed_personas"]], ["failed", "failed"])
+        self.assertIsNone(results["overall_score"])
+        self.assertIn("读者模拟全部失败，本次没有满意度评分，建议稍后重试", results["recommendations"])
+
+    async def test_without_session_factory_runs_one_call_at_a_time(self) -> None:
+        results = await self._service(session_factory=None).simulate_reading_experience(
+            "正文", 1, [ReaderType.CASUAL, ReaderType.CRITIC]
+        )
+        self.assertEqual(_FakeLLM.peak, 1)
+        self.assertEqual(results["overall_score"], 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
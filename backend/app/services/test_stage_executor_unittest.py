@@ -0,0 +1,59 @@
+# AIMETA P=阶段执行器测试|R=并发执行_依赖顺序_失败记录|NR=不依赖外部服务|E=unittest_async|X=internal|A=单元测试|D=unittest,asyncio|S=none|RD=./README.ai
+import asyncio
+import unittest
+
+from app.services.stage_executor import Stage, run_stages
+
+
+class TestStageExecutor(unittest.IsolatedAsyncioTestCase):
+    async def test_independent_stages_run_concurrently_and_dependents_wait(self) -> None:
+        active = 0
+        peak = 0
+
+        async def slow(value):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            return value
+
+        async def combine(results):
+            return results["a"] + results["b"]
+
+        outcomes = await run_stages(
+            [
+                Stage("a", lambda _: slow(1)),
+                Stage("b", lambda _: slow(2)),
+                Stage("sum", combine, after=("a", "b")),
+            ],
+            max_concurrency=4,
+        )
+
+        self.assertEqual(peak, 2)
+        self.assertEqual(outcomes["sum"].result, 3)
+        self.assertGreaterEqual(outcomes["sum"].started_ms, outcomes["a"].duration_ms)
+
+    async def test_failure_is_recorded_and_dependents_receive_none(self) -> None:
+        async def boom(_):
+            raise RuntimeError("llm down")
+
+        async def fallback(results):
+            return results["a"] or "default"
+
+        outcomes = await run_stages([Stage("a", boom), Stage("b", fallback, after=("a",))])
+
+        self.assertEqual(outcomes["a"].timing()["status"], "failed")
+        self.assertIn("llm down", outcomes["a"].timing()["error"])
+        self.assertEqual(outcomes["b"].result, "default")
+
+    async def test_rejects_cycles(self) -> None:
+        async def noop(_):
+            return None
+
+        with self.assertRaises(ValueError):
+            await run_stages([Stage("a", noop, after=("b",)), Stage("b", noop, after=("a",))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# AIMETA P=章节摘要补全测试|R=有界并发_分批提交_部分失败_不覆盖编辑|NR=不调用真实LLM|E=unittest_async|X=internal|A=单元测试|D=unittest,sqlalchemy,aiosqlite|S=db|RD=./README.ai
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models.novel import Chapter, ChapterVersion, NovelProject
+from app.services.summary_backfill import SummaryBackfillService
+from app.services.version_fanout import ConcurrencyLimiter
+
+
+class _FakeLLM:
+    in_flight = 0
+    peak = 0
+    on_call = None
+
+    def __init__(self, session):
+        self.session = session
+
+    async def get_summary(self, content, **kwargs):
+        cls = type(self)
+        cls.in_flight += 1
+        cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if cls.on_call:
+                await cls.on_call(content)
+            if "坏" in content:
+                raise RuntimeError("llm down")
+            return f"<think>x</think>摘要:{content}"
+        finally:
+            cls.in_flight -= 1
+
+
+class TestSummaryBackfill(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{Path(self.tmp.name) / 'test.db'}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(
+                Base.metadata.create_all,
+                tables=[NovelProject.__table__, Chapter.__table__, ChapterVersion.__table__],
+            )
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        _FakeLLM.in_flight = _FakeLLM.peak = 0
+        _FakeLLM.on_call = None
+        patcher = mock.patch("app.services.summary_backfill.LLMService", _FakeLLM)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+        self.tmp.cleanup()
+
+    async def _seed(self, contents):
+        async with self.session_factory() as session:
+            session.add(NovelProject(id="p1", user_id=1, title="t", initial_prompt=""))
+            for number, content in enumerate(contents, 1):
+                chapter = Chapter(project_id="p1", chapter_number=number)
+                session.add(chapter)
+                await session.flush()
+                if content is None:
+                    continue
+                version = ChapterVersion(chapter_id=chapter.id, content=content)
+                session.add(version)
+                await session.flush()
+                chapter.selected_version_id = version.id
+                if content == "已有":
+                    chapter.real_summary = "旧摘要"
+            await session.commit()
+
+    async def _summaries(self):
+        async with self.session_factory() as session:
+            rows = await session.execute(select(Chapter.chapter_number, Chapter.real_summary).order_by(Chapter.chapter_number))
+            return dict(rows.all())
+
+    def _service(self, batch_size=3, limit=2) -> SummaryBackfillService:
+        return SummaryBackfillService(
+            self.session_factory,
+            limiter=ConcurrencyLimiter(global_limit=limit, per_key_limit=limit),
+            batch_size=batch_size,
+        )
+
+    async def test_backfills_missing_summaries_with_bounded_concurrency(self) -> None:
+        await self._seed([f"正文{i}" for i in range(1, 8)] + ["已有", None, "正文10"])
+
+        result = await self._service().backfill_project("p1", 1, before_chapter=10)
+
+        summaries = await self._summaries()
+        self.assertEqual((result.pending, result.generated, result.failed), (7, 7, []))
+        self.assertEqual(summaries[1], "摘要:正文1")
+        self.assertEqual(summaries[8], "旧摘要")
+        self.assertIsNone(summaries[9])
+        self.assertIsNone(summaries[10])
+        self.assertEqual(_FakeLLM.peak, 2)
+
+    async def test_failures_are_reported_and_edits_are_not_overwritten(self) -> None:
+        await self._seed(["正文1", "坏章", "正文3"])
+
+        async def _edit_during_call(content):
+            if content == "正文3":
+                async with self.session_factory() as session:
+                    chapter = (await session.execute(select(Chapter).where(Chapter.chapter_number == 3))).scalar_one()
+                    version = ChapterVersion(chapter_id=chapter.id, content="新正文")
+                    session.add(version)
+                    await session.flush()
+                    chapter.selected_version_id = version.id
+                    await session.commit()
+
+        _FakeLLM.on_call = _edit_during_call
+        result = await self._service(batch_size=10).backfill_project("p1", 1)
+
+        summaries = await self._summaries()
+        self.assertEqual(result.failed, [2])
+        self.assertEqual(summaries[1], "摘要:正文1")
+        self.assertIsNone(summaries[2])
+        self.assertIsNone(summaries[3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# AIMETA P=请求计数缓冲测试|R=批量UPSERT_写回失败回填_额度原子预占|NR=不依赖Redis|E=unittest_async|X=internal|A=单元测试|D=unittest,sqlalchemy,aiosqlite|S=db,memory|RD=./README.ai
+import asyncio
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import UsageMetric, User, UserDailyRequest
+from app.services.usage_counters import LocalDailyReservations, UsageCounters
+
+
+class TestUsageCounters(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{Path(self.tmp.name) / 'test.db'}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(
+                Base.metadata.create_all,
+                tables=[User.__table__, UsageMetric.__table__, UserDailyRequest.__table__],
+            )
+        self.session_factory = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.session_factory() as session:
+            session.add(User(id=1, username="u", hashed_password="x"))
+            session.add(UsageMetric(key="api_request_count", value=10))
+            await session.commit()
+        self.counters = UsageCounters(session_factory=self.session_factory)
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose()
+        self.tmp.cleanup()
+
+    async def _metric(self, key: str):
+        async with self.session_factory() as session:
+            return await session.get(UsageMetric, key)
+
+    async def test_flush_upserts_buffered_increments_in_one_commit(self) -> None:
+        for _ in range(50):
+            self.counters.add("api_request_count")
+        self.counters.add("other", 3)
+        self.counters.add_daily(1, date(2024, 1, 1), 2)
+        self.assertEqual(self.counters.pending("api_request_count"), 50)
+
+        commits = []
+        event.listen(self.engine.sync_engine, "commit", lambda conn: commits.append(1))
+        self.assertEqual(await self.counters.flush(), 3)
+        self.assertEqual(len(commits), 1)
+        self.assertEqual((await self._metric("api_request_count")).value, 60)
+        self.assertEqual((await self._metric("other")).value, 3)
+        self.assertEqual(self.counters.pending("api_request_count"), 0)
+
+        self.counters.add_daily(1, date(2024, 1, 1), 1)
+        await self.counters.flush()
+        async with self.session_factory() as session:
+            counts = (await session.execute(select(UserDailyRequest.request_count))).scalars().all()
+        self.assertEqual(counts, [3])
+
+    async def test_failed_flush_keeps_increments(self) -> None:
+        self.counters.add("api_request_count", 5)
+        broken = async_sessionmaker(
+            create_async_engine(f"sqlite+aiosqlite:///{Path(self.tmp.name) / 'missing' / 'x.db'}"),
+            class_=AsyncSession,
+        )
+        self.assertEqual(await self.counters.flush(broken), 0)
+        self.assertEqual(self.counters.pending("api_request_count"), 5)
+        await self.counters.flush()
+        self.assertEqual((await self._metric("api_request_count")).value, 15)
+
+    async def test_daily_reservation_is_atomic_under_concurrency(self) -> None:
+        async def load_used() -> int:
+            await asyncio.sleep(0.01)
+            return 3
+
+        results = await asyncio.gather(*(self.counters.reserve_daily(1, 5, load_used) for _ in range(6)))
+        self.assertEqual(sum(results), 2)
+        self.assertFalse(await self.counters.reserve_daily(1, 5, load_used))
+
+        await self.counters.flush()
+        async with self.session_factory() as session:
+            record = (await session.execute(select(UserDailyRequest))).scalar_one()
+        self.assertEqual((record.request_date, record.request_count), (date.today(), 2))
+
+    async def test_local_reservations_drop_previous_days(self) -> None:
+        reservations = LocalDailyReservations()
+
+        async def zero() -> int:
+            return 0
+
+        await reservations.reserve(1, date(2024, 1, 1), 1, zero)
+        self.assertTrue(await reservations.reserve(1, date(2024, 1, 2), 1, zero))
+        self.assertEqual(list(reservations._used), [(1, date(2024, 1, 2))])
+
+
+if __name__ == "__main__":
+    unittest.main()
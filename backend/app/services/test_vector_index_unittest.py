@@ -0,0 +1,65 @@
+# AIMETA P=进程内向量索引测试|R=TopK排序_增量更新_章节删除|NR=不依赖向量库|E=unittest|X=internal|A=单元测试|D=unittest|S=none|RD=./README.ai
+import math
+import random
+import unittest
+
+from app.services.vector_index import ProjectVectorIndex, VectorIndexRegistry
+
+
+def _cosine_distance(vec_a, vec_b):
+    dot = sum(a * b for a, b in zip(vec_a, vec_b))
+    norm_a = math.sqrt(sum(a * a for a in vec_a))
+    norm_b = math.sqrt(sum(b * b for b in vec_b))
+    return 1.0 - dot / (norm_a * norm_b)
+
+
+class TestProjectVectorIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(7)
+        self.vectors = {f"c{i}": [rng.uniform(-1, 1) for _ in range(16)] for i in range(200)}
+        self.index = ProjectVectorIndex(hnsw_threshold=0)
+        self.index.upsert(
+            (record_id, int(record_id[1:]) // 10, vector, {"id": record_id})
+            for record_id, vector in self.vectors.items()
+        )
+        self.query = [rng.uniform(-1, 1) for _ in range(16)]
+
+    def test_top_k_matches_brute_force(self) -> None:
+        expected = sorted(self.vectors, key=lambda rid: _cosine_distance(self.query, self.vectors[rid]))[:5]
+        results = self.index.search(self.query, 5)
+
+        self.assertEqual([payload["id"] for _, payload in results], expected)
+        for distance, payload in results:
+            self.assertAlmostEqual(distance, _cosine_distance(self.query, self.vectors[payload["id"]]), places=4)
+
+    def test_incremental_upsert_and_chapter_removal(self) -> None:
+        self.index.upsert([("c0", 0, self.query, {"id": "c0"}), ("new", 99, self.query, {"id": "new"})])
+        top = self.index.search(self.query, 2)
+        self.assertEqual({payload["id"] for _, payload in top}, {"c0", "new"})
+        self.assertAlmostEqual(top[0][0], 0.0, places=5)
+
+        removed = self.index.remove_chapters([0, 99])
+        self.assertEqual(removed, 11)
+        self.assertEqual(len(self.index), 190)
+        ids = {payload["id"] for _, payload in self.index.search(self.query, 190)}
+        self.assertNotIn("c0", ids)
+        self.assertNotIn("new", ids)
+
+    def test_dimension_mismatch_returns_empty(self) -> None:
+        self.assertEqual(self.index.search([1.0, 0.0], 3), [])
+
+
+class TestVectorIndexRegistry(unittest.TestCase):
+    def test_evicts_least_recently_used_project(self) -> None:
+        registry = VectorIndexRegistry(max_projects=2, ttl_seconds=0)
+        for project in ("p1", "p2"):
+            registry.build("rag_chunks", project, [("a", 1, [1.0, 0.0], {})])
+        registry.get("rag_chunks", "p1")
+        registry.build("rag_chunks", "p3", [])
+
+        self.assertIsNotNone(registry.get("rag_chunks", "p1"))
+        self.assertIsNone(registry.get("rag_chunks", "p2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
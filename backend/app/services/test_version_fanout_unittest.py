@@ -0,0 +1,86 @@
+# AIMETA P=多版本并发生成测试|R=并发上限_部分失败_独立会话|NR=不依赖外部服务|E=unittest_async|X=internal|A=单元测试|D=unittest,asyncio|S=none|RD=./README.ai
+import asyncio
+import unittest
+
+from app.services.version_fanout import (
+    ConcurrencyLimiter,
+    collect_successful,
+    run_versions_concurrently,
+)
+
+
+class _FakeSession:
+    def __init__(self, registry: list) -> None:
+        self.registry = registry
+
+    async def __aenter__(self):
+        self.registry.append(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class TestVersionFanout(unittest.IsolatedAsyncioTestCase):
+    async def test_respects_per_user_limit_and_uses_separate_sessions(self) -> None:
+        sessions: list = []
+        active = 0
+        peak = 0
+
+        async def worker(idx, session):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return {"index": idx, "session": session}
+
+        outcomes = await run_versions_concurrently(
+            4,
+            worker,
+            session_factory=lambda: _FakeSession(sessions),
+            user_id=1,
+            limiter=ConcurrencyLimiter(global_limit=10, per_key_limit=2),
+        )
+
+        self.assertEqual(peak, 2)
+        self.assertEqual([o.index for o in outcomes], [0, 1, 2, 3])
+        self.assertEqual(len({id(o.result["session"]) for o in outcomes}), 4)
+        self.assertTrue(all(o.timing()["status"] == "ok" for o in outcomes))
+
+    async def test_partial_failure_keeps_successful_versions(self) -> None:
+        async def worker(idx, session):
+            if idx == 1:
+                raise RuntimeError("boom")
+            return idx
+
+        outcomes = await run_versions_concurrently(
+            3,
+            worker,
+            session_factory=lambda: _FakeSession([]),
+            user_id=1,
+            limiter=ConcurrencyLimiter(global_limit=3, per_key_limit=3),
+        )
+
+        self.assertEqual(collect_successful(outcomes), [0, 2])
+        self.assertEqual(outcomes[1].timing()["status"], "failed")
+        self.assertIn("boom", outcomes[1].timing()["error"])
+
+    async def test_all_failed_raises_first_error(self) -> None:
+        async def worker(idx, session):
+            raise ValueError(f"fail-{idx}")
+
+        outcomes = await run_versions_concurrently(
+            2,
+            worker,
+            session_factory=lambda: _FakeSession([]),
+            user_id=None,
+            limiter=ConcurrencyLimiter(global_limit=1, per_key_limit=1),
+        )
+
+        with self.assertRaises(ValueError):
+            collect_successful(outcomes)
+
+
+if __name__ == "__main__":
+    unittest.main()
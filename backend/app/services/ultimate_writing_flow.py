@@ -355,6 +355,9 @@ class UltimateWritingFlow:
             
             reader_feedback = version.get("reader_feedback", {})
             reader_score = reader_feedback.get("overall_score", 50)
+            if reader_score is None:
+                # 读者模拟全部失败时没有评分，只按自我批评分数比较
+                reader_score = critique_score
             
             # 钩子强度加分
             hook_data = reader_feedback.get("hook_strength", {})
@@ -450,6 +453,7 @@ class UltimateWritingFlow:
                 marker = "⭐" if i == result.get("best_version_index", 0) else "  "
                 critique_score = v.get("final_score", 0)
                 reader_score = v.get("reader_feedback", {}).get("overall_score", 0)
-                lines.append(f"{marker} 版本 {i+1}：批评 {critique_score}/100，读者 {reader_score}/100")
+                reader_text = f"{reader_score}/100" if reader_score is not None else "暂无"
+                lines.append(f"{marker} 版本 {i+1}：批评 {critique_score}/100，读者 {reader_text}")
         
         return "\n".join(lines)
@@ -0,0 +1,256 @@
+# AIMETA P=请求计数缓冲_每日额度预占|R=内存累加_定时批量UPSERT_原子预占_Redis可选|NR=不含限额配置读写|E=UsageCounters_get_usage_counters|X=internal|A=计数缓冲_额度预占|D=sqlalchemy,redis可选|S=db,memory,cache|RD=./README.ai
+"""
+请求计数缓冲与每日额度预占
+
+旧实现每次 LLM 调用都在业务会话上读取并提交 usage_metrics / user_daily_requests，
+章节生成的并发请求会在 SQLite 上互相等待写锁。现在：
+
+- 计数先在进程内累加，按 usage_counter_flush_seconds 定时（以及进程退出时）
+  用一次 UPSERT 批量写回，业务会话不再为计数提交；
+- 每日额度通过 reserve 原子预占：local 在进程内计数（当天首次预占时从数据库读取已用次数），
+  redis 用 Lua 脚本在多进程间共享同一个计数；
+- 写回失败时增量回填到缓冲区，下次继续写回；进程崩溃最多丢失一个间隔内的统计。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import Table
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.config import settings
+from ..db.session import AsyncSessionLocal
+from ..models import UsageMetric, UserDailyRequest
+
+try:  # pragma: no cover - redis 为可选依赖
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+UsedLoader = Callable[[], Awaitable[int]]
+DailyKey = Tuple[int, date]
+
+
+class LocalDailyReservations:
+    """进程内每日额度计数；同一事件循环内检查与自增之间没有 await，天然原子。"""
+
+    def __init__(self) -> None:
+        self._used: Dict[DailyKey, int] = {}
+
+    async def reserve(self, user_id: int, day: date, limit: int, load_used: UsedLoader) -> bool:
+        key = (user_id, day)
+        if key not in self._used:
+            used = await load_used()
+            # 并发的首次预占只采用先完成的那次读取
+            if key not in self._used:
+                self._used = {k: v for k, v in self._used.items() if k[1] >= day}
+                self._used[key] = used
+        if self._used[key] >= limit:
+            return False
+        self._used[key] += 1
+        return True
+
+
+class RedisDailyReservations:
+    """Redis 共享的每日额度计数，键当天首次使用时用数据库中的已用次数初始化。"""
+
+    # 返回 -1 表示键不存在且未提供初始值，1 / 0 表示预占成功 / 已达上限
+    _SCRIPT = """
+local used = redis.call('GET', KEYS[1])
+if not used then
+    if tonumber(ARGV[2]) < 0 then
+        return -1
+    end
+    used = ARGV[2]
+    redis.call('SET', KEYS[1], used, 'EX', ARGV[3])
+end
+if tonumber(used) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+return 1
+"""
+    _TTL_SECONDS = 2 * 24 * 3600
+
+    def __init__(self, url: str, *, fallback: Optional[LocalDailyReservations] = None) -> None:
+        if aioredis is None:
+            raise RuntimeError("未安装 redis 依赖，无法使用 USAGE_COUNTER_BACKEND=redis")
+        self._url = url
+        self._fallback = fallback or LocalDailyReservations()
+        self._client: Any = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> Any:
+        # Celery 任务每次使用新的事件循环，客户端需随循环重建
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = aioredis.from_url(self._url, decode_responses=True)
+            self._loop = loop
+        return self._client
+
+    async def reserve(self, user_id: int, day: date, limit: int, load_used: UsedLoader) -> bool:
+        key = f"daily_request:{user_id}:{day.isoformat()}"
+        try:
+            client = self._get_client()
+            outcome = await client.eval(self._SCRIPT, 1, key, limit, -1, self._TTL_SECONDS)
+            if int(outcome) == -1:
+                outcome = await client.eval(self._SCRIPT, 1, key, limit, await load_used(), self._TTL_SECONDS)
+            return int(outcome) == 1
+        except Exception as exc:  # noqa: BLE001 - Redis 不可用时退回进程内计数
+            logger.warning("Redis 额度预占失败，改用进程内计数: %s", exc)
+            return await self._fallback.reserve(user_id, day, limit, load_used)
+
+
+class UsageCounters:
+    """进程级计数缓冲：累加 usage_metrics 与每日请求数，定时批量写回。"""
+
+    def __init__(
+        self,
+        *,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        reservations: Optional[Any] = None,
+        flush_interval: float = 5.0,
+    ) -> None:
+        self._session_factory = session_factory
+        self.reservations = reservations or LocalDailyReservations()
+        self._flush_interval = flush_interval
+        self._metrics: Dict[str, int] = {}
+        self._daily: Dict[DailyKey, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # 计数
+    # ------------------------------------------------------------------
+    def add(self, key: str, amount: int = 1) -> None:
+        self._metrics[key] = self._metrics.get(key, 0) + amount
+
+    def add_daily(self, user_id: int, day: date, amount: int = 1) -> None:
+        self._daily[(user_id, day)] = self._daily.get((user_id, day), 0) + amount
+
+    def pending(self, key: str) -> int:
+        """尚未写回数据库的增量，读取统计时需要加上。"""
+        return self._metrics.get(key, 0)
+
+    async def reserve_daily(self, user_id: int, limit: int, load_used: UsedLoader) -> bool:
+        """预占一次当日请求额度，成功时同时记入待写回的每日计数。"""
+        today = date.today()
+        if not await self.reservations.reserve(user_id, today, limit, load_used):
+            return False
+        self.add_daily(user_id, today)
+        return True
+
+    # ------------------------------------------------------------------
+    # 写回
+    # ------------------------------------------------------------------
+    async def flush(self, session_factory: Optional[async_sessionmaker] = None) -> int:
+        """把缓冲的增量用 UPSERT 写回数据库，返回写回的行数。"""
+        async with self._flush_lock:
+            metrics, self._metrics = self._metrics, {}
+            daily, self._daily = self._daily, {}
+            if not metrics and not daily:
+                return 0
+            try:
+                async with (session_factory or self._session_factory)() as session:
+                    if metrics:
+                        await _upsert_increment(
+                            session,
+                            UsageMetric.__table__,
+                            [{"key": key, "value": value} for key, value in metrics.items()],
+                            conflict_columns=["key"],
+                            counter_column="value",
+                        )
+                    if daily:
+                        await _upsert_increment(
+                            session,
+                            UserDailyRequest.__table__,
+                            [
+                                {"user_id": user_id, "request_date": day, "request_count": value}
+                                for (user_id, day), value in daily.items()
+                            ],
+                            conflict_columns=["user_id", "request_date"],
+                            counter_column="request_count",
+                        )
+                    await session.commit()
+            except Exception as exc:  # noqa: BLE001 - 写回失败时保留增量等待下次写回
+                logger.warning("请求计数写回失败，稍后重试: %s", exc)
+                for key, value in metrics.items():
+                    self.add(key, value)
+                for (user_id, day), value in daily.items():
+                    self.add_daily(user_id, day, value)
+                return 0
+            return len(metrics) + len(daily)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop(), name="usage-counter-flush")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
+
+
+async def _upsert_increment(
+    session: AsyncSession,
+    table: Table,
+    rows: List[Dict[str, Any]],
+    *,
+    conflict_columns: List[str],
+    counter_column: str,
+) -> None:
+    """按方言生成 INSERT ... ON CONFLICT/DUPLICATE KEY 累加计数列。"""
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            {counter_column: table.c[counter_column] + stmt.inserted[counter_column]}
+        )
+    else:
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={counter_column: table.c[counter_column] + stmt.excluded[counter_column]},
+        )
+    await session.execute(stmt, rows)
+
+
+_COUNTERS: Optional[UsageCounters] = None
+
+
+def get_usage_counters() -> UsageCounters:
+    """进程级计数缓冲，按配置懒加载。"""
+    global _COUNTERS
+    if _COUNTERS is None:
+        reservations: Any = None
+        if settings.usage_counter_backend == "redis":
+            reservations = RedisDailyReservations(settings.usage_counter_redis_url)
+        _COUNTERS = UsageCounters(
+            reservations=reservations,
+            flush_interval=settings.usage_counter_flush_seconds,
+        )
+    return _COUNTERS
+
+
+__all__ = [
+    "LocalDailyReservations",
+    "RedisDailyReservations",
+    "UsageCounters",
+    "get_usage_counters",
+]
@@ -0,0 +1,295 @@
+# AIMETA P=进程内向量索引_项目级相似检索|R=归一化矩阵_TopK检索_增量更新_HNSW可选|NR=不含数据库读写|E=ProjectVectorIndex_VectorIndexRegistry_get_vector_index_registry|X=internal|A=向量索引|D=numpy_hnswlib可选|S=mem|RD=./README.ai
+"""
+进程内向量索引：当 libsql 缺少 vector_distance_cosine 时替代逐行 Python 余弦计算。
+
+- 每个 (表, 项目) 维护一份预归一化的 float32 矩阵，查询时一次矩阵乘 + argpartition 取 TopK；
+- 行数超过阈值且安装了 hnswlib 时自动切换为 HNSW 近似检索；
+- 未安装 numpy 时退化为纯 Python 实现（仍预先归一化，避免每次查询重复计算范数）；
+- upsert / 删除章节时增量维护，不需要重新从数据库加载。
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import operator
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from ..core.config import settings
+
+try:  # noqa: SIM105 - numpy 为可选加速依赖
+    import numpy as np
+except ImportError:  # pragma: no cover - 未安装时使用纯 Python 实现
+    np = None  # type: ignore[assignment]
+
+try:  # noqa: SIM105 - hnswlib 为可选近似检索依赖
+    import hnswlib
+except ImportError:  # pragma: no cover - 未安装时仅使用精确检索
+    hnswlib = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# 一条索引记录：(记录 ID, 章节号, 向量, 附带数据)
+IndexItem = Tuple[str, int, Sequence[float], Dict[str, Any]]
+
+
+class ProjectVectorIndex:
+    """单个项目、单张向量表的内存索引，检索结果为 (余弦距离, 附带数据)。"""
+
+    def __init__(self, *, hnsw_threshold: Optional[int] = None) -> None:
+        self.dim: Optional[int] = None
+        self.loaded_at = time.monotonic()
+        self._hnsw_threshold = hnsw_threshold if hnsw_threshold is not None else settings.vector_index_hnsw_threshold
+        self._ids: List[str] = []
+        self._chapters: List[int] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        # numpy 模式下为预分配容量的矩阵，纯 Python 模式下为归一化后的元组列表
+        self._matrix: Any = None if np is not None else []
+        self._hnsw: Any = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def backend(self) -> str:
+        if self._hnsw is not None:
+            return "hnsw"
+        return "numpy" if np is not None else "python"
+
+    def upsert(self, items: Iterable[IndexItem]) -> None:
+        """写入或覆盖记录；维度与索引不一致的向量会被跳过。"""
+        with self._lock:
+            appended: List[Tuple[int, Any]] = []
+            for record_id, chapter_number, embedding, payload in items:
+                if not embedding:
+                    continue
+                if self.dim is None:
+                    self.dim = len(embedding)
+                elif len(embedding) != self.dim:
+                    logger.warning(
+                        "向量维度不一致，跳过索引: id=%s dim=%s expected=%s",
+                        record_id,
+                        len(embedding),
+                        self.dim,
+                    )
+                    continue
+                vector = self._normalize(embedding)
+                position = self._positions.get(record_id)
+                if position is None:
+                    position = len(self._ids)
+                    self._positions[record_id] = position
+                    self._ids.append(record_id)
+                    self._chapters.append(chapter_number)
+                    self._payloads.append(payload)
+                    self._append_vector(vector)
+                else:
+                    self._chapters[position] = chapter_number
+                    self._payloads[position] = payload
+                    self._set_vector(position, vector)
+                appended.append((position, vector))
+            if appended and self._hnsw is not None:
+                self._hnsw_add(appended)
+
+    def remove_chapters(self, chapter_numbers: Iterable[int]) -> int:
+        """删除指定章节的全部记录，返回删除条数。"""
+        targets = set(chapter_numbers)
+        with self._lock:
+            return self._retain([idx for idx, number in enumerate(self._chapters) if number not in targets])
+
+    def remove_ids(self, record_ids: Iterable[str]) -> int:
+        """按记录 ID 删除，返回删除条数。"""
+        targets = set(record_ids)
+        with self._lock:
+            return self._retain([idx for idx, record_id in enumerate(self._ids) if record_id not in targets])
+
+    def _retain(self, keep: List[int]) -> int:
+        """仅保留给定行号的记录并压缩存储，返回删除条数（调用方需持有锁）。"""
+        removed = len(self._ids) - len(keep)
+        if not removed:
+            return 0
+        self._ids = [self._ids[idx] for idx in keep]
+        self._chapters = [self._chapters[idx] for idx in keep]
+        self._payloads = [self._payloads[idx] for idx in keep]
+        self._positions = {record_id: idx for idx, record_id in enumerate(self._ids)}
+        if np is not None:
+            self._matrix = self._matrix[keep].copy() if keep else None
+        else:
+            self._matrix = [self._matrix[idx] for idx in keep]
+        # 行号已变化，HNSW 图在下次查询时按需重建
+        self._hnsw = None
+        if not self._ids:
+            self.dim = None
+        return removed
+
+    def search(self, query: Sequence[float], top_k: int) -> List[Tuple[float, Dict[str, Any]]]:
+        """返回按余弦距离升序排列的 TopK 结果。"""
+        with self._lock:
+            size = len(self._ids)
+            if not size or top_k <= 0 or not query:
+                return []
+            if len(query) != self.dim:
+                logger.warning("查询向量维度 %s 与索引维度 %s 不一致，跳过检索", len(query), self.dim)
+                return []
+            top_k = min(top_k, size)
+            vector = self._normalize(query)
+            if np is None:
+                scored = self._search_python(vector, top_k)
+            else:
+                self._maybe_build_hnsw()
+                if self._hnsw is not None and top_k < size:
+                    scored = self._search_hnsw(vector, top_k)
+                else:
+                    scored = self._search_numpy(vector, top_k)
+            return [(1.0 - similarity, self._payloads[position]) for position, similarity in scored]
+
+    # ------------------------------------------------------------------
+    # 内部实现
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> Any:
+        if np is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+            return vector / norm if norm > 0 else np.zeros_like(vector)
+        norm = math.sqrt(sum(value * value for value in embedding))
+        if norm == 0:
+            return tuple(0.0 for _ in embedding)
+        return tuple(value / norm for value in embedding)
+
+    def _append_vector(self, vector: Any) -> None:
+        if np is None:
+            self._matrix.append(vector)
+            return
+        position = len(self._ids) - 1
+        if self._matrix is None:
+            self._matrix = np.zeros((max(16, position + 1), self.dim), dtype=np.float32)
+        elif position >= self._matrix.shape[0]:
+            # 容量翻倍，摊销追加成本
+            grown = np.zeros((self._matrix.shape[0] * 2, self.dim), dtype=np.float32)
+            grown[: self._matrix.shape[0]] = self._matrix
+            self._matrix = grown
+        self._matrix[position] = vector
+
+    def _set_vector(self, position: int, vector: Any) -> None:
+        self._matrix[position] = vector
+
+    def _search_python(self, vector: Sequence[float], top_k: int) -> List[Tuple[int, float]]:
+        mul = operator.mul
+        similarities = ((sum(map(mul, vector, row)), idx) for idx, row in enumerate(self._matrix))
+        return [(idx, similarity) for similarity, idx in heapq.nlargest(top_k, similarities)]
+
+    def _search_numpy(self, vector: Any, top_k: int) -> List[Tuple[int, float]]:
+        size = len(self._ids)
+        similarities = self._matrix[:size] @ vector
+        if top_k < size:
+            candidates = np.argpartition(-similarities, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(size)
+        ordered = candidates[np.argsort(-similarities[candidates], kind="stable")]
+        return [(int(idx), float(similarities[idx])) for idx in ordered]
+
+    def _maybe_build_hnsw(self) -> None:
+        if (
+            self._hnsw is not None
+            or hnswlib is None
+            or self._hnsw_threshold <= 0
+            or len(self._ids) < self._hnsw_threshold
+        ):
+            return
+        size = len(self._ids)
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        index.init_index(max_elements=max(size * 2, 1024), ef_construction=200, M=16)
+        index.add_items(self._matrix[:size], np.arange(size))
+        index.set_ef(max(64, settings.vector_top_k_chunks * 8))
+        self._hnsw = index
+        logger.info("已构建 HNSW 向量索引: size=%s dim=%s", size, self.dim)
+
+    def _hnsw_add(self, items: List[Tuple[int, Any]]) -> None:
+        needed = len(self._ids)
+        if needed > self._hnsw.get_max_elements():
+            self._hnsw.resize_index(needed * 2)
+        positions = np.asarray([position for position, _ in items])
+        vectors = np.stack([vector for _, vector in items])
+        self._hnsw.add_items(vectors, positions)
+
+    def _search_hnsw(self, vector: Any, top_k: int) -> List[Tuple[int, float]]:
+        labels, distances = self._hnsw.knn_query(vector, k=top_k)
+        # 内积空间下 distance = 1 - 内积，即余弦距离
+        return [(int(label), 1.0 - float(distance)) for label, distance in zip(labels[0], distances[0])]
+
+
+class VectorIndexRegistry:
+    """进程级索引注册表：按 (表名, 项目) 缓存索引，LRU 淘汰并按 TTL 过期重建。"""
+
+    def __init__(self, *, max_projects: int, ttl_seconds: float) -> None:
+        self._max_projects = max(1, max_projects)
+        self._ttl_seconds = ttl_seconds
+        self._indexes: "OrderedDict[Hashable, ProjectVectorIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, table: str, project_id: str) -> Optional[ProjectVectorIndex]:
+        """返回已加载且未过期的索引，不存在时返回 None。"""
+        key = (table, project_id)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                return None
+            if self._ttl_seconds > 0 and time.monotonic() - index.loaded_at > self._ttl_seconds:
+                del self._indexes[key]
+                return None
+            self._indexes.move_to_end(key)
+            return index
+
+    def build(self, table: str, project_id: str, items: Iterable[IndexItem]) -> ProjectVectorIndex:
+        """用全量数据构建索引并登记。"""
+        index = ProjectVectorIndex()
+        index.upsert(items)
+        key = (table, project_id)
+        with self._lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self._max_projects:
+                self._indexes.popitem(last=False)
+        logger.info(
+            "已加载向量索引: table=%s project=%s size=%s backend=%s",
+            table,
+            project_id,
+            len(index),
+            index.backend,
+        )
+        return index
+
+    def invalidate(self, table: str, project_id: str) -> None:
+        with self._lock:
+            self._indexes.pop((table, project_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+_registry: Optional[VectorIndexRegistry] = None
+
+
+def get_vector_index_registry() -> VectorIndexRegistry:
+    """返回进程级向量索引注册表（惰性创建）。"""
+    global _registry
+    if _registry is None:
+        _registry = VectorIndexRegistry(
+            max_projects=settings.vector_index_max_projects,
+            ttl_seconds=settings.vector_index_ttl_seconds,
+        )
+    return _registry
+
+
+__all__ = [
+    "ProjectVectorIndex",
+    "VectorIndexRegistry",
+    "get_vector_index_registry",
+]
@@ -16,6 +16,7 @@ from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Sequence
 
 from ..core.config import settings
+from .vector_index import IndexItem, ProjectVectorIndex, get_vector_index_registry
 
 try:  # noqa: SIM105 - 明确区分依赖缺失的情况
     import libsql_client
@@ -24,6 +25,9 @@ except ImportError:  # pragma: no cover - 在未安装依赖时提供友好提
 
 logger = logging.getLogger(__name__)
 
+_CHUNK_TABLE = "rag_chunks"
+_SUMMARY_TABLE = "rag_summaries"
+
 
 @dataclass
 class RetrievedChunk:
@@ -49,6 +53,9 @@ class RetrievedSummary:
 class VectorStoreService:
     """libsql 向量库操作工具，确保不同小说项目的数据隔离。"""
 
+    # 向量库是否支持 vector_distance_cosine；首次探测失败后直接走进程内索引，避免每次查询重复报错
+    _native_distance_available: Optional[bool] = None
+
     def __init__(self) -> None:
         if not settings.vector_store_enabled:
             logger.warning("未开启向量库配置，RAG 检索将被跳过。")
@@ -146,6 +153,13 @@ class VectorStoreService:
         if top_k <= 0:
             return []
 
+        if VectorStoreService._native_distance_available is False:
+            return await self._query_chunks_with_python_similarity(
+                project_id=project_id,
+                embedding=embedding,
+                top_k=top_k,
+            )
+
         blob = self._to_f32_blob(embedding)
         sql = """
         SELECT
@@ -171,6 +185,7 @@ class VectorStoreService:
         except Exception as exc:  # pragma: no cover - 查询异常时仅记录
             if "no such function: vector_distance_cosine" in str(exc).lower():
                 logger.warning("向量库缺少 vector_distance_cosine 函数，回退至应用层相似度计算。")
+                VectorStoreService._native_distance_available = False
                 return await self._query_chunks_with_python_similarity(
                     project_id=project_id,
                     embedding=embedding,
@@ -178,6 +193,7 @@ class VectorStoreService:
                 )
             logger.warning("向量检索剧情片段失败: %s", exc)
             return []
+        VectorStoreService._native_distance_available = True
 
         items: List[RetrievedChunk] = []
         for row in self._iter_rows(result):
@@ -208,6 +224,13 @@ class VectorStoreService:
         if top_k <= 0:
             return []
 
+        if VectorStoreService._native_distance_available is False:
+            return await self._query_summaries_with_python_similarity(
+                project_id=project_id,
+                embedding=embedding,
+                top_k=top_k,
+            )
+
         blob = self._to_f32_blob(embedding)
         sql = """
         SELECT
@@ -232,6 +255,7 @@ class VectorStoreService:
         except Exception as exc:  # pragma: no cover - 查询异常时仅记录
             if "no such function: vector_distance_cosine" in str(exc).lower():
                 logger.warning("向量库缺少 vector_distance_cosine 函数，回退至应用层相似度计算。")
+                VectorStoreService._native_distance_available = False
                 return await self._query_summaries_with_python_similarity(
                     project_id=project_id,
                     embedding=embedding,
@@ -239,6 +263,7 @@ class VectorStoreService:
                 )
             logger.warning("向量检索章节摘要失败: %s", exc)
             return []
+        VectorStoreService._native_distance_available = True
 
         items: List[RetrievedSummary] = []
         for row in self._iter_rows(result):
@@ -262,6 +287,7 @@ class VectorStoreService:
             return
 
         await self.ensure_schema()
+        records = list(records)
         sql = """
         INSERT INTO rag_chunks (
             id,
@@ -302,7 +328,8 @@ class VectorStoreService:
         if not payload:
             return
 
-        for item in payload:
+        indexed: Dict[str, List[IndexItem]] = {}
+        for raw, item in zip(records, payload):
             try:
                 await self._client.execute(sql, item)  # type: ignore[union-attr]
             except Exception as exc:  # pragma: no cover - 单条写入失败时记录日志
@@ -314,6 +341,20 @@ class VectorStoreService:
                     item.get("chapter_number"),
                     item.get("chunk_index"),
                 )
+                indexed.setdefault(item["project_id"], []).append(
+                    (
+                        item["id"],
+                        item.get("chapter_number", 0),
+                        raw.get("embedding") or [],
+                        self._chunk_payload(
+                            content=item.get("content", ""),
+                            chapter_number=item.get("chapter_number", 0),
+                            chapter_title=item.get("chapter_title"),
+                            metadata=raw.get("metadata") or {},
+                        ),
+                    )
+                )
+        self._refresh_index(_CHUNK_TABLE, indexed)
 
     async def upsert_summaries(
         self,
@@ -325,6 +366,7 @@ class VectorStoreService:
             return
 
         await self.ensure_schema()
+        records = list(records)
         sql = """
         INSERT INTO rag_summaries (
             id,
@@ -360,7 +402,8 @@ class VectorStoreService:
         if not payload:
             return
 
-        for item in payload:
+        indexed: Dict[str, List[IndexItem]] = {}
+        for raw, item in zip(records, payload):
             try:
                 await self._client.execute(sql, item)  # type: ignore[union-attr]
             except Exception as exc:  # pragma: no cover - 单条写入失败时记录日志
@@ -371,6 +414,19 @@ class VectorStoreService:
                     item.get("project_id"),
                     item.get("chapter_number"),
                 )
+                indexed.setdefault(item["project_id"], []).append(
+                    (
+                        item["id"],
+                        item.get("chapter_number", 0),
+                        raw.get("embedding") or [],
+                        self._summary_payload(
+                            chapter_number=item.get("chapter_number", 0),
+                            title=item.get("title", ""),
+                            summary=item.get("summary", ""),
+                        ),
+                    )
+                )
+        self._refresh_index(_SUMMARY_TABLE, indexed)
 
     async def delete_by_chapters(self, project_id: str, chapter_numbers: Sequence[int]) -> None:
         """根据章节编号批量删除对应的上下文数据。"""
@@ -396,6 +452,11 @@ class VectorStoreService:
         try:
             await self._client.execute(chunk_sql, params)  # type: ignore[union-attr]
             await self._client.execute(summary_sql, params)  # type: ignore[union-attr]
+            registry = get_vector_index_registry()
+            for table in (_CHUNK_TABLE, _SUMMARY_TABLE):
+                index = registry.get(table, project_id)
+                if index is not None:
+                    index.remove_chapters(chapter_numbers)
             logger.info(
                 "已删除章节向量: project=%s chapters=%s",
                 project_id,
@@ -404,6 +465,118 @@ class VectorStoreService:
         except Exception as exc:  # pragma: no cover - 删除失败时记录日志
             logger.error("删除章节向量失败: project=%s chapters=%s error=%s", project_id, chapter_numbers, exc)
 
+    async def get_chapter_chunks(self, project_id: str, chapter_number: int) -> List[Dict[str, Any]]:
+        """读取章节已入库的片段（含向量与内容哈希），供增量入库比对。"""
+        if not self._client:
+            return []
+
+        await self.ensure_schema()
+        sql = """
+        SELECT
+            id,
+            chunk_index,
+            chapter_title,
+            COALESCE(metadata, '{}') AS metadata,
+            embedding
+        FROM rag_chunks
+        WHERE project_id = :project_id
+          AND chapter_number = :chapter_number
+        """
+        try:
+            result = await self._client.execute(  # type: ignore[union-attr]
+                sql,
+                {"project_id": project_id, "chapter_number": chapter_number},
+            )
+        except Exception as exc:  # pragma: no cover - 查询失败时按无历史数据处理
+            logger.warning("读取章节片段失败: project=%s chapter=%s error=%s", project_id, chapter_number, exc)
+            return []
+
+        items: List[Dict[str, Any]] = []
+        for row in self._iter_rows(result):
+            metadata = self._parse_metadata(row.get("metadata"))
+            items.append(
+                {
+                    "id": row.get("id"),
+                    "chunk_index": row.get("chunk_index", 0),
+                    "chapter_title": row.get("chapter_title"),
+                    "content_hash": metadata.get("content_hash"),
+                    "embedding_namespace": metadata.get("embedding_namespace"),
+                    "embedding": self._from_f32_blob(row.get("embedding")),
+                }
+            )
+        return items
+
+    async def get_chapter_summary(self, project_id: str, chapter_number: int) -> Optional[Dict[str, Any]]:
+        """读取章节已入库的摘要文本与标题，不存在时返回 None。"""
+        if not self._client:
+            return None
+
+        await self.ensure_schema()
+        sql = """
+        SELECT title, summary
+        FROM rag_summaries
+        WHERE project_id = :project_id
+          AND chapter_number = :chapter_number
+        LIMIT 1
+        """
+        try:
+            result = await self._client.execute(  # type: ignore[union-attr]
+                sql,
+                {"project_id": project_id, "chapter_number": chapter_number},
+            )
+        except Exception as exc:  # pragma: no cover - 查询失败时按无历史数据处理
+            logger.warning("读取章节摘要失败: project=%s chapter=%s error=%s", project_id, chapter_number, exc)
+            return None
+
+        rows = list(self._iter_rows(result))
+        return rows[0] if rows else None
+
+    async def delete_chunks(self, project_id: str, chunk_ids: Sequence[str]) -> None:
+        """按片段 ID 删除剧情片段，用于增量入库时清理多余分块。"""
+        if not self._client or not chunk_ids:
+            return
+
+        await self.ensure_schema()
+        placeholders = ",".join(":id_" + str(idx) for idx in range(len(chunk_ids)))
+        params = {
+            "project_id": project_id,
+            **{f"id_{idx}": chunk_id for idx, chunk_id in enumerate(chunk_ids)},
+        }
+        sql = f"""
+        DELETE FROM rag_chunks
+        WHERE project_id = :project_id
+          AND id IN ({placeholders})
+        """
+        try:
+            await self._client.execute(sql, params)  # type: ignore[union-attr]
+            index = get_vector_index_registry().get(_CHUNK_TABLE, project_id)
+            if index is not None:
+                index.remove_ids(chunk_ids)
+            logger.info("已删除章节片段: project=%s count=%d", project_id, len(chunk_ids))
+        except Exception as exc:  # pragma: no cover - 删除失败时记录日志
+            logger.error("删除章节片段失败: project=%s ids=%s error=%s", project_id, list(chunk_ids), exc)
+
+    async def delete_summary(self, project_id: str, chapter_number: int) -> None:
+        """删除单个章节的摘要向量，用于正文变化但尚无新摘要时清理过期摘要。"""
+        if not self._client:
+            return
+
+        await self.ensure_schema()
+        summary_id = f"{project_id}:{chapter_number}:summary"
+        sql = """
+        DELETE FROM rag_summaries
+        WHERE project_id = :project_id
+          AND id = :id
+        """
+        try:
+            await self._client.execute(sql, {"project_id": project_id, "id": summary_id})  # type: ignore[union-attr]
+            index = get_vector_index_registry().get(_SUMMARY_TABLE, project_id)
+            if index is not None:
+                index.remove_ids([summary_id])
+            logger.info("已删除章节摘要向量: project=%s chapter=%s", project_id, chapter_number)
+        except Exception as exc:  # pragma: no cover - 删除失败时记录日志
+            logger.error("删除章节摘要向量失败: project=%s chapter=%s error=%s", project_id, chapter_number, exc)
+
     @staticmethod
     def _to_f32_blob(embedding: Sequence[float]) -> bytes:
         """将向量浮点列表编码为 libsql 可识别的 float32 二进制。"""
@@ -440,6 +613,13 @@ class VectorStoreService:
         embedding: Sequence[float],
         top_k: int,
     ) -> List[RetrievedChunk]:
+        if settings.vector_index_enabled:
+            index = await self._load_chunk_index(project_id)
+            return [
+                RetrievedChunk(**payload, score=distance)
+                for distance, payload in index.search(embedding, top_k)
+            ]
+
         sql = """
         SELECT
             content,
@@ -474,6 +654,13 @@ class VectorStoreService:
         embedding: Sequence[float],
         top_k: int,
     ) -> List[RetrievedSummary]:
+        if settings.vector_index_enabled:
+            index = await self._load_summary_index(project_id)
+            return [
+                RetrievedSummary(**payload, score=distance)
+                for distance, payload in index.search(embedding, top_k)
+            ]
+
         sql = """
         SELECT
             chapter_number,
@@ -499,6 +686,102 @@ class VectorStoreService:
         scored.sort(key=lambda item: item.score)
         return scored[:top_k]
 
+    async def _load_chunk_index(self, project_id: str) -> ProjectVectorIndex:
+        """返回项目的剧情片段索引，未加载时从向量库全量读取一次。"""
+        registry = get_vector_index_registry()
+        index = registry.get(_CHUNK_TABLE, project_id)
+        if index is not None:
+            return index
+
+        sql = """
+        SELECT
+            id,
+            content,
+            chapter_number,
+            chapter_title,
+            COALESCE(metadata, '{}') AS metadata,
+            embedding
+        FROM rag_chunks
+        WHERE project_id = :project_id
+        """
+        result = await self._client.execute(sql, {"project_id": project_id})  # type: ignore[union-attr]
+        items: List[IndexItem] = [
+            (
+                row.get("id"),
+                row.get("chapter_number", 0),
+                self._from_f32_blob(row.get("embedding")),
+                self._chunk_payload(
+                    content=row.get("content", ""),
+                    chapter_number=row.get("chapter_number", 0),
+                    chapter_title=row.get("chapter_title"),
+                    metadata=self._parse_metadata(row.get("metadata")),
+                ),
+            )
+            for row in self._iter_rows(result)
+        ]
+        return registry.build(_CHUNK_TABLE, project_id, items)
+
+    async def _load_summary_index(self, project_id: str) -> ProjectVectorIndex:
+        """返回项目的章节摘要索引，未加载时从向量库全量读取一次。"""
+        registry = get_vector_index_registry()
+        index = registry.get(_SUMMARY_TABLE, project_id)
+        if index is not None:
+            return index
+
+        sql = """
+        SELECT
+            id,
+            chapter_number,
+            title,
+            summary,
+            embedding
+        FROM rag_summaries
+        WHERE project_id = :project_id
+        """
+        result = await self._client.execute(sql, {"project_id": project_id})  # type: ignore[union-attr]
+        items: List[IndexItem] = [
+            (
+                row.get("id"),
+                row.get("chapter_number", 0),
+                self._from_f32_blob(row.get("embedding")),
+                self._summary_payload(
+                    chapter_number=row.get("chapter_number", 0),
+                    title=row.get("title", ""),
+                    summary=row.get("summary", ""),
+                ),
+            )
+            for row in self._iter_rows(result)
+        ]
+        return registry.build(_SUMMARY_TABLE, project_id, items)
+
+    @staticmethod
+    def _refresh_index(table: str, indexed: Dict[str, List[IndexItem]]) -> None:
+        """把刚写入的记录同步到已加载的进程内索引；未加载的项目在下次查询时再全量读取。"""
+        registry = get_vector_index_registry()
+        for project_id, items in indexed.items():
+            index = registry.get(table, project_id)
+            if index is not None:
+                index.upsert(items)
+
+    @staticmethod
+    def _chunk_payload(
+        *,
+        content: str,
+        chapter_number: int,
+        chapter_title: Optional[str],
+        metadata: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        return {
+            "content": content,
+            "chapter_number": chapter_number,
+            "chapter_title": chapter_title,
+            "metadata": metadata,
+        }
+
+    @staticmethod
+    def _summary_payload(*, chapter_number: int, title: str, summary: str) -> Dict[str, Any]:
+        return {"chapter_number": chapter_number, "title": title, "summary": summary}
+
     @staticmethod
     def _parse_metadata(raw: Any) -> Dict[str, Any]:
         """解析存储的 JSON 文本，确保输出为 dict。"""
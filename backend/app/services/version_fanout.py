@@ -0,0 +1,161 @@
+# AIMETA P=多版本并发生成_有界扇出|R=全局并发限制_用户并发限制_独立会话_部分失败保留|NR=不含提示词构建|E=run_versions_concurrently_ConcurrencyLimiter|X=internal|A=并发工具|D=asyncio,sqlalchemy|S=db|RD=./README.ai
+"""章节多版本并发生成工具。
+
+每个版本在独立的 AsyncSession 中运行（LLMService 会在会话上读写配置与计数，
+同一会话不能被多个协程并发使用），并同时受全局与单用户信号量约束。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ConcurrencyLimiter:
+    """全局 + 按键（用户）两级信号量。"""
+
+    def __init__(self, global_limit: int, per_key_limit: int):
+        self.global_limit = max(1, int(global_limit))
+        self.per_key_limit = max(1, int(per_key_limit))
+        self._global = asyncio.Semaphore(self.global_limit)
+        self._per_key: Dict[Hashable, asyncio.Semaphore] = {}
+        self._holders: Dict[Hashable, int] = {}
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable) -> AsyncIterator[None]:
+        semaphore = self._per_key.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_key_limit)
+            self._per_key[key] = semaphore
+        self._holders[key] = self._holders.get(key, 0) + 1
+        try:
+            async with semaphore:
+                async with self._global:
+                    yield
+        finally:
+            remaining = self._holders.get(key, 1) - 1
+            if remaining <= 0:
+                # 无人使用时回收，避免按用户累积信号量
+                self._holders.pop(key, None)
+                self._per_key.pop(key, None)
+            else:
+                self._holders[key] = remaining
+
+
+_VERSION_LIMITER: Optional[ConcurrencyLimiter] = None
+
+
+def get_version_limiter() -> ConcurrencyLimiter:
+    """进程级章节版本并发限制器，按配置懒加载。"""
+    global _VERSION_LIMITER
+    if _VERSION_LIMITER is None:
+        _VERSION_LIMITER = ConcurrencyLimiter(
+            global_limit=settings.writer_version_concurrency_global,
+            per_key_limit=settings.writer_version_concurrency_per_user,
+        )
+    return _VERSION_LIMITER
+
+
+@dataclass
+class VersionOutcome(Generic[T]):
+    index: int
+    result: Optional[T] = None
+    error: Optional[BaseException] = None
+    started_at: float = 0.0
+    duration_ms: float = 0.0
+    queued_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def timing(self) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {
+            "index": self.index,
+            "status": "ok" if self.ok else "failed",
+            "duration_ms": round(self.duration_ms, 1),
+            "queued_ms": round(self.queued_ms, 1),
+        }
+        if self.error is not None:
+            entry["error"] = str(getattr(self.error, "detail", None) or self.error)[:200]
+        return entry
+
+
+async def run_versions_concurrently(
+    count: int,
+    worker: Callable[[int, AsyncSession], Awaitable[T]],
+    *,
+    session_factory: async_sessionmaker,
+    user_id: Optional[int],
+    limiter: Optional[ConcurrencyLimiter] = None,
+) -> List[VersionOutcome[T]]:
+    """并发执行 ``count`` 个版本生成任务，单个失败不影响其他版本。
+
+    结果按版本序号返回；调用方根据 ``VersionOutcome.ok`` 决定保留或报错。
+    """
+    limiter = limiter or get_version_limiter()
+    batch_started = time.perf_counter()
+
+    async def _run(index: int) -> VersionOutcome[T]:
+        outcome: VersionOutcome[T] = VersionOutcome(index=index)
+        async with limiter.slot(user_id):
+            outcome.started_at = time.perf_counter()
+            outcome.queued_ms = (outcome.started_at - batch_started) * 1000
+            try:
+                async with session_factory() as version_session:
+                    outcome.result = await worker(index, version_session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("版本 %s 生成失败: %s", index + 1, exc)
+                outcome.error = exc
+            finally:
+                outcome.duration_ms = (time.perf_counter() - outcome.started_at) * 1000
+        return outcome
+
+    return list(await asyncio.gather(*(_run(idx) for idx in range(count))))
+
+
+async def run_versions_sequentially(
+    count: int,
+    worker: Callable[[int], Awaitable[T]],
+) -> List[VersionOutcome[T]]:
+    """顺序执行版本生成（兼容旧模式），遇到异常直接抛出。"""
+    outcomes: List[VersionOutcome[T]] = []
+    for index in range(count):
+        outcome: VersionOutcome[T] = VersionOutcome(index=index, started_at=time.perf_counter())
+        outcome.result = await worker(index)
+        outcome.duration_ms = (time.perf_counter() - outcome.started_at) * 1000
+        outcomes.append(outcome)
+    return outcomes
+
+
+def collect_successful(outcomes: List[VersionOutcome[T]]) -> List[T]:
+    """提取成功版本；全部失败时抛出首个异常，保持原有错误语义。"""
+    successes = [outcome.result for outcome in outcomes if outcome.ok]
+    if not successes:
+        first_error = next((outcome.error for outcome in outcomes if outcome.error is not None), None)
+        if first_error is not None:
+            raise first_error
+    return successes  # type: ignore[return-value]
+
+
+__all__ = [
+    "ConcurrencyLimiter",
+    "VersionOutcome",
+    "get_version_limiter",
+    "run_versions_concurrently",
+    "run_versions_sequentially",
+    "collect_successful",
+]
@@ -1,4 +1,4 @@
-# AIMETA P=写作上下文构建_信息可见性过滤|R=角色登场检测_蓝图裁剪_已知未知分离|NR=不含LLM调用|E=none|X=internal|A=过滤_构建|D=none|S=none|RD=./README.ai
+# AIMETA P=写作上下文构建_信息可见性过滤|R=角色登场检测_蓝图裁剪_已知未知分离|NR=不含LLM调用|E=none|X=internal|A=过滤_构建|D=utils.name_index,utils.frozen|S=none|RD=./README.ai
 """
 WriterContextBuilder: 写作层信息可见性过滤服务
 
@@ -7,29 +7,23 @@ WriterContextBuilder: 写作层信息可见性过滤服务
 2. 检测本章计划登场的新角色（从大纲/导演脚本中提取）
 3. 裁剪蓝图信息，移除剧透字段和未登场角色
 4. 输出 Writer 可见的上下文，防止主角全知问题
+
+角色名检测使用编译好的 CharacterNameIndex（一遍扫描全部角色名），蓝图以只读视图
+（utils.frozen）传入和返回，裁剪时只重组顶层字段，不再深拷贝。
 """
 
 import re
-from copy import deepcopy
-from typing import Dict, List, Optional, Set
-
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
-def _detect_names(all_names: List[str], texts: List[str]) -> Set[str]:
-    """
-    从文本列表中检测出现过的角色名。
-    使用简单的字符串匹配，后续可升级为 NER。
-    """
-    found = set()
-    combined_text = "\n".join(t for t in texts if t)
-    for name in all_names:
-        if name and name in combined_text:
-            found.add(name)
-    return found
+from ..utils.frozen import ReadOnlyDict, freeze
+from ..utils.name_index import CharacterNameIndex
 
 
-def _shallow_copy_blueprint(blueprint: dict) -> dict:
-    """浅拷贝蓝图，避免修改原始数据。"""
-    return deepcopy(blueprint)
+@lru_cache(maxsize=256)
+def _compile_names_pattern(names: Tuple[str, ...]) -> re.Pattern:
+    # 长名字优先，避免“张三”抢先匹配“张三丰”
+    return re.compile("|".join(re.escape(name) for name in sorted(names, key=len, reverse=True)))
 
 
 class WriterContextBuilder:
@@ -64,6 +58,7 @@ class WriterContextBuilder:
         outline_summary: str,
         writing_notes: str,
         allowed_new_characters: Optional[List[str]] = None,
+        name_index: Optional[CharacterNameIndex] = None,
     ) -> Dict:
         """
         构建 Writer 可见的上下文。
@@ -76,49 +71,52 @@ class WriterContextBuilder:
             outline_summary: 当前章节摘要
             writing_notes: 写作指令
             allowed_new_characters: 导演脚本指定的本章允许登场的新角色
+            name_index: 蓝图角色名索引（由 blueprint_index_cache 按项目缓存），缺省时临时构建
 
         Returns:
             包含裁剪后蓝图和角色信息的字典
         """
         # 1. 提取所有角色名
-        all_names = [
-            c.get("name") for c in blueprint.get("characters", []) if c.get("name")
-        ]
+        if name_index is None:
+            name_index = CharacterNameIndex(
+                c.get("name") for c in blueprint.get("characters") or () if c.get("name")
+            )
+        all_names = name_index.names
 
         # 2. 检测已登场角色（从已完成章节中）
-        introduced = _detect_names(all_names, completed_summaries + [previous_tail])
+        introduced = name_index.detect(completed_summaries + [previous_tail])
 
         # 3. 检测本章计划提及的角色（从大纲/写作指令中）
-        planned = _detect_names(
-            all_names, [outline_title, outline_summary, writing_notes]
-        )
+        planned = name_index.detect([outline_title, outline_summary, writing_notes])
 
         # 4. 合并允许的角色集合
         allowed = introduced | planned
         if allowed_new_characters:
             allowed.update(allowed_new_characters)
 
-        # 5. 裁剪蓝图
-        writer_blueprint = _shallow_copy_blueprint(blueprint)
+        # 5. 裁剪蓝图：在只读视图上重组顶层字段，角色与关系条目共享原对象
+        source = freeze(blueprint)
 
         # 移除禁止字段
-        for key in self.FORBIDDEN_BLUEPRINT_KEYS:
-            writer_blueprint.pop(key, None)
+        visible = {
+            key: value for key, value in source.items()
+            if key not in self.FORBIDDEN_BLUEPRINT_KEYS
+        }
 
         # 裁剪角色列表：只保留允许的角色
-        if "characters" in writer_blueprint:
-            writer_blueprint["characters"] = [
-                c for c in writer_blueprint.get("characters", [])
+        if "characters" in visible:
+            visible["characters"] = tuple(
+                c for c in visible["characters"] or ()
                 if c.get("name") in allowed
-            ]
+            )
 
         # 裁剪关系列表：只保留与允许角色相关的关系
-        if "relationships" in writer_blueprint:
-            rels = writer_blueprint.get("relationships", [])
-            writer_blueprint["relationships"] = [
-                r for r in rels
+        if "relationships" in visible:
+            visible["relationships"] = tuple(
+                r for r in visible["relationships"] or ()
                 if r.get("from") in allowed and r.get("to") in allowed
-            ]
+            )
+        writer_blueprint = ReadOnlyDict(visible)
 
         # 6. 计算禁止角色列表（用于 Guardrails 检查）
         forbidden = set(all_names) - allowed
@@ -139,13 +137,9 @@ class WriterContextBuilder:
             forbidden_characters: 禁止出现的角色名列表
             
         Returns:
-            编译后的正则表达式，如果列表为空则返回 None
+            编译后的正则表达式（按名字集合缓存），如果列表为空则返回 None
         """
-        if not forbidden_characters:
-            return None
-        # 转义特殊字符并构建正则
-        escaped = [re.escape(name) for name in forbidden_characters if name]
-        if not escaped:
+        names = tuple(sorted({name for name in forbidden_characters or () if name}))
+        if not names:
             return None
-        pattern = "|".join(escaped)
-        return re.compile(pattern)
+        return _compile_names_pattern(names)
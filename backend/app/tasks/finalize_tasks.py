@@ -0,0 +1,66 @@
+# AIMETA P=定稿任务_Celery后台执行章节定稿|R=领取定稿任务_项目串行_退避重试|NR=不含定稿业务逻辑|E=celery_task:run_finalize_job|X=job|A=Celery任务|D=celery,redis|S=db|RD=./README.ai
+"""章节定稿 Celery 任务（FINALIZE_QUEUE_BACKEND=celery 时使用）"""
+import asyncio
+import logging
+
+from app.config.celery_config import app
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(bind=True, name='app.tasks.finalize_tasks.run_finalize_job', max_retries=None)
+def run_finalize_job(self, job_id: str):
+    """
+    执行 finalize_jobs 表中的一个定稿任务
+
+    Args:
+        job_id: 定稿任务 ID
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        outcome = loop.run_until_complete(_run_finalize_job_impl(job_id))
+    finally:
+        loop.close()
+
+    status, countdown = outcome
+    if countdown is not None:
+        # 同项目已有任务在执行，或本次失败需要退避重试
+        raise self.retry(countdown=countdown)
+    return {'job_id': job_id, 'status': status}
+
+
+async def _run_finalize_job_impl(job_id: str):
+    """领取并执行任务，返回 (状态, 需要延迟重投的秒数或 None)"""
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.core.config import settings
+    from app.repositories.finalize_job_repository import FinalizeJobRepository
+    from app.services.finalize_queue import default_worker_id, process_finalize_job, retry_delay_seconds
+    from app.services.usage_counters import get_usage_counters
+    from app.utils.llm_tool import close_llm_clients
+
+    # 每个任务使用独立事件循环，数据库引擎随之创建和释放
+    engine = create_async_engine(settings.sqlalchemy_database_uri, poolclass=NullPool)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with session_factory() as session:
+            repo = FinalizeJobRepository(session)
+            job = await repo.get_by_id(job_id)
+            if job is None or job.status in ('succeeded', 'failed'):
+                return (job.status if job else 'missing'), None
+            if job.status == 'running' or await repo.has_running(job.project_id, exclude_job_id=job_id):
+                return 'waiting', settings.finalize_queue_poll_seconds
+            job = await repo.try_claim(job_id, worker_id=f"celery:{default_worker_id()}")
+            if job is None:
+                return 'waiting', settings.finalize_queue_poll_seconds
+
+        status = await process_finalize_job(job, session_factory=session_factory)
+        if status == 'queued':
+            return status, retry_delay_seconds(job.attempts)
+        return status, None
+    finally:
+        await get_usage_counters().flush(session_factory)
+        await close_llm_clients()
+        await engine.dispose()
@@ -1,7 +1,8 @@
-# AIMETA P=情感分析器_基础情感识别|R=关键词匹配_情感评分|NR=不含多维分析|E=EmotionAnalyzer|X=internal|A=分析器类|D=none|S=none|RD=./README.ai
+# AIMETA P=情感分析器_基础情感识别|R=关键词匹配_情感评分_单遍扫描|NR=不含多维分析|E=KeywordEmotionAnalyzer_analyze_chapter_emotion|X=internal|A=分析器类|D=none|S=none|RD=./README.ai
 """情感分析工具函数"""
-import re
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from .keyword_matcher import KeywordCounts, KeywordMatcher
 
 # 情感关键词定义
 EMOTION_KEYWORDS = {
@@ -26,46 +27,85 @@ NARRATIVE_PHASE_KEYWORDS = {
     "过渡": ["然而", "但是", "不过", "只是", "却"],
 }
 
+_PUNCTUATION_KEYWORDS = {
+    "exclamation": ["！", "!"],
+    "question": ["？", "?"],
+}
+
+
+class KeywordEmotionAnalyzer:
+    """
+    基于关键词的情感/叙事阶段分析
+
+    情感关键词、叙事阶段关键词和标点编译进同一个 KeywordMatcher，
+    analyze 对每章只扫描一遍即可同时得到情感和叙事阶段。
+    """
+
+    def __init__(self, emotion_keywords: Dict[str, List[str]], phase_keywords: Dict[str, List[str]]):
+        self.emotion_keywords = emotion_keywords
+        self.phase_keywords = phase_keywords
+        families: Dict[Tuple[str, str], List[str]] = {}
+        families.update({("emotion", name): words for name, words in emotion_keywords.items()})
+        families.update({("phase", name): words for name, words in phase_keywords.items()})
+        families.update({("punct", name): words for name, words in _PUNCTUATION_KEYWORDS.items()})
+        self.matcher = KeywordMatcher(families)
+
+    def analyze(self, content: str, summary: str = "") -> Tuple[str, int, Optional[str]]:
+        """单遍扫描正文和摘要，返回 (情感, 强度, 叙事阶段)。"""
+        counts = self.matcher.scan(content, summary)
+        emotion, intensity = self._emotion_from_counts(counts)
+        return emotion, intensity, self._phase_from_counts(counts)
+
+    def analyze_emotion(self, text: str) -> Tuple[str, int]:
+        return self._emotion_from_counts(self.matcher.scan(text))
+
+    def detect_narrative_phase(self, text: str, summary: str = "") -> Optional[str]:
+        return self._phase_from_counts(self.matcher.scan(text, summary))
+
+    def _emotion_from_counts(self, counts: KeywordCounts) -> Tuple[str, int]:
+        emotion_scores = {emotion: counts.total(("emotion", emotion)) for emotion in self.emotion_keywords}
+
+        # 找出最高分的情感
+        max_emotion = max(emotion_scores, key=emotion_scores.get)
+        max_score = emotion_scores[max_emotion]
+
+        if max_score == 0:
+            return "平静", 3
+
+        # 计算强度 (1-10)
+        intensity = min(10, max(1, max_score))
+
+        # 根据感叹号和问号增加强度
+        exclamation_count = counts.total(("punct", "exclamation"))
+        question_count = counts.total(("punct", "question"))
+        intensity = min(10, intensity + exclamation_count // 3 + question_count // 5)
+
+        return max_emotion, intensity
+
+    def _phase_from_counts(self, counts: KeywordCounts) -> Optional[str]:
+        # 每个阶段按出现过的关键词个数计分
+        phase_scores = {phase: counts.distinct(("phase", phase)) for phase in self.phase_keywords}
+
+        max_phase = max(phase_scores, key=phase_scores.get)
+        if phase_scores[max_phase] > 0:
+            return max_phase
+        return None
+
+
+_default_analyzer = KeywordEmotionAnalyzer(EMOTION_KEYWORDS, NARRATIVE_PHASE_KEYWORDS)
+
+
 def analyze_emotion(text: str) -> Tuple[str, int]:
     """分析文本的主要情感和强度"""
-    emotion_scores = {emotion: 0 for emotion in EMOTION_KEYWORDS}
-    
-    for emotion, keywords in EMOTION_KEYWORDS.items():
-        for keyword in keywords:
-            count = text.count(keyword)
-            emotion_scores[emotion] += count
-    
-    # 找出最高分的情感
-    max_emotion = max(emotion_scores, key=emotion_scores.get)
-    max_score = emotion_scores[max_emotion]
-    
-    if max_score == 0:
-        return "平静", 3
-    
-    # 计算强度 (1-10)
-    intensity = min(10, max(1, max_score))
-    
-    # 根据感叹号和问号增加强度
-    exclamation_count = text.count("！") + text.count("!")
-    question_count = text.count("？") + text.count("?")
-    intensity = min(10, intensity + exclamation_count // 3 + question_count // 5)
-    
-    return max_emotion, intensity
+    return _default_analyzer.analyze_emotion(text)
 
 def detect_narrative_phase(text: str, summary: str = "") -> Optional[str]:
     """检测叙事阶段"""
-    combined_text = text + " " + summary
-    phase_scores = {phase: 0 for phase in NARRATIVE_PHASE_KEYWORDS}
-    
-    for phase, keywords in NARRATIVE_PHASE_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in combined_text:
-                phase_scores[phase] += 1
-    
-    max_phase = max(phase_scores, key=phase_scores.get)
-    if phase_scores[max_phase] > 0:
-        return max_phase
-    return None
+    return _default_analyzer.detect_narrative_phase(text, summary)
+
+def analyze_chapter_emotion(content: str, summary: str = "") -> Tuple[str, int, Optional[str]]:
+    """单遍分析章节情感、强度和叙事阶段"""
+    return _default_analyzer.analyze(content, summary)
 
 def generate_emotion_description(emotion: str, intensity: int, title: str) -> str:
     """生成情感描述"""
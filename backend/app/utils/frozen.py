@@ -0,0 +1,49 @@
+# AIMETA P=只读数据视图_递归冻结字典与列表|R=只读字典_递归冻结|NR=不含业务逻辑|E=ReadOnlyDict_freeze|X=internal|A=工具函数|D=none|S=none|RD=./README.ai
+"""
+只读数据视图
+
+蓝图字典会在一次章节生成中传给导演脚本、可见性过滤、各版本生成与护栏检查，
+原实现每次过滤前都 deepcopy 整个蓝图以防被修改。freeze 把数据递归转换为
+ReadOnlyDict / tuple 后即可安全共享，裁剪时只需浅层重组，无需复制。
+
+ReadOnlyDict 继承 dict，json.dumps 与 ``.get`` 等读取方式不受影响；任何写操作抛出 TypeError。
+"""
+from __future__ import annotations
+
+from typing import Any, NoReturn
+
+
+class ReadOnlyDict(dict):
+    """不可修改的 dict。"""
+
+    __slots__ = ()
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> NoReturn:
+        raise TypeError("ReadOnlyDict 不可修改")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self) -> "ReadOnlyDict":
+        return self
+
+    def __deepcopy__(self, memo: Any) -> "ReadOnlyDict":
+        return self
+
+    def __reduce__(self) -> Any:
+        return (ReadOnlyDict, (dict(self),))
+
+
+def freeze(value: Any) -> Any:
+    """递归把 dict / list 转换为 ReadOnlyDict / tuple，已冻结的对象原样返回。"""
+    if isinstance(value, ReadOnlyDict):
+        return value
+    if isinstance(value, dict):
+        return ReadOnlyDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+__all__ = ["ReadOnlyDict", "freeze"]
@@ -0,0 +1,107 @@
+# AIMETA P=多模式关键词匹配器_单遍统计关键词族|R=编译关键词自动机_单遍计数_按族汇总|NR=不含情感评分规则|E=KeywordMatcher_KeywordCounts|X=internal|A=匹配器类|D=pyahocorasick可选|S=none|RD=./README.ai
+"""
+多模式关键词匹配器
+
+情感/叙事分析需要统计上百个关键词在章节中的出现次数，逐个 text.count 会把
+同一章节重复扫描上百遍。KeywordMatcher 把所有关键词族编译为一个 Aho-Corasick
+自动机，每章只扫描一遍，再按族汇总。
+
+- 安装了 pyahocorasick 时使用其 C 实现的自动机；
+- 未安装时回退为对去重后的关键词逐个 str.count（纯 Python 自动机实测比
+  C 实现的 str.count 循环更慢，因此不作为回退方案）。
+
+两种方式的计数结果与 text.count(keyword) 完全一致（同一关键词不重叠计数，
+不同关键词之间互不影响）。
+"""
+from __future__ import annotations
+
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, Hashable, Iterable, Mapping, Tuple
+
+try:  # noqa: SIM105 - pyahocorasick 为可选加速依赖
+    import ahocorasick
+except ImportError:  # pragma: no cover - 未安装时走 str.count 回退
+    ahocorasick = None  # type: ignore[assignment]
+
+
+def _self_overlaps(keyword: str) -> bool:
+    """关键词自身能否重叠出现（如“慢慢”在“慢慢慢”中），这类词需按 str.count 语义计数。"""
+    return any(keyword[:size] == keyword[-size:] for size in range(1, len(keyword)))
+
+
+class KeywordCounts:
+    """一次扫描得到的关键词计数，按族查询。"""
+
+    __slots__ = ("_counts", "_families")
+
+    def __init__(self, counts: Mapping[str, int], families: Mapping[Hashable, Tuple[str, ...]]) -> None:
+        self._counts = counts
+        self._families = families
+
+    def count(self, keyword: str) -> int:
+        return self._counts.get(keyword, 0)
+
+    def total(self, family: Hashable) -> int:
+        """族内所有关键词出现次数之和。"""
+        counts = self._counts
+        return sum(counts.get(keyword, 0) for keyword in self._families[family])
+
+    def distinct(self, family: Hashable) -> int:
+        """族内出现过的关键词个数（等价于逐个判断 keyword in text）。"""
+        counts = self._counts
+        return sum(1 for keyword in self._families[family] if counts.get(keyword, 0))
+
+
+class KeywordMatcher:
+    """
+    编译后的多族关键词匹配器
+
+    Args:
+        families: 族标识 -> 关键词列表；族标识可以是任意可哈希对象，
+            同一关键词可以出现在多个族中，扫描时只统计一次。
+        use_automaton: 为 False 时强制使用 str.count 回退（用于对比测试）。
+    """
+
+    def __init__(self, families: Mapping[Hashable, Iterable[str]], *, use_automaton: bool = True) -> None:
+        self._families: Dict[Hashable, Tuple[str, ...]] = {
+            name: tuple(word for word in words if word)
+            for name, words in families.items()
+        }
+        keywords = dict.fromkeys(word for words in self._families.values() for word in words)
+        self.keywords: Tuple[str, ...] = tuple(keywords)
+
+        self._automaton = None
+        self._counted_directly: Tuple[str, ...] = self.keywords
+        if use_automaton and ahocorasick is not None and self.keywords:
+            automaton = ahocorasick.Automaton()
+            for word in self.keywords:
+                if not _self_overlaps(word):
+                    automaton.add_word(word, word)
+            if len(automaton):
+                automaton.make_automaton()
+                self._automaton = automaton
+                self._counted_directly = tuple(word for word in self.keywords if _self_overlaps(word))
+
+    @property
+    def backend(self) -> str:
+        return "aho-corasick" if self._automaton is not None else "str.count"
+
+    def scan(self, *texts: str) -> KeywordCounts:
+        """
+        统计多段文本中各关键词的出现次数之和
+
+        分段传入即可（如正文和摘要），无需先拼接；关键词不含空白，
+        与拼接后用空格分隔再统计的结果相同。
+        """
+        counts: Counter = Counter()
+        for text in texts:
+            if not text:
+                continue
+            if self._automaton is not None:
+                counts.update(map(itemgetter(1), self._automaton.iter(text)))
+            for word in self._counted_directly:
+                found = text.count(word)
+                if found:
+                    counts[word] += found
+        return KeywordCounts(counts, self._families)
@@ -2,17 +2,23 @@
 # AIMETA P=LLM工具_大模型调用辅助|R=请求构建_响应解析|NR=不含业务逻辑|E=LLMTool|X=internal|A=工具类|D=httpx|S=net|RD=./README.ai
 """多格式 LLM 工具封装，支持 OpenAI Chat/Responses、Anthropic、Google API。"""
 
+import asyncio
+import hashlib
 import json
 import logging
 import os
 import re
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import AsyncGenerator, Dict, List, Optional, Any, Literal
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Optional, Any, Literal, Set, Tuple
 
 import httpx
 from openai import AsyncOpenAI
 
+from ..core.config import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -53,9 +59,31 @@ class ChatMessage:
 class BaseLLMClient(ABC):
     """LLM 客户端基类，定义统一接口。"""
 
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
         self.api_key = api_key
         self.base_url = base_url
+        self._http = http_client
+        self._pool_entry: Optional["_PooledEntry"] = None
+
+    def _lease(self):
+        """池化客户端在请求期间登记占用，避免被空闲回收。"""
+        if self._pool_entry is None:
+            return nullcontext()
+        return self._pool_entry.lease()
+
+    @asynccontextmanager
+    async def _http_session(self, request_timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+        """优先复用共享连接池；未池化时退化为单次请求客户端。"""
+        if self._http is not None and not self._http.is_closed:
+            yield self._http
+            return
+        async with httpx.AsyncClient(timeout=request_timeout) as http:
+            yield http
 
     @abstractmethod
     async def stream_chat(
@@ -75,7 +103,12 @@ class BaseLLMClient(ABC):
 class OpenAIChatClient(BaseLLMClient):
     """OpenAI Chat Completions API 客户端（/v1/chat/completions）。"""
 
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
         key = api_key or os.environ.get("OPENAI_API_KEY")
         if not key:
             raise ValueError("缺少 OPENAI_API_KEY 配置，请在数据库或环境变量中补全。")
@@ -86,8 +119,8 @@ class OpenAIChatClient(BaseLLMClient):
             or os.environ.get("OPENAI_BASE_URL")
             or os.environ.get("OPENAI_API_BASE")
         )
-        super().__init__(key, resolved_base_url)
-        self._client = AsyncOpenAI(api_key=key, base_url=resolved_base_url)
+        super().__init__(key, resolved_base_url, http_client)
+        self._client = AsyncOpenAI(api_key=key, base_url=resolved_base_url, http_client=http_client)
 
     async def stream_chat(
         self,
@@ -118,26 +151,32 @@ class OpenAIChatClient(BaseLLMClient):
         if max_tokens is not None:
             request_body["max_tokens"] = max_tokens
 
-        stream = await self._client.chat.completions.create(**request_body, timeout=timeout)
+        async with self._lease():
+            stream = await self._client.chat.completions.create(**request_body, timeout=timeout)
 
-        async for chunk in stream:
-            if chunk.choices and len(chunk.choices) > 0:
-                choice = chunk.choices[0]
-                delta = choice.delta
-                content = delta.content if delta else ""
-                finish_reason = choice.finish_reason
+            async for chunk in stream:
+                if chunk.choices and len(chunk.choices) > 0:
+                    choice = chunk.choices[0]
+                    delta = choice.delta
+                    content = delta.content if delta else ""
+                    finish_reason = choice.finish_reason
 
-                if content:
-                    yield {"content": content, "finish_reason": None}
+                    if content:
+                        yield {"content": content, "finish_reason": None}
 
-                if finish_reason:
-                    yield {"content": "", "finish_reason": finish_reason}
+                    if finish_reason:
+                        yield {"content": "", "finish_reason": finish_reason}
 
 
 class OpenAIResponsesClient(BaseLLMClient):
     """OpenAI Responses API 客户端（/v1/responses）。"""
 
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
         key = api_key or os.environ.get("OPENAI_API_KEY")
         if not key:
             raise ValueError("缺少 OPENAI_API_KEY 配置，请在数据库或环境变量中补全。")
@@ -148,8 +187,8 @@ class OpenAIResponsesClient(BaseLLMClient):
             or os.environ.get("OPENAI_BASE_URL")
             or os.environ.get("OPENAI_API_BASE")
         )
-        super().__init__(key, resolved_base_url)
-        self._client = AsyncOpenAI(api_key=key, base_url=resolved_base_url)
+        super().__init__(key, resolved_base_url, http_client)
+        self._client = AsyncOpenAI(api_key=key, base_url=resolved_base_url, http_client=http_client)
 
     async def stream_chat(
         self,
@@ -196,46 +235,47 @@ class OpenAIResponsesClient(BaseLLMClient):
             request_body["max_output_tokens"] = max_tokens
 
         # 调用 Responses API
-        stream = await self._client.responses.create(**request_body, timeout=timeout)
-
-        async for event in stream:
-            event_type = getattr(event, "type", None)
-
-            # 文本增量事件
-            if event_type == "response.output_text.delta":
-                delta = getattr(event, "delta", "")
-                if delta:
-                    yield {"content": delta, "finish_reason": None}
-
-            # 文本完成事件
-            elif event_type == "response.output_text.done":
-                text = getattr(event, "text", "")
-                # 只有在之前没有收到增量时才使用完整文本
-                if text:
-                    pass  # 增量已经处理过了，这里跳过
-
-            # 响应完成事件
-            elif event_type == "response.completed":
-                response = getattr(event, "response", None)
-                finish_reason = "stop"
-                if response:
-                    status = getattr(response, "status", None)
-                    if status == "incomplete":
-                        details = getattr(response, "incomplete_details", None)
-                        reason = getattr(details, "reason", None) if details else None
-                        if reason == "max_output_tokens":
-                            finish_reason = "length"
-                        elif reason == "content_filter":
-                            finish_reason = "content_filter"
-                        else:
-                            finish_reason = "incomplete"
-                    elif status in {"failed", "cancelled"}:
-                        finish_reason = "error"
-                yield {"content": "", "finish_reason": finish_reason}
-
-            # 响应失败/取消事件
-            elif event_type in {"response.failed", "response.cancelled", "response.incomplete"}:
-                yield {"content": "", "finish_reason": "error"}
+        async with self._lease():
+            stream = await self._client.responses.create(**request_body, timeout=timeout)
+
+            async for event in stream:
+                event_type = getattr(event, "type", None)
+
+                # 文本增量事件
+                if event_type == "response.output_text.delta":
+                    delta = getattr(event, "delta", "")
+                    if delta:
+                        yield {"content": delta, "finish_reason": None}
+
+                # 文本完成事件
+                elif event_type == "response.output_text.done":
+                    text = getattr(event, "text", "")
+                    # 只有在之前没有收到增量时才使用完整文本
+                    if text:
+                        pass  # 增量已经处理过了，这里跳过
+
+                # 响应完成事件
+                elif event_type == "response.completed":
+                    response = getattr(event, "response", None)
+                    finish_reason = "stop"
+                    if response:
+                        status = getattr(response, "status", None)
+                        if status == "incomplete":
+                            details = getattr(response, "incomplete_details", None)
+                            reason = getattr(details, "reason", None) if details else None
+                            if reason == "max_output_tokens":
+                                finish_reason = "length"
+                            elif reason == "content_filter":
+                                finish_reason = "content_filter"
+                            else:
+                                finish_reason = "incomplete"
+                        elif status in {"failed", "cancelled"}:
+                            finish_reason = "error"
+                    yield {"content": "", "finish_reason": finish_reason}
+
+                # 响应失败/取消事件
+                elif event_type in {"response.failed", "response.cancelled", "response.incomplete"}:
+                    yield {"content": "", "finish_reason": "error"}
 
 
 class AnthropicClient(BaseLLMClient):
@@ -244,7 +284,12 @@ class AnthropicClient(BaseLLMClient):
     使用 httpx 直接调用 API，兼容更多中转服务。
     """
 
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
         key = api_key or os.environ.get("ANTHROPIC_API_KEY")
         if not key:
             raise ValueError("缺少 ANTHROPIC_API_KEY 配置，请在数据库或环境变量中补全。")
@@ -254,7 +299,7 @@ class AnthropicClient(BaseLLMClient):
             or os.environ.get("ANTHROPIC_BASE_URL")
             or "https://api.anthropic.com"
         )
-        super().__init__(key, resolved_base_url)
+        super().__init__(key, resolved_base_url, http_client)
 
     async def stream_chat(
         self,
@@ -330,8 +375,8 @@ class AnthropicClient(BaseLLMClient):
         else:
             request_timeout = timeout
 
-        async with httpx.AsyncClient(timeout=request_timeout) as http:
-            async with http.stream("POST", url, headers=headers, json=body) as response:
+        async with self._lease(), self._http_session(request_timeout) as http:
+            async with http.stream("POST", url, headers=headers, json=body, timeout=request_timeout) as response:
                 # 检查响应状态，如果出错则读取完整响应体以获取错误详情
                 if response.status_code >= 400:
                     error_body = await response.aread()
@@ -406,7 +451,12 @@ class AnthropicClient(BaseLLMClient):
 class GoogleClient(BaseLLMClient):
     """Google Generative AI API 客户端（streamGenerateContent）。"""
 
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
         key = api_key or os.environ.get("GOOGLE_API_KEY")
         if not key:
             raise ValueError("缺少 GOOGLE_API_KEY 配置，请在数据库或环境变量中补全。")
@@ -416,7 +466,7 @@ class GoogleClient(BaseLLMClient):
             or os.environ.get("GOOGLE_BASE_URL")
             or DEFAULT_GOOGLE_BASE_URL
         )
-        super().__init__(key, resolved_base_url)
+        super().__init__(key, resolved_base_url, http_client)
 
     async def stream_chat(
         self,
@@ -488,8 +538,8 @@ class GoogleClient(BaseLLMClient):
         safe_url = url.replace(self.api_key, "***") if self.api_key else url
         logger.info("Google API 请求: url=%s body_keys=%s", safe_url, list(body.keys()))
 
-        async with httpx.AsyncClient(timeout=request_timeout) as http:
-            async with http.stream("POST", url, json=body) as response:
+        async with self._lease(), self._http_session(request_timeout) as http:
+            async with http.stream("POST", url, json=body, timeout=request_timeout) as response:
                 logger.info("Google API 响应状态: status=%d headers=%s", response.status_code, dict(response.headers))
 
                 # 检查响应状态，如果出错则读取完整响应体以获取错误详情
@@ -581,10 +631,190 @@ class GoogleClient(BaseLLMClient):
                 logger.info("Google API 流结束: 共处理 %d 行", line_count)
 
 
+@dataclass
+class _PooledEntry:
+    """注册表中的一条池化记录：共享的 httpx 连接池及其上层客户端。"""
+
+    http: httpx.AsyncClient
+    client: Any
+    last_used: float = field(default_factory=time.monotonic)
+    in_flight: int = 0
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[None]:
+        self.in_flight += 1
+        self.last_used = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.last_used = time.monotonic()
+
+
+class LLMClientRegistry:
+    """进程级 LLM 客户端注册表。
+
+    以 (api_format, base_url, api_key 哈希) 为键复用客户端与底层连接池，
+    避免每次调用重复 TLS 握手；空闲超时的条目会被回收，应用关闭时统一释放。
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        idle_ttl: float = 600.0,
+        http2: bool = True,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.idle_ttl = idle_ttl
+        self.http2 = http2 and self._h2_available()
+        self._entries: Dict[Tuple[str, str, str], _PooledEntry] = {}
+        self._closing: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _h2_available() -> bool:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.info("未安装 h2，LLM 连接池使用 HTTP/1.1")
+            return False
+        return True
+
+    @staticmethod
+    def _key(kind: str, base_url: Optional[str], api_key: Optional[str]) -> Tuple[str, str, str]:
+        key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+        return kind, (base_url or "").rstrip("/"), key_hash
+
+    def _new_http(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(http2=self.http2, limits=self.limits, timeout=httpx.Timeout(600.0, connect=10.0))
+
+    def _get_entry(self, kind: str, base_url: Optional[str], api_key: Optional[str], factory) -> _PooledEntry:
+        self._evict_idle()
+        key = self._key(kind, base_url, api_key)
+        entry = self._entries.get(key)
+        if entry is None or entry.http.is_closed:
+            http = self._new_http()
+            entry = _PooledEntry(http=http, client=factory(http))
+            self._entries[key] = entry
+        entry.last_used = time.monotonic()
+        return entry
+
+    def get_llm_client(
+        self,
+        api_format: ApiFormatType,
+        client_class: type,
+        api_key: Optional[str],
+        base_url: Optional[str],
+    ) -> "BaseLLMClient":
+        entry = self._get_entry(
+            api_format,
+            base_url,
+            api_key,
+            lambda http: client_class(api_key=api_key, base_url=base_url, http_client=http),
+        )
+        entry.client._pool_entry = entry
+        return entry.client
+
+    @asynccontextmanager
+    async def openai_sdk(self, api_key: Optional[str], base_url: Optional[str]) -> AsyncIterator[AsyncOpenAI]:
+        """共享的 AsyncOpenAI 客户端（嵌入等非流式调用）。"""
+        entry = self._get_entry(
+            "openai_sdk",
+            base_url,
+            api_key,
+            lambda http: AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http),
+        )
+        async with entry.lease():
+            yield entry.client
+
+    @asynccontextmanager
+    async def http_client(self, kind: str, base_url: Optional[str], api_key: Optional[str]) -> AsyncIterator[httpx.AsyncClient]:
+        """按提供方复用的原始 httpx 客户端（如 Google 嵌入接口）。"""
+        entry = self._get_entry(kind, base_url, api_key, lambda http: http)
+        async with entry.lease():
+            yield entry.http
+
+    def _evict_idle(self) -> None:
+        if self.idle_ttl <= 0:
+            return
+        now = time.monotonic()
+        expired = [
+            key
+            for key, entry in self._entries.items()
+            if entry.in_flight == 0 and now - entry.last_used > self.idle_ttl
+        ]
+        for key in expired:
+            entry = self._entries.pop(key)
+            self._schedule_close(entry)
+        if expired:
+            logger.info("回收空闲 LLM 客户端: count=%d remaining=%d", len(expired), len(self._entries))
+
+    def _schedule_close(self, entry: _PooledEntry) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(entry.http.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "in_flight": sum(entry.in_flight for entry in self._entries.values()),
+            "http2": self.http2,
+        }
+
+    async def aclose(self) -> None:
+        entries = list(self._entries.values())
+        self._entries.clear()
+        for entry in entries:
+            try:
+                await entry.http.aclose()
+            except Exception as exc:  # pragma: no cover - 关闭失败仅记录
+                logger.warning("关闭 LLM 连接池失败: %s", exc)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+
+_REGISTRY: Optional[LLMClientRegistry] = None
+
+
+def get_llm_client_registry() -> LLMClientRegistry:
+    """获取进程级客户端注册表，首次调用时按配置创建。"""
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = LLMClientRegistry(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+            keepalive_expiry=settings.llm_http_keepalive_expiry_seconds,
+            idle_ttl=settings.llm_client_idle_ttl_seconds,
+            http2=settings.llm_http2_enabled,
+        )
+    return _REGISTRY
+
+
+async def close_llm_clients() -> None:
+    """释放所有池化连接，供 FastAPI lifespan 在关闭阶段调用。"""
+    global _REGISTRY
+    if _REGISTRY is None:
+        return
+    registry, _REGISTRY = _REGISTRY, None
+    await registry.aclose()
+
+
 def create_llm_client(
     api_format: ApiFormatType,
     api_key: Optional[str] = None,
     base_url: Optional[str] = None,
+    *,
+    pooled: bool = True,
 ) -> BaseLLMClient:
     """根据 API 格式创建对应的 LLM 客户端。
 
@@ -592,6 +822,7 @@ def create_llm_client(
         api_format: API 格式类型
         api_key: API 密钥
         base_url: API 基础 URL
+        pooled: 是否从进程级注册表复用客户端与连接池（连接测试等一次性调用可关闭）
 
     Returns:
         对应的 LLM 客户端实例
@@ -607,7 +838,9 @@ def create_llm_client(
     if not client_class:
         raise ValueError(f"不支持的 API 格式: {api_format}")
 
-    return client_class(api_key=api_key, base_url=base_url)
+    if not pooled:
+        return client_class(api_key=api_key, base_url=base_url)
+    return get_llm_client_registry().get_llm_client(api_format, client_class, api_key, base_url)
 
 
 # 为了向后兼容，保留原来的 LLMClient 作为 OpenAIResponsesClient 的别名
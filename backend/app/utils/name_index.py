@@ -0,0 +1,116 @@
+# AIMETA P=角色名多模式索引_单遍定位全部角色名|R=编译角色名自动机_单遍命中与位置_登场检测|NR=不含蓝图缓存|E=CharacterNameIndex_NameHit|X=internal|A=匹配器类|D=pyahocorasick可选|S=none|RD=./README.ai
+"""
+角色名多模式索引
+
+登场检测和护栏检查原先对每个角色名分别执行 ``name in text`` 或编译一次正则再 finditer，
+角色越多扫描次数越多，而且每章、每个版本都要重新编译。CharacterNameIndex 把蓝图中的
+全部角色名编译成一个 Aho-Corasick 自动机，一遍扫描即可得到所有命中及位置。
+
+- 安装了 pyahocorasick 时使用自动机；未安装时回退为逐个 str.find（与 KeywordMatcher 的回退理由相同）；
+- 命中语义与 ``re.finditer(re.escape(name), text)`` 一致：同一名字不重叠，不同名字之间
+  互不影响（“张三”与“张三丰”会在同一位置各命中一次）；
+- 查询不在索引中的名字时逐个 str.find，结果仍与原实现一致。
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:  # noqa: SIM105 - pyahocorasick 为可选加速依赖
+    import ahocorasick
+except ImportError:  # pragma: no cover - 未安装时走 str.find 回退
+    ahocorasick = None  # type: ignore[assignment]
+
+
+@dataclass(frozen=True)
+class NameHit:
+    name: str
+    start: int
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.name)
+
+
+def _find_all(text: str, name: str) -> List[int]:
+    """不重叠地查找 name 的全部出现位置（等价于 re.finditer(re.escape(name), text)）。"""
+    positions: List[int] = []
+    start = text.find(name)
+    while start >= 0:
+        positions.append(start)
+        start = text.find(name, start + len(name))
+    return positions
+
+
+class CharacterNameIndex:
+    """
+    编译后的角色名索引
+
+    Args:
+        names: 角色名列表，空值与重复值会被忽略，保留首次出现的顺序。
+        use_automaton: 为 False 时强制使用 str.find 回退（用于对比测试）。
+    """
+
+    def __init__(self, names: Iterable[Optional[str]], *, use_automaton: bool = True) -> None:
+        self.names: Tuple[str, ...] = tuple(dict.fromkeys(name for name in names if name))
+        self._automaton = None
+        if use_automaton and ahocorasick is not None and self.names:
+            automaton = ahocorasick.Automaton()
+            for name in self.names:
+                automaton.add_word(name, name)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    @property
+    def backend(self) -> str:
+        return "aho-corasick" if self._automaton is not None else "str.find"
+
+    def find_all(self, text: str, names: Optional[Sequence[str]] = None) -> List[NameHit]:
+        """
+        返回 names（默认为索引中的全部角色名）在 text 中的所有命中
+
+        结果先按 names 中的顺序、再按出现位置排序。
+        """
+        wanted = self.names if names is None else tuple(dict.fromkeys(name for name in names if name))
+        if not text or not wanted:
+            return []
+
+        positions: Dict[str, List[int]] = {}
+        indexed: Set[str] = set(self.names)
+        if self._automaton is not None:
+            wanted_set = set(wanted)
+            for end_index, name in self._automaton.iter(text):
+                if name not in wanted_set:
+                    continue
+                start = end_index - len(name) + 1
+                found = positions.setdefault(name, [])
+                # 自动机会报告同一名字的重叠出现，按 finditer 语义只保留不重叠的部分
+                if not found or start >= found[-1] + len(name):
+                    found.append(start)
+        else:
+            indexed = set()
+
+        hits: List[NameHit] = []
+        for name in wanted:
+            starts = positions.get(name, []) if name in indexed else _find_all(text, name)
+            hits.extend(NameHit(name, start) for start in starts)
+        return hits
+
+    def first_positions(self, text: str, names: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """每个出现过的名字首次出现的位置。"""
+        first: Dict[str, int] = {}
+        for hit in self.find_all(text, names):
+            first.setdefault(hit.name, hit.start)
+        return first
+
+    def detect(self, texts: Iterable[Optional[str]]) -> Set[str]:
+        """多段文本中出现过的索引内角色名（等价于对拼接文本逐个判断 name in text）。"""
+        combined = "\n".join(text for text in texts if text)
+        if not combined:
+            return set()
+        if self._automaton is not None:
+            return {name for _, name in self._automaton.iter(combined)}
+        return {name for name in self.names if name in combined}
+
+
+__all__ = ["CharacterNameIndex", "NameHit"]
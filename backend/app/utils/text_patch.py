@@ -0,0 +1,192 @@
+# AIMETA P=文本补丁引擎_段落级替换与合并|R=段落切分_补丁解析_定位替换_冲突检测|NR=不含LLM调用|E=TextPatch_PatchResult_parse_patches_apply_patches|X=internal|A=补丁解析_本地合并|D=difflib|S=none|RD=./README.ai
+"""
+段落级文本补丁
+
+优化器让模型只返回需要修改的片段：``{"paragraph": 段落序号, "original": 原文片段, "replacement": 替换文本}``，
+由本模块在本地定位并合并，避免模型重新输出整章。
+
+定位顺序：指定段落内精确匹配 → 全文唯一精确匹配 → 指定段落内忽略空白差异的相似匹配。
+无法定位或与已接受补丁重叠的补丁会被拒绝并记录原因，其余补丁照常应用。
+"""
+from __future__ import annotations
+
+import difflib
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_PARAGRAPH_RE = re.compile(r"[^\n]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+_FUZZY_THRESHOLD = 0.9
+
+
+@dataclass
+class TextPatch:
+    original: str
+    replacement: str
+    paragraph: Optional[int] = None
+    dimension: str = ""
+    reason: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "paragraph": self.paragraph,
+            "dimension": self.dimension,
+            "original": self.original,
+            "replacement": self.replacement,
+            "reason": self.reason,
+        }
+
+
+@dataclass
+class PatchResult:
+    content: str
+    applied: List[TextPatch] = field(default_factory=list)
+    rejected: List[Tuple[TextPatch, str]] = field(default_factory=list)
+
+    @property
+    def proposed(self) -> int:
+        return len(self.applied) + len(self.rejected)
+
+
+def split_paragraphs(text: str) -> List[Tuple[int, int]]:
+    """返回非空段落在原文中的 (起, 止) 位置，段落序号从 1 开始对应列表下标 + 1。"""
+    return [
+        (match.start(), match.end())
+        for match in _PARAGRAPH_RE.finditer(text)
+        if match.group().strip()
+    ]
+
+
+def number_paragraphs(text: str) -> List[Dict[str, Any]]:
+    """生成发给模型的段落列表：[{"index": 1, "text": ...}]"""
+    return [
+        {"index": index, "text": text[start:end]}
+        for index, (start, end) in enumerate(split_paragraphs(text), 1)
+    ]
+
+
+def parse_patches(payload: Any) -> List[TextPatch]:
+    """从模型输出的 JSON（dict 或 list）中提取补丁，忽略字段缺失的条目。"""
+    items: Iterable[Any]
+    if isinstance(payload, dict):
+        items = payload.get("patches") or []
+    elif isinstance(payload, list):
+        items = payload
+    else:
+        return []
+
+    patches: List[TextPatch] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        original = item.get("original")
+        replacement = item.get("replacement")
+        if not isinstance(original, str) or not original or not isinstance(replacement, str):
+            continue
+        paragraph = item.get("paragraph")
+        try:
+            paragraph = int(paragraph) if paragraph is not None else None
+        except (TypeError, ValueError):
+            paragraph = None
+        patches.append(
+            TextPatch(
+                original=original,
+                replacement=replacement,
+                paragraph=paragraph,
+                dimension=str(item.get("dimension") or ""),
+                reason=str(item.get("reason") or ""),
+            )
+        )
+    return patches
+
+
+def apply_patches(text: str, patches: Iterable[TextPatch]) -> PatchResult:
+    """在原文上定位全部补丁后一次性合并；补丁之间按出现顺序先到先得，重叠的后者被拒绝。"""
+    paragraphs = split_paragraphs(text)
+    accepted: List[Tuple[int, int, TextPatch]] = []
+    result = PatchResult(content=text)
+
+    for patch in patches:
+        span = _locate(text, paragraphs, patch)
+        if span is None:
+            result.rejected.append((patch, "not_found"))
+            continue
+        start, end = span
+        if any(start < other_end and other_start < end for other_start, other_end, _ in accepted):
+            result.rejected.append((patch, "overlap"))
+            continue
+        accepted.append((start, end, patch))
+
+    pieces: List[str] = []
+    cursor = 0
+    for start, end, patch in sorted(accepted, key=lambda item: item[0]):
+        pieces.append(text[cursor:start])
+        pieces.append(patch.replacement)
+        cursor = end
+        result.applied.append(patch)
+    pieces.append(text[cursor:])
+    result.content = "".join(pieces)
+    return result
+
+
+def _locate(text: str, paragraphs: List[Tuple[int, int]], patch: TextPatch) -> Optional[Tuple[int, int]]:
+    scope: Optional[Tuple[int, int]] = None
+    if patch.paragraph is not None and 1 <= patch.paragraph <= len(paragraphs):
+        scope = paragraphs[patch.paragraph - 1]
+
+    if scope is not None:
+        offset = text.find(patch.original, scope[0], scope[1])
+        if offset >= 0:
+            return offset, offset + len(patch.original)
+
+    first = text.find(patch.original)
+    if first >= 0 and text.find(patch.original, first + 1) < 0:
+        return first, first + len(patch.original)
+
+    if scope is not None:
+        return _fuzzy_locate(text, scope, patch.original)
+    return None
+
+
+def _fuzzy_locate(text: str, scope: Tuple[int, int], original: str) -> Optional[Tuple[int, int]]:
+    """模型常改动空白或个别标点：先忽略空白匹配，再在段落内按片段长度滑动取相似度最高且超过阈值的位置。"""
+    target = _WHITESPACE_RE.sub("", original)
+    if not target:
+        return None
+    start, end = scope
+
+    # 先尝试忽略空白后的精确匹配，再映射回原文位置
+    positions = [index for index in range(start, end) if not text[index].isspace()]
+    compact = "".join(text[index] for index in positions)
+    offset = compact.find(target)
+    if offset >= 0:
+        return positions[offset], positions[offset + len(target) - 1] + 1
+
+    length = len(original)
+    # seq2 固定为目标片段，SequenceMatcher 只需为其建一次索引；quick_ratio 先过滤明显不匹配的窗口
+    matcher = difflib.SequenceMatcher(None, autojunk=False)
+    matcher.set_seq2(target)
+    best: Tuple[float, Optional[Tuple[int, int]]] = (0.0, None)
+    for window_start in range(start, max(start, end - length) + 1):
+        window_end = min(end, window_start + length)
+        matcher.set_seq1(_WHITESPACE_RE.sub("", text[window_start:window_end]))
+        floor = max(_FUZZY_THRESHOLD, best[0])
+        if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+            continue
+        ratio = matcher.ratio()
+        if ratio > best[0]:
+            best = (ratio, (window_start, window_end))
+    if best[0] >= _FUZZY_THRESHOLD:
+        return best[1]
+    return None
+
+
+__all__ = [
+    "PatchResult",
+    "TextPatch",
+    "apply_patches",
+    "number_paragraphs",
+    "parse_patches",
+    "split_paragraphs",
+]
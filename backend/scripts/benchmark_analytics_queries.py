@@ -0,0 +1,153 @@
+"""
+Benchmark analytics chapter-text loading.
+
+Purpose:
+  Compare the legacy per-chapter ChapterVersion lookup used by the analytics
+  endpoints with app.services.project_text_loader, reporting query counts and
+  wall time on a throwaway SQLite database.
+
+Usage:
+  cd backend
+  python -m scripts.benchmark_analytics_queries
+  python -m scripts.benchmark_analytics_queries --chapters 2000 --chars 6000
+
+Options:
+  --chapters <N>   Number of chapters to seed (default 500)
+  --chars <N>      Characters per chapter body (default 3000)
+  --rounds <N>     Timed rounds per strategy (default 3)
+
+Notes:
+  - Uses a temporary database file; the configured database is never touched
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List, Tuple
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models.novel import Chapter, ChapterOutline, ChapterVersion, NovelProject
+from app.services.project_text_loader import load_project_texts
+
+PROJECT_ID = "bench-project"
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark analytics chapter-text loading")
+    parser.add_argument("--chapters", type=int, default=500, help="Number of chapters to seed")
+    parser.add_argument("--chars", type=int, default=3000, help="Characters per chapter body")
+    parser.add_argument("--rounds", type=int, default=3, help="Timed rounds per strategy")
+    return parser.parse_args()
+
+
+async def _seed(session_factory: async_sessionmaker, chapters: int, chars: int) -> None:
+    body = ("他握紧拳头，心中燃起希望。" * (chars // 12 + 1))[:chars]
+    async with session_factory() as session:
+        session.add(NovelProject(id=PROJECT_ID, user_id=1, title="bench", initial_prompt=""))
+        for number in range(1, chapters + 1):
+            chapter = Chapter(project_id=PROJECT_ID, chapter_number=number, status="successful")
+            session.add(chapter)
+            session.add(ChapterOutline(project_id=PROJECT_ID, chapter_number=number, title=f"第{number}章", summary=""))
+        await session.flush()
+        rows = (await session.execute(select(Chapter).where(Chapter.project_id == PROJECT_ID))).scalars().all()
+        for chapter in rows:
+            version = ChapterVersion(chapter_id=chapter.id, content=body)
+            session.add(version)
+            await session.flush()
+            chapter.selected_version_id = version.id
+        await session.commit()
+
+
+async def _legacy(session: AsyncSession) -> List[Tuple[str, str]]:
+    """优化前的写法：先查章节和大纲，再逐章查询选中版本，返回 (标题, 正文)。"""
+    chapters = (
+        await session.execute(
+            select(Chapter).where(Chapter.project_id == PROJECT_ID).order_by(Chapter.chapter_number)
+        )
+    ).scalars().all()
+    outlines = {
+        o.chapter_number: o
+        for o in (
+            await session.execute(select(ChapterOutline).where(ChapterOutline.project_id == PROJECT_ID))
+        ).scalars().all()
+    }
+    contents = []
+    for chapter in chapters:
+        content = ""
+        if chapter.selected_version_id:
+            version = (
+                await session.execute(select(ChapterVersion).where(ChapterVersion.id == chapter.selected_version_id))
+            ).scalar_one_or_none()
+            if version:
+                content = version.content
+        outline = outlines.get(chapter.chapter_number)
+        title = (outline.title if outline else None) or f"第{chapter.chapter_number}章"
+        contents.append((title, content))
+    return contents
+
+
+async def _loader(session: AsyncSession) -> List[Tuple[str, str]]:
+    return [(chapter.title, chapter.content) for chapter in await load_project_texts(session, PROJECT_ID)]
+
+
+async def _measure(
+    name: str,
+    session_factory: async_sessionmaker,
+    counter: List[int],
+    func: Callable[[AsyncSession], Awaitable[List[Tuple[str, str]]]],
+    rounds: int,
+) -> List[Tuple[str, str]]:
+    timings = []
+    queries = 0
+    for _ in range(rounds):
+        counter[0] = 0
+        async with session_factory() as session:
+            started = time.perf_counter()
+            contents = await func(session)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = counter[0]
+    print(f"{name:<8} chapters={len(contents):<6} queries={queries:<6} best={min(timings):8.1f} ms")
+    return contents
+
+
+async def main() -> None:
+    args = _parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                Base.metadata.create_all,
+                tables=[NovelProject.__table__, ChapterOutline.__table__, Chapter.__table__, ChapterVersion.__table__],
+            )
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        await _seed(session_factory, args.chapters, args.chars)
+
+        counter = [0]
+
+        def _count(conn, cursor, statement, parameters, context, executemany) -> None:
+            counter[0] += 1
+
+        event.listen(engine.sync_engine, "before_cursor_execute", _count)
+
+        print("=" * 60)
+        print(f"Analytics text loading: {args.chapters} chapters x {args.chars} chars")
+        print("=" * 60)
+        legacy = await _measure("legacy", session_factory, counter, _legacy, args.rounds)
+        loader = await _measure("loader", session_factory, counter, _loader, args.rounds)
+        if legacy != loader:
+            print("WARNING: legacy and loader returned different titles or contents")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
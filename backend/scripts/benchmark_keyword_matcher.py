@@ -0,0 +1,130 @@
+"""
+Benchmark keyword scoring for emotion / narrative analysis.
+
+Purpose:
+  Compare per-keyword text.count scanning (the previous implementation of
+  EnhancedEmotionAnalyzer and utils.emotion_analyzer) with the shared
+  KeywordMatcher on a synthetic novel, and check that both produce the same
+  keyword counts.
+
+Usage:
+  cd backend
+  python -m scripts.benchmark_keyword_matcher
+  python -m scripts.benchmark_keyword_matcher --chars 3000000 --chapter-chars 3000
+
+Options:
+  --chars <N>          Total novel length in characters (default 3,000,000)
+  --chapter-chars <N>  Characters per chapter (default 3000)
+  --density <F>        Share of tokens that are keywords (default 0.03)
+  --seed <N>           Random seed (default 7)
+
+Notes:
+  - pyahocorasick is optional; without it the matcher falls back to str.count
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.emotion_analyzer_enhanced import EnhancedEmotionAnalyzer
+from app.utils.emotion_analyzer import EMOTION_KEYWORDS, NARRATIVE_PHASE_KEYWORDS
+from app.utils.keyword_matcher import KeywordMatcher
+
+FILLER = (
+    "的一是了我不人在他有这个上们来到时大地为子中你说生国年着就那和要她出也得里后自以会家可下而过"
+    "天去能对小多于心学么之都好看起当没成只如事把还用第样道想作种美总从无情己面最女但现前些所同日手"
+    "又行意动方期它头经长儿回位分爱老因很给名法间斯知世什两次使身者被高已亲其进此话常与活正感，。"
+)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark keyword scoring")
+    parser.add_argument("--chars", type=int, default=3_000_000, help="Total novel length in characters")
+    parser.add_argument("--chapter-chars", type=int, default=3000, help="Characters per chapter")
+    parser.add_argument("--density", type=float, default=0.03, help="Share of tokens that are keywords")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    return parser.parse_args()
+
+
+def _families() -> Dict[Tuple[str, str], List[str]]:
+    """收集增强分析器和基础分析器用到的全部关键词族。"""
+    analyzer = EnhancedEmotionAnalyzer()
+    families: Dict[Tuple[str, str], List[str]] = {}
+    for emotion_type, data in analyzer.emotion_keywords.items():
+        families[("enhanced-positive", emotion_type.value)] = data["positive"]
+        families[("enhanced-actions", emotion_type.value)] = data["actions"]
+    for phase, words in analyzer.narrative_keywords.items():
+        families[("enhanced-narrative", phase.value)] = words
+    for pace, words in analyzer.pace_keywords.items():
+        families[("enhanced-pace", pace)] = words
+    for tp_type, words in analyzer.turning_keywords.items():
+        families[("enhanced-turning", tp_type)] = words
+    for emotion, words in EMOTION_KEYWORDS.items():
+        families[("basic-emotion", emotion)] = words
+    for phase, words in NARRATIVE_PHASE_KEYWORDS.items():
+        families[("basic-phase", phase)] = words
+    families[("basic-punct", "all")] = ["！", "!", "？", "?"]
+    return families
+
+
+def _build_chapters(keywords: Sequence[str], args: argparse.Namespace) -> List[str]:
+    rng = random.Random(args.seed)
+    parts: List[str] = []
+    size = 0
+    while size < args.chars:
+        token = rng.choice(keywords) if rng.random() < args.density else rng.choice(FILLER)
+        parts.append(token)
+        size += len(token)
+    novel = "".join(parts)[: args.chars]
+    return [novel[i : i + args.chapter_chars] for i in range(0, len(novel), args.chapter_chars)]
+
+
+def _legacy_scan(families: Dict[Tuple[str, str], List[str]], chapter: str) -> Dict[Tuple[str, str], int]:
+    """优化前的写法：每个族的每个关键词各 text.count 一遍。"""
+    return {name: sum(chapter.count(word) for word in words) for name, words in families.items()}
+
+
+def _timed(label: str, chapters: List[str], scan: Callable[[str], Dict]) -> List[Dict]:
+    started = time.perf_counter()
+    results = [scan(chapter) for chapter in chapters]
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"{label:<28} {elapsed:9.1f} ms")
+    return results
+
+
+def main() -> None:
+    args = _parse_args()
+    families = _families()
+    keywords = sorted({word for words in families.values() for word in words})
+    chapters = _build_chapters(keywords, args)
+    total_refs = sum(len(words) for words in families.values())
+
+    print("=" * 60)
+    print(f"Keyword scoring: {args.chars:,} chars in {len(chapters)} chapters")
+    print(f"Families: {len(families)}  keyword refs: {total_refs}  unique keywords: {len(keywords)}")
+    print("=" * 60)
+
+    expected = _timed("legacy text.count", chapters, lambda chapter: _legacy_scan(families, chapter))
+
+    matchers = [KeywordMatcher(families)]
+    if matchers[0].backend != "str.count":
+        matchers.append(KeywordMatcher(families, use_automaton=False))
+    for matcher in matchers:
+
+        def scan(chapter: str, matcher: KeywordMatcher = matcher) -> Dict:
+            counts = matcher.scan(chapter)
+            return {name: counts.total(name) for name in families}
+
+        results = _timed(f"KeywordMatcher[{matcher.backend}]", chapters, scan)
+        print(f"{'':<28} counts match legacy: {results == expected}")
+
+
+if __name__ == "__main__":
+    main()
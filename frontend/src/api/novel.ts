@@ -167,6 +167,22 @@ export interface ChapterGenerationResponse {
   chapter_number: number
 }
 
+export interface ImportJobStatus {
+  id: string
+  filename: string
+  file_size: number
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled'
+  stage: 'parse' | 'census' | 'profiling' | 'persist' | 'ingest' | null
+  progress_done: number
+  progress_total: number
+  cancel_requested: boolean
+  project_id: string | null
+  last_error: string | null
+  result: Record<string, any> | null
+}
+
+const IMPORT_JOB_POLL_INTERVAL_MS = 2000
+
 export interface DeleteNovelsResponse {
   status: string
   message: string
@@ -211,10 +227,28 @@ export class NovelAPI {
     return request(`${NOVELS_BASE}/inspiration/active`)
   }
 
-  static async importNovel(file: File): Promise<{ id: string }> {
+  // 创建后台导入任务并轮询至结束，onProgress 接收每次轮询到的任务状态
+  static async importNovel(
+    file: File,
+    onProgress?: (job: ImportJobStatus) => void
+  ): Promise<{ id: string }> {
+    let job = await NovelAPI.createImportJob(file)
+    while (job.status === 'queued' || job.status === 'running') {
+      onProgress?.(job)
+      await new Promise((resolve) => setTimeout(resolve, IMPORT_JOB_POLL_INTERVAL_MS))
+      job = await NovelAPI.getImportJob(job.id)
+    }
+    onProgress?.(job)
+    if (job.status !== 'succeeded' || !job.project_id) {
+      throw new Error(job.last_error || (job.status === 'cancelled' ? '导入已取消' : '导入失败，请重试'))
+    }
+    return { id: job.project_id }
+  }
+
+  static async createImportJob(file: File): Promise<ImportJobStatus> {
     const formData = new FormData()
     formData.append('file', file)
-    return request(`${NOVELS_BASE}/import`, {
+    return request(`${NOVELS_BASE}/import-jobs`, {
       method: 'POST',
       body: formData,
       headers: {
@@ -223,6 +257,14 @@ export class NovelAPI {
     })
   }
 
+  static async getImportJob(jobId: string): Promise<ImportJobStatus> {
+    return request(`${NOVELS_BASE}/import-jobs/${jobId}`)
+  }
+
+  static async cancelImportJob(jobId: string): Promise<ImportJobStatus> {
+    return request(`${NOVELS_BASE}/import-jobs/${jobId}/cancel`, { method: 'POST' })
+  }
+
   static async importProject(file: File): Promise<{ id: string }> {
     const formData = new FormData()
     formData.append('file', file)
@@ -243,6 +285,35 @@ export class NovelAPI {
     return request(`${NOVELS_BASE}/export-batch`)
   }
 
+  // 流式导出（NDJSON，gzip 压缩），服务端逐项目逐批输出章节
+  static async exportBatchStream(): Promise<Blob> {
+    const authStore = useAuthStore()
+    const headers = new Headers()
+    if (authStore.isAuthenticated && authStore.token) {
+      headers.set('Authorization', `Bearer ${authStore.token}`)
+    }
+    const response = await fetch(`${NOVELS_BASE}/export-stream?gzip=true`, { headers })
+    if (response.status === 401) {
+      authStore.logout()
+      router.push('/login')
+      throw new Error('会话已过期，请重新登录')
+    }
+    if (!response.ok) {
+      throw new Error(`导出失败，状态码: ${response.status}`)
+    }
+    return response.blob()
+  }
+
+  static async importBatchStream(file: File): Promise<{ ids: string[] }> {
+    const formData = new FormData()
+    formData.append('file', file)
+    return request(`${NOVELS_BASE}/import-stream`, {
+      method: 'POST',
+      body: formData,
+      timeoutMs: LONG_RUNNING_REQUEST_TIMEOUT_MS
+    })
+  }
+
   static async importBatch(file: File): Promise<{ ids: string[] }> {
     const formData = new FormData()
     formData.append('file', file)